@@ -8,7 +8,7 @@ from django.db.models import Sum, F
 from decimal import Decimal
 
 from accounts.models import Account
-from utils.currency import get_active_currency
+from utils.currency import get_active_currency, get_conversion_rates
 from utils.conversion import convert_amount, MissingRateError
 from django.conf import settings
 from .forms import AccountForm
@@ -38,14 +38,15 @@ def account_list(request):
 
     active_cur = get_active_currency(request)
     base_cur = active_cur.code if active_cur else None
-    converted = []
-    total_balance = sum(c or Decimal("0") for _, c in converted)
     if base_cur:
-        for a in qs:
-            conv = a.balance_in_currency(base_cur)
-            converted.append((a, conv))
-            if conv is not None:
-                total_balance += conv
+        # One rate lookup per currency instead of a balance subquery, Currency
+        # lookup and rate lookup per account.
+        accounts = list(qs.select_related("currency"))
+        rates = get_conversion_rates({a.currency_id for a in accounts}, active_cur)
+        converted = [
+            (a, (a.net_total or Decimal("0")) * rates[a.currency_id]) for a in accounts
+        ]
+        total_balance = sum((c for _, c in converted), Decimal("0"))
     else:
         converted = [(a, None) for a in qs]
 
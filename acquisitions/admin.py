@@ -1,12 +1,18 @@
 from django.contrib import admin
-from .models import Acquisition
+from .models import Acquisition, AcquisitionPrice
 
 # Register your models here.
 
 
+class AcquisitionPriceInline(admin.TabularInline):
+    model = AcquisitionPrice
+    extra = 0
+
+
 @admin.register(Acquisition)
 class AcquisitionAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "purchase_tx", "sell_tx")
+    inlines = [AcquisitionPriceInline]
 
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
@@ -17,4 +23,7 @@ class AcquisitionAdmin(admin.ModelAdmin):
         if cat != "property":
             form.base_fields.pop("expected_lifespan_years", None)
             form.base_fields.pop("location", None)
+        if cat not in Acquisition.DEPRECIABLE_CATEGORIES:
+            form.base_fields.pop("depreciation_method", None)
+            form.base_fields.pop("salvage_value", None)
         return form
@@ -0,0 +1,249 @@
+"""Depreciation schedules for property, equipment and vehicles.
+
+The schedule of every depreciable acquisition is computed from a single
+query over the user's holdings and materialized month by month as
+:class:`~acquisitions.models.DepreciationSnapshot` rows, covering the whole
+useful life up front. Requests then read book values with one grouped query
+instead of computing each asset's schedule.
+
+Two methods are supported: straight-line, and double declining balance
+(twice the straight-line rate applied to the remaining book value). Both
+stop at the salvage value, which is reached exactly in the last month of
+the useful life. The purchase month is depreciated in full.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from utils.currency import get_conversion_rates
+
+from .models import Acquisition, DepreciationSnapshot
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+
+# Used when ``expected_lifespan_years`` is not set
+DEFAULT_LIFESPAN_YEARS = {
+    Acquisition.CATEGORY_PROPERTY: 25,
+    Acquisition.CATEGORY_EQUIPMENT: 5,
+    Acquisition.CATEGORY_VEHICLE: 10,
+}
+
+
+def _month(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def useful_life_months(
+    category: str, lifespan_years: Optional[int], model_year: Optional[int], bought: date
+) -> int:
+    """Return the remaining useful life in months at purchase.
+
+    Without an explicit lifespan the category default is used; for vehicles
+    the years already elapsed since ``model_year`` are deducted from it.
+    """
+    if lifespan_years:
+        return max(lifespan_years, 1) * 12
+    years = DEFAULT_LIFESPAN_YEARS.get(category, 5)
+    if model_year and category == Acquisition.CATEGORY_VEHICLE:
+        years -= max(bought.year - model_year, 0)
+    return max(years, 1) * 12
+
+
+def schedule(
+    cost: Decimal,
+    salvage: Decimal,
+    life_months: int,
+    method: str,
+    start: date,
+    sold: Optional[date] = None,
+) -> list:
+    """Return ``[(month, charge, accumulated, book_value)]`` from ``start``.
+
+    When ``sold`` is given depreciation stops before the sale month, which
+    gets a closing row reversing the accumulated depreciation.
+    """
+    if not cost or cost <= 0:
+        return []
+    start = _month(start)
+    sold = _month(sold) if sold else None
+    salvage = min(max(salvage or ZERO, ZERO), cost)
+    straight = (cost - salvage) / life_months
+    rate = Decimal(2) / life_months
+
+    rows = []
+    book, acc, month = cost, ZERO, start
+    for k in range(1, life_months + 1):
+        if sold is not None and month >= sold:
+            break
+        if k == life_months:
+            charge = book - salvage
+        elif method == Acquisition.DEPRECIATION_DECLINING:
+            charge = (book * rate).quantize(CENT)
+        else:
+            # Rounded against the running total so cents never drift
+            charge = (straight * k).quantize(CENT) - acc
+        charge = min(charge, book - salvage)
+        acc += charge
+        book -= charge
+        rows.append((month, charge, acc, book))
+        month = _next_month(month)
+    if sold is not None and sold >= start:
+        rows.append((sold, -acc, ZERO, ZERO))
+    return rows
+
+
+def materialize(user=None, acquisition_ids: Optional[Iterable[int]] = None) -> int:
+    """Rebuild snapshot rows for the user's (or the given) acquisitions.
+
+    Returns the number of acquisitions scheduled. Rows of acquisitions that
+    are deleted or no longer depreciable are removed.
+    """
+    qs = Acquisition.objects.all()
+    stale = DepreciationSnapshot.objects.all()
+    if user is not None:
+        qs = qs.filter(user=user)
+        stale = stale.filter(acquisition__user=user)
+    if acquisition_ids is not None:
+        ids = list(acquisition_ids)
+        qs = qs.filter(pk__in=ids)
+        stale = stale.filter(acquisition_id__in=ids)
+    rows = list(
+        qs.filter(
+            is_deleted=False,
+            category__in=Acquisition.DEPRECIABLE_CATEGORIES,
+            purchase_tx__isnull=False,
+        ).values_list(
+            "pk",
+            "category",
+            "depreciation_method",
+            "salvage_value",
+            "expected_lifespan_years",
+            "model_year",
+            "purchase_tx__amount",
+            "purchase_tx__date",
+            "sell_tx__date",
+        )
+    )
+    snapshots = [
+        DepreciationSnapshot(
+            acquisition_id=pk, month=month, charge=charge, accumulated=acc, book_value=book
+        )
+        for pk, cat, method, salvage, lifespan, model_year, cost, bought, sold in rows
+        for month, charge, acc, book in schedule(
+            cost,
+            salvage,
+            useful_life_months(cat, lifespan, model_year, bought),
+            method,
+            bought,
+            sold,
+        )
+    ]
+    with transaction.atomic():
+        stale.delete()
+        DepreciationSnapshot.objects.bulk_create(snapshots, batch_size=500)
+    return len(rows)
+
+
+# ---------------- Reads ----------------
+def _snapshots(user, entity_id=None):
+    qs = DepreciationSnapshot.objects.filter(
+        acquisition__user=user,
+        acquisition__is_deleted=False,
+        acquisition__category__in=Acquisition.DEPRECIABLE_CATEGORIES,
+    )
+    if entity_id:
+        qs = qs.filter(acquisition__purchase_tx__entity_destination_id=entity_id)
+    return qs
+
+
+def book_values(user, month: Optional[date] = None) -> dict:
+    """Return ``{acquisition_id: book value}`` at the end of ``month``.
+
+    Amounts are in each purchase's currency. Acquisitions bought after
+    ``month`` are omitted; sold ones have a book value of zero.
+    """
+    month = _month(month or timezone.localdate())
+    latest = DepreciationSnapshot.objects.filter(
+        acquisition=OuterRef("pk"), month__lte=month
+    ).order_by("-month")
+    return dict(
+        Acquisition.objects.filter(
+            user=user, is_deleted=False, category__in=Acquisition.DEPRECIABLE_CATEGORIES
+        )
+        .annotate(book=Subquery(latest.values("book_value")[:1]))
+        .filter(book__isnull=False)
+        .values_list("pk", "book")
+    )
+
+
+def entity_book_values(user, currency=None, month: Optional[date] = None) -> dict:
+    """Return ``{entity_id: net book value}`` converted to ``currency``."""
+    month = _month(month or timezone.localdate())
+    latest = DepreciationSnapshot.objects.filter(
+        acquisition=OuterRef("pk"), month__lte=month
+    ).order_by("-month")
+    rows = list(
+        Acquisition.objects.filter(
+            user=user, is_deleted=False, category__in=Acquisition.DEPRECIABLE_CATEGORIES
+        )
+        .annotate(book=Subquery(latest.values("book_value")[:1]))
+        .filter(book__isnull=False)
+        .values("purchase_tx__entity_destination_id", "purchase_tx__currency_id")
+        .annotate(total=Sum("book"))
+        .values_list(
+            "purchase_tx__entity_destination_id", "purchase_tx__currency_id", "total"
+        )
+    )
+    rates = get_conversion_rates({cur for _, cur, _ in rows}, currency)
+    out: dict = {}
+    for ent_id, cur, total in rows:
+        out[ent_id] = out.get(ent_id, ZERO) + total * rates.get(cur, Decimal("1"))
+    return out
+
+
+def depreciation_series(
+    user, start: date, end: date, *, entity_id=None, currency=None
+) -> list:
+    """Accumulated depreciation at the end of each month from ``start`` to ``end``.
+
+    Charges are summed per month and currency in one query and accumulated
+    in order, so assets sold earlier drop out through their closing rows.
+    """
+    months, month = [], _month(start)
+    while month <= end:
+        months.append(month)
+        month = _next_month(month)
+    if not months:
+        return []
+    rows = list(
+        _snapshots(user, entity_id)
+        .filter(month__lte=months[-1])
+        .values("month", "acquisition__purchase_tx__currency_id")
+        .annotate(total=Sum("charge"))
+        .values_list("month", "acquisition__purchase_tx__currency_id", "total")
+    )
+    rates = get_conversion_rates({cur for _, cur, _ in rows}, currency)
+    by_month: dict = {}
+    for month, cur, total in rows:
+        by_month[month] = by_month.get(month, ZERO) + total * rates.get(cur, Decimal("1"))
+
+    charges = sorted(by_month.items())
+    series, acc, i = [], ZERO, 0
+    for month in months:
+        while i < len(charges) and charges[i][0] <= month:
+            acc += charges[i][1]
+            i += 1
+        series.append(acc)
+    return series
@@ -0,0 +1,302 @@
+"""Lot-based cost basis for acquisitions.
+
+Every purchase is an :class:`~acquisitions.models.AcquisitionLot` and every
+(partial) sale an :class:`~acquisitions.models.AcquisitionDisposal`. A replay
+walks buys and sales in date order and records which lots each sale used up
+(:class:`~acquisitions.models.LotConsumption`), valued either first in, first
+out or at the running average cost, as selected by ``Acquisition.cost_method``.
+
+Replays are incremental: the state just before the first affected date is
+rebuilt from a few aggregates over the earlier lots and consumptions, and only
+the events from that date forward are walked again. Correcting a buy
+therefore re-prices the sales after it without touching older history.
+
+The acquisition's ``quantity`` and ``avg_unit_cost`` are kept in sync with the
+remaining lots so existing views and the valuation engine keep working.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Acquisition, AcquisitionDisposal, AcquisitionLot, LotConsumption
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+UNIT = Decimal("0.0001")
+
+BUY = 0
+SELL = 1
+
+
+def _dec(expr):
+    return Coalesce(
+        expr, Value(ZERO), output_field=DecimalField(max_digits=30, decimal_places=8)
+    )
+
+
+def ensure_lots(acq: Acquisition) -> None:
+    """Seed an opening lot for holdings recorded before lots existed.
+
+    While the holding still matches its purchase the lot is linked to the
+    purchase transaction, so correcting that transaction re-prices it. After
+    earlier sales the transaction's amount covers units no longer held, and
+    the lot only carries the running average.
+    """
+    if acq.quantity > 0 and not acq.lots.exists():
+        tx = acq.purchase_tx
+        unsold = _holds_whole_purchase(acq, tx)
+        AcquisitionLot.objects.create(
+            acquisition=acq,
+            transaction=tx if unsold else None,
+            date=tx.date if tx is not None else acq.created_at.date(),
+            quantity=acq.quantity,
+            unit_cost=tx.amount / acq.quantity if unsold else acq.avg_unit_cost,
+            remaining_quantity=acq.quantity,
+        )
+
+
+def _holds_whole_purchase(acq: Acquisition, tx) -> bool:
+    """Whether no units of ``tx``'s purchase have been sold yet.
+
+    ``avg_unit_cost`` is stored in cents, so the held cost may be off from
+    the purchase amount by up to half a cent per unit.
+    """
+    if tx is None or tx.amount is None or acq.sell_tx_id is not None:
+        return False
+    return abs(acq.quantity * acq.avg_unit_cost - tx.amount) <= acq.quantity * CENT / 2
+
+
+# ---------------- Replay ----------------
+def replay(acq: Acquisition, since: Optional[date] = None) -> dict:
+    """Recompute consumptions and gains of ``acq`` from ``since`` onward.
+
+    Returns ``{disposal_id: disposal}`` for the disposals that were walked.
+    Raises :class:`ValidationError` when a sale exceeds the quantity held on
+    its date; callers run inside a transaction so nothing is written.
+    """
+    since = since or date.min
+    fifo = acq.cost_method == Acquisition.COST_FIFO
+
+    base = AcquisitionLot.objects.filter(acquisition=acq, date__lt=since).aggregate(
+        qty=_dec(Sum("quantity")), cost=_dec(Sum(F("quantity") * F("unit_cost")))
+    )
+    spent = LotConsumption.objects.filter(
+        disposal__acquisition=acq, disposal__date__lt=since
+    ).aggregate(qty=_dec(Sum("quantity")), cost=_dec(Sum("cost")))
+    pool_qty = base["qty"] - spent["qty"]
+    pool_cost = base["cost"] - spent["cost"]
+
+    # Lots still open before ``since`` plus every lot bought from then on
+    lots = list(
+        acq.lots.annotate(
+            used=_dec(
+                Sum(
+                    "consumptions__quantity",
+                    filter=Q(consumptions__disposal__date__lt=since),
+                )
+            )
+        )
+        .filter(Q(date__gte=since) | Q(quantity__gt=F("used")))
+        .order_by("date", "pk")
+    )
+    disposals = list(acq.disposals.filter(date__gte=since).order_by("date", "pk"))
+
+    open_lots: deque = deque()
+    events = sorted(
+        [(lot.date, BUY, lot.pk, lot) for lot in lots]
+        + [(d.date, SELL, d.pk, d) for d in disposals],
+        key=lambda e: e[:3],
+    )
+    consumptions = []
+    for day, kind, _, obj in events:
+        if kind == BUY:
+            if obj.date < since:
+                open_lots.append([obj, obj.quantity - obj.used])
+                continue
+            open_lots.append([obj, obj.quantity])
+            pool_qty += obj.quantity
+            pool_cost += obj.quantity * obj.unit_cost
+            continue
+
+        if obj.quantity > pool_qty:
+            raise ValidationError(
+                f"Cannot sell {obj.quantity.normalize()} of {acq.name} on {day}: "
+                f"only {pool_qty.normalize()} held."
+            )
+        if obj.quantity == pool_qty:
+            basis = pool_cost
+        else:
+            basis = (pool_cost * obj.quantity / pool_qty).quantize(UNIT)
+        need, used_cost = obj.quantity, ZERO
+        while need > 0:
+            entry = open_lots[0]
+            lot, left = entry
+            take = min(left, need)
+            if fifo:
+                cost = take * lot.unit_cost
+            elif take == need:
+                cost = basis - used_cost
+            else:
+                cost = (basis * take / obj.quantity).quantize(UNIT)
+            consumptions.append(
+                LotConsumption(disposal=obj, lot=lot, quantity=take, cost=cost)
+            )
+            used_cost += cost
+            need -= take
+            if take == left:
+                open_lots.popleft()
+            else:
+                entry[1] = left - take
+        if fifo:
+            basis = used_cost
+        pool_qty -= obj.quantity
+        pool_cost -= basis
+        obj.cost_basis = basis.quantize(CENT)
+        obj.realized_gain = (obj.proceeds - basis).quantize(CENT)
+
+    remaining = {lot.pk: left for lot, left in open_lots}
+    for lot in lots:
+        lot.remaining_quantity = remaining.get(lot.pk, ZERO)
+
+    LotConsumption.objects.filter(
+        disposal__acquisition=acq, disposal__date__gte=since
+    ).delete()
+    LotConsumption.objects.bulk_create(consumptions)
+    AcquisitionDisposal.objects.bulk_update(disposals, ["cost_basis", "realized_gain"])
+    AcquisitionLot.objects.bulk_update(lots, ["remaining_quantity"])
+
+    acq.quantity = pool_qty
+    acq.avg_unit_cost = (pool_cost / pool_qty).quantize(CENT) if pool_qty > 0 else ZERO
+    acq.save(update_fields=["quantity", "avg_unit_cost"])
+    return {d.pk: d for d in disposals}
+
+
+# ---------------- Mutations ----------------
+def record_buy(
+    acq: Acquisition, quantity: Decimal, unit_cost: Decimal, day: date, tx=None
+) -> AcquisitionLot:
+    """Add a lot and re-price any sales dated on or after ``day``."""
+    if quantity <= 0:
+        raise ValidationError("Quantity must be positive.")
+    with transaction.atomic():
+        ensure_lots(acq)
+        lot = AcquisitionLot.objects.create(
+            acquisition=acq,
+            transaction=tx,
+            date=day,
+            quantity=quantity,
+            unit_cost=unit_cost,
+        )
+        replay(acq, since=day)
+    lot.refresh_from_db(fields=["remaining_quantity"])
+    return lot
+
+
+def record_sale(
+    acq: Acquisition, quantity: Decimal, proceeds: Decimal, day: date
+) -> AcquisitionDisposal:
+    """Dispose of ``quantity`` units for ``proceeds`` in total."""
+    if quantity <= 0:
+        raise ValidationError("Quantity must be positive.")
+    with transaction.atomic():
+        ensure_lots(acq)
+        disposal = AcquisitionDisposal.objects.create(
+            acquisition=acq, date=day, quantity=quantity, proceeds=proceeds
+        )
+        return replay(acq, since=day)[disposal.pk]
+
+
+def update_lot(lot: AcquisitionLot, **changes) -> None:
+    """Correct a lot's ``date``, ``quantity`` or ``unit_cost`` and replay.
+
+    Only events from the earlier of the old and new dates are recomputed.
+    """
+    since = lot.date
+    for name, value in changes.items():
+        setattr(lot, name, value)
+    with transaction.atomic():
+        lot.save(update_fields=list(changes))
+        replay(lot.acquisition, since=min(since, lot.date))
+
+
+# ---------------- Bulk queries ----------------
+@dataclass
+class Position:
+    quantity: Decimal = ZERO
+    cost: Decimal = ZERO
+    realized: Decimal = ZERO
+    proceeds: Decimal = ZERO
+
+
+def realized_gains(user, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+    """Return ``{acquisition_id: realized gain}`` for sales in the period."""
+    qs = AcquisitionDisposal.objects.filter(
+        acquisition__user=user, acquisition__is_deleted=False
+    )
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    return dict(
+        qs.values("acquisition").annotate(g=Sum("realized_gain")).values_list("acquisition", "g")
+    )
+
+
+def open_lots(user):
+    """Lots of the user's holdings that still have quantity left."""
+    return (
+        AcquisitionLot.objects.filter(
+            acquisition__user=user,
+            acquisition__is_deleted=False,
+            remaining_quantity__gt=0,
+        )
+        .select_related("acquisition")
+        .order_by("acquisition", "date", "pk")
+    )
+
+
+def positions(user) -> dict:
+    """Return ``{acquisition_id: Position}`` for every holding with lots.
+
+    Remaining cost is the cost of the open lots under FIFO and the running
+    average otherwise. Two grouped queries cover all holdings.
+    """
+    out: dict = {}
+    rows = (
+        AcquisitionLot.objects.filter(acquisition__user=user, acquisition__is_deleted=False)
+        .values("acquisition")
+        .annotate(
+            qty=_dec(Sum("remaining_quantity")),
+            fifo_cost=_dec(Sum(F("remaining_quantity") * F("unit_cost"))),
+        )
+        .values_list(
+            "acquisition",
+            "acquisition__cost_method",
+            "acquisition__avg_unit_cost",
+            "qty",
+            "fifo_cost",
+        )
+    )
+    for acq_id, method, avg, qty, fifo_cost in rows:
+        cost = fifo_cost if method == Acquisition.COST_FIFO else qty * avg
+        out[acq_id] = Position(quantity=qty, cost=cost.quantize(CENT))
+    sales = (
+        AcquisitionDisposal.objects.filter(acquisition__user=user, acquisition__is_deleted=False)
+        .values("acquisition")
+        .annotate(g=Sum("realized_gain"), p=Sum("proceeds"))
+        .values_list("acquisition", "g", "p")
+    )
+    for acq_id, gain, proceeds in sales:
+        pos = out.setdefault(acq_id, Position())
+        pos.realized, pos.proceeds = gain, proceeds
+    return out
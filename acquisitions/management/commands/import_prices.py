@@ -0,0 +1,125 @@
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from acquisitions.models import Acquisition, AcquisitionPrice
+from acquisitions.valuation import bump_price_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import acquisition prices from a local CSV or JSON file. Each row "
+        "needs a date, a price and either an acquisition id or a name; "
+        "existing prices for the same day are replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row or JSON list.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            help="File format (default: taken from the file extension).",
+        )
+        parser.add_argument(
+            "--user",
+            type=str,
+            help="Restrict matching to acquisitions owned by this username.",
+        )
+        parser.add_argument(
+            "--source",
+            default="import",
+            help="Source label stored with each price.",
+        )
+
+    def _read(self, path: Path, fmt: str) -> list:
+        try:
+            with path.open(newline="", encoding="utf-8") as fh:
+                if fmt == "json":
+                    data = json.load(fh)
+                    if isinstance(data, dict):
+                        data = data.get("prices", [])
+                    return list(data)
+                return list(csv.DictReader(fh))
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        except (ValueError, csv.Error) as exc:
+            raise CommandError(f"Cannot parse {path}: {exc}")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options.get("format") or ("json" if path.suffix.lower() == ".json" else "csv")
+        rows = self._read(path, fmt)
+
+        qs = Acquisition.objects.filter(is_deleted=False)
+        if options.get("user"):
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"Unknown user {options['user']!r}")
+            qs = qs.filter(user=user)
+
+        ids, names = set(), set()
+        for row in rows:
+            ref = str(row.get("acquisition") or row.get("acquisition_id") or "").strip()
+            if ref.isdigit():
+                ids.add(int(ref))
+            elif row.get("name"):
+                names.add(str(row["name"]).strip().lower())
+        by_id = set(qs.filter(pk__in=ids).values_list("pk", flat=True))
+        by_name: dict = {}
+        for pk, name in qs.values_list("pk", "name"):
+            if name.lower() in names:
+                by_name.setdefault(name.lower(), []).append(pk)
+
+        prices, errors = {}, []
+        for lineno, row in enumerate(rows, start=1):
+            ref = str(row.get("acquisition") or row.get("acquisition_id") or "").strip()
+            name = str(row.get("name") or "").strip()
+            if ref.isdigit():
+                acq_id = int(ref) if int(ref) in by_id else None
+            else:
+                matches = by_name.get(name.lower(), [])
+                if len(matches) > 1:
+                    errors.append(f"row {lineno}: name {name!r} is ambiguous")
+                    continue
+                acq_id = matches[0] if matches else None
+            if acq_id is None:
+                errors.append(f"row {lineno}: no acquisition matches {ref or name!r}")
+                continue
+            try:
+                day = date.fromisoformat(str(row.get("date", "")).strip())
+                price = Decimal(str(row.get("price", "")).strip())
+            except (ValueError, InvalidOperation):
+                errors.append(f"row {lineno}: invalid date or price")
+                continue
+            if price < 0:
+                errors.append(f"row {lineno}: price cannot be negative")
+                continue
+            # Later rows for the same day win
+            prices[(acq_id, day)] = AcquisitionPrice(
+                acquisition_id=acq_id, date=day, price=price, source=options["source"]
+            )
+
+        with transaction.atomic():
+            AcquisitionPrice.objects.bulk_create(
+                prices.values(),
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=["acquisition", "date"],
+                update_fields=["price", "source"],
+            )
+        if prices:
+            bump_price_version()
+
+        for err in errors:
+            self.stderr.write(err)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {len(prices)} price(s); skipped {len(errors)} row(s)."
+            )
+        )
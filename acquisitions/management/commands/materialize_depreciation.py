@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from acquisitions.depreciation import materialize
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the monthly depreciation snapshots of property, equipment and "
+        "vehicle acquisitions. Use after bulk edits that bypass model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=str,
+            help="Only rebuild acquisitions owned by this username.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options.get("user"):
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"Unknown user {options['user']!r}")
+        count = materialize(user=user)
+        self.stdout.write(
+            self.style.SUCCESS(f"Materialized depreciation for {count} acquisition(s).")
+        )
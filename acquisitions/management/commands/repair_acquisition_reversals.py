@@ -1,137 +1,84 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.utils import timezone
 
 from acquisitions.models import Acquisition
+from core.maintenance import ChunkedCommand
 from transactions.models import Transaction
+from transactions.services import reverse_and_hide_many
+from transactions.versions import bump_ledger_version
 
 
-def _local_reverse_and_hide(txn, actor=None):
-    """Minimal, idempotent reverse+hide for a single visible root txn.
-
-    - Creates a hidden reversal row with swapped sides.
-    - Marks original as reversed and hidden.
-    - No-op if txn already reversed or is a reversal.
-    """
-    if not txn or getattr(txn, "is_reversal", False) or getattr(txn, "is_reversed", False):
-        # Still ensure it's hidden if the acquisition was deleted
-        if getattr(txn, "is_hidden", False) is False:
-            txn.is_hidden = True
-            txn.save(update_fields=["is_hidden"])
-        return
-    from transactions.models import Transaction as Tx
-
-    has_both = bool(txn.account_source_id and txn.account_destination_id)
-    if has_both and txn.destination_amount is not None:
-        amount = txn.destination_amount
-        dest_amount = txn.amount
-    else:
-        amount = txn.amount
-        dest_amount = None
-    # reversal row (hidden)
-    Tx.objects.create(
-        user=txn.user,
-        date=timezone.now().date(),
-        description=f"Reversal of {txn.description}",
-        transaction_type=txn.transaction_type,
-        amount=amount,
-        destination_amount=dest_amount,
-        account_source=txn.account_destination,
-        account_destination=txn.account_source,
-        entity_source=txn.entity_destination,
-        entity_destination=txn.entity_source,
-        currency=txn.currency,
-        is_hidden=True,
-        is_reversal=True,
-        reversed_transaction=txn,
-    )
-    txn.is_reversed = True
-    txn.reversed_at = timezone.now()
-    if actor is not None:
-        txn.reversed_by = actor
-    txn.ledger_status = "reversed"
-    txn.is_hidden = True
-    txn.save(update_fields=["is_reversed", "reversed_at", "reversed_by", "ledger_status", "is_hidden"])
-
-
-class Command(BaseCommand):
+class Command(ChunkedCommand):
     help = "Repair archived acquisitions by reversing/hiding their linked transactions if missing."
 
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument("--username", help="Limit repair to a specific username", default=None)
 
-    def handle(self, *args, **options):
+    def prepare(self, options):
+        self.owner = None
         username = options.get("username")
-        user = None
         if username:
             User = get_user_model()
             try:
-                user = User.objects.get(username=username)
+                self.owner = User.objects.get(username=username)
             except User.DoesNotExist:
-                self.stderr.write(self.style.ERROR(f"User not found: {username}"))
-                return
+                raise CommandError(f"User not found: {username}")
+
+    def get_queryset(self, options):
+        qs = Acquisition.objects.filter(is_deleted=True).select_related(
+            "user", "purchase_tx", "sell_tx"
+        )
+        if self.owner is not None:
+            qs = qs.filter(user=self.owner)
+        return qs
 
-        qs = Acquisition.objects.filter(is_deleted=True)
-        if user:
-            qs = qs.filter(user=user)
+    def after_chunk(self, objects):
+        for user_id in {getattr(o, "user_id", None) for o in objects}:
+            bump_ledger_version(user_id)
 
-        repaired = 0
-        checked = 0
-        try:
-            from transactions.views import _reverse_and_hide as shared_reverse
-        except Exception:
-            shared_reverse = None
+    @staticmethod
+    def _needs_reversal(txn):
+        return txn and (not getattr(txn, "is_hidden", False) or not getattr(txn, "is_reversed", False))
 
-        for acq in qs.iterator():
-            checked += 1
-            changed = False
-            with transaction.atomic():
-                # Try to resolve a missing purchase_tx by heuristics: find a
-                # visible, non-reversed 'buy acquisition' row matching the
-                # acquisition name. If exactly one candidate exists, treat it as
-                # the purchase and link it to the acquisition for future safety.
-                if not acq.purchase_tx_id:
-                    try:
-                        cands = list(
-                            Transaction.objects.filter(
-                                user=acq.user,
-                                transaction_type="buy acquisition",
-                                description__icontains=(acq.name or ""),
-                                is_reversal=False,
-                            ).order_by("-date")
-                        )
-                        if len(cands) == 1:
-                            acq.purchase_tx = cands[0]
-                            acq.save(update_fields=["purchase_tx"])
-                    except Exception:
-                        pass
+    def process_chunk(self, rows, options):
+        pending = {}
+        for acq in rows:
+            # Try to resolve a missing purchase_tx by heuristics: find a
+            # visible, non-reversed 'buy acquisition' row matching the
+            # acquisition name. If exactly one candidate exists, treat it as
+            # the purchase and link it to the acquisition for future safety.
+            if not acq.purchase_tx_id:
+                cands = list(
+                    Transaction.objects.filter(
+                        user_id=acq.user_id,
+                        transaction_type="buy acquisition",
+                        description__icontains=(acq.name or ""),
+                        is_reversal=False,
+                    ).order_by("-date")[:2]
+                )
+                if len(cands) == 1:
+                    acq.purchase_tx = cands[0]
+                    self.defer(
+                        lambda acq=acq: acq.save(update_fields=["purchase_tx"]),
+                        f"Acq {acq.pk}: link purchase tx {cands[0].pk}",
+                    )
 
-                if acq.purchase_tx_id:
-                    pt = acq.purchase_tx
-                    if pt and (not getattr(pt, "is_hidden", False) or not getattr(pt, "is_reversed", False)):
-                        try:
-                            if shared_reverse:
-                                shared_reverse(pt, actor=acq.user)
-                            else:
-                                _local_reverse_and_hide(pt, actor=acq.user)
-                        except Exception:
-                            _local_reverse_and_hide(pt, actor=acq.user)
-                        changed = True
-                if acq.sell_tx_id:
-                    st = acq.sell_tx
-                    if st and (not getattr(st, "is_hidden", False) or not getattr(st, "is_reversed", False)):
-                        try:
-                            if shared_reverse:
-                                shared_reverse(st, actor=acq.user)
-                            else:
-                                _local_reverse_and_hide(st, actor=acq.user)
-                        except Exception:
-                            _local_reverse_and_hide(st, actor=acq.user)
-                        changed = True
-            if changed:
-                repaired += 1
+            for role, txn in (("purchase", acq.purchase_tx), ("sell", acq.sell_tx)):
+                if not self._needs_reversal(txn):
+                    continue
+                if txn.is_reversal or txn.is_reversed:
+                    # Reversed already; only make sure it is hidden
+                    self.update(txn, is_hidden=True)
+                else:
+                    pending.setdefault(acq.user, []).append(
+                        (txn, f"Acq {acq.pk}: reverse and hide {role} tx {txn.pk}")
+                    )
 
-        self.stdout.write(self.style.SUCCESS(
-            f"Checked {checked} archived acquisitions; repaired {repaired}."
-        ))
+        # One set-based reversal per owner for the whole chunk
+        for actor, items in pending.items():
+            txns = [txn for txn, _ in items]
+            self.defer(
+                lambda actor=actor, txns=txns: reverse_and_hide_many(txns, actor=actor),
+                [label for _, label in items],
+            )
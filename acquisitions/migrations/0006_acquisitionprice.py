@@ -0,0 +1,51 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("acquisitions", "0005_acquisition_soft_delete"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AcquisitionPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("price", models.DecimalField(decimal_places=4, max_digits=15)),
+                ("source", models.CharField(blank=True, max_length=100)),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "acquisition",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prices",
+                        to="acquisitions.acquisition",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["acquisition", "-date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("acquisition", "date"),
+                        name="uniq_acquisition_price_date",
+                    )
+                ],
+            },
+        ),
+    ]
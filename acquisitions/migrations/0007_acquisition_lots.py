@@ -0,0 +1,154 @@
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("acquisitions", "0006_acquisitionprice"),
+        ("transactions", "0013_template_recurrence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="acquisition",
+            name="cost_method",
+            field=models.CharField(
+                choices=[
+                    ("average", "Average cost"),
+                    ("fifo", "First in, first out"),
+                ],
+                default="average",
+                max_length=10,
+            ),
+        ),
+        migrations.CreateModel(
+            name="AcquisitionDisposal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("quantity", models.DecimalField(decimal_places=4, max_digits=15)),
+                ("proceeds", models.DecimalField(decimal_places=2, max_digits=15)),
+                (
+                    "cost_basis",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=15
+                    ),
+                ),
+                (
+                    "realized_gain",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=15
+                    ),
+                ),
+                (
+                    "acquisition",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="disposals",
+                        to="acquisitions.acquisition",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["acquisition", "date", "pk"],
+            },
+        ),
+        migrations.CreateModel(
+            name="AcquisitionLot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("quantity", models.DecimalField(decimal_places=4, max_digits=15)),
+                ("unit_cost", models.DecimalField(decimal_places=4, max_digits=15)),
+                (
+                    "remaining_quantity",
+                    models.DecimalField(
+                        decimal_places=4, default=Decimal("0"), max_digits=15
+                    ),
+                ),
+                (
+                    "acquisition",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lots",
+                        to="acquisitions.acquisition",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="acquisition_lots",
+                        to="transactions.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["acquisition", "date", "pk"],
+            },
+        ),
+        migrations.CreateModel(
+            name="LotConsumption",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.DecimalField(decimal_places=4, max_digits=15)),
+                ("cost", models.DecimalField(decimal_places=4, max_digits=15)),
+                (
+                    "disposal",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="consumptions",
+                        to="acquisitions.acquisitiondisposal",
+                    ),
+                ),
+                (
+                    "lot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="consumptions",
+                        to="acquisitions.acquisitionlot",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="acquisitiondisposal",
+            index=models.Index(
+                fields=["acquisition", "date"], name="acquisition_acquisi_d485d8_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="acquisitionlot",
+            index=models.Index(
+                fields=["acquisition", "date"], name="acquisition_acquisi_381aa6_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("acquisitions", "0007_acquisition_lots"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="acquisition",
+            name="depreciation_method",
+            field=models.CharField(
+                choices=[
+                    ("straight_line", "Straight-line"),
+                    ("declining_balance", "Declining balance"),
+                ],
+                default="straight_line",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="acquisition",
+            name="salvage_value",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0"), max_digits=15
+            ),
+        ),
+        migrations.CreateModel(
+            name="DepreciationSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(help_text="First day of the month")),
+                ("charge", models.DecimalField(decimal_places=2, max_digits=15)),
+                ("accumulated", models.DecimalField(decimal_places=2, max_digits=15)),
+                ("book_value", models.DecimalField(decimal_places=2, max_digits=15)),
+                (
+                    "acquisition",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="depreciation",
+                        to="acquisitions.acquisition",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["acquisition", "month"],
+                "indexes": [
+                    models.Index(fields=["month"], name="acquisition_month_30408a_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("acquisition", "month"), name="uniq_depreciation_month"
+                    )
+                ],
+            },
+        ),
+    ]
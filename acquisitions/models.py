@@ -30,6 +30,25 @@ class Acquisition(models.Model):
         ("active", "Active"),
     ]
 
+    COST_AVERAGE = "average"
+    COST_FIFO = "fifo"
+
+    COST_METHOD_CHOICES = [
+        (COST_AVERAGE, "Average cost"),
+        (COST_FIFO, "First in, first out"),
+    ]
+
+    DEPRECIATION_STRAIGHT_LINE = "straight_line"
+    DEPRECIATION_DECLINING = "declining_balance"
+
+    DEPRECIATION_METHOD_CHOICES = [
+        (DEPRECIATION_STRAIGHT_LINE, "Straight-line"),
+        (DEPRECIATION_DECLINING, "Declining balance"),
+    ]
+
+    # Categories whose book value is written down over their lifespan
+    DEPRECIABLE_CATEGORIES = (CATEGORY_PROPERTY, CATEGORY_EQUIPMENT, CATEGORY_VEHICLE)
+
     name = models.CharField(max_length=255)
     # Optional provider/source name for the acquisition (kept nullable for
     # compatibility with existing databases that may require a value).
@@ -69,6 +88,19 @@ class Acquisition(models.Model):
     target_selling_date = models.DateField(blank=True, null=True)
     quantity = models.DecimalField(max_digits=15, decimal_places=4, default=0)
     avg_unit_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # property / equipment / vehicle; see acquisitions.depreciation
+    depreciation_method = models.CharField(
+        max_length=20,
+        choices=DEPRECIATION_METHOD_CHOICES,
+        default=DEPRECIATION_STRAIGHT_LINE,
+    )
+    salvage_value = models.DecimalField(
+        max_digits=15, decimal_places=2, default=Decimal("0")
+    )
+    # How sales consume lots; see acquisitions.lots
+    cost_method = models.CharField(
+        max_length=10, choices=COST_METHOD_CHOICES, default=COST_AVERAGE
+    )
 
     # vehicle-specific fields
     vehicle_type = models.CharField(max_length=50, blank=True)
@@ -145,16 +177,18 @@ class Acquisition(models.Model):
     def sell(
         self, delta_qty: Decimal, sell_price: Decimal, account_dest, sell_date
     ) -> None:
-        """Record the sale via paired transactions and update holdings."""
+        """Record the sale via paired transactions and update holdings.
+
+        ``sell_price`` is the total proceeds for ``delta_qty`` units.
+        """
         from accounts.utils import ensure_outside_account
         from entities.utils import ensure_fixed_entities
 
+        from .lots import record_sale
+
         outside_acc = ensure_outside_account()
         outside_ent, _ = ensure_fixed_entities(self.user)
 
-        original_cost = self.avg_unit_cost * Decimal(delta_qty)
-        profit = Decimal(sell_price) - original_cost
-
         tx_kwargs = dict(
             user=self.user,
             date=sell_date,
@@ -166,6 +200,9 @@ class Acquisition(models.Model):
         )
 
         with transaction.atomic():
+            # Cost basis comes from the lots consumed under ``cost_method``
+            disposal = record_sale(self, Decimal(delta_qty), Decimal(sell_price), sell_date)
+            original_cost, profit = disposal.cost_basis, disposal.realized_gain
             Transaction.objects.create(
                 description=f"Sell {self.name} - capital",
                 transaction_type="transfer",
@@ -178,7 +215,138 @@ class Acquisition(models.Model):
                 amount=abs(profit),
                 **tx_kwargs,
             )
-            self.recompute_average(-delta_qty, -original_cost)
             if self.quantity <= 0:
                 self.status = "inactive"
             self.save(update_fields=["status"])
+
+
+class AcquisitionLot(models.Model):
+    """Quantity bought in one purchase, consumed by later disposals.
+
+    ``remaining_quantity`` is maintained by :mod:`acquisitions.lots` and is
+    what is left after every disposal up to now.
+    """
+
+    acquisition = models.ForeignKey(
+        Acquisition, on_delete=models.CASCADE, related_name="lots"
+    )
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="acquisition_lots",
+    )
+    date = models.DateField()
+    quantity = models.DecimalField(max_digits=15, decimal_places=4)
+    unit_cost = models.DecimalField(max_digits=15, decimal_places=4)
+    remaining_quantity = models.DecimalField(
+        max_digits=15, decimal_places=4, default=Decimal("0")
+    )
+
+    class Meta:
+        ordering = ["acquisition", "date", "pk"]
+        indexes = [models.Index(fields=["acquisition", "date"])]
+
+    def __str__(self) -> str:
+        return f"{self.acquisition.name} lot {self.date:%Y-%m-%d} ({self.quantity})"
+
+    @property
+    def cost(self) -> Decimal:
+        return self.quantity * self.unit_cost
+
+
+class AcquisitionDisposal(models.Model):
+    """A (partial) sale of an acquisition and its realized gain."""
+
+    acquisition = models.ForeignKey(
+        Acquisition, on_delete=models.CASCADE, related_name="disposals"
+    )
+    date = models.DateField()
+    quantity = models.DecimalField(max_digits=15, decimal_places=4)
+    proceeds = models.DecimalField(max_digits=15, decimal_places=2)
+    cost_basis = models.DecimalField(
+        max_digits=15, decimal_places=2, default=Decimal("0")
+    )
+    realized_gain = models.DecimalField(
+        max_digits=15, decimal_places=2, default=Decimal("0")
+    )
+
+    class Meta:
+        ordering = ["acquisition", "date", "pk"]
+        indexes = [models.Index(fields=["acquisition", "date"])]
+
+    def __str__(self) -> str:
+        return f"{self.acquisition.name} sale {self.date:%Y-%m-%d} ({self.quantity})"
+
+
+class LotConsumption(models.Model):
+    """Quantity of a lot used up by a disposal, at the cost it carried."""
+
+    disposal = models.ForeignKey(
+        AcquisitionDisposal, on_delete=models.CASCADE, related_name="consumptions"
+    )
+    lot = models.ForeignKey(
+        AcquisitionLot, on_delete=models.CASCADE, related_name="consumptions"
+    )
+    quantity = models.DecimalField(max_digits=15, decimal_places=4)
+    cost = models.DecimalField(max_digits=15, decimal_places=4)
+
+    def __str__(self) -> str:
+        return f"{self.quantity} of {self.lot}"
+
+
+class DepreciationSnapshot(models.Model):
+    """Book value of a depreciable acquisition at the end of a month.
+
+    Rows are materialized by :mod:`acquisitions.depreciation` for the whole
+    schedule. A sale closes the schedule with a row that reverses the
+    accumulated depreciation and leaves no book value.
+    """
+
+    acquisition = models.ForeignKey(
+        Acquisition, on_delete=models.CASCADE, related_name="depreciation"
+    )
+    month = models.DateField(help_text="First day of the month")
+    charge = models.DecimalField(max_digits=15, decimal_places=2)
+    accumulated = models.DecimalField(max_digits=15, decimal_places=2)
+    book_value = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        ordering = ["acquisition", "month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["acquisition", "month"], name="uniq_depreciation_month"
+            )
+        ]
+        indexes = [models.Index(fields=["month"])]
+
+    def __str__(self) -> str:
+        return f"{self.acquisition.name} {self.month:%Y-%m}: {self.book_value}"
+
+
+class AcquisitionPrice(models.Model):
+    """Unit price of an acquisition on a given date.
+
+    Prices are quoted in the currency of the acquisition's purchase
+    transaction. Holdings without a quantity are priced as a single unit.
+    """
+
+    acquisition = models.ForeignKey(
+        Acquisition, on_delete=models.CASCADE, related_name="prices"
+    )
+    date = models.DateField()
+    price = models.DecimalField(max_digits=15, decimal_places=4)
+    source = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["acquisition", "-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["acquisition", "date"], name="uniq_acquisition_price_date"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.acquisition.name} {self.date:%Y-%m-%d}: {self.price}"
@@ -1,8 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.utils import timezone
+from decimal import Decimal
 
-from .models import Acquisition
+from currencies.models import ExchangeRate
+from transactions.models import Transaction
+from transactions.services import reverse_and_hide_many
+from transactions.versions import bump_ledger_version
+
+from .models import Acquisition, AcquisitionLot, AcquisitionPrice
+from .valuation import bump_price_version, bump_rate_version
 
 
 def _safe_reverse_and_hide(txn, actor=None):
@@ -20,43 +26,7 @@ def _safe_reverse_and_hide(txn, actor=None):
                 txn.is_hidden = True
                 txn.save(update_fields=["is_hidden"])
             return
-        from transactions.models import Transaction as Tx
-
-        has_both = bool(txn.account_source_id and txn.account_destination_id)
-        if has_both and txn.destination_amount is not None:
-            amount = txn.destination_amount
-            dest_amount = txn.amount
-        else:
-            amount = txn.amount
-            dest_amount = None
-
-        rev = Tx.objects.create(
-            user=txn.user,
-            date=timezone.now().date(),
-            description=f"Reversal of {txn.description}",
-            transaction_type=txn.transaction_type,
-            amount=amount,
-            destination_amount=dest_amount,
-            account_source=txn.account_destination,
-            account_destination=txn.account_source,
-            entity_source=txn.entity_destination,
-            entity_destination=txn.entity_source,
-            currency=txn.currency,
-            is_hidden=True,
-            is_reversal=True,
-            reversed_transaction=txn,
-        )
-        # Mark and hide original
-        txn.is_reversed = True
-        txn.reversed_at = timezone.now()
-        if actor is not None:
-            try:
-                txn.reversed_by = actor
-            except Exception:
-                pass
-        txn.ledger_status = "reversed"
-        txn.is_hidden = True
-        txn.save(update_fields=["is_reversed", "reversed_at", "reversed_by", "ledger_status", "is_hidden"])
+        reverse_and_hide_many([txn], actor=actor)
     except Exception:
         # Swallow any errors: this is a safety net; views/commands handle primary flow
         return
@@ -69,55 +39,98 @@ def enforce_reversal_on_soft_delete(sender, instance: Acquisition, created, **kw
     outside the normal view path or when prior bugs left rows visible.
 
     Idempotent and best-effort: if already reversed/hidden, does nothing.
+    The purchase, the sale and the matching capital returns are reversed
+    as one batch.
     """
+    if not getattr(instance, "is_deleted", False):
+        return
+    actor = getattr(instance, "user", None)
+    linked = []
     try:
-        if getattr(instance, "is_deleted", False):
-            # Attempt shared helper when available
-            try:
-                from transactions.views import _reverse_and_hide as shared_reverse
-            except Exception:
-                shared_reverse = None
-
-            if instance.purchase_tx_id:
-                try:
-                    tx = instance.purchase_tx
-                    if shared_reverse:
-                        shared_reverse(tx, actor=getattr(instance, "user", None))
-                    else:
-                        _safe_reverse_and_hide(tx, actor=getattr(instance, "user", None))
-                except Exception:
-                    _safe_reverse_and_hide(getattr(instance, "purchase_tx", None), actor=getattr(instance, "user", None))
-
-            if instance.sell_tx_id:
-                try:
-                    tx = instance.sell_tx
-                    if shared_reverse:
-                        shared_reverse(tx, actor=getattr(instance, "user", None))
-                    else:
-                        _safe_reverse_and_hide(tx, actor=getattr(instance, "user", None))
-                except Exception:
-                    _safe_reverse_and_hide(getattr(instance, "sell_tx", None), actor=getattr(instance, "user", None))
-            # Also reverse the capital-return transaction for this acquisition's sale.
-            try:
-                from transactions.models import Transaction as Tx
-                from decimal import Decimal as _Dec
-                cap_amt = (instance.purchase_tx.amount if instance.purchase_tx else _Dec("0")) or _Dec("0")
-                caps = Tx.objects.filter(
-                    user=instance.user,
-                    transaction_type__in=["sell acquisition", "sell_acquisition"],
-                    amount=cap_amt,
-                    description__icontains=instance.name,
-                ).order_by("-date", "-id")
-                for cap in caps:
-                    if shared_reverse:
-                        try:
-                            shared_reverse(cap, actor=getattr(instance, "user", None))
-                        except Exception:
-                            _safe_reverse_and_hide(cap, actor=getattr(instance, "user", None))
-                    else:
-                        _safe_reverse_and_hide(cap, actor=getattr(instance, "user", None))
-            except Exception:
-                pass
+        if instance.purchase_tx_id:
+            linked.append(instance.purchase_tx)
+        if instance.sell_tx_id:
+            linked.append(instance.sell_tx)
+        # Also reverse the capital-return transaction for this acquisition's sale.
+        cap_amt = (instance.purchase_tx.amount if instance.purchase_tx else Decimal("0")) or Decimal("0")
+        linked.extend(
+            Transaction.objects.filter(
+                user=instance.user,
+                transaction_type__in=["sell acquisition", "sell_acquisition"],
+                amount=cap_amt,
+                description__icontains=instance.name,
+            ).order_by("-date", "-id")
+        )
+        reverse_and_hide_many(linked, actor=actor)
     except Exception:
-        # Never block save; this is a guardrail
-        pass
+        # Never block save; this is a guardrail. Fall back to one at a time.
+        for txn in linked:
+            _safe_reverse_and_hide(txn, actor=actor)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Acquisition)
+@receiver(post_delete, sender=Acquisition)
+def invalidate_user_valuation(sender, instance, **kwargs):
+    """Drop cached valuations when a user's ledger or holdings change."""
+    bump_ledger_version(getattr(instance, "user_id", None))
+
+
+@receiver(post_save, sender=AcquisitionPrice)
+@receiver(post_delete, sender=AcquisitionPrice)
+def invalidate_price_valuation(sender, instance, **kwargs):
+    """Drop cached valuations when a price is added, edited or removed."""
+    bump_price_version()
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_rate_valuation(sender, instance, **kwargs):
+    """Drop cached valuations when an exchange rate is stored or removed."""
+    bump_rate_version()
+
+
+@receiver(post_save, sender=Transaction)
+def reprice_lots_on_buy_correction(sender, instance, created, **kwargs):
+    """Re-price lots bought by ``instance`` when its amount or date is edited."""
+    if created or instance.transaction_type not in ("buy acquisition", "buy_acquisition"):
+        return
+    from .lots import update_lot
+
+    for lot in AcquisitionLot.objects.filter(transaction=instance).select_related(
+        "acquisition"
+    ):
+        unit_cost = (instance.amount or Decimal("0")) / lot.quantity
+        changes = {}
+        if unit_cost.quantize(Decimal("0.0001")) != lot.unit_cost:
+            changes["unit_cost"] = unit_cost
+        if instance.date != lot.date:
+            changes["date"] = instance.date
+        if changes:
+            update_lot(lot, **changes)
+
+
+@receiver(post_save, sender=Acquisition)
+def refresh_depreciation(sender, instance, **kwargs):
+    """Re-materialize the depreciation schedule of a depreciable acquisition."""
+    if instance.category in Acquisition.DEPRECIABLE_CATEGORIES or instance.is_deleted:
+        from .depreciation import materialize
+
+        materialize(acquisition_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Transaction)
+def refresh_depreciation_on_purchase_edit(sender, instance, created, **kwargs):
+    """Re-schedule when the cost or date of a depreciable purchase changes."""
+    if created or instance.transaction_type not in ("buy acquisition", "buy_acquisition"):
+        return
+    from .depreciation import materialize
+
+    ids = list(
+        Acquisition.objects.filter(
+            purchase_tx=instance, category__in=Acquisition.DEPRECIABLE_CATEGORIES
+        ).values_list("pk", flat=True)
+    )
+    if ids:
+        materialize(acquisition_ids=ids)
@@ -11,6 +11,8 @@ def render_acquisition_card(context, acq):
     """Render an acquisition card."""
 
     request = context.get("request")
+    active = get_active_currency(request) if request else None
+    symbol = get_currency_symbol(active.code) if active else ""
 
     def _fmt_amt(val):
         if val is None:
@@ -25,8 +27,6 @@ def render_acquisition_card(context, acq):
             )
         )
         amt = amount_for_display(request, val, currency_code) if request else val
-        active = get_active_currency(request) if request else None
-        symbol = get_currency_symbol(active.code) if active else ""
         return f"{symbol}{intcomma(floatformat(amt, 2))}"
 
     rows = [
@@ -34,6 +34,15 @@ def render_acquisition_card(context, acq):
         ("Amount", _fmt_amt(acq.purchase_tx.amount if acq.purchase_tx else None)),
         ("Status", "Sold" if acq.sell_tx else acq.get_status_display()),
     ]
+    holding = getattr(acq, "holding", None)
+    if holding is not None and (
+        holding.price is not None or acq.category == acq.CATEGORY_STOCK_BOND
+    ):
+        # Valuation figures are already in the display currency
+        rows += [
+            ("Market Value", f"{symbol}{intcomma(floatformat(holding.market_value, 2))}"),
+            ("Unrealized P/L", f"{symbol}{intcomma(floatformat(holding.unrealized, 2))}"),
+        ]
     return {
         "acq": acq,
         "rows": rows,
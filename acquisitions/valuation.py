@@ -0,0 +1,212 @@
+"""Mark-to-market valuation of open acquisitions.
+
+Every open holding of a user is loaded with one query that also selects its
+latest :class:`~acquisitions.models.AcquisitionPrice` on or before the
+valuation date. Market value, unrealized profit/loss and allocation per
+entity and per category are then derived column by column in a single pass,
+so the cost does not depend on how many prices have been recorded.
+
+Results are cached under the user's ledger version and the global price
+and exchange-rate versions. They are bumped by signal handlers (and by
+``import_prices``) so a cached valuation is not served after the underlying
+data changed. Like the ledger versions of :mod:`transactions.versions`,
+the price and rate versions live in the default cache, so this only holds
+across worker processes when ``CACHES`` points at a backend they share;
+with a per-process cache another worker may keep serving its copy for up to
+``CACHE_TTL``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from currencies.models import Currency
+from transactions.versions import bump_cache_version, cache_version, ledger_version
+from utils.currency import get_conversion_rates
+
+from .models import Acquisition, AcquisitionPrice
+
+CACHE_TTL = 60 * 60
+
+_PRICE_KEY = "acq-valuation:prices"
+_RATE_KEY = "acq-valuation:rates"
+
+
+# ---------------- Versions ----------------
+def bump_price_version() -> None:
+    """Invalidate every cached valuation after prices changed."""
+    bump_cache_version(_PRICE_KEY)
+
+
+def bump_rate_version() -> None:
+    """Invalidate every cached valuation after exchange rates changed."""
+    bump_cache_version(_RATE_KEY)
+
+
+# ---------------- Results ----------------
+@dataclass
+class Holding:
+    acquisition_id: int
+    name: str
+    category: str
+    entity_id: Optional[int]
+    quantity: Decimal
+    cost: Decimal
+    price: Optional[Decimal]
+    price_date: Optional[date]
+    market_value: Decimal
+    unrealized: Decimal
+    allocation: Decimal = Decimal("0")
+
+
+@dataclass
+class Allocation:
+    cost: Decimal = Decimal("0")
+    market_value: Decimal = Decimal("0")
+    unrealized: Decimal = Decimal("0")
+    allocation: Decimal = Decimal("0")
+
+
+@dataclass
+class Valuation:
+    currency: str
+    as_of: date
+    holdings: list = field(default_factory=list)
+    by_entity: dict = field(default_factory=dict)
+    by_category: dict = field(default_factory=dict)
+    cost: Decimal = Decimal("0")
+    market_value: Decimal = Decimal("0")
+    unrealized: Decimal = Decimal("0")
+
+    def holding_map(self) -> dict:
+        return {h.acquisition_id: h for h in self.holdings}
+
+
+# ---------------- Engine ----------------
+def _share(part: Decimal, whole: Decimal) -> Decimal:
+    return (part / whole * 100).quantize(Decimal("0.01")) if whole else Decimal("0")
+
+
+def _group(holdings, key) -> dict:
+    groups: dict = {}
+    for h in holdings:
+        bucket = groups.setdefault(key(h), Allocation())
+        bucket.cost += h.cost
+        bucket.market_value += h.market_value
+        bucket.unrealized += h.unrealized
+    return groups
+
+
+def _compute(user, as_of: date, target: Optional[Currency], code: str) -> Valuation:
+    latest = AcquisitionPrice.objects.filter(
+        acquisition=OuterRef("pk"), date__lte=as_of
+    ).order_by("-date")
+    rows = list(
+        Acquisition.objects.filter(user=user, is_deleted=False, sell_tx__isnull=True)
+        .annotate(
+            last_price=Subquery(latest.values("price")[:1]),
+            last_price_date=Subquery(latest.values("date")[:1]),
+        )
+        .order_by("pk")
+        .values_list(
+            "pk",
+            "name",
+            "category",
+            "purchase_tx__entity_destination_id",
+            "purchase_tx__currency_id",
+            "purchase_tx__amount",
+            "quantity",
+            "avg_unit_cost",
+            "current_value",
+            "last_price",
+            "last_price_date",
+        )
+    )
+    val = Valuation(currency=code, as_of=as_of)
+    if not rows:
+        return val
+
+    (ids, names, cats, ents, curs, amounts, qtys, avgs, manual, prices, price_dates) = (
+        list(col) for col in zip(*rows)
+    )
+    rates = get_conversion_rates(set(curs), target)
+    zero = Decimal("0")
+    units = [q if q and q > 0 else Decimal("1") for q in qtys]
+    costs = [
+        (q * a if q and a and q > 0 and a > 0 else amt or zero) * rates.get(c, 1)
+        for q, a, amt, c in zip(qtys, avgs, amounts, curs)
+    ]
+    values = [
+        (
+            p * u * rates.get(c, 1)
+            if p is not None
+            else m * rates.get(c, 1) if m is not None else cost
+        )
+        for p, u, m, c, cost in zip(prices, units, manual, curs, costs)
+    ]
+    val.cost = sum(costs, zero)
+    val.market_value = sum(values, zero)
+    val.unrealized = val.market_value - val.cost
+    val.holdings = [
+        Holding(
+            acquisition_id=pk,
+            name=name,
+            category=cat,
+            entity_id=ent,
+            quantity=qty,
+            cost=cost,
+            price=price,
+            price_date=pdate,
+            market_value=mv,
+            unrealized=mv - cost,
+            allocation=_share(mv, val.market_value),
+        )
+        for pk, name, cat, ent, qty, cost, price, pdate, mv in zip(
+            ids, names, cats, ents, qtys, costs, prices, price_dates, values
+        )
+    ]
+    val.by_entity = _group(val.holdings, lambda h: h.entity_id)
+    val.by_category = _group(val.holdings, lambda h: h.category)
+    for bucket in (*val.by_entity.values(), *val.by_category.values()):
+        bucket.allocation = _share(bucket.market_value, val.market_value)
+    return val
+
+
+def value_holdings(user, *, as_of: Optional[date] = None, currency=None) -> Valuation:
+    """Value the user's open acquisitions in ``currency`` as of ``as_of``.
+
+    Each holding is marked at its latest price on or before ``as_of``. Without
+    a price the manually entered ``current_value`` is used, and failing that
+    the cost basis, so unpriced holdings report no unrealized profit/loss.
+    ``currency`` may be a :class:`Currency` or a code and defaults to the
+    user's base currency.
+    """
+    as_of = as_of or timezone.localdate()
+    if isinstance(currency, str) or currency is None:
+        code = currency or getattr(
+            getattr(user, "base_currency", None), "code", None
+        ) or settings.BASE_CURRENCY
+        currency = Currency.objects.filter(code=code).first()
+    code = getattr(currency, "code", "") or settings.BASE_CURRENCY
+
+    key = "acq-valuation:{}:{}:{}:{}:{}:{}".format(
+        user.pk,
+        as_of.isoformat(),
+        code,
+        ledger_version(user.pk),
+        cache_version(_PRICE_KEY),
+        cache_version(_RATE_KEY),
+    )
+    val = cache.get(key)
+    if val is None:
+        val = _compute(user, as_of, currency, code)
+        cache.set(key, val, CACHE_TTL)
+    return val
@@ -22,7 +22,9 @@ from django.contrib.auth.decorators import login_required
 
 # Create your views here.
 
+from .lots import record_buy
 from .models import Acquisition
+from .valuation import value_holdings
 from .forms import AcquisitionForm, SellAcquisitionForm
 from transactions.models import Transaction
 from accounts.models import Account
@@ -30,6 +32,7 @@ from accounts.forms import AccountForm
 from entities.models import Entity
 from entities.forms import EntityForm
 from currencies.models import Currency
+from utils.currency import get_active_currency
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +144,14 @@ class AcquisitionListView(ListView):
         ctx["form"] = AcquisitionForm(user=self.request.user)
         ctx["form"] = AcquisitionForm(user=self.request.user)
         ctx["CARD_FIELDS_BY_CATEGORY"] = CARD_FIELDS_BY_CATEGORY
+        # Value every open holding in one pass instead of per card
+        valuation = value_holdings(
+            self.request.user, currency=get_active_currency(self.request)
+        )
+        holdings = valuation.holding_map()
+        for acq in ctx["acquisitions"]:
+            acq.holding = holdings.get(acq.pk)
+        ctx["valuation"] = valuation
         ctx["entities"] = (
             Entity.objects.filter(
                 Q(user=self.request.user) | Q(user__isnull=True),
@@ -231,15 +242,18 @@ class AcquisitionCreateView(FormView):
             else:
                 form.add_error(None, str(e))
             return self.form_invalid(form)
-        tx.save()
-        Acquisition.objects.create(
-            name=data["name"],
-            category=data["category"],
-            purchase_tx=tx,
-            status="active",
-            provider=data.get("name") or "",
-            user=self.request.user,
-        )
+        with transaction.atomic():
+            tx.save()
+            acq = Acquisition.objects.create(
+                name=data["name"],
+                category=data["category"],
+                purchase_tx=tx,
+                status="active",
+                provider=data.get("name") or "",
+                user=self.request.user,
+            )
+            # The form buys a single unit; the lot follows edits to ``tx``
+            record_buy(acq, Decimal("1"), tx.amount, tx.date, tx=tx)
         return super().form_valid(form)
 
     def get_success_url(self):
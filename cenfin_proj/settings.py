@@ -96,11 +96,13 @@ INSTALLED_APPS = [
     "acquisitions.apps.AcquisitionsConfig",
     "liabilities",
     "users",
+    "core",
 ]
 CRISPY_ALLOWED_TEMPLATE_PACKS = {"bootstrap5"}
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    "core.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -113,6 +115,29 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Per-request SQL/timing instrumentation (core.perf), off unless the
+# PERF_INSTRUMENTATION environment variable is set; summarize the NDJSON log
+# with ``manage.py perf_report``. The file sink rotates by size from inside
+# the process, so give each worker process its own PERF_LOG_PATH, or set
+# PERF_LOG_MAX_BYTES = 0 and rotate the shared file externally (logrotate).
+PERF_INSTRUMENTATION = os.environ.get("PERF_INSTRUMENTATION", "").lower() in ("1", "true", "yes")
+PERF_SAMPLE_RATE = 0.1
+PERF_SINK = "file"
+PERF_LOG_PATH = BASE_DIR / "logs" / "perf.ndjson"
+PERF_LOG_MAX_BYTES = 5 * 1024 * 1024
+PERF_LOG_BACKUPS = 3
+
+# Cached valuations and ledger snapshots are keyed on versions kept in the
+# default cache (transactions.versions, acquisitions.valuation). Deployments
+# running several worker processes must point CACHES["default"] at a backend
+# they share (memcached, Redis or the database cache); otherwise a worker may
+# serve a stale copy until the entry's timeout expires.
+
+# Dashboard panels computed concurrently (dashboard.panels); ``None`` runs
+# every panel in its own worker
+DASHBOARD_PANEL_WORKERS = None
+DASHBOARD_PANEL_TIMEOUT = 10.0
+
 ROOT_URLCONF = "cenfin_proj.urls"
 
 WSGI_APPLICATION = "cenfin_proj.wsgi.application"
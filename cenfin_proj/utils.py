@@ -8,7 +8,6 @@ from django.conf import settings
 
 from accounts.models import Account
 from entities.models import Entity
-from utils.currency import convert_to_base
 from utils.currency import convert_amount
 
 
@@ -18,35 +17,51 @@ def get_account_balances():
 
 
 def get_entity_balances():
-    """Return active entities annotated with their current balance."""
+    """Return active entities annotated with their current balance.
+
+    Inflow and outflow are separate correlated subqueries (as in
+    ``AccountQuerySet.with_current_balance``). Summing both reverse relations
+    in one query would join every inflow row with every outflow row, costing
+    O(in x out) per entity and multiplying each sum by the other side's row
+    count.
+    """
+    from django.db.models import OuterRef, Subquery
+    from transactions.models import Transaction
+
+    inflow_sq = (
+        Transaction.all_objects.filter(
+            entity_destination_id=OuterRef("pk"),
+            asset_type_destination__iexact="liquid",
+        )
+        .annotate(
+            adj_amount=Case(
+                When(destination_amount__isnull=False, then=F("destination_amount")),
+                default=F("amount"),
+                output_field=DecimalField(),
+            )
+        )
+        .values("entity_destination_id")
+        .annotate(total=Sum("adj_amount"))
+        .values("total")
+    )
+    outflow_sq = (
+        Transaction.all_objects.filter(
+            entity_source_id=OuterRef("pk"),
+            asset_type_source__iexact="liquid",
+        )
+        .values("entity_source_id")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
     return (
         Entity.objects.active()
         .annotate(
             inflow=Coalesce(
-                Sum(
-                    Case(
-                        When(
-                            transaction_entity_destination__destination_amount__isnull=False,
-                            then=F(
-                                "transaction_entity_destination__destination_amount"
-                            ),
-                        ),
-                        default=F("transaction_entity_destination__amount"),
-                        output_field=DecimalField(),
-                    ),
-                    filter=Q(
-                        transaction_entity_destination__asset_type_destination__iexact="liquid"
-                    ),
-                ),
+                Subquery(inflow_sq, output_field=DecimalField()),
                 Value(Decimal("0.00"), output_field=DecimalField()),
             ),
             outflow=Coalesce(
-                Sum(
-                    "transaction_entity_source__amount",
-                    filter=Q(
-                        transaction_entity_source__asset_type_source__iexact="liquid"
-                    ),
-                ),
+                Subquery(outflow_sq, output_field=DecimalField()),
                 Value(Decimal("0.00"), output_field=DecimalField()),
             ),
         )
@@ -98,6 +113,14 @@ def get_entity_liquid_nonliquid_totals(
     except Exception:
         pass
 
+    rates: dict = {}
+
+    def convert(amount, code):
+        # One rate lookup per currency instead of one per row
+        if code not in rates:
+            rates[code] = convert_amount(Decimal("1"), code, disp_code)
+        return amount * rates[code]
+
     def _is_outside(acct) -> bool:
         if not acct:
             return False
@@ -178,9 +201,7 @@ def get_entity_liquid_nonliquid_totals(
             and dst_asset == "liquid"
             and dest_amt is not None
         ):
-            totals_liq[tx.entity_destination_id] += convert_amount(
-                dest_amt, dest_code, disp_code
-            )
+            totals_liq[tx.entity_destination_id] += convert(dest_amt, dest_code)
 
         # Liquid outflow from entity
         if (
@@ -194,7 +215,7 @@ def get_entity_liquid_nonliquid_totals(
             and src_asset == "liquid"
             and tx.amount is not None
         ):
-            totals_liq[tx.entity_source_id] -= convert_amount(tx.amount, src_code, disp_code)
+            totals_liq[tx.entity_source_id] -= convert(tx.amount, src_code)
 
         # Non‑liquid inflow/outflow
         # Rule: treat movements involving Outside as capital in/out regardless of
@@ -202,23 +223,15 @@ def get_entity_liquid_nonliquid_totals(
         # falling back to asset_type classification when not Outside.
         if tx.entity_destination_id and dest_amt is not None:
             if ttype == "transfer" and dest_outside:
-                totals_non[tx.entity_destination_id] += convert_amount(
-                    dest_amt, dest_code, disp_code
-                )
+                totals_non[tx.entity_destination_id] += convert(dest_amt, dest_code)
             elif dst_asset == "non_liquid":
-                totals_non[tx.entity_destination_id] += convert_amount(
-                    dest_amt, dest_code, disp_code
-                )
+                totals_non[tx.entity_destination_id] += convert(dest_amt, dest_code)
 
         if tx.entity_source_id and tx.amount is not None:
             if ttype == "transfer" and src_outside:
-                totals_non[tx.entity_source_id] -= convert_amount(
-                    tx.amount, src_code, disp_code
-                )
+                totals_non[tx.entity_source_id] -= convert(tx.amount, src_code)
             elif src_asset == "non_liquid":
-                totals_non[tx.entity_source_id] -= convert_amount(
-                    tx.amount, src_code, disp_code
-                )
+                totals_non[tx.entity_source_id] -= convert(tx.amount, src_code)
 
     # Merge into a single dict per entity id
     out: dict[int, dict[str, Decimal]] = {}
@@ -290,91 +303,201 @@ def get_account_entity_balance(account_id, entity_id, user=None):
       account's native currency (destination_amount is already in that currency
       when present).
     """
+    balances = get_account_entity_balances(
+        user=user, entity_id=entity_id, account_id=account_id
+    )
+    return balances.get((account_id, entity_id)) or Decimal("0")
+
+
+def get_account_entity_balances(user=None, entity_id=None, account_id=None):
+    """Return ``{(account_id, entity_id): balance}`` for every pocket.
+
+    Applies the same rules as :func:`get_account_entity_balance` but computes
+    all account/entity pairs in one grouped query. ``entity_id`` and
+    ``account_id`` optionally restrict the pairs returned. Balances are in
+    each account's native currency.
+    """
     from transactions.models import Transaction
     from transactions.constants import transaction_type_TX_MAP
+    from django.db.models import IntegerField
+    from django.db.models.functions import Lower, Trim
 
-    # Only consider top-level rows that touch this account+entity pair
-    qs = (
-        Transaction.objects.filter(
-            parent_transfer__isnull=True,
-            is_deleted=False,
-            is_reversal=False,
-        )
-        .filter(
-            (
-                Q(account_destination_id=account_id, entity_destination_id=entity_id)
-                | Q(account_source_id=account_id, entity_source_id=entity_id)
-            )
-        )
-        .select_related(
-            "account_source",
-            "account_destination",
-            "currency",
-            "account_destination__currency",
-        )
+    qs = Transaction.objects.filter(
+        parent_transfer__isnull=True,
+        is_deleted=False,
+        is_reversal=False,
     )
     if user is not None:
         qs = qs.filter(user=user)
-
+    if entity_id is not None:
+        qs = qs.filter(Q(entity_destination_id=entity_id) | Q(entity_source_id=entity_id))
+    if account_id is not None:
+        qs = qs.filter(
+            Q(account_destination_id=account_id) | Q(account_source_id=account_id)
+        )
     # Mirror list view behavior: exclude acquisition-linked rows soft-deleted
-    try:
-        qs = qs.exclude(acquisition_purchase__is_deleted=True).exclude(
-            acquisition_sale__is_deleted=True
+    qs = qs.exclude(acquisition_purchase__is_deleted=True).exclude(
+        acquisition_sale__is_deleted=True
+    )
+
+    def _liquid_keys(idx):
+        # Both the stored ("buy acquisition") and map ("buy_acquisition") forms
+        keys = [k for k, v in transaction_type_TX_MAP.items() if v[idx] == "liquid"]
+        return keys + [k.replace("_", " ") for k in keys]
+
+    def _is_liquid(field, idx):
+        blank = Q(**{f"{field}__isnull": True}) | Q(**{field: ""})
+        return Q(**{f"{field}__iexact": "liquid"}) | (
+            blank & Q(tx_key__in=_liquid_keys(idx))
         )
-    except Exception:
-        pass
 
-    def _is_outside(acct) -> bool:
-        if not acct:
-            return False
-        name = str(getattr(acct, "account_name", "")).strip().lower()
-        typ = str(getattr(acct, "account_type", "")).strip().lower()
-        return name == "outside" or typ == "outside"
+    def _flag(cond):
+        # Integer flags so negating them never trips over NULL joins
+        return Case(
+            When(cond, then=Value(1)), default=Value(0), output_field=IntegerField()
+        )
 
-    bal = Decimal("0")
-    for tx in qs:
-        ttype = (getattr(tx, "transaction_type", "") or "").lower()
-        dest_outside = _is_outside(getattr(tx, "account_destination", None))
-        src_outside = _is_outside(getattr(tx, "account_source", None))
+    def _outside(prefix):
+        return Q(**{f"{prefix}_name_key": "outside"}) | Q(
+            **{f"{prefix}_type_key": "outside"}
+        )
 
-        # Determine assets using DB fields with fallback to constants map
-        tx_key = (
-            (getattr(tx, "transaction_type", "") or "").replace(" ", "_").lower()
+    qs = qs.annotate(
+        tx_key=Lower("transaction_type"),
+        dst_name_key=Lower(Trim("account_destination__account_name")),
+        dst_type_key=Lower(Trim("account_destination__account_type")),
+        src_name_key=Lower(Trim("account_source__account_name")),
+        src_type_key=Lower(Trim("account_source__account_type")),
+    ).annotate(
+        is_transfer=_flag(Q(tx_key="transfer")),
+        dst_outside=_flag(_outside("dst")),
+        src_outside=_flag(_outside("src")),
+    )
+    inflow = _is_liquid("asset_type_destination", 3) & (
+        Q(is_transfer=0) | Q(dst_outside=0)
+    )
+    outflow = _is_liquid("asset_type_source", 2) & (
+        Q(is_transfer=0) | Q(src_outside=0)
+    )
+    rows = (
+        qs.values(
+            "account_destination_id",
+            "entity_destination_id",
+            "account_source_id",
+            "entity_source_id",
         )
-        tx_map = transaction_type_TX_MAP.get(tx_key)
-        src_asset_fallback = tx_map[2] if tx_map else ""
-        dst_asset_fallback = tx_map[3] if tx_map else ""
-        src_asset = (
-            (getattr(tx, "asset_type_source", "") or "").lower()
-        ) or src_asset_fallback
-        dst_asset = (
-            (getattr(tx, "asset_type_destination", "") or "").lower()
-        ) or dst_asset_fallback
-
-        # Inflow to this account+entity pair
-        if (
-            tx.account_destination_id == account_id
-            and tx.entity_destination_id == entity_id
-            and dst_asset == "liquid"
-            and not (ttype == "transfer" and dest_outside)
+        .annotate(
+            total_in=Sum(Coalesce("destination_amount", "amount"), filter=inflow),
+            total_out=Sum("amount", filter=outflow),
+        )
+        .order_by()
+    )
+
+    balances = {}
+    for row in rows:
+        dest = (row["account_destination_id"], row["entity_destination_id"])
+        src = (row["account_source_id"], row["entity_source_id"])
+        for (acc, ent), total, sign in (
+            (dest, row["total_in"], 1),
+            (src, row["total_out"], -1),
         ):
-            dest_amt = (
-                tx.destination_amount if tx.destination_amount is not None else tx.amount
-            )
-            if dest_amt is not None:
-                bal += dest_amt
+            if total is None or acc is None or ent is None:
+                continue
+            if entity_id is not None and ent != entity_id:
+                continue
+            if account_id is not None and acc != account_id:
+                continue
+            balances[(acc, ent)] = balances.get((acc, ent), Decimal("0")) + sign * total
+    return balances
+
+
+def _month_sequence(start_month, count=None, end_month=None):
+    """Return first-of-month dates from ``start_month`` for ``count`` months
+    or up to and including ``end_month``."""
+    seq = []
+    y, m = start_month.year, start_month.month
+    while True:
+        d = date(y, m, 1)
+        if count is not None and len(seq) >= count:
+            break
+        if end_month is not None and d > end_month:
+            break
+        seq.append(d)
+        m += 1
+        if m == 13:
+            m = 1
+            y += 1
+    return seq
+
+
+def _monthly_cash_flow(
+    q,
+    entity_id,
+    start_date,
+    months_seq,
+    *,
+    end=None,
+    currency=None,
+    outside_rules=True,
+    internal=None,
+    drop_empty=False,
+):
+    """Shared engine for the monthly cash-flow helpers.
+
+    The opening balance comes from one grouped aggregate over rows before
+    ``start_date``; the in-range rows are bucketed with ``TruncMonth`` in the
+    database. Both are summed per currency and converted once per bucket.
+    ``internal`` holds keyword arguments for ``exclude_internal_moves``.
+    """
+    from transactions.models import Transaction
+    from transactions.aggregates import (
+        cash_flow_measures,
+        exclude_internal_moves,
+        grouped_totals,
+        period_totals,
+        with_flow_flags,
+    )
+
+    base = exclude_internal_moves(Transaction.objects.filter(q), **(internal or {}))
+    if outside_rules:
+        base = with_flow_flags(base)
+    measures = cash_flow_measures(entity_id, outside_rules=outside_rules)
+
+    opening = grouped_totals(
+        base.filter(date__lt=start_date), None, measures, currency
+    )[None]
+    liquid_bal = opening["liquid_in"] - opening["liquid_out"]
+    non_liquid_bal = opening["non_liquid_in"] - opening["non_liquid_out"]
 
-        # Outflow from this account+entity pair
+    qs = base.filter(date__gte=start_date)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    month_map = period_totals(qs, measures, "month", currency)
+
+    summary = []
+    for d in months_seq:
+        row = month_map[d]
+        liquid_delta = row["liquid_in"] - row["liquid_out"]
+        non_liquid_delta = row["non_liquid_in"] - row["non_liquid_out"]
+        liquid_bal += liquid_delta
+        non_liquid_bal += non_liquid_delta
+        item = {
+            "month": d.strftime("%b"),
+            "income": row["income"],
+            "expenses": row["expenses"],
+            "liquid": liquid_bal,
+            "non_liquid": non_liquid_bal,
+        }
         if (
-            tx.account_source_id == account_id
-            and tx.entity_source_id == entity_id
-            and src_asset == "liquid"
-            and not (ttype == "transfer" and src_outside)
-            and tx.amount is not None
+            drop_empty
+            and item["income"] == 0
+            and item["expenses"] == 0
+            and liquid_delta == 0
+            and non_liquid_delta == 0
         ):
-            bal -= tx.amount
-
-    return bal or Decimal("0")
+            continue
+        summary.append(item)
+    return summary
 
 
 def get_monthly_cash_flow(
@@ -413,208 +536,17 @@ def get_monthly_cash_flow(
             y -= 1
     start_date = date(y, m, 1)
 
-    qs_initial = Transaction.objects.filter(q, date__lt=start_date).select_related(
-        "currency",
-        "account_destination__currency",
-        "account_destination",
-        "account_source",
+    # Skip only pure internal moves where the entity doesn't change and the
+    # asset class remains the same.
+    return _monthly_cash_flow(
+        q,
+        entity_id,
+        start_date,
+        _month_sequence(start_date, count=months),
+        currency=currency,
+        internal={"keep_asset_changes": True},
+        drop_empty=drop_empty,
     )
-    liquid_bal = Decimal("0")
-    non_liquid_bal = Decimal("0")
-
-    def amt_in(tx):
-        if (
-            getattr(tx, "destination_amount", None) is not None
-            and getattr(tx, "account_destination", None)
-            and getattr(tx.account_destination, "currency", None)
-        ):
-            return convert_to_base(
-                tx.destination_amount or Decimal("0"),
-                tx.account_destination.currency,
-                currency,
-                user=user,
-            )
-        return convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-
-    for tx in qs_initial:
-        # Skip only pure internal moves where the entity doesn't change and
-        # the asset class remains the same.
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        if same_entity:
-            src_t = (getattr(tx, "asset_type_source", "") or "").lower()
-            dst_t = (getattr(tx, "asset_type_destination", "") or "").lower()
-            if src_t == dst_t:
-                continue
-        # Apply side-aware initial balance contributions when filtering by entity
-        match_dest = entity_id is None or tx.entity_destination_id == entity_id
-        match_src = entity_id is None or tx.entity_source_id == entity_id
-        amt = convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-        ttype = (tx.transaction_type or "").lower()
-        dest_outside = bool(
-            getattr(tx, "account_destination", None)
-            and (
-                tx.account_destination.account_type == "Outside"
-                or tx.account_destination.account_name == "Outside"
-            )
-        )
-        src_outside = bool(
-            getattr(tx, "account_source", None)
-            and (
-                tx.account_source.account_type == "Outside"
-                or tx.account_source.account_name == "Outside"
-            )
-        )
-        if match_dest:
-            if (
-                not (ttype == "transfer" and dest_outside)
-                and (tx.asset_type_destination or "").lower() == "liquid"
-            ):
-                liquid_bal += amt_in(tx)
-        if match_src:
-            if (
-                not (ttype == "transfer" and src_outside)
-                and (tx.asset_type_source or "").lower() == "liquid"
-            ):
-                liquid_bal -= amt
-        if match_dest:
-            if ttype == "transfer" and dest_outside:
-                non_liquid_bal += amt_in(tx)
-            elif (tx.asset_type_destination or "").lower() == "non_liquid":
-                non_liquid_bal += amt_in(tx)
-        if match_src:
-            if ttype == "transfer" and src_outside:
-                non_liquid_bal -= amt
-            elif (tx.asset_type_source or "").lower() == "non_liquid":
-                non_liquid_bal -= amt
-
-    month_map: dict[date, dict] = {}
-    qs = (
-        Transaction.objects.filter(q, date__gte=start_date)
-        .select_related(
-            "currency",
-            "account_destination__currency",
-            "account_destination",
-            "account_source",
-        )
-        .order_by("date")
-    )
-    for tx in qs:
-        # Skip only pure internal moves where the entity doesn't change and
-        # the asset class remains the same.
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        if same_entity:
-            src_t = (getattr(tx, "asset_type_source", "") or "").lower()
-            dst_t = (getattr(tx, "asset_type_destination", "") or "").lower()
-            if src_t == dst_t:
-                continue
-        match_dest = entity_id is None or tx.entity_destination_id == entity_id
-        match_src = entity_id is None or tx.entity_source_id == entity_id
-        d = date(tx.date.year, tx.date.month, 1)
-        row = month_map.setdefault(
-            d,
-            {
-                "income": Decimal("0"),
-                "expenses": Decimal("0"),
-                "liquid_delta": Decimal("0"),
-                "non_liquid_delta": Decimal("0"),
-            },
-        )
-        amt_src = convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-        amt_dest = amt_in(tx)
-        if match_dest and (tx.transaction_type_destination or "").lower() == "income":
-            row["income"] += amt_dest
-        if match_src and (tx.transaction_type_source or "").lower() == "expense":
-            row["expenses"] += amt_src
-        ttype = (tx.transaction_type or "").lower()
-        dest_outside = bool(
-            getattr(tx, "account_destination", None)
-            and (
-                tx.account_destination.account_type == "Outside"
-                or tx.account_destination.account_name == "Outside"
-            )
-        )
-        src_outside = bool(
-            getattr(tx, "account_source", None)
-            and (
-                tx.account_source.account_type == "Outside"
-                or tx.account_source.account_name == "Outside"
-            )
-        )
-        if match_dest:
-            if (
-                not (ttype == "transfer" and dest_outside)
-                and (tx.asset_type_destination or "").lower() == "liquid"
-            ):
-                row["liquid_delta"] += amt_dest
-            if ttype == "transfer" and dest_outside:
-                row["non_liquid_delta"] += amt_dest
-            elif (tx.asset_type_destination or "").lower() == "non_liquid":
-                row["non_liquid_delta"] += amt_dest
-        if match_src:
-            if (
-                not (ttype == "transfer" and src_outside)
-                and (tx.asset_type_source or "").lower() == "liquid"
-            ):
-                row["liquid_delta"] -= amt_src
-            if ttype == "transfer" and src_outside:
-                row["non_liquid_delta"] -= amt_src
-            elif (tx.asset_type_source or "").lower() == "non_liquid":
-                row["non_liquid_delta"] -= amt_src
-
-    months_seq = []
-    y = start_date.year
-    m = start_date.month
-    for _ in range(months):
-        months_seq.append(date(y, m, 1))
-        m += 1
-        if m == 13:
-            m = 1
-            y += 1
-
-    summary = []
-    for d in months_seq:
-        row = month_map.get(
-            d,
-            {
-                "income": Decimal("0"),
-                "expenses": Decimal("0"),
-                "liquid_delta": Decimal("0"),
-                "non_liquid_delta": Decimal("0"),
-            },
-        )
-        liquid_bal += row["liquid_delta"]
-        non_liquid_bal += row["non_liquid_delta"]
-        item = {
-            "month": d.strftime("%b"),
-            "income": row["income"],
-            "expenses": row["expenses"],
-            "liquid": liquid_bal,
-            "non_liquid": non_liquid_bal,
-        }
-        if (
-            drop_empty
-            and item["income"] == 0
-            and item["expenses"] == 0
-            and row["liquid_delta"] == 0
-            and row["non_liquid_delta"] == 0
-        ):
-            continue
-        summary.append(item)
-    return summary
 
 
 def get_monthly_summary(entity_id=None, user=None, currency=None):
@@ -624,9 +556,6 @@ def get_monthly_summary(entity_id=None, user=None, currency=None):
     ``currency`` is ``None`` the original amounts are used.
     """
 
-    from django.db.models import Q
-    from django.utils import timezone
-    from datetime import date
     from transactions.models import Transaction
 
     today = timezone.now().date()
@@ -648,153 +577,18 @@ def get_monthly_summary(entity_id=None, user=None, currency=None):
     if entity_id and not Transaction.objects.filter(q).exists():
         return []
 
-    qs_initial = Transaction.objects.filter(q, date__lt=start_date).select_related(
-        "currency",
-        "account_destination__currency",
-        "account_destination",
-        "account_source",
+    # Skip only pure internal moves (same entity or same account) where the
+    # asset class doesn't change. Outside transfers follow the plain asset
+    # classification here.
+    return _monthly_cash_flow(
+        q,
+        entity_id,
+        start_date,
+        _month_sequence(start_date, count=12),
+        currency=currency,
+        outside_rules=False,
+        internal={"accounts": True, "keep_asset_changes": True},
     )
-    liquid_bal = Decimal("0")
-    non_liquid_bal = Decimal("0")
-
-    def _ms_amt_in(tx):
-        if (
-            getattr(tx, "destination_amount", None) is not None
-            and getattr(tx, "account_destination", None)
-            and getattr(tx.account_destination, "currency", None)
-        ):
-            return convert_to_base(
-                tx.destination_amount or Decimal("0"),
-                tx.account_destination.currency,
-                currency,
-                user=user,
-            )
-        return convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-
-    for tx in qs_initial:
-        # Skip only pure internal moves where asset class doesn't change.
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        same_account = (
-            getattr(tx, "account_source_id", None)
-            and getattr(tx, "account_destination_id", None)
-            and tx.account_source_id == tx.account_destination_id
-        )
-        if same_entity or same_account:
-            src_t = (getattr(tx, "asset_type_source", "") or "").lower()
-            dst_t = (getattr(tx, "asset_type_destination", "") or "").lower()
-            if src_t == dst_t:
-                continue
-        match_dest = entity_id is None or tx.entity_destination_id == entity_id
-        match_src = entity_id is None or tx.entity_source_id == entity_id
-        amt_src = convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-        amt_dest = _ms_amt_in(tx)
-        if match_dest and (tx.asset_type_destination or "").lower() == "liquid":
-            liquid_bal += amt_dest
-        if match_src and (tx.asset_type_source or "").lower() == "liquid":
-            liquid_bal -= amt_src
-        if match_dest and (tx.asset_type_destination or "").lower() == "non_liquid":
-            non_liquid_bal += amt_dest
-        if match_src and (tx.asset_type_source or "").lower() == "non_liquid":
-            non_liquid_bal -= amt_src
-
-    month_map: dict[date, dict] = {}
-    qs = (
-        Transaction.objects.filter(q, date__gte=start_date)
-        .select_related(
-            "currency",
-            "account_destination__currency",
-            "account_destination",
-            "account_source",
-        )
-        .order_by("date")
-    )
-    for tx in qs:
-        # Skip only pure internal moves where asset class doesn't change.
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        same_account = (
-            getattr(tx, "account_source_id", None)
-            and getattr(tx, "account_destination_id", None)
-            and tx.account_source_id == tx.account_destination_id
-        )
-        if same_entity or same_account:
-            src_t = (getattr(tx, "asset_type_source", "") or "").lower()
-            dst_t = (getattr(tx, "asset_type_destination", "") or "").lower()
-            if src_t == dst_t:
-                continue
-        match_dest = entity_id is None or tx.entity_destination_id == entity_id
-        match_src = entity_id is None or tx.entity_source_id == entity_id
-        d = date(tx.date.year, tx.date.month, 1)
-        row = month_map.setdefault(
-            d,
-            {
-                "income": Decimal("0"),
-                "expenses": Decimal("0"),
-                "liquid_delta": Decimal("0"),
-                "non_liquid_delta": Decimal("0"),
-            },
-        )
-        amt_src = convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-        amt_dest = _ms_amt_in(tx)
-        if match_dest and (tx.transaction_type_destination or "").lower() == "income":
-            row["income"] += amt_dest
-        if match_src and (tx.transaction_type_source or "").lower() == "expense":
-            row["expenses"] += amt_src
-        if match_dest and (tx.asset_type_destination or "").lower() == "liquid":
-            row["liquid_delta"] += amt_dest
-        if match_src and (tx.asset_type_source or "").lower() == "liquid":
-            row["liquid_delta"] -= amt_src
-        if match_dest and (tx.asset_type_destination or "").lower() == "non_liquid":
-            row["non_liquid_delta"] += amt_dest
-        if match_src and (tx.asset_type_source or "").lower() == "non_liquid":
-            row["non_liquid_delta"] -= amt_src
-
-    months = []
-    y = start_date.year
-    m = start_date.month
-    for _ in range(12):
-        months.append(date(y, m, 1))
-        m += 1
-        if m == 13:
-            m = 1
-            y += 1
-
-    summary = []
-    for d in months:
-        row = month_map.get(
-            d,
-            {
-                "income": Decimal("0"),
-                "expenses": Decimal("0"),
-                "liquid_delta": Decimal("0"),
-                "non_liquid_delta": Decimal("0"),
-            },
-        )
-        liquid_bal += row["liquid_delta"]
-        non_liquid_bal += row["non_liquid_delta"]
-        summary.append(
-            {
-                "month": d.strftime("%b"),
-                "income": row["income"],
-                "expenses": row["expenses"],
-                "liquid": liquid_bal,
-                "non_liquid": non_liquid_bal,
-            }
-        )
-    return summary
 
 
 def parse_range_params(request, default_start, default_end=None):
@@ -841,193 +635,14 @@ def get_monthly_cash_flow_range(
     start_month = date(start.year, start.month, 1)
     end_month = date(end.year, end.month, 1)
 
-    months_seq = []
-    y, m = start_month.year, start_month.month
-    while (y < end_month.year) or (y == end_month.year and m <= end_month.month):
-        months_seq.append(date(y, m, 1))
-        m += 1
-        if m == 13:
-            m = 1
-            y += 1
-
-    qs_initial = Transaction.objects.filter(q, date__lt=start_month).select_related(
-        "currency",
-        "account_destination__currency",
-        "account_destination",
-        "account_source",
-    )
-    liquid_bal = Decimal("0")
-    non_liquid_bal = Decimal("0")
-
-    def _range_amt_in(tx):
-        if (
-            getattr(tx, "destination_amount", None) is not None
-            and getattr(tx, "account_destination", None)
-            and getattr(tx.account_destination, "currency", None)
-        ):
-            return convert_to_base(
-                tx.destination_amount or Decimal("0"),
-                tx.account_destination.currency,
-                currency,
-                user=user,
-            )
-        return convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-
-    for tx in qs_initial:
-        # Skip only when the entity does not change (pure internal move)
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        if same_entity:
-            continue
-        match_dest = entity_id is None or tx.entity_destination_id == entity_id
-        match_src = entity_id is None or tx.entity_source_id == entity_id
-        amt = convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-        ttype = (tx.transaction_type or "").lower()
-        dest_outside = bool(
-            getattr(tx, "account_destination", None)
-            and (
-                tx.account_destination.account_type == "Outside"
-                or tx.account_destination.account_name == "Outside"
-            )
-        )
-        src_outside = bool(
-            getattr(tx, "account_source", None)
-            and (
-                tx.account_source.account_type == "Outside"
-                or tx.account_source.account_name == "Outside"
-            )
-        )
-        if match_dest:
-            if (
-                not (ttype == "transfer" and dest_outside)
-                and (tx.asset_type_destination or "").lower() == "liquid"
-            ):
-                liquid_bal += _range_amt_in(tx)
-            if ttype == "transfer" and dest_outside:
-                non_liquid_bal += _range_amt_in(tx)
-            elif (tx.asset_type_destination or "").lower() == "non_liquid":
-                non_liquid_bal += _range_amt_in(tx)
-        if match_src:
-            if (
-                not (ttype == "transfer" and src_outside)
-                and (tx.asset_type_source or "").lower() == "liquid"
-            ):
-                liquid_bal -= amt
-            if ttype == "transfer" and src_outside:
-                non_liquid_bal -= amt
-            elif (tx.asset_type_source or "").lower() == "non_liquid":
-                non_liquid_bal -= amt
-
-    month_map: dict[date, dict] = {}
-    qs = (
-        Transaction.objects.filter(q, date__range=[start_month, end])
-        .select_related(
-            "currency",
-            "account_destination__currency",
-            "account_destination",
-            "account_source",
-        )
-        .order_by("date")
+    # Skip only when the entity does not change (pure internal move)
+    return _monthly_cash_flow(
+        q,
+        entity_id,
+        start_month,
+        _month_sequence(start_month, end_month=end_month),
+        end=end,
+        currency=currency,
+        internal={"keep_asset_changes": False},
+        drop_empty=drop_empty,
     )
-    for tx in qs:
-        # Skip only when the entity does not change (pure internal move)
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        if same_entity:
-            continue
-        match_dest = entity_id is None or tx.entity_destination_id == entity_id
-        match_src = entity_id is None or tx.entity_source_id == entity_id
-        d = date(tx.date.year, tx.date.month, 1)
-        row = month_map.setdefault(
-            d,
-            {
-                "income": Decimal("0"),
-                "expenses": Decimal("0"),
-                "liquid_delta": Decimal("0"),
-                "non_liquid_delta": Decimal("0"),
-            },
-        )
-        amt_src = convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, currency, user=user
-        )
-        amt_dest = _range_amt_in(tx)
-        if match_dest and (tx.transaction_type_destination or "").lower() == "income":
-            row["income"] += amt_dest
-        if match_src and (tx.transaction_type_source or "").lower() == "expense":
-            row["expenses"] += amt_src
-        ttype = (tx.transaction_type or "").lower()
-        dest_outside = bool(
-            getattr(tx, "account_destination", None)
-            and (
-                tx.account_destination.account_type == "Outside"
-                or tx.account_destination.account_name == "Outside"
-            )
-        )
-        src_outside = bool(
-            getattr(tx, "account_source", None)
-            and (
-                tx.account_source.account_type == "Outside"
-                or tx.account_source.account_name == "Outside"
-            )
-        )
-        if match_dest:
-            if (
-                not (ttype == "transfer" and dest_outside)
-                and (tx.asset_type_destination or "").lower() == "liquid"
-            ):
-                row["liquid_delta"] += amt_dest
-            if ttype == "transfer" and dest_outside:
-                row["non_liquid_delta"] += amt_dest
-            elif (tx.asset_type_destination or "").lower() == "non_liquid":
-                row["non_liquid_delta"] += amt_dest
-        if match_src:
-            if (
-                not (ttype == "transfer" and src_outside)
-                and (tx.asset_type_source or "").lower() == "liquid"
-            ):
-                row["liquid_delta"] -= amt_src
-            if ttype == "transfer" and src_outside:
-                row["non_liquid_delta"] -= amt_src
-            elif (tx.asset_type_source or "").lower() == "non_liquid":
-                row["non_liquid_delta"] -= amt_src
-
-    summary = []
-    for d in months_seq:
-        row = month_map.get(
-            d,
-            {
-                "income": Decimal("0"),
-                "expenses": Decimal("0"),
-                "liquid_delta": Decimal("0"),
-                "non_liquid_delta": Decimal("0"),
-            },
-        )
-        liquid_bal += row["liquid_delta"]
-        non_liquid_bal += row["non_liquid_delta"]
-        item = {
-            "month": d.strftime("%b"),
-            "income": row["income"],
-            "expenses": row["expenses"],
-            "liquid": liquid_bal,
-            "non_liquid": non_liquid_bal,
-        }
-        if (
-            drop_empty
-            and item["income"] == 0
-            and item["expenses"] == 0
-            and row["liquid_delta"] == 0
-            and row["non_liquid_delta"] == 0
-        ):
-            continue
-        summary.append(item)
-    return summary
@@ -0,0 +1,270 @@
+"""Benchmarks for the ledger, report and validation hot paths.
+
+:func:`run` seeds a synthetic ledger of the requested size (see
+:mod:`transactions.synthetic`) and measures every entry point returned by
+:func:`entry_points`: the dashboard page and its JSON endpoints, the entity
+and transaction lists, balance validation, corrections, bulk deletes,
+``Transaction.save`` and the columnar ledger snapshot. After one warm-up
+call, so process-level caches do not depend on which entry points ran
+before, each result holds the number of queries of one call, the median
+wall time over ``repeat`` calls and the peak Python memory of one extra
+call traced with :mod:`tracemalloc`.
+
+Entry points that write run inside a transaction that is rolled back, so
+repeated calls see the same data. :func:`compare` checks results against
+a stored baseline: any extra query is a regression, wall time and memory
+only beyond a relative tolerance and a small absolute noise floor.
+
+``manage.py benchmark`` runs the suite against a throwaway test database;
+``pytest -m benchmark`` runs it from the test suite.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from typing import Callable, Iterable, Optional
+
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Endpoints of dashboard/api.py, by URL name
+DASHBOARD_API = [
+    "dashboard:dashboard-data",
+    "dashboard:top10-data",
+    "dashboard:category-summary",
+    "dashboard:entity-summary",
+    "dashboard:analytics-data",
+    "dashboard:forecast-data",
+    "dashboard:monthly-audit",
+]
+
+# Relative slack on wall time and memory before compare() flags a result
+DEFAULT_TOLERANCE = 0.25
+# Differences below these are noise whatever the ratio
+MIN_WALL_DELTA_MS = 5.0
+MIN_PEAK_DELTA_KB = 64.0
+
+
+def _rolled_back(fn: Callable) -> Callable:
+    def call():
+        with transaction.atomic():
+            result = fn()
+            transaction.set_rollback(True)
+        return result
+
+    return call
+
+
+def _get(client: Client, url: str, params: Optional[dict] = None) -> Callable:
+    def call():
+        resp = client.get(url, params or {})
+        if resp.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {resp.status_code}")
+        return resp
+
+    return call
+
+
+def seed(size: int, seed_value: int = 0, prefix: str = "bench"):
+    """Generate a one-user ledger of ``size`` transactions over the last year."""
+    from django.contrib.auth import get_user_model
+
+    from transactions.synthetic import generate
+
+    username = f"{prefix}-{seed_value}-1"
+    User = get_user_model()
+    if not User.objects.filter(username=username).exists():
+        generate(
+            users=1,
+            transactions=size,
+            seed=seed_value,
+            start=timezone.localdate() - timedelta(days=364),
+            days=365,
+            prefix=prefix,
+        )
+    return User.objects.get(username=username)
+
+
+def entry_points(user) -> list:
+    """Return ``[(name, callable)]`` for the benchmarked entry points."""
+    from entities.models import Entity
+    from transactions.models import Transaction
+    from transactions.services import (
+        correct_transaction,
+        validate_no_future_negative_balances,
+    )
+    from transactions.snapshot import build_snapshot
+
+    client = Client()
+    client.force_login(user)
+    entity = Entity.objects.filter(user=user, is_visible=True, system_hidden=False).first()
+    expenses = (
+        Transaction.objects.filter(user=user, transaction_type="expense", is_reversal=False)
+        .select_related(
+            "account_source", "account_destination", "entity_source", "entity_destination"
+        )
+        .order_by("-date", "-pk")
+    )
+    original = expenses.first()
+
+    def replacement():
+        return {
+            "user": user,
+            "date": original.date,
+            "description": "benchmark correction",
+            "transaction_type": "expense",
+            "amount": original.amount - Decimal("0.01"),
+            "account_source": original.account_source,
+            "account_destination": original.account_destination,
+            "entity_source": original.entity_source,
+            "entity_destination": original.entity_destination,
+        }
+
+    def validate():
+        validate_no_future_negative_balances(original, replacement())
+
+    def correct():
+        correct_transaction(Transaction.objects.get(pk=original.pk), replacement(), actor=user)
+
+    bulk_ids = [str(pk) for pk in expenses.values_list("pk", flat=True)[:50]]
+
+    def bulk_delete():
+        client.post(reverse("transactions:bulk_action"), {"selected_ids": bulk_ids})
+
+    def save():
+        Transaction(
+            user=user,
+            date=original.date,
+            description="benchmark save",
+            transaction_type="expense",
+            amount=Decimal("1.00"),
+            account_source=original.account_source,
+            account_destination=original.account_destination,
+            entity_source=original.entity_source,
+            entity_destination=original.entity_destination,
+        ).save()
+
+    def snapshot():
+        # Built uncached: a read plus the columnar rollups
+        snap = build_snapshot(user)
+        snap.entity_totals()
+        snap.monthly_totals(
+            {
+                "income": ("destination", snap.match("type_destination", "income")),
+                "expenses": ("source", snap.match("type_source", "expense")),
+            },
+            where=snap["top_level"],
+        )
+        snap.running_balance(original.account_source_id)
+
+    points = [("dashboard", _get(client, reverse("dashboard:dashboard")))]
+    today = timezone.localdate()
+    params = {
+        "dashboard:monthly-audit": {
+            "start": (today - timedelta(days=364)).isoformat(),
+            "end": today.isoformat(),
+        }
+    }
+    points += [
+        (name.split(":")[1], _get(client, reverse(name), params.get(name)))
+        for name in DASHBOARD_API
+    ]
+    points += [
+        ("entity_list", _get(client, reverse("entities:list"))),
+        (
+            "entity_accounts",
+            _get(client, reverse("entities:accounts", args=[entity.pk])),
+        ),
+        ("transaction_list", _get(client, reverse("transactions:transaction_list"))),
+        ("validate_no_future_negative_balances", validate),
+        ("correct_transaction", _rolled_back(correct)),
+        ("bulk_delete", _rolled_back(bulk_delete)),
+        ("transaction_save", _rolled_back(save)),
+        ("ledger_snapshot", snapshot),
+    ]
+    return points
+
+
+def measure(fn: Callable, repeat: int = 3) -> dict:
+    """Return ``{"queries", "wall_ms", "peak_kb"}`` for ``fn``."""
+    fn()
+    walls = []
+    queries = None
+    for _ in range(max(repeat, 1)):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn()
+            walls.append((time.perf_counter() - start) * 1000)
+        if queries is None:
+            queries = len(ctx)
+    # Traced separately: tracemalloc slows everything it watches
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "queries": queries,
+        "wall_ms": round(statistics.median(walls), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(
+    sizes: Iterable[int],
+    *,
+    seed_value: int = 0,
+    repeat: int = 3,
+    only: Optional[Iterable[str]] = None,
+) -> list:
+    """Seed one ledger per size and measure the entry points against it.
+
+    Returns ``[{"size", "name", "queries", "wall_ms", "peak_kb"}]``.
+    """
+    only = set(only or ())
+    results = []
+    for size in sizes:
+        user = seed(size, seed_value, prefix=f"bench{size}")
+        for name, fn in entry_points(user):
+            if only and name not in only:
+                continue
+            results.append({"size": size, "name": name, **measure(fn, repeat)})
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """Return the regressions of ``results`` against ``baseline``.
+
+    Each regression is ``{"size", "name", "metric", "baseline", "current"}``.
+    Entry points missing from the baseline are not compared.
+    """
+    base = {(r["size"], r["name"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = base.get((r["size"], r["name"]))
+        if b is None:
+            continue
+        for metric, limit in (
+            ("queries", b["queries"]),
+            ("wall_ms", max(b["wall_ms"] * (1 + tolerance), b["wall_ms"] + MIN_WALL_DELTA_MS)),
+            ("peak_kb", max(b["peak_kb"] * (1 + tolerance), b["peak_kb"] + MIN_PEAK_DELTA_KB)),
+        ):
+            if r[metric] > limit:
+                regressions.append(
+                    {
+                        "size": r["size"],
+                        "name": r["name"],
+                        "metric": metric,
+                        "baseline": b[metric],
+                        "current": r[metric],
+                    }
+                )
+    return regressions
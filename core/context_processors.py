@@ -5,7 +5,9 @@ from utils.currency import get_currency_symbol
 def display_currency(request):
     """Provide display currency code and symbol for templates."""
     code = getattr(request, "display_currency", settings.BASE_CURRENCY)
-    symbol = get_currency_symbol(code)
+    symbol = getattr(request, "display_currency_symbol", None) or get_currency_symbol(
+        code
+    )
     return {
         "display_currency": code,
         "display_currency_symbol": symbol,
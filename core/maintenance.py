@@ -0,0 +1,378 @@
+"""Base class for chunked bulk-maintenance commands.
+
+Repair and backfill commands used to walk every row, save each one on its
+own and run in one long transaction (or none). :class:`ChunkedCommand`
+gives them a shared loop instead:
+
+* keyset iteration: rows are read ``chunk_size`` at a time ordered by
+  primary key (``WHERE pk > last``), so every chunk costs the same however
+  far into the table the scan is;
+* batched writes: :meth:`~ChunkedCommand.update`,
+  :meth:`~ChunkedCommand.create` and :meth:`~ChunkedCommand.delete`
+  collect changes that are flushed with one ``bulk_update`` per set of
+  changed fields, one ``bulk_create`` per model and one ``DELETE`` per
+  model; :meth:`~ChunkedCommand.defer` queues work that needs the model's
+  own ``save()`` or a service function;
+* one transaction per chunk, so a failure loses at most one chunk;
+* checkpoints: after each committed chunk the last key is written to
+  ``MAINTENANCE_CHECKPOINT_DIR`` and ``--resume`` continues from it;
+* ``--dry-run`` (or the command's ``apply_flag`` left off) prints the
+  diff of every change and rolls each chunk back;
+* progress and throughput after every chunk;
+* ``--workers N`` fans the scan out over N processes, one user at a time.
+
+Subclasses implement :meth:`~ChunkedCommand.get_queryset` and
+:meth:`~ChunkedCommand.process_chunk`.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from importlib import import_module
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+# Options every ChunkedCommand defines; they do not tie a checkpoint to a run
+_BASE_OPTIONS = {
+    "chunk_size",
+    "dry_run",
+    "apply",
+    "resume",
+    "workers",
+    "limit",
+    "verbosity",
+    "settings",
+    "pythonpath",
+    "traceback",
+    "no_color",
+    "force_color",
+    "skip_checks",
+    "stdout",
+    "stderr",
+}
+
+
+@dataclass
+class ScanStats:
+    """Totals of one scan; merged across fan-out workers."""
+
+    scanned: int = 0
+    changed: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    def merge(self, other: "ScanStats") -> None:
+        self.scanned += other.scanned
+        self.changed += other.changed
+        self.chunks += other.chunks
+        self.seconds += other.seconds
+
+    @property
+    def rate(self) -> float:
+        return self.scanned / self.seconds if self.seconds else 0.0
+
+
+def checkpoint_dir() -> Path:
+    return Path(
+        getattr(
+            settings,
+            "MAINTENANCE_CHECKPOINT_DIR",
+            Path(settings.BASE_DIR) / "logs" / "maintenance",
+        )
+    )
+
+
+def _scan_in_worker(module: str, options: dict, user_id) -> ScanStats:
+    # Runs in a forked process; each process opens its own connections
+    command = import_module(module).Command()
+    command.setup(options)
+    return command.scan(options, user_id)
+
+
+class ChunkedCommand(BaseCommand):
+    """Management command that repairs rows chunk by chunk."""
+
+    chunk_size = 500
+    # Flag that applies changes; when set the command dry-runs by default
+    # (e.g. "--commit") instead of offering --dry-run
+    apply_flag: Optional[str] = None
+    # Field the fan-out partitions rows by
+    user_field = "user_id"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=self.chunk_size,
+            help=f"Rows read and written per transaction (default {self.chunk_size}).",
+        )
+        if self.apply_flag:
+            parser.add_argument(
+                self.apply_flag,
+                dest="apply",
+                action="store_true",
+                help="Apply changes. Omit to run in dry-run mode.",
+            )
+        else:
+            parser.add_argument(
+                "--dry-run",
+                action="store_true",
+                help="Print the changes without writing them.",
+            )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue from the checkpoint of an interrupted run.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes to fan the scan out over, one user at a time.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Stop after scanning N rows (0 = all).",
+        )
+
+    # ---------------- hooks ----------------
+    def prepare(self, options) -> None:
+        """Validate options and resolve lookups once; raise CommandError."""
+
+    def get_queryset(self, options):
+        raise NotImplementedError
+
+    def process_chunk(self, rows, options) -> None:
+        """Inspect ``rows`` and record changes with update/create/defer."""
+        raise NotImplementedError
+
+    def after_chunk(self, objects) -> None:
+        """Called inside the chunk transaction with the objects written or deleted."""
+
+    def report(self, stats: ScanStats, options) -> None:
+        verb = "would change" if self.dry_run else "changed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scanned {stats.scanned} rows in {stats.chunks} chunk(s); "
+                f"{verb} {stats.changed} ({stats.rate:.0f} rows/s)."
+            )
+        )
+
+    # ---------------- recording changes ----------------
+    def update(self, obj, **fields) -> bool:
+        """Set ``fields`` on ``obj`` and queue a bulk update of the changed ones."""
+        diffs = {
+            name: (getattr(obj, name), value)
+            for name, value in fields.items()
+            if getattr(obj, name) != value
+        }
+        if not diffs:
+            return False
+        for name, (_, value) in diffs.items():
+            setattr(obj, name, value)
+        self._updates.setdefault((type(obj), tuple(sorted(diffs))), []).append(obj)
+        self._touched.append(obj)
+        self._diff(
+            f"{type(obj).__name__} {obj.pk}: "
+            + ", ".join(f"{name}: {old!s} -> {new!s}" for name, (old, new) in diffs.items())
+        )
+        return True
+
+    def create(self, obj, label: Optional[str] = None) -> None:
+        """Queue ``obj`` for a bulk create."""
+        self._creates.setdefault(type(obj), []).append(obj)
+        self._touched.append(obj)
+        self._diff(f"+ {type(obj).__name__}: {label or obj}")
+
+    def delete(self, objs, label: str) -> None:
+        """Queue ``objs`` (instances of one model) for a batched delete."""
+        objs = list(objs)
+        if objs:
+            self._deletes.setdefault(type(objs[0]), []).extend(o.pk for o in objs)
+            self._touched.extend(objs)
+            self._diff(f"- {label}")
+
+    def defer(self, action: Callable[[], object], label: Union[str, Sequence[str]]) -> None:
+        """Queue ``action`` to run in the chunk transaction (skipped on dry runs).
+
+        ``label`` may list several changes made by one batched action; each
+        is printed and counted on its own.
+        """
+        self._actions.append(action)
+        for line in [label] if isinstance(label, str) else label:
+            self._diff(f"* {line}")
+
+    def _diff(self, line: str) -> None:
+        self._changes += 1
+        if self.verbosity >= 2 or self.dry_run:
+            self.stdout.write(line)
+
+    def _reset_pending(self) -> None:
+        self._updates: dict = {}
+        self._creates: dict = {}
+        self._deletes: dict = {}
+        self._actions: list = []
+        self._touched: list = []
+        self._changes = 0
+
+    def _flush(self, batch_size: int) -> None:
+        for (model, fields), objs in self._updates.items():
+            model._base_manager.bulk_update(objs, list(fields), batch_size=batch_size)
+        for model, objs in self._creates.items():
+            model._base_manager.bulk_create(objs, batch_size=batch_size)
+        for model, pks in self._deletes.items():
+            for i in range(0, len(pks), batch_size):
+                model._base_manager.filter(pk__in=pks[i : i + batch_size]).delete()
+        for action in self._actions:
+            action()
+        self.after_chunk(self._touched)
+
+    # ---------------- checkpoints ----------------
+    def _checkpoint_path(self, user_id) -> Path:
+        name = self.__module__.rsplit(".", 1)[-1]
+        suffix = "" if user_id is None else f"-user{user_id}"
+        return checkpoint_dir() / f"{name}{suffix}.json"
+
+    @staticmethod
+    def _scan_options(options) -> dict:
+        return {
+            k: v if isinstance(v, (int, float, str, bool, type(None))) else str(v)
+            for k, v in sorted(options.items())
+            if k not in _BASE_OPTIONS
+        }
+
+    def _load_checkpoint(self, user_id, options) -> Optional[dict]:
+        path = self._checkpoint_path(user_id)
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        if data.get("options") != self._scan_options(options):
+            raise CommandError(
+                f"Checkpoint {path} was written with other options; "
+                "rerun with them or without --resume."
+            )
+        return data
+
+    def _save_checkpoint(self, user_id, options, last_pk, stats: ScanStats) -> None:
+        path = self._checkpoint_path(user_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"last_pk": last_pk, "options": self._scan_options(options), **asdict(stats)}
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(path)
+
+    # ---------------- running ----------------
+    def setup(self, options) -> None:
+        self.verbosity = options.get("verbosity", 1)
+        self.dry_run = (
+            not options.get("apply") if self.apply_flag else bool(options.get("dry_run"))
+        )
+        self._reset_pending()
+        self.prepare(options)
+
+    def handle(self, *args, **options):
+        self.setup(options)
+        if self.dry_run:
+            self.stdout.write(self.style.NOTICE("Dry run: no changes will be written."))
+        if options["workers"] > 1:
+            stats = self._fan_out(options)
+        else:
+            stats = self.scan(options)
+        self.report(stats, options)
+
+    def scan(self, options, user_id=None, *, null_user=False) -> ScanStats:
+        """Scan the queryset (or one user's share of it) chunk by chunk."""
+        qs = self.get_queryset(options)
+        if null_user:
+            qs = qs.filter(**{f"{self.user_field}__isnull": True})
+        elif user_id is not None:
+            qs = qs.filter(**{self.user_field: user_id})
+        stats = ScanStats()
+        last_pk = None
+        if options.get("resume"):
+            checkpoint = self._load_checkpoint(user_id, options)
+            if checkpoint:
+                last_pk = checkpoint["last_pk"]
+                stats = ScanStats(
+                    checkpoint["scanned"], checkpoint["changed"], checkpoint["chunks"]
+                )
+                self.stdout.write(f"Resuming after pk {last_pk} ({stats.scanned} rows done).")
+        previous_seconds = stats.seconds
+        size = max(options.get("chunk_size") or self.chunk_size, 1)
+        limit = options.get("limit") or 0
+        prefix = "" if user_id is None else f"[user {user_id}] "
+        started = time.monotonic()
+        while not limit or stats.scanned < limit:
+            page = qs.order_by("pk")
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            take = min(size, limit - stats.scanned) if limit else size
+            rows = list(page[:take])
+            if not rows:
+                break
+            self._reset_pending()
+            with transaction.atomic():
+                self.process_chunk(rows, options)
+                if self.dry_run:
+                    transaction.set_rollback(True)
+                else:
+                    self._flush(size)
+            last_pk = rows[-1].pk
+            stats.scanned += len(rows)
+            stats.changed += self._changes
+            stats.chunks += 1
+            stats.seconds = previous_seconds + time.monotonic() - started
+            if not self.dry_run:
+                self._save_checkpoint(user_id, options, last_pk, stats)
+            if self.verbosity >= 1:
+                self.stdout.write(
+                    f"{prefix}chunk {stats.chunks}: {stats.scanned} scanned, "
+                    f"{stats.changed} changed, {stats.rate:.0f} rows/s"
+                )
+        if not self.dry_run:
+            self._checkpoint_path(user_id).unlink(missing_ok=True)
+        return stats
+
+    def _fan_out(self, options) -> ScanStats:
+        qs = self.get_queryset(options).order_by()
+        user_ids = sorted(
+            u for u in qs.values_list(self.user_field, flat=True).distinct() if u is not None
+        )
+        started = time.monotonic()
+        stats = ScanStats()
+        # Rows without a user are few; scan them here
+        stats.merge(self.scan(options, null_user=True))
+        can_fork = "fork" in multiprocessing.get_all_start_methods() and not (
+            connection.vendor == "sqlite" and connection.is_in_memory_db()
+        )
+        if not can_fork:
+            # Other processes cannot see this database; one user at a time
+            for user_id in user_ids:
+                stats.merge(self.scan(options, user_id))
+            stats.seconds = time.monotonic() - started
+            return stats
+
+        options = {k: v for k, v in options.items() if k not in ("stdout", "stderr")}
+        # Forked children must not share the parent's sockets
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            futures = [
+                pool.submit(_scan_in_worker, self.__module__, options, user_id)
+                for user_id in user_ids
+            ]
+            for future in as_completed(futures):
+                stats.merge(future.result())
+        stats.seconds = time.monotonic() - started
+        return stats
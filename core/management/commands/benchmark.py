@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from core.bench import DEFAULT_TOLERANCE, compare, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic ledgers in a throwaway test database and time the "
+        "dashboard, list, validation and write hot paths. Prints JSON with "
+        "query count, wall time and peak memory per entry point."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            action="append",
+            help="Transactions in the seeded ledger (repeatable, default 1000).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Timed calls per entry point."
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Only run this entry point (repeatable).",
+        )
+        parser.add_argument("--output", help="Also write the results to this file.")
+        parser.add_argument(
+            "--baseline", help="Compare against results stored by --output."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help="Relative wall time and memory slack before a regression.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options.get("baseline"):
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())["results"]
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {exc}")
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = run(
+                options.get("size") or [1000],
+                seed_value=options["seed"],
+                repeat=options["repeat"],
+                only=options.get("only"),
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {"results": results}
+        if baseline is not None:
+            report["regressions"] = compare(results, baseline, options["tolerance"])
+        text = json.dumps(report, indent=2)
+        if options.get("output"):
+            Path(options["output"]).write_text(text + "\n")
+        self.stdout.write(text)
+
+        if report.get("regressions"):
+            raise CommandError(
+                f"{len(report['regressions'])} regression(s) against {options['baseline']}."
+            )
@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.perf import aggregate, default_log_path, read_ndjson
+
+SORT_KEYS = {
+    "p95": "p95_ms",
+    "p99": "p99_ms",
+    "p50": "p50_ms",
+    "requests": "requests",
+    "queries": "avg_queries",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the request instrumentation log: p50/p95/p99 duration, "
+        "query counts and the most repeated SQL per URL name."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            help="NDJSON log to read (default: PERF_LOG_PATH and its rotated files).",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=sorted(SORT_KEYS),
+            default="p95",
+            help="Order endpoints by this column, largest first.",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Endpoints to show (0 = all)."
+        )
+        parser.add_argument(
+            "--top-queries",
+            type=int,
+            default=3,
+            help="Repeated SQL shapes to show per endpoint.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the summary as JSON."
+        )
+
+    def handle(self, *args, **options):
+        if options.get("path"):
+            paths = [Path(options["path"])]
+            if not paths[0].exists():
+                raise CommandError(f"No such file: {paths[0]}")
+        else:
+            base = default_log_path()
+            paths = sorted(base.parent.glob(base.name + ".*"), reverse=True) + [base]
+
+        rows = aggregate(read_ndjson(paths), top=options["top_queries"])
+        key = SORT_KEYS[options["sort"]]
+        rows.sort(key=lambda r: r[key] or 0, reverse=True)
+        if options["limit"]:
+            rows = rows[: options["limit"]]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write("No instrumented requests recorded.")
+            return
+
+        header = f"{'URL name':<40} {'reqs':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'avg q':>7} {'max q':>6} {'db ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for r in rows:
+            self.stdout.write(
+                f"{r['url_name'][:40]:<40} {r['requests']:>6} {r['p50_ms']:>9.1f} "
+                f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['avg_queries']:>7.1f} "
+                f"{r['max_queries']:>6} {r['avg_db_ms']:>9.1f}"
+            )
+            for q in r["top_queries"]:
+                self.stdout.write(f"    {q['count']:>5}x  {q['sql'][:110]}")
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} endpoint(s) reported."))
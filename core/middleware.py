@@ -1,8 +1,21 @@
+import random
+import time
+from contextlib import ExitStack
+
 from django.conf import settings
+from django.db import connections
+
+from core import perf
+from utils.currency import get_currency_symbol
 
 
 class DisplayCurrencyMiddleware:
-    """Attach the chosen display currency code to the request."""
+    """Attach the chosen display currency code and symbol to the request.
+
+    The matching ``Currency`` row is not fetched here; the first call to
+    ``utils.currency.get_active_currency(request)`` resolves it and caches it
+    on the request for every later helper and template tag.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -10,6 +23,7 @@ class DisplayCurrencyMiddleware:
     def __call__(self, request):
         code = request.session.get("display_currency", settings.BASE_CURRENCY)
         request.display_currency = code
+        request.display_currency_symbol = get_currency_symbol(code)
         response = self.get_response(request)
         return response
 
@@ -41,3 +55,52 @@ class NoStoreCacheMiddleware:
             # Never fail request processing due to header manipulation
             pass
         return response
+
+
+class QueryInstrumentationMiddleware:
+    """Record query count, DB time and repeated SQL per sampled request.
+
+    Disabled unless ``PERF_INSTRUMENTATION`` is true; ``PERF_SAMPLE_RATE``
+    controls the fraction of requests recorded. See :mod:`core.perf` for the
+    record format and sinks.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "PERF_INSTRUMENTATION", False):
+            return self.get_response(request)
+        rate = getattr(settings, "PERF_SAMPLE_RATE", 1.0)
+        if rate < 1 and random.random() >= rate:
+            return self.get_response(request)
+
+        recorder = perf.QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "ts": round(time.time(), 3),
+            "method": request.method,
+            "path": request.path,
+            "url_name": match.view_name if match else None,
+            "view": match._func_path if match else None,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 3),
+            "db_ms": round(recorder.seconds * 1000, 3),
+            "python_ms": round((elapsed - recorder.seconds) * 1000, 3),
+            "queries": recorder.count,
+            "response_bytes": None if response.streaming else len(response.content),
+            "top_queries": recorder.top(getattr(settings, "PERF_TOP_QUERIES", 5)),
+        }
+        try:
+            perf.get_sink().write(record)
+        except Exception:
+            # Instrumentation must never break a response
+            pass
+        return response
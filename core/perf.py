@@ -0,0 +1,260 @@
+"""Per-request SQL and timing instrumentation.
+
+:class:`core.middleware.QueryInstrumentationMiddleware` samples requests and,
+for each sampled one, records the number of queries, the time spent in the
+database, the most repeated SQL shapes (the usual sign of an N+1 loop), the
+remaining Python time and the response size. Records go to the sink chosen
+by ``PERF_SINK``: an in-process ring buffer (``"memory"``) or a rotating
+NDJSON file (``"file"``) that ``manage.py perf_report`` aggregates.
+
+Settings (all optional):
+
+``PERF_INSTRUMENTATION``  enable the middleware (default ``False``)
+``PERF_SAMPLE_RATE``      fraction of requests recorded, 0..1 (default ``1.0``)
+``PERF_SINK``             ``"memory"`` or ``"file"`` (default ``"memory"``)
+``PERF_RING_SIZE``        records kept by the ring buffer (default 1000)
+``PERF_LOG_PATH``         NDJSON file for the file sink
+``PERF_LOG_MAX_BYTES``    rotate the file after this size (default 5 MB);
+                          ``0`` leaves rotation to an external tool
+``PERF_LOG_BACKUPS``      rotated files kept (default 3)
+``PERF_TOP_QUERIES``      repeated SQL shapes kept per record (default 5)
+
+Size-based rotation happens inside the writing process and is not safe when
+several processes append to the same file: one of them renames the file
+while the others keep writing to the old handle. Under a multi-process
+server either give every process its own ``PERF_LOG_PATH`` or set
+``PERF_LOG_MAX_BYTES = 0``; the sink then uses a
+:class:`~logging.handlers.WatchedFileHandler`, which reopens the file after
+an external tool such as logrotate has moved it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import re
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    # IN (%s, %s, ...) lists of any length share one shape
+    (re.compile(r"(?:%s|\?)(?:\s*,\s*(?:%s|\?))+"), "?, ..."),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def sql_shape(sql: str) -> str:
+    """Return ``sql`` with literals and parameter lists collapsed."""
+    for pattern, repl in _LITERALS:
+        sql = pattern.sub(repl, sql)
+    return sql.strip()
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def default_log_path() -> Path:
+    return Path(_setting("PERF_LOG_PATH", Path(settings.BASE_DIR) / "logs" / "perf.ndjson"))
+
+
+# ---------------- Query capture ----------------
+class QueryRecorder:
+    """``connection.execute_wrapper`` hook timing every statement.
+
+    Thread-safe, so one recorder can be installed on the connections of
+    worker threads serving the same request (see :mod:`dashboard.panels`).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.shape_seconds: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            shape = sql_shape(sql)
+            with self._lock:
+                self.count += 1
+                self.seconds += elapsed
+                self.shapes[shape] += 1
+                self.shape_seconds[shape] += elapsed
+
+    def top(self, limit: int) -> list:
+        """Most repeated shapes (executed more than once)."""
+        return [
+            {
+                "sql": shape,
+                "count": count,
+                "ms": round(self.shape_seconds[shape] * 1000, 3),
+            }
+            for shape, count in self.shapes.most_common(limit)
+            if count > 1
+        ]
+
+
+# ---------------- Sinks ----------------
+class RingBufferSink:
+    """Keep the latest records in memory."""
+
+    def __init__(self, size: int = 1000):
+        self._records: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def write(self, record: dict) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def records(self) -> list:
+        with self._lock:
+            return list(self._records)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+class NDJSONSink:
+    """Append records as JSON lines to a size-rotated file.
+
+    With ``max_bytes`` of ``0`` the file is never rotated here but reopened
+    whenever an external tool has rotated it.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, backups: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if max_bytes:
+            self._handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+            )
+        else:
+            self._handler = logging.handlers.WatchedFileHandler(self.path, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def write(self, record: dict) -> None:
+        self._handler.emit(
+            logging.makeLogRecord({"msg": json.dumps(record, default=str)})
+        )
+
+    def records(self) -> list:
+        return list(read_ndjson([self.path]))
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """Return the configured sink, creating it on first use."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                if _setting("PERF_SINK", "memory") == "file":
+                    _sink = NDJSONSink(
+                        default_log_path(),
+                        _setting("PERF_LOG_MAX_BYTES", 5 * 1024 * 1024),
+                        _setting("PERF_LOG_BACKUPS", 3),
+                    )
+                else:
+                    _sink = RingBufferSink(_setting("PERF_RING_SIZE", 1000))
+    return _sink
+
+
+def reset_sink() -> None:
+    global _sink
+    with _sink_lock:
+        if isinstance(_sink, NDJSONSink):
+            _sink.close()
+        _sink = None
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    if setting.startswith("PERF_"):
+        reset_sink()
+
+
+# ---------------- Reports ----------------
+def read_ndjson(paths: Iterable[Path]):
+    """Yield records from NDJSON files, skipping blank or corrupt lines."""
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def percentile(values: list, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return None
+    rank = max(int(-(-pct * len(values) // 100)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def aggregate(records: Iterable[dict], top: int = 3) -> list:
+    """Summarize records per URL name (the path when a view has none).
+
+    Returns one dict per endpoint with the request count, p50/p95/p99 of
+    the total duration, average and maximum query count, average database
+    time and the SQL shapes repeated most often across its requests.
+    """
+    groups: dict = {}
+    for rec in records:
+        key = rec.get("url_name") or rec.get("path") or "?"
+        groups.setdefault(key, []).append(rec)
+
+    rows = []
+    for key, recs in groups.items():
+        durations = sorted(r.get("duration_ms", 0) for r in recs)
+        queries = [r.get("queries", 0) for r in recs]
+        shapes: Counter = Counter()
+        for r in recs:
+            for q in r.get("top_queries", []):
+                shapes[q["sql"]] += q["count"]
+        rows.append(
+            {
+                "url_name": key,
+                "requests": len(recs),
+                "p50_ms": percentile(durations, 50),
+                "p95_ms": percentile(durations, 95),
+                "p99_ms": percentile(durations, 99),
+                "avg_queries": round(sum(queries) / len(recs), 1),
+                "max_queries": max(queries),
+                "avg_db_ms": round(sum(r.get("db_ms", 0) for r in recs) / len(recs), 3),
+                "top_queries": [
+                    {"sql": sql, "count": count} for sql, count in shapes.most_common(top)
+                ],
+            }
+        )
+    return rows
@@ -0,0 +1,70 @@
+"""Test helpers for SQL query budgets.
+
+:func:`capture` runs a callable and returns the number of queries it issued
+together with a counter of their shapes (see :func:`core.perf.sql_shape`).
+:class:`QueryBudgetMixin` asserts that a page stays within a fixed budget
+at every dataset size; when it does not, the failure lists the SQL shapes
+whose count grew between the smallest and the failing size (or, at the
+smallest size, the shapes that ran more than once), which points straight
+at the loop that issues a query per row.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Callable
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.perf import sql_shape
+
+
+def capture(fn: Callable) -> tuple:
+    """Run ``fn`` and return ``(query count, Counter of SQL shapes)``."""
+    with CaptureQueriesContext(connection) as ctx:
+        fn()
+    return len(ctx), Counter(sql_shape(q["sql"]) for q in ctx.captured_queries)
+
+
+def shape_diff(before: Counter, after: Counter, width: int = 160) -> str:
+    """Describe shapes executed more often in ``after`` than in ``before``."""
+    grown = sorted(
+        ((after[s] - before.get(s, 0), s) for s in after if after[s] > before.get(s, 0)),
+        reverse=True,
+    )
+    if not grown:
+        return "  (no SQL shape grew)"
+    return "\n".join(
+        f"  +{delta:<5} {before.get(shape, 0):>5} -> {after[shape]:<5} {shape[:width]}"
+        for delta, shape in grown
+    )
+
+
+class QueryBudgetMixin:
+    """``assertQueryBudget`` for ``TestCase`` subclasses."""
+
+    def assertQueryBudget(self, label: str, runs: dict, budget: int) -> None:
+        """Assert every run in ``runs`` issued at most ``budget`` queries.
+
+        ``runs`` maps a dataset size to the result of :func:`capture`.
+        """
+        sizes = sorted(runs)
+        smallest = runs[sizes[0]]
+        for size in sizes:
+            count, shapes = runs[size]
+            if count <= budget:
+                continue
+            if size == sizes[0]:
+                # Nothing to compare against: show what ran more than once
+                detail = "Repeated SQL shapes:\n" + shape_diff(
+                    Counter({s: 1 for s in shapes}), shapes
+                )
+            else:
+                detail = f"SQL shapes that grew from {sizes[0]} to {size}:\n" + shape_diff(
+                    smallest[1], shapes
+                )
+            self.fail(
+                f"{label}: {count} queries at {size} transactions "
+                f"(budget {budget}; {smallest[0]} at {sizes[0]}).\n{detail}"
+            )
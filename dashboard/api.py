@@ -5,11 +5,26 @@ from django.contrib.auth.decorators import login_required
 from datetime import date, timedelta
 from django.db.models import Q
 
-from cenfin_proj.utils import get_monthly_cash_flow_range, parse_range_params
+from cenfin_proj.utils import parse_range_params
 from transactions.models import Transaction
+from transactions.aggregates import (
+    category_totals,
+    entity_flow_totals,
+    exclude_internal,
+)
+from transactions.forecast import DAILY, MONTHLY, forecast_cash_flow
 from utils.currency import get_active_currency, convert_to_base
 from decimal import Decimal
 
+from .bundle import (
+    PANELS,
+    BundleFilters,
+    build_bundle,
+    cash_flow_payload,
+    default_range,
+    top10_payload,
+)
+
 
 @login_required
 @require_GET
@@ -34,26 +49,7 @@ def dashboard_data(request):
         ent = None
 
     base_cur = get_active_currency(request)
-    data = get_monthly_cash_flow_range(
-        ent,
-        start=start,
-        end=end,
-        drop_empty=False,
-        user=request.user,
-        currency=base_cur,
-    )
-
-    labels = [row["month"] for row in data]
-    datasets = {
-        "income": [float(row["income"]) for row in data],
-        "expenses": [float(row["expenses"]) for row in data],
-        "liquid": [float(row["liquid"]) for row in data],
-        "asset": [float(row["non_liquid"]) for row in data],
-        # Keep the original key as well for compatibility with older client code
-        "non_liquid": [float(row["non_liquid"]) for row in data],
-    }
-
-    return JsonResponse({"labels": labels, "datasets": datasets})
+    return JsonResponse(cash_flow_payload(request.user, ent, start, end, base_cur))
 
 
 @login_required
@@ -74,50 +70,13 @@ def top10_data(request):
     today = date.today()
     start, end = parse_range_params(request, date(today.year, 1, 1))
 
-    qs = Transaction.objects.filter(
-        user=request.user, date__range=[start, end]
-    ).select_related("currency")
+    qs = Transaction.objects.filter(user=request.user, date__range=[start, end])
     if ids:
         qs = qs.filter(Q(entity_source_id__in=ids) | Q(entity_destination_id__in=ids))
     if txn_type and txn_type != "all":
         qs = qs.filter(transaction_type=txn_type)
     base_cur = get_active_currency(request)
-    entries = []
-    for tx in qs:
-        # Skip internal movements where entity or account is identical
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        same_account = (
-            getattr(tx, "account_source_id", None)
-            and getattr(tx, "account_destination_id", None)
-            and tx.account_source_id == tx.account_destination_id
-        )
-        if same_entity or same_account:
-            continue
-        amt = convert_to_base(
-            abs(tx.amount or 0), tx.currency, base_cur, user=request.user
-        )
-        if tx.transaction_type_destination == "Income":
-            entry_type = "income"
-        elif tx.transaction_type_source == "Expense":
-            entry_type = "expense"
-        elif tx.asset_type_destination == "Non-Liquid":
-            entry_type = "asset"
-        else:
-            entry_type = "other"
-        entries.append({"label": tx.description, "amount": amt, "type": entry_type})
-
-    entries.sort(key=lambda r: r["amount"], reverse=True)
-    top = entries[:10]
-    payload = {
-        "labels": [r["label"] for r in top],
-        "amounts": [float(r["amount"]) for r in top],
-        "types": [r["type"] for r in top],
-    }
-    return JsonResponse(payload)
+    return JsonResponse(top10_payload(qs, base_cur))
 
 
 @login_required
@@ -143,11 +102,7 @@ def category_summary(request):
             return JsonResponse({"error": "invalid entity"}, status=400)
     start, end = parse_range_params(request, None)
 
-    qs = (
-        Transaction.objects.filter(user=request.user, parent_transfer__isnull=True)
-        .prefetch_related("categories")
-        .select_related("currency", "account_destination__currency")
-    )
+    qs = Transaction.objects.filter(user=request.user, parent_transfer__isnull=True)
     if start:
         qs = qs.filter(date__gte=start)
     if end:
@@ -157,45 +112,16 @@ def category_summary(request):
 
     if mode == "income":
         qs = qs.filter(transaction_type_destination__iexact="Income")
-
-        def amount_and_currency(tx):
-            if (
-                tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-            ):
-                return tx.destination_amount, tx.account_destination.currency
-            return tx.amount, tx.currency
-
+        side = "destination"
     else:
         qs = qs.filter(transaction_type_source__iexact="Expense")
-
-        def amount_and_currency(tx):
-            return tx.amount, tx.currency
+        side = "source"
 
     base_cur = get_active_currency(request)
-    totals = {}
-    for tx in qs:
-        # Skip internal movements where entity or account is identical
-        same_entity = (
-            getattr(tx, "entity_source_id", None)
-            and getattr(tx, "entity_destination_id", None)
-            and tx.entity_source_id == tx.entity_destination_id
-        )
-        same_account = (
-            getattr(tx, "account_source_id", None)
-            and getattr(tx, "account_destination_id", None)
-            and tx.account_source_id == tx.account_destination_id
-        )
-        if same_entity or same_account:
-            continue
-        cats = list(tx.categories.all())
-        if not cats:
-            continue
-        val, cur = amount_and_currency(tx)
-        amt = convert_to_base(val or Decimal("0"), cur, base_cur, user=request.user)
-        for c in cats:
-            totals[c.name] = totals.get(c.name, Decimal("0")) + amt
+    grouped = category_totals(
+        exclude_internal(qs), {"total": (side, None)}, currency=base_cur
+    )
+    totals = {name: t["total"] for name, t in grouped.items()}
 
     rows = sorted(
         ({"name": k, "total": float(v)} for k, v in totals.items()),
@@ -237,111 +163,96 @@ def entity_summary(request):
         ents = ents.filter(id__in=ids)
 
     base_cur = get_active_currency(request)
+    totals = entity_flow_totals(
+        request.user, entity_ids=ents, start=start, end=end, currency=base_cur
+    )
     results = []
     for e in ents:
-        q = Transaction.objects.filter(
-            user=request.user, parent_transfer__isnull=True
-        ).select_related("currency", "account_destination__currency")
-        if start:
-            q = q.filter(date__gte=start)
-        if end:
-            q = q.filter(date__lte=end)
-        inc = exp = cap_in = cap_out = Decimal("0")
-        for tx in q.filter(
-            entity_destination=e, transaction_type_destination__iexact="Income"
-        ):
-            # Skip internal same-entity/account movements
-            if (
-                tx.entity_source_id
-                and tx.entity_destination_id
-                and tx.entity_source_id == tx.entity_destination_id
-            ) or (
-                tx.account_source_id
-                and tx.account_destination_id
-                and tx.account_source_id == tx.account_destination_id
-            ):
-                continue
-            val = (
-                tx.destination_amount
-                if tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-                else tx.amount
-            )
-            cur = (
-                tx.account_destination.currency
-                if tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-                else tx.currency
-            )
-            inc += convert_to_base(val or 0, cur, base_cur, user=request.user)
-        for tx in q.filter(entity_source=e, transaction_type_source__iexact="Expense"):
-            if (
-                tx.entity_source_id
-                and tx.entity_destination_id
-                and tx.entity_source_id == tx.entity_destination_id
-            ) or (
-                tx.account_source_id
-                and tx.account_destination_id
-                and tx.account_source_id == tx.account_destination_id
-            ):
-                continue
-            exp += convert_to_base(
-                tx.amount or 0, tx.currency, base_cur, user=request.user
-            )
-        for tx in q.filter(entity_destination=e, transaction_type__iexact="transfer"):
-            if (
-                tx.entity_source_id
-                and tx.entity_destination_id
-                and tx.entity_source_id == tx.entity_destination_id
-            ) or (
-                tx.account_source_id
-                and tx.account_destination_id
-                and tx.account_source_id == tx.account_destination_id
-            ):
-                continue
-            val = (
-                tx.destination_amount
-                if tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-                else tx.amount
-            )
-            cur = (
-                tx.account_destination.currency
-                if tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-                else tx.currency
-            )
-            cap_in += convert_to_base(val or 0, cur, base_cur, user=request.user)
-        for tx in q.filter(entity_source=e, transaction_type__iexact="transfer"):
-            if (
-                tx.entity_source_id
-                and tx.entity_destination_id
-                and tx.entity_source_id == tx.entity_destination_id
-            ) or (
-                tx.account_source_id
-                and tx.account_destination_id
-                and tx.account_source_id == tx.account_destination_id
-            ):
-                continue
-            cap_out += convert_to_base(
-                tx.amount or 0, tx.currency, base_cur, user=request.user
-            )
+        t = totals[e.pk]
         results.append(
             {
                 "entity": e.entity_name,
-                "income": float(inc),
-                "expenses": float(exp),
-                "capital": float(cap_in - cap_out),
-                "net": float(inc - exp),
+                "income": float(t["income"]),
+                "expenses": float(t["expenses"]),
+                "capital": float(t["capital_in"] - t["capital_out"]),
+                "net": float(t["income"] - t["expenses"]),
             }
         )
     return JsonResponse(results, safe=False)
 
 
+@login_required
+@require_GET
+def forecast_data(request):
+    """Return projected liquid balances for the coming months.
+
+    Query params: months (1-36, default 12), granularity ("month" or "day").
+    Series are in the active display currency; ``first_negative`` holds the
+    first date each series drops below zero.
+    """
+    from accounts.models import Account
+    from entities.models import Entity
+
+    try:
+        months = min(max(int(request.GET.get("months", 12)), 1), 36)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "invalid months"}, status=400)
+    granularity = request.GET.get("granularity", MONTHLY)
+    if granularity not in {MONTHLY, DAILY}:
+        return JsonResponse({"error": "invalid granularity"}, status=400)
+
+    base_cur = get_active_currency(request)
+    fc = forecast_cash_flow(
+        request.user, months, granularity=granularity, currency=base_cur
+    )
+    acc_names = dict(
+        Account.objects.filter(pk__in=fc.accounts).values_list("pk", "account_name")
+    )
+    ent_names = dict(
+        Entity.objects.filter(pk__in=fc.entities).values_list("pk", "entity_name")
+    )
+
+    def first_neg(kind, pk):
+        dt = fc.first_negative.get((kind, pk))
+        return dt.isoformat() if dt else None
+
+    payload = {
+        "currency": fc.currency,
+        "labels": [d.isoformat() for d in fc.dates],
+        "total": [float(v) for v in fc.total],
+        "total_first_negative": first_neg("total", None),
+        "accounts": [
+            {
+                "id": pk,
+                "name": acc_names.get(pk, ""),
+                "balances": [float(v) for v in values],
+                "first_negative": first_neg("account", pk),
+            }
+            for pk, values in fc.accounts.items()
+        ],
+        "entities": [
+            {
+                "id": pk,
+                "name": ent_names.get(pk, ""),
+                "balances": [float(v) for v in values],
+                "first_negative": first_neg("entity", pk),
+            }
+            for pk, values in fc.entities.items()
+        ],
+        "events": [
+            {
+                "date": e.date.isoformat(),
+                "kind": e.kind,
+                "label": e.label,
+                "amount": float(e.amount),
+                "currency": e.currency,
+            }
+            for e in fc.events
+        ],
+    }
+    return JsonResponse(payload)
+
+
 @login_required
 @require_GET
 def analytics_data(request):
@@ -416,45 +327,22 @@ def analytics_data(request):
         return tx.amount, tx.currency
 
     if dimension == "categories":
-        qs = qs.prefetch_related("categories")
-        totals_inc: dict[str, Decimal] = {}
-        totals_exp: dict[str, Decimal] = {}
-        for tx in qs:
-            # Skip internal movements where entity or account is identical
-            same_entity = (
-                getattr(tx, "entity_source_id", None)
-                and getattr(tx, "entity_destination_id", None)
-                and tx.entity_source_id == tx.entity_destination_id
-            )
-            same_account = (
-                getattr(tx, "account_source_id", None)
-                and getattr(tx, "account_destination_id", None)
-                and tx.account_source_id == tx.account_destination_id
-            )
-            if same_entity or same_account:
-                continue
-            cats = list(tx.categories.all())
-            if cat_list:
-                cats = [c for c in cats if c.name in cat_list]
-            if not cats:
-                continue
-            if (tx.transaction_type_destination or "").lower() == "income":
-                val, cur = amt_in(tx)
-                amt = convert_to_base(
-                    val or Decimal("0"), cur, base_cur, user=request.user
-                )
-                for c in cats:
-                    totals_inc[c.name] = totals_inc.get(c.name, Decimal("0")) + amt
-            if (tx.transaction_type_source or "").lower() == "expense":
-                amt = convert_to_base(
-                    tx.amount or Decimal("0"), tx.currency, base_cur, user=request.user
-                )
-                for c in cats:
-                    totals_exp[c.name] = totals_exp.get(c.name, Decimal("0")) + amt
-        labels = sorted(set(totals_inc.keys()) | set(totals_exp.keys()))
+        grouped = category_totals(
+            exclude_internal(qs),
+            {
+                "income": (
+                    "destination",
+                    Q(transaction_type_destination__iexact="income"),
+                ),
+                "expenses": ("source", Q(transaction_type_source__iexact="expense")),
+            },
+            currency=base_cur,
+            names=cat_list,
+        )
+        labels = sorted(grouped)
         series = [
-            {"name": "Income", "data": [float(totals_inc.get(k, 0)) for k in labels]},
-            {"name": "Expenses", "data": [float(totals_exp.get(k, 0)) for k in labels]},
+            {"name": "Income", "data": [float(grouped[k]["income"]) for k in labels]},
+            {"name": "Expenses", "data": [float(grouped[k]["expenses"]) for k in labels]},
         ]
         return JsonResponse({"labels": labels, "series": series})
 
@@ -545,26 +433,30 @@ def monthly_audit(request):
         "account_source",
     )
 
+    rates: dict = {}
+
+    def to_base(amount, currency):
+        # Resolve each currency's rate once rather than once per row
+        key = getattr(currency, "pk", currency)
+        if key not in rates:
+            rates[key] = convert_to_base(
+                Decimal("1"), currency, base_cur, user=request.user
+            )
+        return amount * rates[key]
+
     def amt_in(tx):
         if (
             getattr(tx, "destination_amount", None) is not None
             and getattr(tx, "account_destination", None)
             and getattr(tx.account_destination, "currency", None)
         ):
-            return convert_to_base(
-                tx.destination_amount or Decimal("0"),
-                tx.account_destination.currency,
-                base_cur,
-                user=request.user,
+            return to_base(
+                tx.destination_amount or Decimal("0"), tx.account_destination.currency
             )
-        return convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, base_cur, user=request.user
-        )
+        return to_base(tx.amount or Decimal("0"), tx.currency)
 
     def amt_src(tx):
-        return convert_to_base(
-            tx.amount or Decimal("0"), tx.currency, base_cur, user=request.user
-        )
+        return to_base(tx.amount or Decimal("0"), tx.currency)
 
     liquid_bal = Decimal("0")
     non_liquid_bal = Decimal("0")
@@ -764,3 +656,56 @@ def monthly_audit(request):
         "transactions": tx_rows,
     }
     return JsonResponse(payload, safe=False)
+
+
+@login_required
+@require_GET
+def dashboard_bundle(request):
+    """Return several dashboard panels for one set of filters.
+
+    Query params:
+      - panels: CSV subset of cash_flow, monthly, top10, categories,
+        entities, analytics (default: all)
+      - start, end: ISO dates (default: the last 12 months)
+      - entities: CSV list of entity IDs (optional)
+      - txn_type: transaction type for top10 (optional)
+      - dimension: 'categories' (default) or 'entities' for analytics
+      - categories: CSV list of category names for analytics (optional)
+      - limit: top N categories (optional)
+    """
+    names = [p for p in (request.GET.get("panels") or "").split(",") if p]
+    unknown = sorted(set(names) - set(PANELS))
+    if unknown:
+        return JsonResponse({"error": f"unknown panel(s): {', '.join(unknown)}"}, status=400)
+
+    entity_ids = request.GET.getlist("entities")
+    if len(entity_ids) == 1 and "," in entity_ids[0]:
+        entity_ids = [e for e in entity_ids[0].split(",") if e]
+    try:
+        ids = [int(v) for v in entity_ids]
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "invalid entity"}, status=400)
+    try:
+        limit = int(request.GET.get("limit") or 0)
+    except (TypeError, ValueError):
+        limit = 0
+
+    default_start, default_end = default_range(date.today())
+    start, end = parse_range_params(request, default_start, default_end)
+    cat_filter = request.GET.get("categories") or ""
+    filters = BundleFilters(
+        start=start,
+        end=end,
+        entities=ids,
+        txn_type=request.GET.get("txn_type"),
+        categories=[c.strip() for c in cat_filter.split(",") if c.strip()],
+        dimension=(request.GET.get("dimension") or "categories").lower(),
+        limit=limit,
+    )
+    payload = build_bundle(
+        request.user,
+        filters,
+        [p for p in PANELS if p in names] if names else PANELS,
+        currency=get_active_currency(request),
+    )
+    return JsonResponse(payload)
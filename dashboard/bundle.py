@@ -0,0 +1,253 @@
+"""One-request bundle of the dashboard panels.
+
+The dashboard endpoints in :mod:`dashboard.api` each parse their own filters
+and scan overlapping transaction ranges. :func:`build_bundle` takes one set
+of filters and computes any subset of the panels, sharing the underlying
+reads: the category panel and the category analytics come from one grouped
+category rollup, and the entity panel and the entity analytics come from one
+:func:`transactions.aggregates.entity_flow_totals` read. A rollup that no
+requested panel needs is never computed.
+
+Panels:
+
+``cash_flow``   monthly cash flow and depreciation (as ``dashboard-data``)
+``monthly``     rolling 12-month summary (as ``monthly-data``)
+``top10``       largest transactions (as ``top10``)
+``categories``  income and expenses per category, as parallel columns
+``entities``    income, expenses, capital and net per entity, as columns
+``analytics``   grouped totals (as ``analytics``)
+
+``cash_flow`` and ``monthly`` follow a single entity: they use the entity
+filter only when it names exactly one entity.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import cached_property
+from typing import Optional
+
+from django.db.models import Q
+
+from acquisitions.depreciation import depreciation_series
+from cenfin_proj.utils import get_monthly_cash_flow_range, get_monthly_summary
+from transactions.aggregates import (
+    category_totals,
+    entity_flow_totals,
+    exclude_internal,
+    top_transactions,
+)
+from transactions.models import Transaction
+
+PANELS = ("cash_flow", "monthly", "top10", "categories", "entities", "analytics")
+
+
+def cash_flow_payload(user, entity_id, start, end, currency) -> dict:
+    """Monthly cash flow and accumulated depreciation as chart columns."""
+    data = get_monthly_cash_flow_range(
+        entity_id,
+        start=start,
+        end=end,
+        drop_empty=False,
+        user=user,
+        currency=currency,
+    )
+
+    labels = [row["month"] for row in data]
+    # Accumulated depreciation from the materialized monthly snapshots
+    depreciation = depreciation_series(
+        user, start, end, entity_id=entity_id, currency=currency
+    )
+    if len(depreciation) != len(data):
+        depreciation = [Decimal("0")] * len(data)
+    datasets = {
+        "income": [float(row["income"]) for row in data],
+        "expenses": [float(row["expenses"]) for row in data],
+        "liquid": [float(row["liquid"]) for row in data],
+        "asset": [float(row["non_liquid"]) for row in data],
+        # Keep the original key as well for compatibility with older client code
+        "non_liquid": [float(row["non_liquid"]) for row in data],
+        "depreciation": [float(dep) for dep in depreciation],
+        "non_liquid_net": [
+            float(row["non_liquid"] - dep) for row, dep in zip(data, depreciation)
+        ],
+    }
+    return {"labels": labels, "datasets": datasets}
+
+
+def top10_payload(qs, currency) -> dict:
+    """The ten largest transactions of ``qs`` as chart columns."""
+    entries = []
+    # Skip internal movements where entity or account is identical
+    for amt, tx in top_transactions(exclude_internal(qs), 10, currency=currency):
+        if tx.transaction_type_destination == "Income":
+            entry_type = "income"
+        elif tx.transaction_type_source == "Expense":
+            entry_type = "expense"
+        elif tx.asset_type_destination == "Non-Liquid":
+            entry_type = "asset"
+        else:
+            entry_type = "other"
+        entries.append({"label": tx.description, "amount": amt, "type": entry_type})
+
+    return {
+        "labels": [r["label"] for r in entries],
+        "amounts": [float(r["amount"]) for r in entries],
+        "types": [r["type"] for r in entries],
+    }
+
+
+@dataclass
+class BundleFilters:
+    """The one filter set every panel of a bundle shares."""
+
+    start: date
+    end: date
+    entities: list = field(default_factory=list)
+    txn_type: Optional[str] = None
+    categories: list = field(default_factory=list)
+    dimension: str = "categories"
+    limit: int = 0
+
+    @property
+    def single_entity(self) -> Optional[int]:
+        return self.entities[0] if len(self.entities) == 1 else None
+
+
+class _Bundle:
+    def __init__(self, user, filters: BundleFilters, currency):
+        self.user = user
+        self.f = filters
+        self.currency = currency
+
+    def _range_qs(self):
+        qs = Transaction.objects.filter(
+            user=self.user,
+            parent_transfer__isnull=True,
+            date__range=[self.f.start, self.f.end],
+        )
+        if self.f.entities:
+            qs = qs.filter(
+                Q(entity_source_id__in=self.f.entities)
+                | Q(entity_destination_id__in=self.f.entities)
+            )
+        return qs
+
+    @cached_property
+    def category_rollup(self) -> dict:
+        # Income and expenses per tag; serves categories and analytics
+        return category_totals(
+            exclude_internal(self._range_qs()),
+            {
+                "income": ("destination", Q(transaction_type_destination__iexact="income")),
+                "expenses": ("source", Q(transaction_type_source__iexact="expense")),
+            },
+            currency=self.currency,
+        )
+
+    @cached_property
+    def entity_rollup(self) -> dict:
+        # Flows per entity; serves entities and analytics
+        return entity_flow_totals(
+            self.user,
+            entity_ids=self.f.entities or None,
+            start=self.f.start,
+            end=self.f.end,
+            currency=self.currency,
+        )
+
+    def cash_flow(self):
+        return cash_flow_payload(
+            self.user, self.f.single_entity, self.f.start, self.f.end, self.currency
+        )
+
+    def monthly(self):
+        return get_monthly_summary(
+            self.f.single_entity, user=self.user, currency=self.currency
+        )
+
+    def top10(self):
+        qs = Transaction.objects.filter(
+            user=self.user, date__range=[self.f.start, self.f.end]
+        )
+        if self.f.entities:
+            qs = qs.filter(
+                Q(entity_source_id__in=self.f.entities)
+                | Q(entity_destination_id__in=self.f.entities)
+            )
+        if self.f.txn_type and self.f.txn_type != "all":
+            qs = qs.filter(transaction_type=self.f.txn_type)
+        return top10_payload(qs, self.currency)
+
+    def categories(self):
+        labels = sorted(self.category_rollup)
+        if self.f.limit > 0:
+            # Largest expense categories first, as category-summary does
+            labels = sorted(
+                labels, key=lambda k: self.category_rollup[k]["expenses"], reverse=True
+            )[: self.f.limit]
+        return {
+            "labels": labels,
+            "income": [float(self.category_rollup[k]["income"]) for k in labels],
+            "expenses": [float(self.category_rollup[k]["expenses"]) for k in labels],
+        }
+
+    def entities(self):
+        from entities.models import Entity
+
+        ents = Entity.objects.active().filter(user=self.user)
+        if self.f.entities:
+            ents = ents.filter(id__in=self.f.entities)
+        rows = [(e.entity_name, self.entity_rollup[e.pk]) for e in ents]
+        return {
+            "labels": [name for name, _ in rows],
+            "income": [float(t["income"]) for _, t in rows],
+            "expenses": [float(t["expenses"]) for _, t in rows],
+            "capital": [float(t["capital_in"] - t["capital_out"]) for _, t in rows],
+            "net": [float(t["income"] - t["expenses"]) for _, t in rows],
+        }
+
+    def analytics(self):
+        if self.f.dimension == "categories":
+            wanted = set(self.f.categories)
+            rows = [
+                (name, self.category_rollup[name])
+                for name in sorted(self.category_rollup)
+                if not wanted or name in wanted
+            ]
+        else:
+            from entities.models import Entity
+
+            ids = sorted(
+                pk for pk, t in self.entity_rollup.items() if t["income"] or t["expenses"]
+            )
+            names = dict(Entity.objects.filter(pk__in=ids).values_list("pk", "entity_name"))
+            rows = [(names.get(pk, str(pk)), self.entity_rollup[pk]) for pk in ids]
+        return {
+            "labels": [label for label, _ in rows],
+            "series": [
+                {"name": "Income", "data": [float(t["income"]) for _, t in rows]},
+                {"name": "Expenses", "data": [float(t["expenses"]) for _, t in rows]},
+            ],
+        }
+
+
+def build_bundle(user, filters: BundleFilters, panels=PANELS, currency=None) -> dict:
+    """Return ``{panel: payload}`` for ``panels`` plus the currency and range."""
+    bundle = _Bundle(user, filters, currency)
+    payload = {
+        "currency": getattr(currency, "code", None),
+        "start": filters.start.isoformat(),
+        "end": filters.end.isoformat(),
+    }
+    for name in panels:
+        payload[name] = getattr(bundle, name)()
+    return payload
+
+
+def default_range(today: date) -> tuple:
+    """First day of the month a year ago through today, as ``dashboard-data``."""
+    year_ago = today.replace(day=1) - timedelta(days=365)
+    return date(year_ago.year, year_ago.month, 1), today
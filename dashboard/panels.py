@@ -0,0 +1,174 @@
+"""Concurrent computation of the dashboard's independent panels.
+
+The dashboard page is built from read-only sub-reports (all-time totals,
+liabilities, the monthly summary, categories, top-10) that do not depend on
+each other. :func:`run_panels` hands them to a bounded thread pool so the
+page costs roughly the slowest panel instead of the sum of all of them.
+Django gives every worker thread its own database connection. Workers keep
+it between panels and drop it by the same rules as a request thread
+(``close_old_connections``, so ``CONN_MAX_AGE`` applies). The execute wrappers installed on the caller's
+connections (such as the recorder of
+:class:`~core.middleware.QueryInstrumentationMiddleware`) are installed on
+the worker's connections too, so the panels' queries are counted with the
+request that ran them.
+
+Every panel has a timeout and a fallback value. A panel that raises or does
+not finish in time is logged and replaced by its fallback, and its name is
+returned so the page can say which figures are missing. A timed-out panel
+keeps its worker until it finishes; it cannot be interrupted, so the pool
+it ran in is retired. Its threads close their connections and exit once
+their work is done, and no new pool is started before then, so the number
+of live workers (and their connections) stays bounded.
+
+Panels run inline, one after another, when the pool is disabled, while a
+retired pool is still busy, or when the caller is inside a transaction:
+other connections cannot see its uncommitted rows (this is always the case
+under ``TestCase``).
+
+Settings (all optional):
+
+``DASHBOARD_PANEL_WORKERS``  threads in the pool; 0 or 1 runs inline (default:
+                             one per panel)
+``DASHBOARD_PANEL_TIMEOUT``  seconds a panel may take (default 10)
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+
+logger = logging.getLogger(__name__)
+
+_pools: dict = {}
+# Retired pools that still run timed-out panels
+_retired: set = set()
+_pools_lock = threading.Lock()
+
+
+@dataclass
+class Panel:
+    """One independent piece of the dashboard."""
+
+    name: str
+    compute: Callable[[], Any]
+    fallback: Any = None
+    # Seconds; ``None`` uses DASHBOARD_PANEL_TIMEOUT
+    timeout: Optional[float] = None
+
+
+def _pool(workers: int) -> Optional[ThreadPoolExecutor]:
+    """Return the pool for ``workers``, or ``None`` while a retired one is busy."""
+    with _pools_lock:
+        if workers not in _pools:
+            if _retired:
+                return None
+            _pools[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="dashboard-panel"
+            )
+        return _pools[workers]
+
+
+def _retire(pool: ThreadPoolExecutor, stuck: list) -> None:
+    """Stop handing out ``pool`` until its ``stuck`` futures have finished."""
+    with _pools_lock:
+        for workers, current in list(_pools.items()):
+            if current is pool:
+                del _pools[workers]
+        _retired.add(pool)
+    pool.shutdown(wait=False)
+    pending = set(stuck)
+    lock = threading.Lock()
+
+    def release(future):
+        with lock:
+            pending.discard(future)
+            done = not pending
+        if done:
+            with _pools_lock:
+                _retired.discard(pool)
+
+    for future in stuck:
+        future.add_done_callback(release)
+
+
+def _in_worker(
+    compute: Callable[[], Any], wrappers: dict, pool: ThreadPoolExecutor
+) -> Callable[[], Any]:
+    def call():
+        close_old_connections()
+        try:
+            with ExitStack() as stack:
+                for alias, funcs in wrappers.items():
+                    for func in funcs:
+                        stack.enter_context(connections[alias].execute_wrapper(func))
+                return compute()
+        finally:
+            # Only this thread's connections; the request keeps its own
+            if pool in _retired:
+                connections.close_all()
+            else:
+                close_old_connections()
+
+    return call
+
+
+def run_panels(panels: list, *, workers: Optional[int] = None) -> tuple:
+    """Compute ``panels`` and return ``({name: value}, [degraded names])``."""
+    if workers is None:
+        workers = getattr(settings, "DASHBOARD_PANEL_WORKERS", None)
+    if workers is None:
+        workers = len(panels)
+    default_timeout = getattr(settings, "DASHBOARD_PANEL_TIMEOUT", 10.0)
+    results: dict = {}
+    degraded: list = []
+
+    def degrade(panel: Panel, reason: str) -> None:
+        logger.warning("Dashboard panel %s degraded: %s", panel.name, reason, exc_info=True)
+        results[panel.name] = panel.fallback
+        degraded.append(panel.name)
+
+    if workers <= 1 or connection.in_atomic_block:
+        for panel in panels:
+            try:
+                results[panel.name] = panel.compute()
+            except Exception as exc:
+                degrade(panel, repr(exc))
+        return results, degraded
+
+    # Carry the caller's query instrumentation over to the workers
+    wrappers = {
+        conn.alias: list(conn.execute_wrappers)
+        for conn in connections.all(initialized_only=True)
+        if conn.execute_wrappers
+    }
+    pool = _pool(workers)
+    if pool is None:
+        return run_panels(panels, workers=1)
+    started = time.monotonic()
+    futures = [
+        (panel, pool.submit(_in_worker(panel.compute, wrappers, pool)))
+        for panel in panels
+    ]
+    stuck = []
+    for panel, future in futures:
+        timeout = default_timeout if panel.timeout is None else panel.timeout
+        remaining = max(0.0, started + timeout - time.monotonic())
+        try:
+            results[panel.name] = future.result(timeout=remaining)
+        except TimeoutError:
+            if not future.cancel():
+                stuck.append(future)
+            degrade(panel, f"no result after {timeout}s")
+        except Exception as exc:
+            degrade(panel, repr(exc))
+    if stuck:
+        _retire(pool, stuck)
+    return results, degraded
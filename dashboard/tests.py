@@ -1 +1,329 @@
-# Create your tests here.
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Account
+from currencies.models import Currency, ExchangeRate
+from entities.models import Entity
+from entities.utils import ensure_fixed_entities
+from transactions.models import CategoryTag, Transaction
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class EntitySummaryTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="dash", password="p")
+        self.client.force_login(self.user)
+        self.php = Currency.objects.create(code="PHP", name="Peso")
+        self.usd = Currency.objects.create(code="USD", name="Dollar")
+        ExchangeRate.objects.create(
+            currency_from=self.usd, currency_to=self.php, rate=Decimal("50")
+        )
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user, currency=self.php
+        )
+        self.wallet = Account.objects.create(
+            account_name="Wallet",
+            account_type="E-Wallet",
+            user=self.user,
+            currency=self.usd,
+        )
+        self.outside, _ = ensure_fixed_entities(self.user)
+        session = self.client.session
+        session["display_currency"] = "PHP"
+        session.save()
+
+    def _entity(self, name):
+        return Entity.objects.create(
+            entity_name=name, entity_type="personal fund", user=self.user
+        )
+
+    def _tx(self, **kwargs):
+        kwargs.setdefault("user", self.user)
+        kwargs.setdefault("date", timezone.now().date())
+        return Transaction.objects.create(**kwargs)
+
+    def _seed(self, ent, other):
+        self._tx(
+            transaction_type="income",
+            amount=Decimal("100"),
+            account_destination=self.cash,
+            entity_source=self.outside,
+            entity_destination=ent,
+            currency=self.php,
+        )
+        self._tx(
+            transaction_type="income",
+            amount=Decimal("2"),
+            account_destination=self.wallet,
+            entity_source=self.outside,
+            entity_destination=ent,
+            currency=self.usd,
+        )
+        self._tx(
+            transaction_type="expense",
+            amount=Decimal("30"),
+            account_source=self.cash,
+            entity_source=ent,
+            entity_destination=self.outside,
+            currency=self.php,
+        )
+        self._tx(
+            transaction_type="transfer",
+            amount=Decimal("1"),
+            destination_amount=Decimal("50"),
+            account_source=self.wallet,
+            account_destination=self.cash,
+            entity_source=other,
+            entity_destination=ent,
+            currency=self.usd,
+        )
+
+    def test_totals_match_per_row_conversion(self):
+        farm = self._entity("Farm")
+        shop = self._entity("Shop")
+        self._seed(farm, shop)
+        # Same-entity move is ignored
+        self._tx(
+            transaction_type="transfer",
+            amount=Decimal("10"),
+            account_source=self.cash,
+            account_destination=self.wallet,
+            entity_source=farm,
+            entity_destination=farm,
+            currency=self.php,
+        )
+
+        resp = self.client.get(reverse("dashboard:entity-summary"))
+        self.assertEqual(resp.status_code, 200)
+        rows = {r["entity"]: r for r in resp.json()}
+        self.assertEqual(rows["Farm"]["income"], 200.0)
+        self.assertEqual(rows["Farm"]["expenses"], 30.0)
+        self.assertEqual(rows["Farm"]["capital"], 50.0)
+        self.assertEqual(rows["Farm"]["net"], 170.0)
+        self.assertEqual(rows["Shop"]["capital"], -50.0)
+        self.assertEqual(rows["Shop"]["income"], 0.0)
+
+    def test_entities_filter(self):
+        farm = self._entity("Farm")
+        shop = self._entity("Shop")
+        self._seed(farm, shop)
+        resp = self.client.get(
+            reverse("dashboard:entity-summary") + f"?entities={shop.pk}"
+        )
+        self.assertEqual([r["entity"] for r in resp.json()], ["Shop"])
+
+    def test_query_count_independent_of_entity_count(self):
+        url = reverse("dashboard:entity-summary")
+        first = self._entity("E0")
+        self._seed(first, self._entity("Src0"))
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+
+        for i in range(1, 15):
+            self._seed(self._entity(f"E{i}"), self._entity(f"Src{i}"))
+        with CaptureQueriesContext(connection) as large:
+            resp = self.client.get(url)
+        self.assertGreater(len(resp.json()), 30)
+        self.assertEqual(len(large), len(small))
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class CategoryAggregationTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="cats", password="p")
+        self.client.force_login(self.user)
+        self.php = Currency.objects.create(code="PHP", name="Peso")
+        self.usd = Currency.objects.create(code="USD", name="Dollar")
+        ExchangeRate.objects.create(
+            currency_from=self.usd, currency_to=self.php, rate=Decimal("50")
+        )
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user, currency=self.php
+        )
+        self.wallet = Account.objects.create(
+            account_name="Wallet",
+            account_type="E-Wallet",
+            user=self.user,
+            currency=self.usd,
+        )
+        self.outside, _ = ensure_fixed_entities(self.user)
+        self.ent = Entity.objects.create(
+            entity_name="Home", entity_type="personal fund", user=self.user
+        )
+        self.food = CategoryTag.objects.create(
+            user=self.user, transaction_type="expense", name="Food"
+        )
+        self.fun = CategoryTag.objects.create(
+            user=self.user, transaction_type="expense", name="Fun"
+        )
+        self.salary = CategoryTag.objects.create(
+            user=self.user, transaction_type="income", name="Salary"
+        )
+        session = self.client.session
+        session["display_currency"] = "PHP"
+        session.save()
+
+    def _expense(self, amount, account, currency, *tags):
+        tx = Transaction.objects.create(
+            user=self.user,
+            date=timezone.now().date(),
+            transaction_type="expense",
+            amount=Decimal(amount),
+            account_source=account,
+            entity_source=self.ent,
+            entity_destination=self.outside,
+            currency=currency,
+        )
+        tx.categories.set(tags)
+        return tx
+
+    def _seed(self):
+        self._expense("30", self.cash, self.php, self.food)
+        self._expense("2", self.wallet, self.usd, self.food, self.fun)
+        tx = Transaction.objects.create(
+            user=self.user,
+            date=timezone.now().date(),
+            transaction_type="income",
+            amount=Decimal("3"),
+            account_destination=self.wallet,
+            entity_source=self.outside,
+            entity_destination=self.ent,
+            currency=self.usd,
+        )
+        tx.categories.set([self.salary])
+
+    def test_category_summary_converts_grouped_totals(self):
+        self._seed()
+        resp = self.client.get(reverse("dashboard:category-summary"))
+        self.assertEqual(
+            resp.json(),
+            [{"name": "Food", "total": 130.0}, {"name": "Fun", "total": 100.0}],
+        )
+        resp = self.client.get(reverse("dashboard:category-summary") + "?type=income")
+        self.assertEqual(resp.json(), [{"name": "Salary", "total": 150.0}])
+
+    def test_analytics_categories_dimension(self):
+        self._seed()
+        resp = self.client.get(
+            reverse("dashboard:analytics-data") + "?categories=Food,Salary"
+        )
+        payload = resp.json()
+        self.assertEqual(payload["labels"], ["Food", "Salary"])
+        self.assertEqual(payload["series"][0]["data"], [0.0, 150.0])
+        self.assertEqual(payload["series"][1]["data"], [130.0, 0.0])
+
+    def test_entity_category_summary_api(self):
+        self._seed()
+        resp = self.client.get(
+            reverse("entities:analytics-category-summary", args=[self.ent.pk])
+        )
+        totals = {r["name"]: Decimal(r["total"]) for r in resp.json()}
+        self.assertEqual(totals, {"Food": Decimal("130"), "Fun": Decimal("100")})
+
+    def test_query_count_independent_of_row_count(self):
+        url = reverse("dashboard:category-summary")
+        self._seed()
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        for _ in range(20):
+            self._seed()
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url)
+        self.assertEqual(len(large), len(small))
+
+    def test_category_timeseries_honours_interval(self):
+        self._seed()
+        url = reverse("entities:analytics-category-timeseries", args=[self.ent.pk])
+        today = timezone.now().date()
+        for interval, start in (
+            ("week", today - timezone.timedelta(days=today.weekday())),
+            ("month", today.replace(day=1)),
+            ("quarter", today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)),
+        ):
+            resp = self.client.get(url + f"?interval={interval}")
+            rows = [(r["period"][:10], Decimal(r["total"])) for r in resp.json()]
+            self.assertEqual(rows, [(start.isoformat(), Decimal("130"))])
+
+    def test_monthly_cash_flow_query_count_independent_of_row_count(self):
+        from cenfin_proj.utils import get_monthly_cash_flow
+
+        self._seed()
+        with CaptureQueriesContext(connection) as small:
+            get_monthly_cash_flow(self.ent.pk, user=self.user, currency=self.php)
+        for _ in range(20):
+            self._seed()
+        with CaptureQueriesContext(connection) as large:
+            rows = get_monthly_cash_flow(self.ent.pk, user=self.user, currency=self.php)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(rows[-1]["income"], Decimal("3150"))
+        self.assertEqual(rows[-1]["expenses"], Decimal("2730"))
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class TopTransactionsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="top", password="p")
+        self.client.force_login(self.user)
+        self.php = Currency.objects.create(code="PHP", name="Peso")
+        self.usd = Currency.objects.create(code="USD", name="Dollar")
+        ExchangeRate.objects.create(
+            currency_from=self.usd, currency_to=self.php, rate=Decimal("50")
+        )
+        self.outside, _ = ensure_fixed_entities(self.user)
+        self.ent = Entity.objects.create(
+            entity_name="Home", entity_type="personal fund", user=self.user
+        )
+        session = self.client.session
+        session["display_currency"] = "PHP"
+        session.save()
+
+    def _expense(self, amount, currency, description):
+        return Transaction.objects.create(
+            user=self.user,
+            date=timezone.now().date(),
+            transaction_type="expense",
+            description=description,
+            amount=Decimal(amount),
+            entity_source=self.ent,
+            entity_destination=self.outside,
+            currency=currency,
+        )
+
+    def test_top10_merges_currencies_after_conversion(self):
+        for i in range(12):
+            self._expense(str(100 + i), self.php, f"php{i}")
+        self._expense("3", self.usd, "usd-big")  # 150 PHP
+        self._expense("1", self.usd, "usd-small")  # 50 PHP
+        resp = self.client.get(reverse("dashboard:top10-data"))
+        payload = resp.json()
+        self.assertEqual(payload["labels"][0], "usd-big")
+        self.assertEqual(payload["amounts"][:2], [150.0, 111.0])
+        self.assertEqual(len(payload["labels"]), 10)
+        self.assertNotIn("usd-small", payload["labels"])
+
+    def test_top10_query_count_independent_of_row_count(self):
+        url = reverse("dashboard:top10-data")
+        self._expense("5", self.php, "a")
+        self._expense("1", self.usd, "b")
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        for i in range(30):
+            self._expense(str(i + 1), self.php if i % 2 else self.usd, f"t{i}")
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url)
+        self.assertEqual(len(large), len(small))
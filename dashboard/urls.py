@@ -6,7 +6,9 @@ from .api import (
     category_summary,
     entity_summary,
     analytics_data,
+    forecast_data,
     monthly_audit,
+    dashboard_bundle,
 )
 
 app_name = "dashboard"
@@ -19,5 +21,7 @@ urlpatterns = [
     path("api/category-summary/", category_summary, name="category-summary"),
     path("api/entity-summary/", entity_summary, name="entity-summary"),
     path("api/analytics/", analytics_data, name="analytics-data"),
+    path("api/forecast/", forecast_data, name="forecast-data"),
     path("api/monthly-audit/", monthly_audit, name="monthly-audit"),
+    path("api/bundle/", dashboard_bundle, name="bundle"),
 ]
@@ -10,6 +10,7 @@ from transactions.models import Transaction
 from transactions.constants import TXN_TYPE_CHOICES
 from entities.models import Entity
 from transactions.models import CategoryTag
+from transactions.aggregates import top_transactions
 from cenfin_proj.utils import (
     get_monthly_summary,
     get_monthly_cash_flow,
@@ -17,164 +18,185 @@ from cenfin_proj.utils import (
 )
 from utils.currency import get_active_currency, convert_to_base
 
+from .panels import Panel, run_panels
+
 # Create your views here.
 
 
-class DashboardView(TemplateView):
-    template_name = "dashboard.html"
+def _base_converter(base_cur, user):
+    rates: dict = {}
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
+    def to_base(amount, currency):
+        # Resolve each currency's rate once rather than once per row
+        key = getattr(currency, "pk", currency)
+        if key not in rates:
+            rates[key] = convert_to_base(Decimal("1"), currency, base_cur, user=user)
+        return amount * rates[key]
 
-        base_cur = get_active_currency(self.request)
-        ctx["base_currency"] = base_cur
-        income = expenses = liquid = asset = liabilities = Decimal("0")
-        qs_all = Transaction.objects.filter(user=self.request.user).select_related(
-            "currency",
-            "account_destination__currency",
-            "account_destination",
-            "account_source",
-        )
+    return to_base
 
-        def inflow_base(tx):
-            # Prefer destination_amount in the destination account's currency
-            if (
-                getattr(tx, "destination_amount", None) is not None
-                and getattr(tx, "account_destination", None)
-                and getattr(tx.account_destination, "currency", None)
-            ):
-                return convert_to_base(
-                    tx.destination_amount or Decimal("0"),
-                    tx.account_destination.currency,
-                    base_cur,
-                    user=self.request.user,
-                )
-            return convert_to_base(
-                tx.amount or Decimal("0"), tx.currency, base_cur, user=self.request.user
-            )
 
-        def outflow_base(tx):
-            return convert_to_base(
-                tx.amount or Decimal("0"), tx.currency, base_cur, user=self.request.user
-            )
+def all_time_totals(user, base_cur):
+    """Return all-time income, expenses, liquid and asset totals."""
+    income = expenses = liquid = asset = Decimal("0")
+    qs_all = Transaction.objects.filter(user=user).select_related(
+        "currency",
+        "account_destination__currency",
+        "account_destination",
+        "account_source",
+    )
+    to_base = _base_converter(base_cur, user)
 
-        for tx in qs_all:
-            # Skip only pure internal moves where asset class doesn't change
-            same_entity = (
-                getattr(tx, "entity_source_id", None)
-                and getattr(tx, "entity_destination_id", None)
-                and tx.entity_source_id == tx.entity_destination_id
-            )
-            same_account = (
-                getattr(tx, "account_source_id", None)
-                and getattr(tx, "account_destination_id", None)
-                and tx.account_source_id == tx.account_destination_id
-            )
-            if same_entity or same_account:
-                src_t = (getattr(tx, "asset_type_source", "") or "").lower()
-                dst_t = (getattr(tx, "asset_type_destination", "") or "").lower()
-                if src_t == dst_t:
-                    continue
-            tdest = (tx.transaction_type_destination or "").lower()
-            tsrc = (tx.transaction_type_source or "").lower()
-            adest = (tx.asset_type_destination or "").lower()
-            asrc = (tx.asset_type_source or "").lower()
-            ttype = (tx.transaction_type or "").lower()
-            dest_is_outside = bool(
-                getattr(tx, "account_destination", None)
-                and (
-                    tx.account_destination.account_type == "Outside"
-                    or tx.account_destination.account_name == "Outside"
-                )
+    def inflow_base(tx):
+        # Prefer destination_amount in the destination account's currency
+        if (
+            getattr(tx, "destination_amount", None) is not None
+            and getattr(tx, "account_destination", None)
+            and getattr(tx.account_destination, "currency", None)
+        ):
+            return to_base(
+                tx.destination_amount or Decimal("0"),
+                tx.account_destination.currency,
             )
-            src_is_outside = bool(
-                getattr(tx, "account_source", None)
-                and (
-                    tx.account_source.account_type == "Outside"
-                    or tx.account_source.account_name == "Outside"
-                )
-            )
-            if tdest == "income":
-                income += inflow_base(tx)
-            if tsrc == "expense":
-                expenses += outflow_base(tx)
-            # Treat transfer to Outside as moving to non-liquid Asset, and
-            # transfer from Outside as moving from Asset (not Liquid).
-            if ttype == "transfer" and dest_is_outside:
-                asset += inflow_base(tx)
-            elif adest == "liquid":
-                liquid += inflow_base(tx)
-            if ttype == "transfer" and src_is_outside:
-                asset -= outflow_base(tx)
-            elif asrc == "liquid":
-                liquid -= outflow_base(tx)
-            if adest == "non_liquid" and not (ttype == "transfer" and dest_is_outside):
-                asset += inflow_base(tx)
-            elif asrc == "non_liquid" and not (ttype == "transfer" and src_is_outside):
-                asset -= outflow_base(tx)
-
-        # Liabilities from loans and credit cards
-        from liabilities.models import Loan, CreditCard
-        from currencies.models import Currency
-
-        for loan in Loan.objects.filter(user=self.request.user):
-            cur = Currency.objects.filter(code=loan.currency).first()
-            liabilities += convert_to_base(
-                loan.outstanding_balance or Decimal("0"),
-                cur,
-                base_cur,
-                user=self.request.user,
+        return to_base(tx.amount or Decimal("0"), tx.currency)
+
+    def outflow_base(tx):
+        return to_base(tx.amount or Decimal("0"), tx.currency)
+
+    for tx in qs_all:
+        # Skip only pure internal moves where asset class doesn't change
+        same_entity = (
+            getattr(tx, "entity_source_id", None)
+            and getattr(tx, "entity_destination_id", None)
+            and tx.entity_source_id == tx.entity_destination_id
+        )
+        same_account = (
+            getattr(tx, "account_source_id", None)
+            and getattr(tx, "account_destination_id", None)
+            and tx.account_source_id == tx.account_destination_id
+        )
+        if same_entity or same_account:
+            src_t = (getattr(tx, "asset_type_source", "") or "").lower()
+            dst_t = (getattr(tx, "asset_type_destination", "") or "").lower()
+            if src_t == dst_t:
+                continue
+        tdest = (tx.transaction_type_destination or "").lower()
+        tsrc = (tx.transaction_type_source or "").lower()
+        adest = (tx.asset_type_destination or "").lower()
+        asrc = (tx.asset_type_source or "").lower()
+        ttype = (tx.transaction_type or "").lower()
+        dest_is_outside = bool(
+            getattr(tx, "account_destination", None)
+            and (
+                tx.account_destination.account_type == "Outside"
+                or tx.account_destination.account_name == "Outside"
             )
-        for card in CreditCard.objects.filter(user=self.request.user):
-            cur = Currency.objects.filter(code=card.currency).first()
-            liabilities += convert_to_base(
-                card.outstanding_amount or Decimal("0"),
-                cur,
-                base_cur,
-                user=self.request.user,
+        )
+        src_is_outside = bool(
+            getattr(tx, "account_source", None)
+            and (
+                tx.account_source.account_type == "Outside"
+                or tx.account_source.account_name == "Outside"
             )
+        )
+        if tdest == "income":
+            income += inflow_base(tx)
+        if tsrc == "expense":
+            expenses += outflow_base(tx)
+        # Treat transfer to Outside as moving to non-liquid Asset, and
+        # transfer from Outside as moving from Asset (not Liquid).
+        if ttype == "transfer" and dest_is_outside:
+            asset += inflow_base(tx)
+        elif adest == "liquid":
+            liquid += inflow_base(tx)
+        if ttype == "transfer" and src_is_outside:
+            asset -= outflow_base(tx)
+        elif asrc == "liquid":
+            liquid -= outflow_base(tx)
+        if adest == "non_liquid" and not (ttype == "transfer" and dest_is_outside):
+            asset += inflow_base(tx)
+        elif asrc == "non_liquid" and not (ttype == "transfer" and src_is_outside):
+            asset -= outflow_base(tx)
 
-        aggregates = {
-            "income": income,
-            "expenses": expenses,
-            "liquid": liquid,
-            "asset": asset,
-            "liabilities": liabilities,
-            "net": liquid + asset - liabilities,
-        }
+    return {"income": income, "expenses": expenses, "liquid": liquid, "asset": asset}
 
-        ctx["totals"] = aggregates
 
-        ctx["cards"] = [
-            ("Income", "income", "success"),
-            ("Expenses", "expenses", "danger"),
-            ("Liquid", "liquid", "warning"),
-            ("Asset", "asset", "info"),
-            ("Liabilities", "liabilities", "secondary"),
-        ]
-        # Ensure monthly_summary includes both 'non_liquid' and 'asset' keys
-        ms = get_monthly_summary(user=self.request.user, currency=base_cur)
-        for item in ms:
-            if "non_liquid" in item and "asset" not in item:
-                item["asset"] = item["non_liquid"]
-        ctx["monthly_summary"] = ms
+def liabilities_total(user, base_cur):
+    """Return outstanding loans plus credit card balances."""
+    from liabilities.models import Loan, CreditCard
+
+    to_base = _base_converter(base_cur, user)
+    liabilities = Decimal("0")
+    for loan in Loan.objects.filter(user=user):
+        liabilities += to_base(loan.outstanding_balance or Decimal("0"), loan.currency)
+    for card in CreditCard.objects.filter(user=user):
+        liabilities += to_base(card.outstanding_amount or Decimal("0"), card.currency)
+    return liabilities
+
+
+def monthly_summary(user, base_cur):
+    # Ensure monthly_summary includes both 'non_liquid' and 'asset' keys
+    ms = get_monthly_summary(user=user, currency=base_cur)
+    for item in ms:
+        if "non_liquid" in item and "asset" not in item:
+            item["asset"] = item["non_liquid"]
+    return ms
+
+
+def category_names(user):
+    """Unique category names for the analytics filter."""
+    cat_qs = CategoryTag.objects.filter(user=user).order_by("name")
+    cat_names = []
+    last = None
+    for n in cat_qs.values_list("name", flat=True):
+        if n and n != last:
+            cat_names.append(n)
+            last = n
+    return cat_names
+
+
+def top10_big_tickets(user, base_cur, start, end, selected_entities, txn_type):
+    """Top 10 big-ticket transactions within the date range."""
+    qs = Transaction.objects.filter(user=user, date__range=[start, end])
+    if selected_entities:
+        qs = qs.filter(
+            Q(entity_source_id__in=selected_entities)
+            | Q(entity_destination_id__in=selected_entities)
+        )
+    if txn_type and txn_type != "all":
+        qs = qs.filter(transaction_type=txn_type)
+
+    entries = []
+    for amt, tx in top_transactions(qs, 10, currency=base_cur):
+        if tx.transaction_type_destination == "Income":
+            entry_type = "income"
+        elif tx.transaction_type_source == "Expense":
+            entry_type = "expense"
+        elif tx.asset_type_destination == "Non-Liquid":
+            entry_type = "asset"
+        else:
+            entry_type = "other"
+        entries.append({"category": tx.description, "amount": amt, "type": entry_type})
+    return entries
+
+
+class DashboardView(TemplateView):
+    template_name = "dashboard.html"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+
+        user = self.request.user
+        base_cur = get_active_currency(self.request)
+        ctx["base_currency"] = base_cur
         today = timezone.now().date()
         ctx["today"] = today
 
         ctx["entities"] = (
             Entity.objects.active()
-            .filter(user=self.request.user)
+            .filter(user=user)
             .order_by("entity_name")
         )
-        # Unique category names for the analytics filter
-        cat_qs = CategoryTag.objects.filter(user=self.request.user).order_by("name")
-        cat_names = []
-        last = None
-        for n in cat_qs.values_list("name", flat=True):
-            if n and n != last:
-                cat_names.append(n)
-                last = n
-        ctx["categories"] = cat_names
         params = self.request.GET
 
         # Defaults for the date filters used by the charts. These are separate
@@ -211,42 +233,44 @@ class DashboardView(TemplateView):
         ctx["selected_entities"] = selected_entities
         ctx["selected_txn_type"] = txn_type
         ctx["txn_type_choices"] = TXN_TYPE_CHOICES
-        # ------------------------------------------------------
-        # Top 10 big-ticket transactions within date range
-        # ------------------------------------------------------
-        qs = Transaction.objects.filter(
-            user=self.request.user, date__range=[start_top, end_top]
-        ).select_related("currency")
-        if selected_entities:
-            qs = qs.filter(
-                Q(entity_source_id__in=selected_entities)
-                | Q(entity_destination_id__in=selected_entities)
-            )
-        if txn_type and txn_type != "all":
-            qs = qs.filter(transaction_type=txn_type)
-
-        entries = []
-        for tx in qs:
-            amt = convert_to_base(
-                abs(tx.amount or Decimal("0")),
-                tx.currency,
-                base_cur,
-                user=self.request.user,
-            )
-            if tx.transaction_type_destination == "Income":
-                entry_type = "income"
-            elif tx.transaction_type_source == "Expense":
-                entry_type = "expense"
-            elif tx.asset_type_destination == "Non-Liquid":
-                entry_type = "asset"
-            else:
-                entry_type = "other"
-            entries.append(
-                {"category": tx.description, "amount": amt, "type": entry_type}
-            )
 
-        entries.sort(key=lambda r: r["amount"], reverse=True)
-        ctx["top10_big_tickets"] = entries[:10]
+        # Independent read-only panels, computed concurrently
+        zero = Decimal("0")
+        panels, degraded = run_panels(
+            [
+                Panel(
+                    "totals",
+                    lambda: all_time_totals(user, base_cur),
+                    {"income": zero, "expenses": zero, "liquid": zero, "asset": zero},
+                ),
+                Panel("liabilities", lambda: liabilities_total(user, base_cur), zero),
+                Panel("monthly_summary", lambda: monthly_summary(user, base_cur), []),
+                Panel("categories", lambda: category_names(user), []),
+                Panel(
+                    "top10_big_tickets",
+                    lambda: top10_big_tickets(
+                        user, base_cur, start_top, end_top, selected_entities, txn_type
+                    ),
+                    [],
+                ),
+            ]
+        )
+        totals = dict(panels["totals"])
+        totals["liabilities"] = panels["liabilities"]
+        totals["net"] = totals["liquid"] + totals["asset"] - totals["liabilities"]
+        ctx["totals"] = totals
+        ctx["degraded_panels"] = degraded
+
+        ctx["cards"] = [
+            ("Income", "income", "success"),
+            ("Expenses", "expenses", "danger"),
+            ("Liquid", "liquid", "warning"),
+            ("Asset", "asset", "info"),
+            ("Liabilities", "liabilities", "secondary"),
+        ]
+        ctx["monthly_summary"] = panels["monthly_summary"]
+        ctx["categories"] = panels["categories"]
+        ctx["top10_big_tickets"] = panels["top10_big_tickets"]
 
         return ctx
 
@@ -131,3 +131,98 @@ class SystemDefaultProtectionTest(TestCase):
         with self.assertRaises(ProtectedError):
             self.account_ent.entity_name = "New"
             self.account_ent.save()
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class EntityKpiTest(TestCase):
+    def setUp(self):
+        from currencies.models import Currency, ExchangeRate
+        from entities.utils import ensure_fixed_entities
+
+        User = get_user_model()
+        self.user = User.objects.create_user(username="kpi", password="p")
+        self.client.force_login(self.user)
+        self.php = Currency.objects.create(code="PHP", name="Peso")
+        self.usd = Currency.objects.create(code="USD", name="Dollar")
+        ExchangeRate.objects.create(
+            currency_from=self.usd, currency_to=self.php, rate=Decimal("50")
+        )
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user, currency=self.php
+        )
+        self.wallet = Account.objects.create(
+            account_name="Wallet",
+            account_type="E-Wallet",
+            user=self.user,
+            currency=self.usd,
+        )
+        self.outside, _ = ensure_fixed_entities(self.user)
+        self.ent = Entity.objects.create(
+            entity_name="Farm", entity_type="personal fund", user=self.user
+        )
+        self.other = Entity.objects.create(
+            entity_name="Shop", entity_type="personal fund", user=self.user
+        )
+        session = self.client.session
+        session["display_currency"] = "PHP"
+        session.save()
+
+    def _tx(self, **kwargs):
+        return Transaction.objects.create(
+            user=self.user, date=timezone.now().date(), **kwargs
+        )
+
+    def _seed(self):
+        self._tx(
+            transaction_type="income",
+            amount=Decimal("2"),
+            account_destination=self.wallet,
+            entity_source=self.outside,
+            entity_destination=self.ent,
+            currency=self.usd,
+        )
+        self._tx(
+            transaction_type="expense",
+            amount=Decimal("30"),
+            account_source=self.cash,
+            entity_source=self.ent,
+            entity_destination=self.outside,
+            currency=self.php,
+        )
+        self._tx(
+            transaction_type="transfer",
+            amount=Decimal("1"),
+            destination_amount=Decimal("50"),
+            account_source=self.wallet,
+            account_destination=self.cash,
+            entity_source=self.other,
+            entity_destination=self.ent,
+            currency=self.usd,
+        )
+
+    def test_kpis_convert_each_currency_bucket(self):
+        self._seed()
+        resp = self.client.get(reverse("entities:analytics-kpis", args=[self.ent.pk]))
+        data = resp.json()
+        self.assertEqual(Decimal(data["income"]), Decimal("100"))
+        self.assertEqual(Decimal(data["expenses"]), Decimal("30"))
+        self.assertEqual(Decimal(data["capital"]), Decimal("50"))
+        self.assertEqual(Decimal(data["net"]), Decimal("70"))
+        self.assertEqual(data["currency"], "PHP")
+
+    def test_kpis_query_count_independent_of_row_count(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = reverse("entities:analytics-kpis", args=[self.ent.pk])
+        self._seed()
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        for _ in range(10):
+            self._seed()
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url)
+        self.assertEqual(len(large), len(small))
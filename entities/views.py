@@ -10,8 +10,8 @@ from django.conf import settings
 from decimal import Decimal
 from django.db.models import Sum, Count
 
-from cenfin_proj.utils import get_account_entity_balance
-from utils.currency import convert_to_base, get_active_currency
+from cenfin_proj.utils import get_account_entity_balances
+from utils.currency import get_active_currency, get_conversion_rates
 
 
 from entities.models import Entity
@@ -19,6 +19,7 @@ from acquisitions.models import Acquisition
 from accounts.models import Account
 from .forms import EntityForm
 from transactions.models import Transaction
+from transactions.aggregates import category_totals, entity_flow_totals, period_totals
 
 
 # ---------------------------------------------------------------------------
@@ -152,12 +153,15 @@ class EntityListView(TemplateView):
 
         disp_code = getattr(self.request, "display_currency", settings.BASE_CURRENCY)
         from cenfin_proj.utils import get_entity_liquid_nonliquid_totals
+        from acquisitions.depreciation import entity_book_values
 
         totals = (
             get_entity_liquid_nonliquid_totals(self.request.user, disp_code)
             if disp_code
             else {}
         )
+        # Materialized depreciation: one grouped read for every card
+        book_values = entity_book_values(self.request.user, disp_code)
 
         for ent in qs:
             # Provide both raw and *_display attributes for templates
@@ -166,6 +170,7 @@ class EntityListView(TemplateView):
             ent.non_liquid_total = t["non_liquid"]
             ent.liquid_total_display = t["liquid"]
             ent.non_liquid_total_display = t["non_liquid"]
+            ent.book_value_display = book_values.get(ent.pk)
 
         ctx["entities"] = qs
         ctx["search"] = search
@@ -435,15 +440,19 @@ class EntityAccountsView(TemplateView):
                 entry["tx_count"] += row["count_out"]
 
             account_map = {
-                acc.id: acc for acc in Account.objects.filter(id__in=balances.keys())
+                acc.id: acc
+                for acc in Account.objects.filter(id__in=balances.keys()).select_related(
+                    "currency"
+                )
             }
+            pocket_balances = get_account_entity_balances(
+                user=self.request.user, entity_id=entity_pk
+            )
             for pk, data in balances.items():
                 acc = account_map.get(pk)
                 data["type"] = getattr(acc, "account_type", "") if acc else ""
                 data["currency"] = acc.currency if acc else None
-                data["balance"] = get_account_entity_balance(
-                    pk, entity_pk, user=self.request.user
-                )
+                data["balance"] = pocket_balances.get((pk, entity_pk)) or Decimal("0")
 
             results = list(balances.values())
             # Hide the special Outside account from the entity Accounts list
@@ -470,16 +479,16 @@ class EntityAccountsView(TemplateView):
             disp_code = getattr(
                 self.request, "display_currency", settings.BASE_CURRENCY
             )
+            rates = get_conversion_rates(
+                {row["currency"].pk for row in results if row.get("currency")},
+                disp_code,
+            )
             total_balance = Decimal("0")
             for row in results:
                 bal = row.get("balance") or Decimal("0")
                 cur = row.get("currency")
-                if cur:
-                    total_balance += convert_to_base(
-                        bal, cur, base_currency=disp_code, user=self.request.user
-                    )
-                else:
-                    total_balance += bal
+                row["display_balance"] = bal * rates[cur.pk] if cur else bal
+                total_balance += row["display_balance"]
 
             ctx["accounts"] = results
             ctx["total_balance"] = total_balance
@@ -578,95 +587,28 @@ def entity_kpis(request, pk):
     entity = get_object_or_404(Entity, pk=pk, user=request.user, is_active=True)
     start, end = _parse_dates(request)
 
-    q_base = Transaction.objects.filter(user=request.user, parent_transfer__isnull=True)
-    if start:
-        q_base = q_base.filter(date__gte=start)
-    if end:
-        q_base = q_base.filter(date__lte=end)
-
-    # Income: true income only (exclude transfers/capital). Use mapped dest type.
-    income_qs = q_base.filter(
-        entity_destination=entity,
-        asset_type_destination__iexact="liquid",
-        transaction_type_destination__iexact="Income",
-    ).select_related("currency")
-    # Expenses: true expenses only (exclude transfers)
-    expense_qs = q_base.filter(
-        entity_source=entity,
-        asset_type_source__iexact="liquid",
-        transaction_type_source__iexact="Expense",
-    ).select_related("currency")
-    # Capital: net transfers (in - out)
-    cap_in_qs = q_base.filter(
-        entity_destination=entity,
-        asset_type_destination__iexact="liquid",
-        transaction_type__iexact="transfer",
-    ).select_related("currency")
-    cap_out_qs = q_base.filter(
-        entity_source=entity,
-        asset_type_source__iexact="liquid",
-        transaction_type__iexact="transfer",
-    ).select_related("currency")
-
-    def inflow_amount_and_currency(tx):
-        # Use destination_amount when present; it is denominated in the
-        # destination account's currency, not tx.currency.
-        if (
-            tx.destination_amount is not None
-            and tx.account_destination
-            and getattr(tx.account_destination, "currency", None)
-        ):
-            return tx.destination_amount, tx.account_destination.currency
-        return (tx.amount, tx.currency)
-
-    income = sum(
-        (
-            convert_to_base(
-                *inflow_amount_and_currency(tx), request=request, user=request.user
-            )
-            for tx in income_qs
-        ),
-        Decimal("0"),
-    )
-    expenses = sum(
-        (
-            convert_to_base(
-                tx.amount or 0, tx.currency, request=request, user=request.user
-            )
-            for tx in expense_qs
-        ),
-        Decimal("0"),
-    )
-    capital_in = sum(
-        (
-            convert_to_base(
-                *inflow_amount_and_currency(tx), request=request, user=request.user
-            )
-            for tx in cap_in_qs
-        ),
-        Decimal("0"),
-    )
-    capital_out = sum(
-        (
-            convert_to_base(
-                tx.amount or 0, tx.currency, request=request, user=request.user
-            )
-            for tx in cap_out_qs
-        ),
-        Decimal("0"),
-    )
-    capital_net = capital_in - capital_out
+    # Income/expenses are true income/expenses only; capital is net liquid
+    # transfers (in - out). All four come from one grouped query.
+    currency = get_active_currency(request)
+    kpis = entity_flow_totals(
+        request.user,
+        entity_ids=[entity.pk],
+        start=start,
+        end=end,
+        currency=currency,
+        liquid_only=True,
+        skip_internal=False,
+    )[entity.pk]
+    income = kpis["income"]
+    expenses = kpis["expenses"]
+    capital_net = kpis["capital_in"] - kpis["capital_out"]
     return JsonResponse(
         {
             "income": str(income),
             "expenses": str(expenses),
             "capital": str(capital_net),
             "net": str(income - expenses),
-            "currency": (
-                get_active_currency(request).code
-                if get_active_currency(request)
-                else "PHP"
-            ),
+            "currency": currency.code if currency else "PHP",
         }
     )
 
@@ -675,11 +617,7 @@ def entity_category_summary_api(request, pk):
     entity = get_object_or_404(Entity, pk=pk, user=request.user, is_active=True)
     start, end = _parse_dates(request)
     mode = (request.GET.get("type") or "expense").lower()
-    q = (
-        Transaction.objects.filter(user=request.user, parent_transfer__isnull=True)
-        .prefetch_related("categories")
-        .select_related("currency")
-    )
+    q = Transaction.objects.filter(user=request.user, parent_transfer__isnull=True)
     if start:
         q = q.filter(date__gte=start)
     if end:
@@ -691,16 +629,7 @@ def entity_category_summary_api(request, pk):
             asset_type_destination__iexact="liquid",
             transaction_type_destination__iexact="Income",
         )
-
-        def get_amount_and_currency(tx):
-            if (
-                tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-            ):
-                return tx.destination_amount, tx.account_destination.currency
-            return tx.amount, tx.currency
-
+        side = "destination"
     elif mode == "transfer":
         # Transfers treated as capital inflows to destination entity
         q = q.filter(
@@ -708,16 +637,7 @@ def entity_category_summary_api(request, pk):
             asset_type_destination__iexact="liquid",
             transaction_type__iexact="transfer",
         )
-
-        def get_amount_and_currency(tx):
-            if (
-                tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-            ):
-                return tx.destination_amount, tx.account_destination.currency
-            return tx.amount, tx.currency
-
+        side = "destination"
     else:
         # Only true expenses
         q = q.filter(
@@ -725,22 +645,14 @@ def entity_category_summary_api(request, pk):
             asset_type_source__iexact="liquid",
             transaction_type_source__iexact="Expense",
         )
+        side = "source"
 
-        def get_amount_and_currency(tx):
-            return tx.amount, tx.currency
-
-    totals = {}
-    for tx in q:
-        cats = list(tx.categories.all())
-        if not cats:
-            continue
-        amt_val, amt_cur = get_amount_and_currency(tx)
-        amt = convert_to_base(amt_val or 0, amt_cur, request=request, user=request.user)
-        for c in cats:
-            totals[c.name] = totals.get(c.name, Decimal("0")) + amt
+    grouped = category_totals(
+        q, {"total": (side, None)}, currency=get_active_currency(request)
+    )
     # Return top N by amount, ordered desc
     data = sorted(
-        ({"name": k, "total": str(v)} for k, v in totals.items()),
+        ({"name": k, "total": str(v["total"])} for k, v in grouped.items()),
         key=lambda r: Decimal(r["total"]),
         reverse=True,
     )
@@ -751,13 +663,9 @@ def entity_category_timeseries_api(request, pk):
     entity = get_object_or_404(Entity, pk=pk, user=request.user)
     start, end = _parse_dates(request)
     category = request.GET.get("category")  # name or id
-    _interval = request.GET.get("interval", "month")  # future-proof
+    interval = request.GET.get("interval", "month")  # week, month or quarter
 
-    q = (
-        Transaction.objects.filter(user=request.user, parent_transfer__isnull=True)
-        .prefetch_related("categories")
-        .select_related("currency")
-    )
+    q = Transaction.objects.filter(user=request.user, parent_transfer__isnull=True)
     if start:
         q = q.filter(date__gte=start)
     if end:
@@ -769,32 +677,14 @@ def entity_category_timeseries_api(request, pk):
             asset_type_destination__iexact="liquid",
             transaction_type_destination__iexact="Income",
         )
-
-        def get_amount_and_currency(tx):
-            if (
-                tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-            ):
-                return tx.destination_amount, tx.account_destination.currency
-            return tx.amount, tx.currency
-
+        side = "destination"
     elif mode == "transfer":
         q = q.filter(
             entity_destination=entity,
             asset_type_destination__iexact="liquid",
             transaction_type__iexact="transfer",
         )
-
-        def get_amount_and_currency(tx):
-            if (
-                tx.destination_amount is not None
-                and tx.account_destination
-                and getattr(tx.account_destination, "currency", None)
-            ):
-                return tx.destination_amount, tx.account_destination.currency
-            return tx.amount, tx.currency
-
+        side = "destination"
     else:
         # Expenses by default (true expenses only)
         q = q.filter(
@@ -802,9 +692,7 @@ def entity_category_timeseries_api(request, pk):
             asset_type_source__iexact="liquid",
             transaction_type_source__iexact="Expense",
         )
-
-        def get_amount_and_currency(tx):
-            return tx.amount, tx.currency
+        side = "source"
 
     # Filter by category name or id
     if category:
@@ -815,16 +703,12 @@ def entity_category_timeseries_api(request, pk):
         except (ValueError, TypeError):
             q = q.filter(categories__name=category)
 
-    buckets = {}
-    for tx in q:
-        key = tx.date.replace(day=1)
-        val, cur = get_amount_and_currency(tx)
-        amt = convert_to_base(val or 0, cur, request=request, user=request.user)
-        buckets[key] = buckets.get(key, Decimal("0")) + amt
-
+    buckets = period_totals(
+        q, {"total": (side, None)}, interval, currency=get_active_currency(request)
+    )
     rows = sorted(
         (
-            {"period": d.strftime("%Y-%m-01"), "total": str(v)}
+            {"period": d.isoformat(), "total": str(v["total"])}
             for d, v in buckets.items()
         ),
         key=lambda r: r["period"],
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Lender, Loan, LoanPayment, CreditCard
+from .models import Lender, Loan, LoanPayment, CreditCard, CreditCardStatement
 
 
 class LoanPaymentInline(admin.TabularInline):
@@ -14,5 +14,15 @@ class LoanAdmin(admin.ModelAdmin):
     list_display = ["lender", "principal_amount", "outstanding_balance"]
 
 
+class CreditCardStatementInline(admin.TabularInline):
+    model = CreditCardStatement
+    extra = 0
+
+
+@admin.register(CreditCard)
+class CreditCardAdmin(admin.ModelAdmin):
+    inlines = [CreditCardStatementInline]
+    list_display = ["card_name", "issuer", "outstanding_amount"]
+
+
 admin.site.register(Lender)
-admin.site.register(CreditCard)
@@ -0,0 +1,171 @@
+"""Loan amortization schedules.
+
+Installments are computed with ``Decimal`` arithmetic for any number of loans
+at once and written with a single ``bulk_create``. When a payment changes a
+loan's outstanding balance only the unpaid installments are re-amortized and
+only the rows whose figures change are written back.
+
+Methods:
+
+- ``principal_only``: equal principal and no interest, the schedule loans
+  had before interest was modelled (the default).
+- ``annuity``: equal payments; interest on the declining balance.
+- ``flat``: equal principal; interest on the original principal.
+- ``interest_only``: interest each month, principal due with the last payment.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Max, Q
+
+CENT = Decimal("0.01")
+
+PRINCIPAL_ONLY = "principal_only"
+ANNUITY = "annuity"
+FLAT = "flat"
+INTEREST_ONLY = "interest_only"
+
+
+@dataclass
+class Installment:
+    number: int
+    due_date: date
+    principal: Decimal
+    interest: Decimal
+
+    @property
+    def amount(self) -> Decimal:
+        return self.principal + self.interest
+
+
+def monthly_rate(annual_rate) -> Decimal:
+    """Convert an annual percentage (e.g. ``5`` for 5%) to a monthly rate."""
+    return Decimal(annual_rate or 0) / Decimal("1200")
+
+
+def amortize(
+    balance, annual_rate, periods, method=PRINCIPAL_ONLY, *, original_principal=None
+):
+    """Return ``[(principal, interest), ...]`` repaying ``balance``.
+
+    ``original_principal`` is the base for flat-rate interest and defaults to
+    ``balance``. Every figure is rounded to cents; the last installment
+    absorbs the rounding so the principal parts sum exactly to ``balance``.
+    """
+    balance = Decimal(balance or 0)
+    if periods <= 0 or balance <= 0:
+        return []
+    rate = monthly_rate(annual_rate)
+
+    if method == PRINCIPAL_ONLY:
+        principal = (balance / periods).quantize(CENT)
+        rows = [[principal, Decimal("0")] for _ in range(periods)]
+    elif method == INTEREST_ONLY:
+        interest = (balance * rate).quantize(CENT)
+        rows = [[Decimal("0"), interest] for _ in range(periods)]
+    elif method == FLAT:
+        base = Decimal(original_principal) if original_principal is not None else balance
+        interest = (base * rate).quantize(CENT)
+        principal = (balance / periods).quantize(CENT)
+        rows = [[principal, interest] for _ in range(periods)]
+    else:
+        if rate:
+            payment = (balance * rate / (1 - (1 + rate) ** -periods)).quantize(CENT)
+        else:
+            payment = (balance / periods).quantize(CENT)
+        rows = []
+        remaining = balance
+        for _ in range(periods):
+            interest = (remaining * rate).quantize(CENT)
+            principal = max(min(payment - interest, remaining), Decimal("0"))
+            rows.append([principal, interest])
+            remaining -= principal
+
+    rows[-1][0] = balance - sum((p for p, _ in rows[:-1]), Decimal("0"))
+    return [(p, i) for p, i in rows]
+
+
+def loan_installments(loan) -> list[Installment]:
+    """Return the full schedule for ``loan`` from its received date."""
+    from .models import _add_months
+
+    rows = amortize(
+        loan.principal_amount,
+        loan.interest_rate,
+        loan.term_months or 0,
+        loan.amortization_method,
+    )
+    return [
+        Installment(n, _add_months(loan.received_date, n), principal, interest)
+        for n, (principal, interest) in enumerate(rows, start=1)
+    ]
+
+
+def create_schedules(loans) -> list:
+    """Create ``LoanPayment`` rows for every loan in ``loans`` in one INSERT."""
+    from .models import LoanPayment
+
+    payments = [
+        LoanPayment(
+            loan=loan,
+            due_date=inst.due_date,
+            amount=inst.amount,
+            principal_component=inst.principal,
+            interest_component=inst.interest,
+        )
+        for loan in loans
+        for inst in loan_installments(loan)
+    ]
+    return LoanPayment.objects.bulk_create(payments)
+
+
+def reschedule(loan) -> list:
+    """Re-amortize the unpaid installments of ``loan`` from its balance.
+
+    Due dates are kept; amounts are recomputed over the remaining periods and
+    only changed rows are updated. Once the balance is cleared the remaining
+    unpaid installments are removed. Returns the rows that changed.
+    """
+    from .models import LoanPayment
+
+    unpaid = list(loan.payments.filter(is_paid=False).order_by("due_date", "pk"))
+    if not unpaid:
+        return []
+    if (loan.outstanding_balance or 0) <= 0:
+        LoanPayment.objects.filter(pk__in=[p.pk for p in unpaid]).delete()
+        return unpaid
+
+    rows = amortize(
+        loan.outstanding_balance,
+        loan.interest_rate,
+        len(unpaid),
+        loan.amortization_method,
+        original_principal=loan.principal_amount,
+    )
+    changed = []
+    for payment, (principal, interest) in zip(unpaid, rows):
+        if (
+            payment.principal_component != principal
+            or payment.interest_component != interest
+            or payment.amount != principal + interest
+        ):
+            payment.principal_component = principal
+            payment.interest_component = interest
+            payment.amount = principal + interest
+            changed.append(payment)
+    if changed:
+        LoanPayment.objects.bulk_update(
+            changed, ["amount", "principal_component", "interest_component"]
+        )
+    return changed
+
+
+def with_payoff_date(qs):
+    """Annotate loans with ``projected_payoff``: the last unpaid due date."""
+    return qs.annotate(
+        projected_payoff=Max("payments__due_date", filter=Q(payments__is_paid=False))
+    )
@@ -39,6 +39,7 @@ class LoanForm(forms.ModelForm):
             "interest_rate",
             "received_date",
             "term_months",
+            "amortization_method",
             "currency",
         ]
         widgets = {
@@ -56,6 +57,7 @@ class LoanForm(forms.ModelForm):
         self.helper.form_tag = False
         self.fields["lender_id"].required = False
         self.fields["lender_text"].required = False
+        self.fields["amortization_method"].required = False
         self.fields["lender_text"].widget.attrs.update(
             {"list": "lender-list", "autocomplete": "off"}
         )
@@ -131,6 +133,7 @@ class LoanForm(forms.ModelForm):
                 Column("currency", css_class="col-md-4"),
                 css_class="g-3",
             ),
+            Row(Column("amortization_method", css_class="col-md-6"), css_class="g-3"),
             Row(Column("account_destination", css_class="col-md-6"), css_class="g-3"),
             Field("account_source"),
             Field("entity_source"),
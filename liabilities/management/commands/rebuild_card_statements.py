@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from liabilities.models import CreditCard
+from liabilities.statements import refresh_card
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute credit card statement cycles from transaction history. "
+        "Use after bulk edits that bypass Transaction.save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--card",
+            type=int,
+            action="append",
+            help="Only rebuild the given card id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        qs = CreditCard.objects.select_related("account")
+        if options.get("card"):
+            qs = qs.filter(pk__in=options["card"])
+        count = 0
+        for card in qs.iterator():
+            refresh_card(card)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statements for {count} card(s)."))
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_principal(apps, schema_editor):
+    # Schedules created before this migration were principal-only
+    LoanPayment = apps.get_model("liabilities", "LoanPayment")
+    LoanPayment.objects.update(principal_component=F("amount"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liabilities", "0010_soft_delete_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loan",
+            name="amortization_method",
+            field=models.CharField(
+                choices=[
+                    ("annuity", "Annuity (equal payments)"),
+                    ("flat", "Flat rate"),
+                    ("interest_only", "Interest only"),
+                ],
+                default="flat",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="loanpayment",
+            name="interest_component",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0"), max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="loanpayment",
+            name="principal_component",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0"), max_digits=12
+            ),
+        ),
+        migrations.RunPython(backfill_principal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liabilities", "0011_loan_amortization"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CreditCardStatement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                ("statement_date", models.DateField()),
+                ("due_date", models.DateField()),
+                (
+                    "opening_balance",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=12
+                    ),
+                ),
+                (
+                    "purchases",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=12
+                    ),
+                ),
+                (
+                    "payments",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=12
+                    ),
+                ),
+                (
+                    "closing_balance",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=12
+                    ),
+                ),
+                (
+                    "minimum_due",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=12
+                    ),
+                ),
+                (
+                    "card",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statements",
+                        to="liabilities.creditcard",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["card", "statement_date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("card", "statement_date"),
+                        name="uniq_card_statement_date",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def restore_principal_only(apps, schema_editor):
+    # 0011 labelled every existing loan "flat", but their schedules carry no
+    # interest; keep them on the principal-only schedule they were built with
+    Loan = apps.get_model("liabilities", "Loan")
+    LoanPayment = apps.get_model("liabilities", "LoanPayment")
+    with_interest = LoanPayment.objects.filter(
+        interest_component__gt=Decimal("0")
+    ).values("loan_id")
+    Loan.objects.filter(amortization_method="flat").exclude(
+        pk__in=with_interest
+    ).update(amortization_method="principal_only")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liabilities", "0012_creditcardstatement"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="loan",
+            name="amortization_method",
+            field=models.CharField(
+                choices=[
+                    ("principal_only", "Equal principal, no interest"),
+                    ("annuity", "Annuity (equal payments)"),
+                    ("flat", "Flat rate"),
+                    ("interest_only", "Interest only"),
+                ],
+                default="principal_only",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(restore_principal_only, migrations.RunPython.noop),
+    ]
@@ -52,6 +52,12 @@ class Lender(models.Model):
 
 
 class Loan(models.Model):
+    amortization_method_choices = [
+        ("principal_only", "Equal principal, no interest"),
+        ("annuity", "Annuity (equal payments)"),
+        ("flat", "Flat rate"),
+        ("interest_only", "Interest only"),
+    ]
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -64,6 +70,9 @@ class Loan(models.Model):
     currency = models.CharField(max_length=3, blank=True)
     received_date = models.DateField()
     term_months = models.PositiveIntegerField()
+    amortization_method = models.CharField(
+        max_length=20, choices=amortization_method_choices, default="principal_only"
+    )
     maturity_date = models.DateField(blank=True, null=True)
     monthly_payment = models.DecimalField(
         max_digits=12, decimal_places=2, blank=True, null=True
@@ -71,7 +80,7 @@ class Loan(models.Model):
     outstanding_balance = models.DecimalField(
         max_digits=12, decimal_places=2, default=Decimal("0")
     )
-    # Tracks any amount paid beyond principal. Accumulates overpayments as interest.
+    # Interest settled by repayments plus anything paid beyond the principal
     interest_paid = models.DecimalField(
         max_digits=12, decimal_places=2, default=Decimal("0")
     )
@@ -121,10 +130,13 @@ class Loan(models.Model):
             self.term_months = (
                 self.maturity_date.year - self.received_date.year
             ) * 12 + (self.maturity_date.month - self.received_date.month)
+        if not self.amortization_method:
+            self.amortization_method = "principal_only"
         if self.monthly_payment is None and self.term_months:
-            self.monthly_payment = (
-                self.principal_amount / Decimal(self.term_months)
-            ).quantize(Decimal("0.01"))
+            from .amortization import loan_installments
+
+            first = next(iter(loan_installments(self)), None)
+            self.monthly_payment = first.amount if first else Decimal("0")
         if new and not self.outstanding_balance:
             self.outstanding_balance = self.principal_amount
         super().save(*args, **kwargs)
@@ -167,13 +179,35 @@ class Loan(models.Model):
                 tx.save()
 
     def _create_schedule(self):
-        for i in range(1, self.term_months + 1):
-            due = _add_months(self.received_date, i)
-            LoanPayment.objects.create(
-                loan=self,
-                due_date=due,
-                amount=self.monthly_payment or Decimal("0"),
-            )
+        from .amortization import create_schedules
+
+        create_schedules([self])
+
+    def apply_payment(self, amount):
+        """Apply a repayment to the next unpaid installment.
+
+        The payment settles that installment's interest first and the rest
+        goes to principal; the installment is marked paid. Anything beyond
+        the outstanding principal is tracked as interest paid. The unpaid
+        schedule is then re-amortized from the new balance.
+        """
+        from .amortization import reschedule
+
+        paid = Decimal(str(amount or 0))
+        due = self.payments.filter(is_paid=False).order_by("due_date", "pk").first()
+        interest = min(paid, due.interest_component) if due else Decimal("0")
+        principal_applied = min(paid - interest, self.outstanding_balance)
+        excess = paid - interest - principal_applied
+        self.outstanding_balance -= principal_applied
+        if due:
+            due.is_paid = True
+            due.save(update_fields=["is_paid"])
+        if interest + excess > 0:
+            self.interest_paid = (self.interest_paid or Decimal("0")) + interest + excess
+            self.save(update_fields=["outstanding_balance", "interest_paid"])
+        else:
+            self.save(update_fields=["outstanding_balance"])
+        reschedule(self)
 
     def __str__(self):
         return f"{self.lender.name} loan {self.principal_amount}"
@@ -199,6 +233,12 @@ class LoanPayment(models.Model):
     loan = models.ForeignKey(Loan, on_delete=models.CASCADE, related_name="payments")
     due_date = models.DateField()
     amount = models.DecimalField(max_digits=12, decimal_places=2)
+    principal_component = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0")
+    )
+    interest_component = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0")
+    )
     is_paid = models.BooleanField(default=False)
     transaction = models.ForeignKey(
         Transaction, on_delete=models.SET_NULL, null=True, blank=True
@@ -206,11 +246,14 @@ class LoanPayment(models.Model):
 
     def mark_paid(self, transaction):
         if not self.is_paid:
+            from .amortization import reschedule
+
             self.transaction = transaction
             self.is_paid = True
             self.save()
-            self.loan.outstanding_balance -= self.amount
+            self.loan.outstanding_balance -= self.principal_component
             self.loan.save()
+            reschedule(self.loan)
 
     def __str__(self):
         return f"Payment {self.due_date} - {self.amount}"
@@ -338,3 +381,44 @@ class CreditCard(models.Model):
         if self.account_id:
             self.account.delete()
         super().delete(*args, **kwargs)
+
+
+class CreditCardStatement(models.Model):
+    """Materialized totals for one billing cycle of a credit card.
+
+    Rows are maintained by :mod:`liabilities.statements` as transactions on
+    the card's account post, so balances never require a history rescan.
+    """
+
+    card = models.ForeignKey(
+        CreditCard, on_delete=models.CASCADE, related_name="statements"
+    )
+    period_start = models.DateField()
+    statement_date = models.DateField()
+    due_date = models.DateField()
+    opening_balance = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0")
+    )
+    purchases = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0")
+    )
+    payments = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0")
+    )
+    closing_balance = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0")
+    )
+    minimum_due = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0")
+    )
+
+    class Meta:
+        ordering = ["card", "statement_date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["card", "statement_date"], name="uniq_card_statement_date"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.card.card_name} {self.statement_date:%Y-%m-%d}"
@@ -0,0 +1,243 @@
+"""Credit card statement cycles.
+
+Each card's activity is bucketed into billing cycles ending on its
+``statement_day``. Cycle totals live in :class:`CreditCardStatement` rows that
+are updated incrementally as transactions post to the card's account: a new
+charge touches its own cycle plus any later cycles (normally none), so the
+card's outstanding amount no longer requires summing the account's history.
+
+Edits, deletions, hidden or reversal rows and split legs fall back to
+:func:`rebuild_statements`, which regroups the card's history in a single
+query. A new split leg turns its parent into a split parent, which the
+balance rules exclude, so the parent's earlier posting has to come out.
+"""
+
+from __future__ import annotations
+
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+CENT = Decimal("0.01")
+MINIMUM_DUE_RATE = Decimal("0.03")
+
+
+def _on_day(year: int, month: int, day: int) -> date:
+    """Return ``day`` of the given month, clamped to the month's length."""
+    last = calendar.monthrange(year, month)[1]
+    return date(year, month, min(max(day or 1, 1), last))
+
+
+def _next_month(year: int, month: int) -> tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _prev_month(year: int, month: int) -> tuple[int, int]:
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def cycle_for(card, day: date | None) -> tuple[date, date, date]:
+    """Return ``(period_start, statement_date, due_date)`` covering ``day``."""
+    day = day or timezone.localdate()
+    end = _on_day(day.year, day.month, card.statement_day)
+    if day > end:
+        end = _on_day(*_next_month(day.year, day.month), card.statement_day)
+    prev_end = _on_day(*_prev_month(end.year, end.month), card.statement_day)
+    due = _on_day(end.year, end.month, card.payment_due_day)
+    if due <= end:
+        due = _on_day(*_next_month(end.year, end.month), card.payment_due_day)
+    return prev_end + timedelta(days=1), end, due
+
+
+def minimum_due(closing) -> Decimal:
+    """Return the minimum payment for a statement closing at ``closing``."""
+    if closing is None or closing <= 0:
+        return Decimal("0")
+    return min(closing, (closing * MINIMUM_DUE_RATE).quantize(CENT))
+
+
+def _counts_toward_balance(tx, account) -> bool:
+    """Whether a newly saved ``tx`` can be posted incrementally.
+
+    Uses the row filters of ``AccountQuerySet.with_current_balance``. Split
+    parents are excluded there through their children, which a new row
+    cannot have yet; a split leg (``parent_transfer_id`` set) is left to a
+    rebuild instead, since it changes whether its parent counts.
+    """
+    return (
+        not tx.is_deleted
+        and not tx.is_hidden
+        and not tx.is_reversal
+        and tx.parent_transfer_id is None
+        and tx.user_id == account.user_id
+    )
+
+
+def _set_outstanding(card, closing) -> None:
+    bal = abs(closing or Decimal("0"))
+    card.outstanding_amount = bal
+    card.available_credit = (card.credit_limit or Decimal("0")) - bal
+    card.save(update_fields=["outstanding_amount", "available_credit"])
+
+
+def post_to_statement(card, day, charges=Decimal("0"), payments=Decimal("0")):
+    """Add ``charges``/``payments`` dated ``day`` to ``card``'s statements.
+
+    Called after the transaction is saved. Only the affected cycle and the
+    cycles after it are read and written; a card without statements is
+    rebuilt from its history instead. Returns the closing balance of the
+    card's latest statement.
+    """
+    from .models import CreditCardStatement
+
+    start, end, due = cycle_for(card, day)
+    rows = list(card.statements.filter(statement_date__gte=end).order_by("statement_date"))
+    if rows and rows[0].statement_date == end:
+        current, created = rows[0], False
+    else:
+        opening = (
+            card.statements.filter(statement_date__lt=end)
+            .order_by("-statement_date")
+            .values_list("closing_balance", flat=True)
+            .first()
+        )
+        if opening is None and not rows:
+            # No statements yet: seed them from the already-saved history
+            return rebuild_statements(card)
+        opening = opening or Decimal("0")
+        current, created = (
+            CreditCardStatement(
+                card=card,
+                period_start=start,
+                statement_date=end,
+                due_date=due,
+                opening_balance=opening,
+                closing_balance=opening,
+            ),
+            True,
+        )
+        rows.insert(0, current)
+
+    delta = charges - payments
+    current.purchases += charges
+    current.payments += payments
+    current.closing_balance += delta
+    for later in rows[1:]:
+        later.opening_balance += delta
+        later.closing_balance += delta
+    for row in rows:
+        row.minimum_due = minimum_due(row.closing_balance)
+
+    if created:
+        current.save()
+    fields = ["opening_balance", "purchases", "payments", "closing_balance", "minimum_due"]
+    CreditCardStatement.objects.bulk_update(rows[1:] if created else rows, fields)
+    return rows[-1].closing_balance
+
+
+def rebuild_statements(card):
+    """Recompute every statement of ``card`` from its account's history.
+
+    Activity is grouped by date in one query and bucketed into cycles in
+    Python. Returns the closing balance of the latest statement.
+    """
+    from transactions.models import Transaction
+    from .models import CreditCardStatement
+
+    acc = card.account
+    card.statements.all().delete()
+    if acc is None:
+        return Decimal("0")
+
+    daily = (
+        Transaction.all_objects.filter(
+            Q(account_source=acc) | Q(account_destination=acc),
+            user_id=acc.user_id,
+            is_deleted=False,
+            is_hidden=False,
+            is_reversal=False,
+            child_transfers__isnull=True,
+        )
+        .values("date")
+        .annotate(
+            charges=Sum("amount", filter=Q(account_source=acc)),
+            payments=Sum(
+                Coalesce("destination_amount", "amount"),
+                filter=Q(account_destination=acc),
+            ),
+        )
+    )
+
+    cycles: dict[date, CreditCardStatement] = {}
+    for row in daily:
+        start, end, due = cycle_for(card, row["date"])
+        stmt = cycles.get(end)
+        if stmt is None:
+            stmt = cycles[end] = CreditCardStatement(
+                card=card, period_start=start, statement_date=end, due_date=due
+            )
+        stmt.purchases += row["charges"] or Decimal("0")
+        stmt.payments += row["payments"] or Decimal("0")
+
+    balance = Decimal("0")
+    statements = [cycles[end] for end in sorted(cycles)]
+    for stmt in statements:
+        stmt.opening_balance = balance
+        balance += stmt.purchases - stmt.payments
+        stmt.closing_balance = balance
+        stmt.minimum_due = minimum_due(balance)
+    CreditCardStatement.objects.bulk_create(statements)
+    return balance
+
+
+def sync_transaction(tx, created: bool) -> None:
+    """Update statements and outstanding amounts of cards ``tx`` touches."""
+    for field, side in (("account_source", "charges"), ("account_destination", "payments")):
+        acc = getattr(tx, field, None)
+        card = getattr(acc, "credit_card", None) if acc is not None else None
+        if card is None:
+            continue
+        if created and _counts_toward_balance(tx, acc):
+            if side == "charges":
+                amount = tx.amount or Decimal("0")
+            else:
+                amount = tx.destination_amount
+                if amount is None:
+                    amount = tx.amount or Decimal("0")
+            closing = post_to_statement(card, tx.date, **{side: Decimal(amount)})
+        else:
+            closing = rebuild_statements(card)
+        _set_outstanding(card, closing)
+
+
+def refresh_card(card) -> None:
+    """Rebuild ``card``'s statements and its outstanding amount."""
+    _set_outstanding(card, rebuild_statements(card))
+
+
+def sync_accounts(account_ids) -> None:
+    """Rebuild statements of the cards attached to ``account_ids``."""
+    from .models import CreditCard
+
+    for card in CreditCard.objects.filter(account_id__in=[a for a in account_ids if a]):
+        refresh_card(card)
+
+
+def latest_statements(cards, as_of: date | None = None) -> dict:
+    """Return ``{card_id: statement}`` for each card's last closed cycle."""
+    from .models import CreditCardStatement
+
+    as_of = as_of or timezone.localdate()
+    last = (
+        CreditCardStatement.objects.filter(
+            card=OuterRef("card"), statement_date__lt=as_of
+        )
+        .order_by("-statement_date")
+        .values("pk")[:1]
+    )
+    rows = CreditCardStatement.objects.filter(card__in=list(cards), pk=Subquery(last))
+    return {stmt.card_id: stmt for stmt in rows}
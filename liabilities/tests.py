@@ -214,3 +214,145 @@ class LoanPaymentTransactionTest(TestCase):
         self.loan.refresh_from_db()
         self.assertEqual(self.loan.outstanding_balance, Decimal("0"))
         self.assertEqual(self.loan.interest_paid, Decimal("100"))
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class LoanAmortizationTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="amort", password="p")
+        self.client.force_login(self.user)
+        self.lender = Lender.objects.create(name="BPI")
+
+    def _loan(self, principal, rate, months, method):
+        return Loan.objects.create(
+            user=self.user,
+            lender=self.lender,
+            principal_amount=Decimal(principal),
+            interest_rate=Decimal(rate),
+            received_date=date(2025, 1, 31),
+            term_months=months,
+            amortization_method=method,
+        )
+
+    def test_annuity_schedule(self):
+        loan = self._loan("1000", "12", 12, "annuity")
+        payments = list(loan.payments.order_by("due_date"))
+        self.assertEqual(len(payments), 12)
+        self.assertEqual(loan.monthly_payment, Decimal("88.85"))
+        self.assertEqual(payments[0].interest_component, Decimal("10.00"))
+        self.assertEqual(payments[0].principal_component, Decimal("78.85"))
+        self.assertEqual(sum(p.principal_component for p in payments), Decimal("1000"))
+        self.assertEqual(payments[0].due_date, date(2025, 2, 28))
+        self.assertEqual(payments[-1].due_date, date(2026, 1, 31))
+
+    def test_flat_and_interest_only_schedules(self):
+        flat = self._loan("1000", "6", 3, "flat")
+        rows = [(p.principal_component, p.interest_component) for p in flat.payments.order_by("due_date")]
+        self.assertEqual(
+            rows,
+            [
+                (Decimal("333.33"), Decimal("5.00")),
+                (Decimal("333.33"), Decimal("5.00")),
+                (Decimal("333.34"), Decimal("5.00")),
+            ],
+        )
+        io = self._loan("1200", "10", 3, "interest_only")
+        amounts = list(io.payments.order_by("due_date").values_list("amount", flat=True))
+        self.assertEqual(amounts, [Decimal("10.00"), Decimal("10.00"), Decimal("1210.00")])
+
+    def test_long_schedule_is_bulk_inserted(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .amortization import create_schedules
+
+        loan = self._loan("250000", "6.5", 360, "annuity")
+        loan.payments.all().delete()
+        with CaptureQueriesContext(connection) as ctx:
+            create_schedules([loan])
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+        # SQLite splits on its variable limit; still a handful, not 360
+        self.assertLessEqual(len(inserts), 5)
+        self.assertEqual(loan.payments.count(), 360)
+
+    def test_default_schedule_is_equal_principal_without_interest(self):
+        loan = Loan.objects.create(
+            user=self.user,
+            lender=self.lender,
+            principal_amount=Decimal("1200"),
+            interest_rate=Decimal("12"),
+            received_date=date(2025, 1, 31),
+            term_months=12,
+        )
+        self.assertEqual(loan.amortization_method, "principal_only")
+        self.assertEqual(loan.monthly_payment, Decimal("100.00"))
+        self.assertEqual(
+            set(loan.payments.values_list("amount", "interest_component")),
+            {(Decimal("100.00"), Decimal("0"))},
+        )
+
+    def test_migration_keeps_interest_free_loans_principal_only(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        migration = import_module("liabilities.migrations.0013_loan_principal_only")
+        legacy = self._loan("1200", "12", 12, "flat")
+        # Schedules from before interest was modelled carry none
+        legacy.payments.update(interest_component=Decimal("0"))
+        flat = self._loan("1200", "12", 12, "flat")
+        migration.restore_principal_only(apps, None)
+        legacy.refresh_from_db()
+        flat.refresh_from_db()
+        self.assertEqual(legacy.amortization_method, "principal_only")
+        self.assertEqual(flat.amortization_method, "flat")
+
+    def test_payment_settles_the_next_installment(self):
+        loan = self._loan("1200", "12", 12, "flat")
+        first = loan.payments.order_by("due_date").first()
+        self.assertEqual(first.amount, Decimal("112.00"))
+        loan.apply_payment(first.amount)
+        loan.refresh_from_db()
+        first.refresh_from_db()
+        self.assertTrue(first.is_paid)
+        self.assertEqual(loan.outstanding_balance, Decimal("1100"))
+        self.assertEqual(loan.interest_paid, Decimal("12.00"))
+        unpaid = list(loan.payments.filter(is_paid=False))
+        self.assertEqual(len(unpaid), 11)
+        self.assertEqual({p.amount for p in unpaid}, {Decimal("112.00")})
+
+    def test_overpayment_reamortizes_unpaid_installments(self):
+        loan = self._loan("1000", "12", 4, "annuity")
+        # 10.00 interest of the first installment, 390 to principal
+        loan.apply_payment(Decimal("400"))
+        loan.refresh_from_db()
+        self.assertEqual(loan.outstanding_balance, Decimal("610"))
+        unpaid = list(loan.payments.filter(is_paid=False).order_by("due_date"))
+        self.assertEqual(len(unpaid), 3)
+        self.assertEqual(sum(p.principal_component for p in unpaid), Decimal("610"))
+        self.assertEqual(unpaid[0].interest_component, Decimal("6.10"))
+
+        # 6.10 interest, 610 principal and 33.90 beyond the balance
+        loan.apply_payment(Decimal("650"))
+        loan.refresh_from_db()
+        self.assertEqual(loan.interest_paid, Decimal("50"))
+        self.assertFalse(loan.payments.filter(is_paid=False).exists())
+        self.assertEqual(loan.payments.filter(is_paid=True).count(), 2)
+
+    def test_list_shows_payoff_dates_without_per_loan_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = reverse("liabilities:list") + "?tab=loans"
+        self._loan("1000", "5", 12, "flat")
+        self.client.get(url)  # warm per-process caches
+        with CaptureQueriesContext(connection) as small:
+            resp = self.client.get(url)
+        self.assertContains(resp, "Jan 31, 2026")
+        for i in range(5):
+            self._loan("500", "5", 6 + i, "annuity")
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url)
+        self.assertEqual(len(large), len(small))
@@ -8,10 +8,12 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.shortcuts import redirect, get_object_or_404
 
+from .amortization import with_payoff_date
+from .statements import latest_statements
 from .models import Loan, CreditCard, Lender
 from .forms import LoanForm, CreditCardForm
 from django.conf import settings
-from utils.currency import convert_amount
+from utils.currency import amount_for_display
 
 
 @login_required
@@ -43,7 +45,9 @@ class LiabilityListView(TemplateView):
         currency = params.get("currency")
 
         if tab == "loans":
-            qs = Loan.objects.filter(user=self.request.user, is_deleted=False)
+            qs = with_payoff_date(
+                Loan.objects.filter(user=self.request.user, is_deleted=False)
+            ).select_related("lender")
             if search:
                 qs = qs.filter(lender__name__icontains=search)
             if status == "active":
@@ -73,7 +77,9 @@ class LiabilityListView(TemplateView):
             else:
                 qs = qs.order_by("lender__name")
         else:
-            qs = CreditCard.objects.filter(user=self.request.user, is_deleted=False)
+            qs = CreditCard.objects.filter(
+                user=self.request.user, is_deleted=False
+            ).select_related("issuer", "account")
             if search:
                 qs = qs.filter(card_name__icontains=search)
             if status == "active":
@@ -156,15 +162,17 @@ class LiabilityListView(TemplateView):
             # Format numeric amounts with thousands separators and 2 decimals
             try:
                 # Convert from the loan's currency code to the display currency
-                conv_bal = convert_amount(
-                    (loan.outstanding_balance or 0), loan.currency or disp_code, disp_code
+                conv_bal = amount_for_display(
+                    self.request, (loan.outstanding_balance or 0), loan.currency or disp_code
                 )
                 bal = f"{(conv_bal or 0):,.2f}"
             except Exception:
                 bal = loan.outstanding_balance
             try:
                 int_paid_val = getattr(loan, "interest_paid", 0) or 0
-                int_paid_conv = convert_amount(int_paid_val, loan.currency or disp_code, disp_code)
+                int_paid_conv = amount_for_display(
+                    self.request, int_paid_val, loan.currency or disp_code
+                )
                 int_paid = f"{(int_paid_conv or 0):,.2f}"
             except Exception:
                 int_paid = getattr(loan, "interest_paid", 0)
@@ -180,9 +188,19 @@ class LiabilityListView(TemplateView):
                         else "-"
                     ),
                 ),
+                (
+                    "Payoff",
+                    (
+                        loan.projected_payoff.strftime("%b %d, %Y")
+                        if loan.projected_payoff
+                        else ("Paid off" if loan.outstanding_balance <= 0 else "-")
+                    ),
+                ),
                 ("Currency", loan.currency),
             ]
-        for card in ctx.get("credit_cards", []):
+        cards = ctx.get("credit_cards", [])
+        statements = latest_statements(cards) if cards else {}
+        for card in cards:
             # Format numeric amounts with thousands separators and 2 decimals
             try:
                 limit_disp = f"{(card.credit_limit or 0):,.2f}"
@@ -198,10 +216,17 @@ class LiabilityListView(TemplateView):
                 avail_disp = f"{avail_calc:,.2f}"
             except Exception:
                 avail_disp = card.available_credit or 0
+            stmt = statements.get(card.pk)
             card.field_tags = [
                 ("Limit", limit_disp),
                 ("Outstanding", out_disp),
                 ("Available", avail_disp),
+                (
+                    "Statement",
+                    f"{stmt.closing_balance:,.2f}" if stmt else "-",
+                ),
+                ("Min Due", f"{stmt.minimum_due:,.2f}" if stmt else "-"),
+                ("Due", stmt.due_date.strftime("%b %d, %Y") if stmt else "-"),
                 ("Rate", f"{card.interest_rate}%"),
             ]
         return ctx
@@ -1,8 +1,16 @@
-from django.test import TestCase, override_settings
+from decimal import Decimal
+
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
 
 from accounts.models import Account
-from currencies.models import Currency
+from currencies.models import Currency, ExchangeRate
+from transactions.models import Transaction
+from utils.mixins import CurrencyConversionMixin
 
 
 @override_settings(
@@ -21,3 +29,75 @@ class AccountBalanceConversionTests(TestCase):
         balance = self.account.get_current_balance()
         conv = self.account.balance_in_currency("USD")
         self.assertEqual(conv, balance)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class AccountListBatchConversionTests(TestCase):
+    def setUp(self):
+        self.php = Currency.objects.create(code="PHP", name="Peso")
+        self.usd = Currency.objects.create(code="USD", name="US Dollar")
+        ExchangeRate.objects.create(
+            currency_from=self.usd, currency_to=self.php, rate=Decimal("50")
+        )
+        User = get_user_model()
+        self.user = User.objects.create_user(username="list", password="p")
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["display_currency"] = "PHP"
+        session.save()
+
+    def _account(self, name, currency, amount):
+        acc = Account.objects.create(
+            account_name=name, account_type="Cash", currency=currency, user=self.user
+        )
+        Transaction.objects.create(
+            user=self.user,
+            date=timezone.now().date(),
+            transaction_type="income",
+            amount=Decimal(amount),
+            account_destination=acc,
+            currency=currency,
+        )
+        return acc
+
+    def test_account_list_converts_annotated_balances(self):
+        self._account("Cash", self.php, "100")
+        self._account("Wallet", self.usd, "2")
+        resp = self.client.get(reverse("accounts:list"))
+        converted = {a.account_name: c for a, c in resp.context["accounts_converted"]}
+        self.assertEqual(converted["Cash"], Decimal("100"))
+        self.assertEqual(converted["Wallet"], Decimal("100"))
+        self.assertEqual(resp.context["total_balance"], Decimal("200"))
+
+    def test_account_list_query_count_independent_of_account_count(self):
+        url = reverse("accounts:list")
+        self._account("Cash", self.php, "100")
+        self.client.get(url)  # warm per-process caches
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        for i in range(10):
+            self._account(f"Wallet {i}", self.usd if i % 2 else self.php, "5")
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url)
+        self.assertEqual(len(large), len(small))
+
+    def test_mixin_converts_with_one_rate_lookup_per_currency(self):
+        self._account("Cash", self.php, "100")
+        self._account("Wallet", self.usd, "2")
+        gbp = Currency.objects.create(code="GBP", name="Pound")
+        self._account("Travel", gbp, "7")
+
+        mixin = CurrencyConversionMixin()
+        mixin.request = RequestFactory().get("/")
+        mixin.request.display_currency = "PHP"
+        qs = Account.objects.filter(user=self.user).with_current_balance()
+        with CaptureQueriesContext(connection) as ctx:
+            objs = mixin.convert_queryset_balance(qs.select_related("currency"))
+            converted = {o.account_name: o.converted_balance for o in objs}
+        self.assertEqual(converted["Wallet"], Decimal("100"))
+        # No PHP->PHP or GBP->PHP rate: convert_amount would raise MissingRateError
+        self.assertIsNone(converted["Cash"])
+        self.assertIsNone(converted["Travel"])
+        self.assertEqual(len(ctx), 3)
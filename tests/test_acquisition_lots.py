@@ -0,0 +1,218 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Account
+from acquisitions.lots import (
+    ensure_lots,
+    positions,
+    realized_gains,
+    record_buy,
+    record_sale,
+    update_lot,
+)
+from acquisitions.models import Acquisition, AcquisitionDisposal, LotConsumption
+from entities.models import Entity
+from transactions.models import Transaction
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class AcquisitionLotTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="lots", password="p")
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user
+        )
+        self.entity = Entity.objects.create(
+            entity_name="Broker", entity_type="outside", user=self.user
+        )
+
+    def _acq(self, method=Acquisition.COST_FIFO):
+        return Acquisition.objects.create(
+            name="ACME", category="stock_bond", user=self.user, cost_method=method
+        )
+
+    def _buy_tx(self, amount, day):
+        return Transaction.objects.create(
+            user=self.user,
+            date=day,
+            description="Buy ACME",
+            transaction_type="buy acquisition",
+            amount=Decimal(amount),
+            account_source=self.cash,
+            account_destination=self.cash,
+            entity_source=self.entity,
+            entity_destination=self.entity,
+        )
+
+    def _two_lots_and_sale(self, method):
+        acq = self._acq(method)
+        lot1 = record_buy(acq, Decimal("10"), Decimal("100"), date(2025, 1, 1))
+        lot2 = record_buy(acq, Decimal("10"), Decimal("200"), date(2025, 2, 1))
+        sale = record_sale(acq, Decimal("15"), Decimal("3000"), date(2025, 3, 1))
+        return acq, lot1, lot2, sale
+
+    def test_fifo_consumes_oldest_lots_first(self):
+        acq, lot1, lot2, sale = self._two_lots_and_sale(Acquisition.COST_FIFO)
+        self.assertEqual((sale.cost_basis, sale.realized_gain), (Decimal("2000"), Decimal("1000")))
+        lot1.refresh_from_db()
+        lot2.refresh_from_db()
+        self.assertEqual((lot1.remaining_quantity, lot2.remaining_quantity), (0, 5))
+        acq.refresh_from_db()
+        self.assertEqual((acq.quantity, acq.avg_unit_cost), (Decimal("5"), Decimal("200")))
+
+    def test_average_cost_uses_running_average(self):
+        acq, _, _, sale = self._two_lots_and_sale(Acquisition.COST_AVERAGE)
+        self.assertEqual((sale.cost_basis, sale.realized_gain), (Decimal("2250"), Decimal("750")))
+        acq.refresh_from_db()
+        self.assertEqual((acq.quantity, acq.avg_unit_cost), (Decimal("5"), Decimal("150")))
+        # Selling the rest leaves no cost behind
+        last = record_sale(acq, Decimal("5"), Decimal("500"), date(2025, 4, 1))
+        self.assertEqual(last.cost_basis, Decimal("750"))
+        self.assertEqual(acq.avg_unit_cost, Decimal("0"))
+
+    def test_correcting_a_buy_reprices_later_sales_only(self):
+        acq = self._acq()
+        record_buy(acq, Decimal("10"), Decimal("100"), date(2025, 1, 1))
+        early = record_sale(acq, Decimal("2"), Decimal("300"), date(2025, 1, 15))
+        lot2 = record_buy(acq, Decimal("10"), Decimal("200"), date(2025, 2, 1))
+        late = record_sale(acq, Decimal("10"), Decimal("2500"), date(2025, 3, 1))
+        # 8 left of the first lot plus 2 of the second
+        self.assertEqual(late.cost_basis, Decimal("1200"))
+        early_rows = set(LotConsumption.objects.filter(disposal=early).values_list("pk", flat=True))
+
+        update_lot(lot2, unit_cost=Decimal("150"))
+        late.refresh_from_db()
+        self.assertEqual(late.cost_basis, Decimal("1100"))
+        self.assertEqual(late.realized_gain, Decimal("1400"))
+        # The sale before the corrected lot was not replayed
+        self.assertEqual(
+            set(LotConsumption.objects.filter(disposal=early).values_list("pk", flat=True)),
+            early_rows,
+        )
+
+        # Backdating a buy before the first sale re-prices both
+        update_lot(lot2, date=date(2024, 12, 1))
+        early.refresh_from_db()
+        self.assertEqual(early.cost_basis, Decimal("300"))
+
+    def test_overselling_is_rejected_and_rolled_back(self):
+        acq = self._acq()
+        record_buy(acq, Decimal("5"), Decimal("10"), date(2025, 1, 1))
+        with self.assertRaises(ValidationError):
+            record_sale(acq, Decimal("6"), Decimal("100"), date(2025, 1, 2))
+        self.assertFalse(AcquisitionDisposal.objects.exists())
+        acq.refresh_from_db()
+        self.assertEqual(acq.quantity, Decimal("5"))
+
+        # A backdated sale before the only lot was bought cannot be placed
+        with self.assertRaises(ValidationError):
+            record_sale(acq, Decimal("1"), Decimal("10"), date(2024, 12, 1))
+
+    def test_editing_buy_transaction_updates_lot_cost(self):
+        acq = self._acq()
+        tx = self._buy_tx("1000", date(2025, 1, 1))
+        lot = record_buy(acq, Decimal("10"), Decimal("100"), tx.date, tx=tx)
+        sale = record_sale(acq, Decimal("5"), Decimal("600"), date(2025, 2, 1))
+        self.assertEqual(sale.realized_gain, Decimal("100"))
+
+        tx.amount = Decimal("800")
+        tx.save()
+        lot.refresh_from_db()
+        sale.refresh_from_db()
+        self.assertEqual(lot.unit_cost, Decimal("80"))
+        self.assertEqual(sale.realized_gain, Decimal("200"))
+
+    def test_replay_cost_does_not_grow_with_earlier_history(self):
+        acq = self._acq()
+        record_buy(acq, Decimal("100"), Decimal("1"), date(2025, 1, 1))
+
+        def cost(day):
+            with CaptureQueriesContext(connection) as ctx:
+                record_sale(acq, Decimal("1"), Decimal("2"), day)
+            return len(ctx)
+
+        first = cost(date(2025, 1, 2))
+        for i in range(3, 20):
+            record_sale(acq, Decimal("1"), Decimal("2"), date(2025, 1, i))
+        self.assertEqual(cost(date(2025, 2, 1)), first)
+
+    def test_bulk_positions_and_gains(self):
+        fifo, _, _, _ = self._two_lots_and_sale(Acquisition.COST_FIFO)
+        avg, _, _, _ = self._two_lots_and_sale(Acquisition.COST_AVERAGE)
+        with CaptureQueriesContext(connection) as ctx:
+            pos = positions(self.user)
+        self.assertEqual(len(ctx), 2)
+        self.assertEqual((pos[fifo.pk].quantity, pos[fifo.pk].cost), (5, Decimal("1000")))
+        self.assertEqual(pos[avg.pk].cost, Decimal("750"))
+        self.assertEqual(pos[avg.pk].realized, Decimal("750"))
+        self.assertEqual(
+            realized_gains(self.user, start=date(2025, 3, 1)),
+            {fifo.pk: Decimal("1000"), avg.pk: Decimal("750")},
+        )
+        self.assertEqual(realized_gains(self.user, end=date(2025, 2, 1)), {})
+
+    def test_sell_posts_transactions_from_lot_basis(self):
+        acq = self._acq(Acquisition.COST_FIFO)
+        acq.purchase_tx = self._buy_tx("100", date(2025, 1, 1))
+        acq.quantity, acq.avg_unit_cost = Decimal("1"), Decimal("100")
+        acq.save()
+        # Holdings from before lots existed get an opening lot
+        acq.sell(Decimal("1"), Decimal("130"), self.cash, date(2025, 2, 1))
+        self.assertEqual(acq.lots.count(), 1)
+        profit = Transaction.objects.get(description="Sell ACME - profit")
+        self.assertEqual(profit.amount, Decimal("30"))
+        self.assertEqual(acq.status, "inactive")
+        self.assertEqual(acq.lots.get().transaction, acq.purchase_tx)
+
+    def test_partly_sold_holding_seeds_an_unlinked_lot(self):
+        acq = self._acq()
+        acq.purchase_tx = self._buy_tx("300", date(2025, 1, 1))
+        # Bought three units at 100, one sold before lots existed
+        acq.quantity, acq.avg_unit_cost = Decimal("2"), Decimal("100")
+        acq.save()
+        ensure_lots(acq)
+        lot = acq.lots.get()
+        self.assertIsNone(lot.transaction)
+        self.assertEqual(lot.unit_cost, Decimal("100"))
+
+    def test_buying_from_the_form_records_a_linked_lot(self):
+        from accounts.utils import ensure_outside_account
+        from entities.utils import ensure_fixed_entities
+
+        outside = ensure_outside_account()
+        outside_ent, _ = ensure_fixed_entities(self.user)
+        self.client.force_login(self.user)
+        resp = self.client.post(
+            reverse("acquisitions:acquisition-create"),
+            {
+                "name": "Tractor",
+                "category": "product",
+                "date": "2025-01-01",
+                "amount": "500",
+                "account_source": outside.pk,
+                "account_destination": self.cash.pk,
+                "entity_source": outside_ent.pk,
+                "entity_destination": self.entity.pk,
+            },
+        )
+        self.assertEqual(resp.status_code, 302)
+        acq = Acquisition.objects.get(name="Tractor")
+        lot = acq.lots.get()
+        self.assertEqual(lot.transaction, acq.purchase_tx)
+        self.assertEqual((lot.quantity, lot.unit_cost), (1, Decimal("500")))
+
+        # Correcting the purchase re-prices the lot
+        acq.purchase_tx.amount = Decimal("450")
+        acq.purchase_tx.save()
+        lot.refresh_from_db()
+        self.assertEqual(lot.unit_cost, Decimal("450"))
@@ -0,0 +1,174 @@
+import json
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Account
+from acquisitions.models import Acquisition, AcquisitionPrice
+from acquisitions.valuation import value_holdings
+from currencies.models import Currency, ExchangeRate
+from entities.models import Entity
+from transactions.models import Transaction
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class AcquisitionValuationTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="val", password="p")
+        self.client.force_login(self.user)
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user
+        )
+        self.broker = Entity.objects.create(
+            entity_name="Broker", entity_type="outside", user=self.user
+        )
+        self.home = Entity.objects.create(
+            entity_name="Home", entity_type="outside", user=self.user
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _acq(self, name, amount, category="stock_bond", entity=None, **kw):
+        tx = Transaction.objects.create(
+            user=self.user,
+            date=date(2025, 1, 2),
+            description=f"Buy {name}",
+            transaction_type="buy acquisition",
+            amount=Decimal(amount),
+            account_source=self.cash,
+            account_destination=self.cash,
+            entity_source=entity or self.broker,
+            entity_destination=entity or self.broker,
+        )
+        return Acquisition.objects.create(
+            name=name,
+            category=category,
+            purchase_tx=tx,
+            user=self.user,
+            status="active",
+            **kw,
+        )
+
+    def _file(self, name, content):
+        path = Path(self.tmp.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def test_marks_to_latest_price_with_fallbacks(self):
+        stock = self._acq(
+            "ACME", "1000", quantity=Decimal("10"), avg_unit_cost=Decimal("100")
+        )
+        bond = self._acq("Bond", "500", current_value=Decimal("450"))
+        house = self._acq("House", "2000", category="property", entity=self.home)
+        AcquisitionPrice.objects.create(acquisition=stock, date=date(2025, 1, 10), price=Decimal("110"))
+        AcquisitionPrice.objects.create(acquisition=stock, date=date(2025, 2, 10), price=Decimal("150"))
+
+        val = value_holdings(self.user, as_of=date(2025, 1, 31))
+        by_id = val.holding_map()
+        self.assertEqual(by_id[stock.pk].market_value, Decimal("1100"))
+        self.assertEqual(by_id[stock.pk].unrealized, Decimal("100"))
+        self.assertEqual(by_id[bond.pk].market_value, Decimal("450"))
+        self.assertEqual(by_id[house.pk].unrealized, Decimal("0"))
+        self.assertEqual(val.market_value, Decimal("3550"))
+        self.assertEqual(val.unrealized, Decimal("50"))
+        self.assertEqual(val.by_entity[self.home.pk].allocation, Decimal("56.34"))
+        self.assertEqual(val.by_category["stock_bond"].market_value, Decimal("1550"))
+
+        later = value_holdings(self.user, as_of=date(2025, 3, 1))
+        self.assertEqual(later.holding_map()[stock.pk].market_value, Decimal("1500"))
+
+    def test_sold_and_deleted_holdings_are_excluded(self):
+        self._acq("Kept", "100")
+        sold = self._acq("Sold", "100")
+        sold.sell_tx = Transaction.objects.create(
+            user=self.user, date=date(2025, 2, 1), transaction_type="income", amount=Decimal("5")
+        )
+        sold.save()
+        self._acq("Gone", "100").delete()
+        val = value_holdings(self.user)
+        self.assertEqual([h.name for h in val.holdings], ["Kept"])
+
+    def test_cached_until_prices_or_ledger_change(self):
+        stock = self._acq("ACME", "100", quantity=Decimal("1"), avg_unit_cost=Decimal("100"))
+        value_holdings(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            value_holdings(self.user)
+        self.assertEqual(len(ctx), 1)  # currency lookup only
+
+        AcquisitionPrice.objects.create(acquisition=stock, date=date(2025, 1, 3), price=Decimal("120"))
+        self.assertEqual(value_holdings(self.user).market_value, Decimal("120"))
+        stock.quantity = Decimal("2")
+        stock.save()
+        self.assertEqual(value_holdings(self.user).market_value, Decimal("240"))
+
+    def test_cached_until_exchange_rates_change(self):
+        usd = Currency.objects.create(code="USD", name="US Dollar")
+        php = Currency.objects.create(code="PHP", name="Philippine Peso")
+        rate = ExchangeRate.objects.create(currency_from=usd, currency_to=php, rate=Decimal("50"))
+        stock = self._acq("ACME", "100", quantity=Decimal("1"), avg_unit_cost=Decimal("100"))
+        Transaction.objects.filter(pk=stock.purchase_tx_id).update(currency=usd)
+        self.assertEqual(value_holdings(self.user, currency="PHP").cost, Decimal("5000"))
+
+        rate.rate = Decimal("55")
+        rate.save()
+        self.assertEqual(value_holdings(self.user, currency="PHP").cost, Decimal("5500"))
+
+    def test_query_count_independent_of_holdings(self):
+        def cost():
+            with CaptureQueriesContext(connection) as ctx:
+                value_holdings(self.user, as_of=date(2025, 6, 1))
+            return len(ctx)
+
+        a = self._acq("A", "10")
+        AcquisitionPrice.objects.create(acquisition=a, date=date(2025, 1, 3), price=Decimal("12"))
+        small = cost()
+        for i in range(10):
+            b = self._acq(f"B{i}", "10", quantity=Decimal("2"), avg_unit_cost=Decimal("5"))
+            AcquisitionPrice.objects.create(acquisition=b, date=date(2025, 1, 3), price=Decimal("7"))
+        self.assertEqual(cost(), small)
+
+    def test_import_prices_csv_and_json(self):
+        stock = self._acq("ACME", "100", quantity=Decimal("1"), avg_unit_cost=Decimal("100"))
+        bond = self._acq("Bond", "500")
+        path = self._file(
+            "prices.csv",
+            "acquisition,name,date,price\n"
+            f"{stock.pk},,2025-01-10,101.5\n"
+            ",bond,2025-01-10,480\n"
+            ",Missing,2025-01-10,1\n"
+            ",ACME,not-a-date,1\n",
+        )
+        out, err = StringIO(), StringIO()
+        call_command("import_prices", path, "--user", "val", stdout=out, stderr=err)
+        self.assertIn("Imported 2 price(s); skipped 2 row(s).", out.getvalue())
+        self.assertIn("no acquisition matches 'Missing'", err.getvalue())
+
+        path = self._file(
+            "prices.json",
+            json.dumps([{"acquisition": stock.pk, "date": "2025-01-10", "price": "105"}]),
+        )
+        call_command("import_prices", path, "--source", "broker", stdout=StringIO())
+        price = AcquisitionPrice.objects.get(acquisition=stock)
+        self.assertEqual((price.price, price.source), (Decimal("105"), "broker"))
+        self.assertEqual(AcquisitionPrice.objects.get(acquisition=bond).price, Decimal("480"))
+        self.assertEqual(value_holdings(self.user).market_value, Decimal("585"))
+
+    def test_list_view_shows_market_value(self):
+        stock = self._acq("ACME", "100", quantity=Decimal("2"), avg_unit_cost=Decimal("50"))
+        AcquisitionPrice.objects.create(acquisition=stock, date=date(2025, 1, 3), price=Decimal("75"))
+        resp = self.client.get(reverse("acquisitions:acquisition-list"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Unrealized P/L")
+        self.assertEqual(resp.context["valuation"].unrealized, Decimal("50"))
@@ -0,0 +1,55 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.bench import DEFAULT_TOLERANCE, compare, run
+
+
+class CompareTests(SimpleTestCase):
+    def test_flags_extra_queries_and_slowdowns_beyond_tolerance(self):
+        baseline = [
+            {"size": 100, "name": "a", "queries": 5, "wall_ms": 10.0, "peak_kb": 100.0},
+            {"size": 100, "name": "b", "queries": 5, "wall_ms": 10.0, "peak_kb": 100.0},
+        ]
+        results = [
+            {"size": 100, "name": "a", "queries": 6, "wall_ms": 14.0, "peak_kb": 150.0},
+            {"size": 100, "name": "b", "queries": 5, "wall_ms": 16.0, "peak_kb": 90.0},
+            {"size": 100, "name": "new", "queries": 50, "wall_ms": 1.0, "peak_kb": 1.0},
+        ]
+        self.assertEqual(
+            [(r["name"], r["metric"]) for r in compare(results, baseline, 0.25)],
+            [("a", "queries"), ("b", "wall_ms")],
+        )
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class BenchmarkRunTests(TestCase):
+    def test_run_reports_each_entry_point(self):
+        results = run([60], repeat=1, only=["dashboard-data", "bulk_delete", "transaction_save"])
+        self.assertEqual(
+            [r["name"] for r in results], ["dashboard-data", "bulk_delete", "transaction_save"]
+        )
+        for r in results:
+            self.assertEqual(r["size"], 60)
+            self.assertGreater(r["queries"], 0)
+            self.assertGreater(r["peak_kb"], 0)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_hot_path_benchmarks():
+    """Full suite, configured by BENCH_SIZE, BENCH_OUTPUT, BENCH_BASELINE and BENCH_TOLERANCE."""
+    sizes = [int(s) for s in os.environ.get("BENCH_SIZE", "1000").split(",")]
+    results = run(sizes)
+    if os.environ.get("BENCH_OUTPUT"):
+        Path(os.environ["BENCH_OUTPUT"]).write_text(json.dumps({"results": results}, indent=2))
+    if os.environ.get("BENCH_BASELINE"):
+        baseline = json.loads(Path(os.environ["BENCH_BASELINE"]).read_text())["results"]
+        tolerance = float(os.environ.get("BENCH_TOLERANCE", DEFAULT_TOLERANCE))
+        regressions = compare(results, baseline, tolerance)
+        assert not regressions, json.dumps(regressions, indent=2)
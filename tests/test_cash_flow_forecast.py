@@ -0,0 +1,160 @@
+from decimal import Decimal
+from datetime import date
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from accounts.models import Account
+from accounts.utils import ensure_outside_account
+from entities.utils import ensure_fixed_entities
+from liabilities.models import CreditCard, Lender, Loan
+from transactions.forecast import (
+    DAILY,
+    ForecastEvent,
+    bucket_dates,
+    forecast_cash_flow,
+)
+from transactions.models import Transaction
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class CashFlowForecastTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="fc", password="p")
+        self.client.force_login(self.user)
+        self.outside = ensure_outside_account()
+        self.out_ent, self.acc_ent = ensure_fixed_entities(self.user)
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user
+        )
+        self.lender = Lender.objects.create(name="Fund Bank")
+
+    def _loan(self, principal, months, received=date(2025, 1, 15)):
+        loan = Loan(
+            user=self.user,
+            lender=self.lender,
+            principal_amount=Decimal(principal),
+            interest_rate=Decimal("0"),
+            received_date=received,
+            term_months=months,
+        )
+        loan._account_destination = self.cash
+        loan.save()
+        return loan
+
+    def _spend(self, amount, day=date(2025, 1, 20)):
+        Transaction.objects.create(
+            user=self.user,
+            date=day,
+            transaction_type="expense",
+            amount=Decimal(amount),
+            account_source=self.cash,
+            account_destination=self.outside,
+            entity_source=self.acc_ent,
+            entity_destination=self.out_ent,
+        )
+
+    def test_bucket_dates(self):
+        self.assertEqual(
+            bucket_dates(date(2025, 1, 10), date(2025, 4, 10)),
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 10)],
+        )
+        self.assertEqual(len(bucket_dates(date(2025, 1, 1), date(2025, 1, 31), DAILY)), 31)
+
+    def test_loan_installments_project_account_entity_and_total(self):
+        self._loan("1200", 12)
+        self._spend("1000")
+        fc = forecast_cash_flow(self.user, 6, start=date(2025, 2, 1))
+        self.assertEqual(len(fc.dates), 7)
+        self.assertEqual(
+            fc.accounts[self.cash.pk][:4],
+            [Decimal("100"), Decimal("0"), Decimal("-100"), Decimal("-200")],
+        )
+        self.assertEqual(fc.total, fc.accounts[self.cash.pk])
+        self.assertEqual(fc.entities[self.acc_ent.pk][0], Decimal("100"))
+        self.assertEqual(fc.first_negative[("account", self.cash.pk)], date(2025, 4, 15))
+        self.assertEqual(fc.first_negative[("total", None)], date(2025, 4, 15))
+        self.assertEqual(fc.first_negative[("entity", self.acc_ent.pk)], date(2025, 4, 15))
+
+    def test_daily_granularity_and_overdue_installments(self):
+        self._loan("300", 3, received=date(2024, 12, 1))
+        fc = forecast_cash_flow(self.user, 1, granularity=DAILY, start=date(2025, 1, 5))
+        # The Jan 1 installment is overdue and lands on the first day
+        self.assertEqual(fc.events[0].date, date(2025, 1, 5))
+        self.assertEqual(fc.accounts[self.cash.pk][0], Decimal("200"))
+        self.assertEqual(fc.accounts[self.cash.pk][-1], Decimal("100"))
+        self.assertEqual(len(fc.dates), 32)
+
+    def test_card_dues_reduce_total_only(self):
+        self._loan("1200", 12)
+        card = CreditCard.objects.create(
+            user=self.user,
+            issuer=self.lender,
+            card_name="Visa",
+            credit_limit=Decimal("5000"),
+            interest_rate=Decimal("2"),
+            statement_day=10,
+            payment_due_day=25,
+        )
+        Transaction.objects.create(
+            user=self.user,
+            date=date(2025, 1, 5),
+            transaction_type="expense",
+            amount=Decimal("300"),
+            account_source=card.account,
+            account_destination=self.outside,
+            entity_source=self.acc_ent,
+            entity_destination=self.out_ent,
+        )
+        fc = forecast_cash_flow(self.user, 1, granularity=DAILY, start=date(2025, 1, 20))
+        credit = [e for e in fc.events if e.kind == "credit"]
+        self.assertEqual([(e.date, e.amount) for e in credit], [(date(2025, 1, 25), Decimal("-300"))])
+        self.assertEqual(fc.total[-1], fc.accounts[self.cash.pk][-1] - 300)
+
+    def test_sources_are_merged_in_date_order(self):
+        def inflows(user, start, end):
+            return [
+                ForecastEvent(date(2025, 2, 10), Decimal("50"), None, self.cash.pk),
+                ForecastEvent(date(2025, 3, 20), Decimal("50"), None, self.cash.pk),
+            ]
+
+        def outflows(user, start, end):
+            return [ForecastEvent(date(2025, 3, 1), Decimal("-80"), None, self.cash.pk)]
+
+        fc = forecast_cash_flow(
+            self.user, 2, start=date(2025, 2, 1), sources=[inflows, outflows]
+        )
+        self.assertEqual([e.date.month for e in fc.events], [2, 3, 3])
+        self.assertEqual(fc.accounts[self.cash.pk], [Decimal("50"), Decimal("20"), Decimal("20")])
+        # Month-end samples stay positive but the Mar 1 dip is still reported
+        self.assertEqual(
+            fc.first_negative,
+            {("account", self.cash.pk): date(2025, 3, 1), ("total", None): date(2025, 3, 1)},
+        )
+
+    def test_query_count_independent_of_schedule_length(self):
+        self._loan("1200", 12)
+
+        def cost():
+            with CaptureQueriesContext(connection) as ctx:
+                forecast_cash_flow(self.user, 12, start=date(2025, 2, 1))
+            return len(ctx)
+
+        small = cost()
+        self._loan("36000", 360)
+        self.assertEqual(cost(), small)
+
+    def test_forecast_api(self):
+        self._loan("1200", 12)
+        resp = self.client.get(reverse("dashboard:forecast-data"), {"months": 3})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(len(data["labels"]), len(data["total"]))
+        self.assertEqual(data["accounts"][0]["name"], "Cash")
+        bad = self.client.get(reverse("dashboard:forecast-data"), {"granularity": "year"})
+        self.assertEqual(bad.status_code, 400)
@@ -262,3 +262,10 @@ class CreditCardAccountTests(TestCase):
         card.refresh_from_db()
         self.assertEqual(card.outstanding_amount, Decimal("0"))
         self.assertEqual(card.available_credit, Decimal("1000"))
+
+    def test_form_layout_only_names_form_fields(self):
+        from liabilities.forms import CreditCardForm
+
+        form = CreditCardForm(user=self.user)
+        names = {f.name for f in form.helper.layout.get_field_names()}
+        self.assertLessEqual(names, set(form.fields))
@@ -0,0 +1,173 @@
+from decimal import Decimal
+from datetime import date
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from liabilities.models import CreditCard, CreditCardStatement, Lender
+from liabilities.statements import cycle_for, rebuild_statements
+from accounts.models import Account
+from transactions.models import Transaction
+from entities.models import Entity
+from entities.utils import ensure_fixed_entities
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class CreditCardStatementTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="stmt", password="p")
+        self.client.force_login(self.user)
+        self.entity = Entity.objects.create(
+            entity_name="Vendor", entity_type="personal fund", user=self.user
+        )
+        self.out_ent, self.acc_ent = ensure_fixed_entities(self.user)
+        self.card = CreditCard.objects.create(
+            user=self.user,
+            issuer=Lender.objects.create(name="CardBank"),
+            card_name="Visa",
+            credit_limit=Decimal("5000"),
+            interest_rate=Decimal("2"),
+            statement_day=15,
+            payment_due_day=5,
+        )
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user
+        )
+
+    def _purchase(self, day, amount):
+        return Transaction.objects.create(
+            user=self.user,
+            date=day,
+            transaction_type="expense",
+            amount=Decimal(amount),
+            account_source=self.card.account,
+            account_destination=self.cash,
+            entity_source=self.acc_ent,
+            entity_destination=self.entity,
+        )
+
+    def _payment(self, day, amount):
+        return Transaction.objects.create(
+            user=self.user,
+            date=day,
+            transaction_type="transfer",
+            amount=Decimal(amount),
+            account_source=self.cash,
+            account_destination=self.card.account,
+            entity_source=self.acc_ent,
+            entity_destination=self.acc_ent,
+        )
+
+    def _rows(self):
+        return list(
+            self.card.statements.values_list(
+                "statement_date", "opening_balance", "purchases", "payments", "closing_balance"
+            )
+        )
+
+    def test_cycle_boundaries(self):
+        self.assertEqual(
+            cycle_for(self.card, date(2025, 1, 15)),
+            (date(2024, 12, 16), date(2025, 1, 15), date(2025, 2, 5)),
+        )
+        self.assertEqual(cycle_for(self.card, date(2025, 1, 16))[1], date(2025, 2, 15))
+        self.card.statement_day = 31
+        self.card.payment_due_day = 20
+        self.assertEqual(
+            cycle_for(self.card, date(2025, 2, 10)),
+            (date(2025, 2, 1), date(2025, 2, 28), date(2025, 3, 20)),
+        )
+
+    def test_postings_materialize_cycle_totals(self):
+        self._purchase(date(2025, 1, 3), "100")
+        self._purchase(date(2025, 1, 20), "250")
+        self._payment(date(2025, 2, 1), "100")
+        self._purchase(date(2025, 3, 1), "40")
+        self.assertEqual(
+            self._rows(),
+            [
+                (date(2025, 1, 15), 0, 100, 0, 100),
+                (date(2025, 2, 15), 100, 250, 100, 250),
+                (date(2025, 3, 15), 250, 40, 0, 290),
+            ],
+        )
+        feb = self.card.statements.get(statement_date=date(2025, 2, 15))
+        self.assertEqual(feb.minimum_due, Decimal("7.50"))
+        self.assertEqual(feb.due_date, date(2025, 3, 5))
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.outstanding_amount, Decimal("290"))
+        self.assertEqual(
+            self.card.outstanding_amount, abs(self.card.account.get_current_balance())
+        )
+
+    def test_split_parent_stops_counting_once_it_has_legs(self):
+        parent = self._purchase(date(2025, 1, 3), "100")
+        for amount in ("60", "30"):
+            Transaction.objects.create(
+                user=self.user,
+                date=date(2025, 1, 3),
+                transaction_type="expense",
+                amount=Decimal(amount),
+                account_source=self.card.account,
+                account_destination=self.cash,
+                entity_source=self.acc_ent,
+                entity_destination=self.entity,
+                parent_transfer=parent,
+            )
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.outstanding_amount, Decimal("90"))
+        self.assertEqual(
+            self.card.outstanding_amount, abs(self.card.account.get_current_balance())
+        )
+
+    def test_backdated_purchase_shifts_later_cycles(self):
+        self._purchase(date(2025, 1, 3), "100")
+        self._purchase(date(2025, 3, 1), "50")
+        self._purchase(date(2025, 2, 1), "20")
+        self.assertEqual(
+            self._rows(),
+            [
+                (date(2025, 1, 15), 0, 100, 0, 100),
+                (date(2025, 2, 15), 100, 20, 0, 120),
+                (date(2025, 3, 15), 120, 50, 0, 170),
+            ],
+        )
+        incremental = self._rows()
+        rebuild_statements(self.card)
+        self.assertEqual(self._rows(), incremental)
+
+    def test_delete_and_edit_rebuild(self):
+        self._purchase(date(2025, 1, 3), "100")
+        tx = self._purchase(date(2025, 2, 3), "60")
+        tx.amount = Decimal("80")
+        tx.save()
+        self.assertEqual(self._rows()[-1][-1], 180)
+        tx.delete()
+        self.assertEqual(self._rows(), [(date(2025, 1, 15), 0, 100, 0, 100)])
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.outstanding_amount, Decimal("100"))
+
+    def test_posting_cost_is_independent_of_history(self):
+        def cost(day):
+            with CaptureQueriesContext(connection) as ctx:
+                self._purchase(day, "1")
+            return len(ctx)
+
+        self._purchase(date(2024, 1, 3), "1")
+        first = cost(date(2024, 1, 4))
+        for month in range(2, 13):
+            self._purchase(date(2024, month, 3), "1")
+        self.assertEqual(cost(date(2024, 12, 4)), first)
+        self.assertEqual(CreditCardStatement.objects.count(), 12)
+
+    def test_liability_list_shows_latest_statement(self):
+        self._purchase(date(2025, 1, 3), "1000")
+        resp = self.client.get(reverse("liabilities:list") + "?tab=credit")
+        self.assertContains(resp, "Min Due")
+        self.assertContains(resp, "30.00")
+        self.assertContains(resp, "Feb 05, 2025")
@@ -1,8 +1,8 @@
 from decimal import Decimal
 
-from django.test import TestCase, override_settings
+from django.test import RequestFactory, TestCase, override_settings
 from currencies.models import Currency, ExchangeRate
-from utils.currency import convert_amount
+from utils.currency import _convert_for_request, convert_amount
 from unittest.mock import patch
 
 
@@ -43,6 +43,24 @@ class ConvertAmountFetchTests(TestCase):
         )
         self.assertEqual(rate.rate, Decimal("55.0"))
 
+    @patch("utils.currency.requests.get")
+    def test_request_conversion_resolves_each_pair_once(self, mock_get):
+        mock_get.side_effect = ConnectionError
+        request = RequestFactory().get("/")
+
+        def convert(amount, orig, target):
+            return _convert_for_request(request, Decimal(amount), orig, target)
+
+        self.assertEqual(convert("10", self.cur_usd, self.cur_php), Decimal("10"))
+        self.assertEqual(convert("20", self.cur_usd, self.cur_php), Decimal("20"))
+        self.assertEqual(mock_get.call_count, 1)
+
+        ExchangeRate.objects.create(
+            currency_from=self.cur_php, currency_to=self.cur_usd, rate=Decimal("1")
+        )
+        self.assertEqual(convert("5", self.cur_php, self.cur_usd), Decimal("5"))
+        self.assertEqual(convert("7", self.cur_usd, self.cur_usd), Decimal("7"))
+
 
 @override_settings(
     DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
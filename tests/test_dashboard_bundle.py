@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from entities.models import Entity
+from transactions.synthetic import generate
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class DashboardBundleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate(users=1, transactions=300, seed=11, start=date(2025, 1, 1), days=365)
+        from django.contrib.auth import get_user_model
+
+        cls.user = get_user_model().objects.get(username="synth-11-1")
+        cls.entity = Entity.objects.filter(user=cls.user, is_account_entity=False).first()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.range = {"start": "2025-01-01", "end": "2025-12-31"}
+
+    def _get(self, name, **params):
+        resp = self.client.get(reverse(name), {**self.range, **params})
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def test_panels_match_the_individual_endpoints(self):
+        ent = str(self.entity.pk)
+        bundle = self._get("dashboard:bundle", entities=ent, txn_type="expense")
+
+        self.assertEqual(bundle["cash_flow"], self._get("dashboard:dashboard-data", entity_id=ent))
+        self.assertEqual(
+            bundle["top10"], self._get("dashboard:top10-data", entities=ent, txn_type="expense")
+        )
+        expenses = self._get("dashboard:category-summary", entities=ent)
+        by_name = dict(zip(bundle["categories"]["labels"], bundle["categories"]["expenses"]))
+        self.assertTrue(expenses)
+        for row in expenses:
+            self.assertAlmostEqual(by_name[row["name"]], row["total"], places=2)
+        entities = self._get("dashboard:entity-summary", entities=ent)
+        self.assertEqual(
+            [(r["entity"], r["income"], r["expenses"], r["net"]) for r in entities],
+            list(
+                zip(
+                    bundle["entities"]["labels"],
+                    bundle["entities"]["income"],
+                    bundle["entities"]["expenses"],
+                    bundle["entities"]["net"],
+                )
+            ),
+        )
+        self.assertEqual(
+            bundle["analytics"], self._get("dashboard:analytics-data", entities=ent)
+        )
+        by_entity = self._get("dashboard:bundle", panels="analytics", dimension="entities")
+        self.assertEqual(
+            by_entity["analytics"], self._get("dashboard:analytics-data", dimension="entities")
+        )
+
+    def test_partial_selection_and_shared_reads(self):
+        only = self._get("dashboard:bundle", panels="top10,entities")
+        self.assertEqual(
+            set(only) - {"currency", "start", "end"}, {"top10", "entities"}
+        )
+
+        with CaptureQueriesContext(connection) as separate:
+            for name in ("dashboard:category-summary", "dashboard:analytics-data"):
+                self._get(name)
+        with CaptureQueriesContext(connection) as bundled:
+            self._get("dashboard:bundle", panels="categories,analytics")
+        self.assertLess(len(bundled), len(separate))
+
+    def test_rejects_bad_filters(self):
+        resp = self.client.get(reverse("dashboard:bundle"), {"panels": "top10,nope"})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get(reverse("dashboard:bundle"), {"entities": "x"})
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,140 @@
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.perf import QueryRecorder
+from dashboard import panels
+from dashboard.panels import Panel, run_panels
+from transactions.synthetic import generate
+
+
+def _sleep(seconds, value):
+    def compute():
+        time.sleep(seconds)
+        return value
+
+    return compute
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+class RunPanelsTests(SimpleTestCase):
+    def test_panels_run_concurrently(self):
+        panels = [Panel(f"p{i}", _sleep(0.3, i)) for i in range(4)]
+        started = time.monotonic()
+        results, degraded = run_panels(panels, workers=4)
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(results, {"p0": 0, "p1": 1, "p2": 2, "p3": 3})
+        self.assertEqual(degraded, [])
+
+    def test_slow_and_failing_panels_fall_back(self):
+        with self.assertLogs("dashboard.panels", "WARNING"):
+            results, degraded = run_panels(
+                [
+                    Panel("fast", _sleep(0, "ok"), "fallback"),
+                    Panel("slow", _sleep(1, "late"), "fallback", timeout=0.1),
+                    Panel("broken", _fail, []),
+                ],
+                workers=3,
+            )
+        self.assertEqual(results, {"fast": "ok", "slow": "fallback", "broken": []})
+        self.assertEqual(degraded, ["slow", "broken"])
+
+    def test_default_workers_cover_every_panel(self):
+        panels = [Panel(f"p{i}", _sleep(0.3, i)) for i in range(6)]
+        started = time.monotonic()
+        with self.settings(DASHBOARD_PANEL_WORKERS=None):
+            results, degraded = run_panels(panels)
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual((len(results), degraded), (6, []))
+
+    def test_no_new_pool_while_stuck_workers_run(self):
+        with self.assertLogs("dashboard.panels", "WARNING"):
+            run_panels([Panel(f"s{i}", _sleep(0.5, i), timeout=0.05) for i in range(2)], workers=2)
+        here = threading.get_ident()
+        results, _ = run_panels([Panel("f", threading.get_ident)], workers=2)
+        self.assertEqual(results["f"], here)
+        time.sleep(0.8)
+        results, _ = run_panels([Panel("f", threading.get_ident)], workers=2)
+        self.assertNotEqual(results["f"], here)
+
+    def test_workers_keep_their_connections(self):
+        with patch.object(connections, "close_all") as close_all:
+            results, _ = run_panels([Panel(f"p{i}", _sleep(0, i)) for i in range(2)], workers=2)
+        self.assertEqual(results, {"p0": 0, "p1": 1})
+        close_all.assert_not_called()
+
+    def test_inline_when_pool_disabled(self):
+        with self.assertLogs("dashboard.panels", "WARNING"):
+            results, degraded = run_panels([Panel("a", lambda: 1), Panel("b", _fail, 0)], workers=1)
+        self.assertEqual((results, degraded), ({"a": 1, "b": 0}, ["b"]))
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class DashboardPanelTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="u", password="p")
+        self.client.force_login(self.user)
+
+    def test_failing_panel_degrades_the_page(self):
+        with patch("dashboard.views.get_monthly_summary", side_effect=RuntimeError), self.assertLogs(
+            "dashboard.panels", "WARNING"
+        ):
+            resp = self.client.get(reverse("dashboard:dashboard"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["degraded_panels"], ["monthly_summary"])
+        self.assertEqual(resp.context["monthly_summary"], [])
+        self.assertContains(resp, "could not be computed")
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class ConcurrentDashboardTests(TransactionTestCase):
+    def setUp(self):
+        self.addCleanup(self._stop_pools)
+
+    def _stop_pools(self):
+        # Workers keep their connections, and closing an in-memory SQLite
+        # connection is a no-op; end the threads with the test database
+        for pool in list(panels._pools.values()):
+            pool.shutdown()
+        panels._pools.clear()
+
+    def test_thread_pool_matches_inline(self):
+        generate(users=1, transactions=200, seed=5, start=date(2025, 1, 1), days=365)
+        user = get_user_model().objects.get(username="synth-5-1")
+        self.client.force_login(user)
+        pages = {}
+        for workers in (1, 4):
+            with self.settings(DASHBOARD_PANEL_WORKERS=workers):
+                resp = self.client.get(reverse("dashboard:dashboard"))
+            self.assertEqual(resp.context["degraded_panels"], [])
+            pages[workers] = {
+                key: resp.context[key]
+                for key in ("totals", "monthly_summary", "categories", "top10_big_tickets")
+            }
+        self.assertEqual(pages[1], pages[4])
+        self.assertNotEqual(pages[4]["totals"]["income"], Decimal("0"))
+
+    def test_worker_queries_reach_the_callers_recorder(self):
+        User = get_user_model()
+        User.objects.create_user(username="w", password="p")
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            results, _ = run_panels(
+                [Panel(f"p{i}", User.objects.count) for i in range(3)], workers=3
+            )
+        self.assertEqual(results, {"p0": 1, "p1": 1, "p2": 1})
+        self.assertEqual(recorder.count, 3)
@@ -0,0 +1,132 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Account
+from acquisitions.depreciation import (
+    book_values,
+    depreciation_series,
+    entity_book_values,
+    schedule,
+    useful_life_months,
+)
+from acquisitions.models import Acquisition, DepreciationSnapshot
+from entities.models import Entity
+from transactions.models import Transaction
+
+
+class DepreciationScheduleTests(SimpleTestCase):
+    def test_straight_line_spreads_cents_and_ends_at_salvage(self):
+        rows = schedule(
+            Decimal("1000"), Decimal("0"), 36, Acquisition.DEPRECIATION_STRAIGHT_LINE, date(2025, 1, 15)
+        )
+        self.assertEqual(len(rows), 36)
+        self.assertEqual(rows[0][:2], (date(2025, 1, 1), Decimal("27.78")))
+        self.assertEqual(sum(r[1] for r in rows), Decimal("1000"))
+        self.assertEqual(rows[-1][0], date(2027, 12, 1))
+        self.assertEqual(rows[-1][3], Decimal("0"))
+
+    def test_declining_balance(self):
+        rows = schedule(
+            Decimal("1200"), Decimal("200"), 24, Acquisition.DEPRECIATION_DECLINING, date(2025, 1, 1)
+        )
+        self.assertEqual([r[1] for r in rows[:2]], [Decimal("100.00"), Decimal("91.67")])
+        self.assertEqual(rows[-1][3], Decimal("200"))
+        self.assertTrue(all(r[3] >= 200 for r in rows))
+
+    def test_sale_closes_the_schedule(self):
+        rows = schedule(
+            Decimal("1200"), Decimal("0"), 12, Acquisition.DEPRECIATION_STRAIGHT_LINE,
+            date(2025, 1, 1), sold=date(2025, 4, 20),
+        )
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[-1], (date(2025, 4, 1), Decimal("-300"), 0, 0))
+
+    def test_useful_life(self):
+        bought = date(2025, 6, 1)
+        self.assertEqual(useful_life_months("equipment", 3, None, bought), 36)
+        self.assertEqual(useful_life_months("property", None, None, bought), 300)
+        self.assertEqual(useful_life_months("vehicle", None, 2021, bought), 72)
+        self.assertEqual(useful_life_months("vehicle", None, 1990, bought), 12)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class MaterializedDepreciationTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="dep", password="p")
+        self.client.force_login(self.user)
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user
+        )
+        self.home = Entity.objects.create(
+            entity_name="Home", entity_type="personal fund", user=self.user
+        )
+
+    def _asset(self, name, amount, category="equipment", day=date(2025, 1, 10), **kw):
+        tx = Transaction.objects.create(
+            user=self.user,
+            date=day,
+            description=f"Buy {name}",
+            transaction_type="buy acquisition",
+            amount=Decimal(amount),
+            account_source=self.cash,
+            account_destination=self.cash,
+            entity_source=self.home,
+            entity_destination=self.home,
+        )
+        return Acquisition.objects.create(
+            name=name, category=category, purchase_tx=tx, user=self.user, **kw
+        )
+
+    def test_snapshots_follow_acquisition_changes(self):
+        laptop = self._asset("Laptop", "1200", expected_lifespan_years=1)
+        self._asset("Shares", "500", category="stock_bond")
+        self.assertEqual(DepreciationSnapshot.objects.count(), 12)
+        self.assertEqual(
+            book_values(self.user, date(2025, 3, 31)), {laptop.pk: Decimal("900")}
+        )
+
+        laptop.purchase_tx.amount = Decimal("2400")
+        laptop.purchase_tx.save()
+        self.assertEqual(book_values(self.user, date(2025, 3, 1))[laptop.pk], Decimal("1800"))
+
+        laptop.delete()
+        self.assertFalse(DepreciationSnapshot.objects.exists())
+
+    def test_entity_book_values_and_series(self):
+        self._asset("Laptop", "1200", expected_lifespan_years=1)
+        van = self._asset("Van", "2400", category="vehicle", expected_lifespan_years=2)
+        van.sell_tx = Transaction.objects.create(
+            user=self.user, date=date(2025, 4, 5), transaction_type="income", amount=Decimal("1")
+        )
+        van.save()
+
+        with CaptureQueriesContext(connection) as ctx:
+            totals = entity_book_values(self.user, month=date(2025, 6, 1))
+        self.assertLessEqual(len(ctx), 2)
+        # The van is sold, the laptop has six months left
+        self.assertEqual(totals, {self.home.pk: Decimal("600")})
+
+        series = depreciation_series(self.user, date(2025, 1, 1), date(2025, 5, 31))
+        self.assertEqual(
+            series,
+            [Decimal(v) for v in ("200", "400", "600", "400", "500")],
+        )
+
+    def test_entity_list_and_dashboard_show_depreciation(self):
+        self._asset("Laptop", "1200", expected_lifespan_years=1, day=date.today())
+        resp = self.client.get(reverse("entities:list"))
+        self.assertContains(resp, "Net book value")
+
+        resp = self.client.get(reverse("dashboard:dashboard-data"))
+        data = resp.json()["datasets"]
+        self.assertEqual(data["depreciation"][-1], 100.0)
+        self.assertEqual(len(data["depreciation"]), len(data["non_liquid"]))
@@ -56,3 +56,37 @@ class DisplayCurrencyPageTests(TestCase):
         session.save()
         resp = self.client.get(reverse("entities:list"))
         self.assertContains(resp, "KRW")
+
+    def test_currency_lookups_do_not_repeat_per_row(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        session = self.client.session
+        session["display_currency"] = "KRW"
+        session.save()
+        url = reverse("transactions:transaction_list") + "?transaction_type=income"
+
+        def currency_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            return [
+                q["sql"]
+                for q in ctx.captured_queries
+                if "currencies_currency" in q["sql"]
+                or "currencies_exchangerate" in q["sql"]
+            ]
+
+        currency_queries()  # warm per-process caches
+        small = currency_queries()
+        for _ in range(10):
+            Transaction.objects.create(
+                user=self.user,
+                transaction_type="income",
+                amount=Decimal("5"),
+                account_destination=self.acc_php,
+                entity_destination=self.entity,
+                currency=self.cur_php,
+            )
+        large = currency_queries()
+        self.assertEqual(len(large), len(small))
@@ -1,6 +1,8 @@
 from decimal import Decimal
 
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -98,3 +100,31 @@ class EntityAccountBalanceFilterTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         balances = {row["name"]: row["balance"] for row in resp.context["accounts"]}
         self.assertEqual(balances["Cash"], Decimal("15000"))
+
+    def test_accounts_tab_query_count_independent_of_account_count(self):
+        self._create_inflow("100")
+        url = reverse("entities:accounts", args=[self.entity.pk])
+        self.client.get(url)  # warm per-process caches
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+
+        for i in range(10):
+            acc = Account.objects.create(
+                account_name=f"Bank {i}",
+                account_type="Bank",
+                user=self.user,
+                currency=self.currency,
+            )
+            Transaction.objects.create(
+                user=self.user,
+                transaction_type="income",
+                amount=Decimal(10 + i),
+                account_destination=acc,
+                entity_destination=self.entity,
+                currency=self.currency,
+            )
+        with CaptureQueriesContext(connection) as large:
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.context["accounts"]), 11)
+        self.assertEqual(resp.context["total_balance"], Decimal("245"))
+        self.assertEqual(len(large), len(small))
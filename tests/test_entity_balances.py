@@ -0,0 +1,85 @@
+import os
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from currencies.models import Currency
+from entities.models import Entity
+from transactions.models import Transaction
+from cenfin_proj.utils import get_entity_balances
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class EntityBalancesBenchmarkTests(TestCase):
+    """get_entity_balances must scale with in + out rows, not in x out."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="bench", password="p")
+        self.php = Currency.objects.create(code="PHP", name="Peso")
+
+    def _entity_with_rows(self, name, rows):
+        ent = Entity.objects.create(
+            entity_name=name, entity_type="personal fund", user=self.user
+        )
+        common = dict(
+            user=self.user, date=date(2024, 1, 1), currency=self.php, amount=Decimal("1")
+        )
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    transaction_type="income",
+                    entity_destination=ent,
+                    asset_type_destination="liquid",
+                    **common,
+                )
+                for _ in range(2 * rows)
+            ]
+            + [
+                Transaction(
+                    transaction_type="expense",
+                    entity_source=ent,
+                    asset_type_source="liquid",
+                    **common,
+                )
+                for _ in range(rows)
+            ]
+        )
+        return ent
+
+    def _best_time(self, ent, runs=5):
+        best = None
+        for _ in range(runs):
+            started = time.perf_counter()
+            list(get_entity_balances().filter(pk=ent.pk))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def test_sums_are_not_multiplied_by_the_other_side(self):
+        ent = self._entity_with_rows("Farm", 50)
+        with CaptureQueriesContext(connection) as ctx:
+            row = get_entity_balances().get(pk=ent.pk)
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(row.inflow, Decimal("100"))
+        self.assertEqual(row.outflow, Decimal("50"))
+        self.assertEqual(row.balance, Decimal("50"))
+
+    @skipUnless(os.environ.get("RUN_BENCHMARKS"), "timing benchmark; set RUN_BENCHMARKS=1")
+    def test_cost_grows_linearly_with_rows_per_side(self):
+        small = self._entity_with_rows("Small", 500)
+        large = self._entity_with_rows("Large", 2000)
+        row = get_entity_balances().get(pk=large.pk)
+        self.assertEqual(row.balance, Decimal("2000"))
+
+        ratio = self._best_time(large) / self._best_time(small)
+        # 4x the rows per side: ~4x for a linear plan, ~16x for a cartesian join.
+        self.assertLess(ratio, 10)
@@ -0,0 +1,129 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.test import TestCase, override_settings
+
+from currencies.models import Currency
+from transactions import snapshot as snap
+from transactions.aggregates import (
+    category_totals,
+    entity_flow_totals,
+    exclude_internal,
+    period_totals,
+)
+from transactions.models import CategoryTag, Transaction
+from transactions.services import _delta_for_account
+from transactions.snapshot import all_of, build_snapshot, ledger_snapshot, negate
+from transactions.synthetic import generate
+
+INCOME = Q(transaction_type_destination__iexact="income")
+EXPENSE = Q(transaction_type_source__iexact="expense")
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class LedgerSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate(users=1, transactions=400, seed=41, start=date(2025, 1, 1), days=365)
+        cls.user = get_user_model().objects.get(username="synth-41-1")
+        cls.usd = Currency.objects.get(code="USD")
+
+    def setUp(self):
+        self.snap = build_snapshot(self.user)
+
+    def _measures(self):
+        return {
+            "income": ("destination", self.snap.match("type_destination", "income")),
+            "expenses": ("source", self.snap.match("type_source", "expense")),
+        }
+
+    def _sql_measures(self):
+        return {"income": ("destination", INCOME), "expenses": ("source", EXPENSE)}
+
+    def test_entity_totals_match_sql(self):
+        window = dict(start=date(2025, 3, 1), end=date(2025, 9, 30))
+        for currency in (None, self.usd):
+            self.assertEqual(
+                dict(self.snap.entity_totals(currency, **window)),
+                dict(entity_flow_totals(self.user, currency=currency, **window)),
+            )
+
+    def test_category_and_monthly_totals_match_sql(self):
+        qs = Transaction.objects.filter(user=self.user, parent_transfer__isnull=True)
+        where = all_of(self.snap["top_level"], negate(self.snap.internal))
+        by_tag = self.snap.category_totals(self._measures(), self.usd, where)
+        self.assertTrue(by_tag)
+        self.assertEqual(
+            by_tag, category_totals(exclude_internal(qs), self._sql_measures(), self.usd)
+        )
+        self.assertEqual(
+            self.snap.monthly_totals(self._measures(), self.usd, self.snap["top_level"]),
+            dict(period_totals(qs, self._sql_measures(), "month", self.usd)),
+        )
+
+    def test_running_balance_follows_account_deltas(self):
+        account_ids = set(
+            Transaction.objects.filter(user=self.user).values_list("account_source_id", flat=True)
+        ) - {None}
+        for account_id in account_ids:
+            series = self.snap.running_balance(account_id)
+            rows = Transaction.objects.filter(user=self.user).filter(
+                Q(account_source_id=account_id) | Q(account_destination_id=account_id)
+            )
+            self.assertEqual(len(series), rows.count())
+            self.assertEqual(
+                series[-1][1], sum(_delta_for_account(tx, account_id) for tx in rows)
+            )
+            self.assertEqual([d for d, _ in series], sorted(d for d, _ in series))
+
+    @skipUnless(snap.HAS_NUMPY, "NumPy is not installed")
+    def test_list_columns_give_the_same_results(self):
+        arrays = (self.snap.entity_totals(), self.snap.monthly_totals(self._measures()))
+        with patch.object(snap, "np", None):
+            lists = build_snapshot(self.user)
+            self.assertEqual(
+                (lists.entity_totals(), lists.monthly_totals(self._measures())), arrays
+            )
+
+    def test_cached_until_the_ledger_changes(self):
+        first = ledger_snapshot(self.user)
+        self.assertIs(ledger_snapshot(self.user), first)
+        tx = Transaction.objects.filter(user=self.user, transaction_type="expense").first()
+        Transaction.objects.create(
+            user=self.user,
+            date=date(2025, 6, 1),
+            description="snapshot",
+            transaction_type="expense",
+            amount=Decimal("1.00"),
+            account_source=tx.account_source,
+            account_destination=tx.account_destination,
+            entity_source=tx.entity_source,
+            entity_destination=tx.entity_destination,
+        )
+        fresh = ledger_snapshot(self.user)
+        self.assertIsNot(fresh, first)
+        self.assertEqual(len(fresh), len(first) + 1)
+
+    def test_cached_until_tags_change(self):
+        tag = CategoryTag.objects.filter(user=self.user).first()
+        tx = Transaction.objects.filter(user=self.user).exclude(categories=tag).first()
+
+        first = ledger_snapshot(self.user)
+        tx.categories.add(tag)
+        tagged = ledger_snapshot(self.user)
+        self.assertIsNot(tagged, first)
+        self.assertEqual(len(tagged.tag_rows), len(first.tag_rows) + 1)
+
+        tag.name = "Renamed"
+        tag.save()
+        renamed = ledger_snapshot(self.user)
+        self.assertEqual(renamed.tags[tag.pk], "Renamed")
+
+        tag.delete()
+        self.assertNotIn(tag.pk, ledger_snapshot(self.user).tags)
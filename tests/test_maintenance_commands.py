@@ -0,0 +1,153 @@
+import json
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from transactions.models import CategoryTag, Transaction
+from transactions.synthetic import generate
+from transactions.versions import ledger_version
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class ChunkedMaintenanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate(users=2, transactions=200, seed=21, start=date(2025, 1, 1), days=180)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoints = Path(tmp.name)
+        settings = self.settings(MAINTENANCE_CHECKPOINT_DIR=self.checkpoints)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.legs = Transaction.all_objects.filter(parent_transfer__isnull=False, is_hidden=True)
+        self.assertGreater(self.legs.count(), 4)
+        self.legs.update(account_source=None, entity_destination=None)
+
+    def _run(self, *args, **options):
+        out = StringIO()
+        call_command(*args, stdout=out, **options)
+        return out.getvalue()
+
+    def _missing(self):
+        return self.legs.filter(account_source__isnull=True).count()
+
+    def test_dry_run_prints_the_diff_and_writes_nothing(self):
+        before = self._missing()
+        out = self._run("backfill_remittance", "--dry-run", "--chunk-size", "3")
+        self.assertEqual(self._missing(), before)
+        self.assertIn("account_source_id: None ->", out)
+        self.assertIn(f"would change {before}", out)
+        self.assertEqual(list(self.checkpoints.iterdir()), [])
+
+    def test_chunks_are_written_in_bulk(self):
+        total = self.legs.count()
+        out = self._run("backfill_remittance", "--chunk-size", "3")
+        self.assertEqual(self._missing(), 0)
+        self.assertEqual(self.legs.filter(entity_destination__entity_name="Remittance").count(), total)
+        self.assertIn(f"chunk {-(-total // 3)}:", out)
+        self.assertNotIn("account_source_id: None ->", out)
+        # Completed runs leave no checkpoint behind
+        self.assertEqual(list(self.checkpoints.iterdir()), [])
+
+    def test_resume_after_a_failed_chunk(self):
+        from transactions.management.commands.backfill_remittance import Command
+
+        original = Command.process_chunk
+        calls = []
+
+        def flaky(command, rows, options):
+            calls.append(rows[0].pk)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+            original(command, rows, options)
+
+        with patch.object(Command, "process_chunk", flaky), self.assertRaises(RuntimeError):
+            self._run("backfill_remittance", "--chunk-size", "3")
+        checkpoint = json.loads((self.checkpoints / "backfill_remittance.json").read_text())
+        self.assertEqual(checkpoint["scanned"], 3)
+        # The failed chunk was rolled back; the first one committed
+        self.assertEqual(self._missing(), self.legs.count() - 3)
+
+        out = self._run("backfill_remittance", "--chunk-size", "3", "--resume")
+        self.assertIn(f"Resuming after pk {checkpoint['last_pk']}", out)
+        self.assertEqual(self._missing(), 0)
+        self.assertFalse((self.checkpoints / "backfill_remittance.json").exists())
+
+    def test_resume_refuses_other_options(self):
+        (self.checkpoints / "fix_buy_acquisitions.json").write_text(
+            json.dumps({"last_pk": 1, "options": {"user_id": 1}, "scanned": 1, "changed": 0, "chunks": 1})
+        )
+        with self.assertRaises(CommandError):
+            self._run("fix_buy_acquisitions", "--resume", "--user-id", "2")
+
+    def test_fan_out_by_user(self):
+        out = self._run("backfill_remittance", "--workers", "2", "--chunk-size", "5")
+        self.assertEqual(self._missing(), 0)
+        users = set(self.legs.values_list("user_id", flat=True))
+        for user_id in users:
+            self.assertIn(f"[user {user_id}] chunk 1:", out)
+
+    def test_normalize_categories_keeps_the_oldest(self):
+        tx = Transaction.objects.filter(user__username="synth-21-1").first()
+        first = CategoryTag.objects.create(user=tx.user, name="First")
+        second = CategoryTag.objects.create(user=tx.user, name="Second")
+        tx.categories.set([first, second])
+
+        self._run("normalize_categories", "--chunk-size", "2")
+        self.assertEqual(list(tx.categories.all()), [first, second])
+
+        self._run("normalize_categories", "--commit", "--chunk-size", "2")
+        self.assertEqual(list(tx.categories.all()), [first])
+
+    def test_normalize_categories_invalidates_the_ledger(self):
+        tx = Transaction.objects.filter(user__username="synth-21-1").first()
+        tx.categories.set(
+            [CategoryTag.objects.create(user=tx.user, name=name) for name in ("A", "B")]
+        )
+        before = ledger_version(tx.user_id)
+
+        self._run("normalize_categories", "--commit")
+        self.assertNotEqual(ledger_version(tx.user_id), before)
+
+    def test_batched_reversals_count_every_transaction(self):
+        from acquisitions.models import Acquisition
+
+        acqs = list(Acquisition.objects.filter(user__username="synth-21-1", purchase_tx__isnull=False)[:2])
+        self.assertEqual(len(acqs), 2)
+        Acquisition.objects.filter(pk__in=[a.pk for a in acqs]).update(is_deleted=True)
+
+        out = self._run("repair_acquisition_reversals", "--dry-run", "--username", "synth-21-1")
+        for acq in acqs:
+            self.assertIn(f"* Acq {acq.pk}: reverse and hide purchase tx", out)
+        self.assertIn("would change 2", out)
+
+    def test_ported_commands_run_chunked(self):
+        from acquisitions.models import Acquisition
+
+        acq = Acquisition.objects.filter(purchase_tx__isnull=False).first()
+        Acquisition.objects.filter(pk=acq.pk).update(is_deleted=True)
+
+        out = self._run("repair_acquisition_reversals", "--dry-run")
+        self.assertIn(f"Acq {acq.pk}: reverse and hide purchase tx", out)
+        self.assertFalse(Transaction.all_objects.get(pk=acq.purchase_tx_id).is_reversed)
+        self._run("repair_acquisition_reversals")
+        self.assertTrue(Transaction.all_objects.get(pk=acq.purchase_tx_id).is_reversed)
+
+        for command in ("retag_sell_profits", "fix_buy_acquisitions"):
+            self._run(command, "--chunk-size", "4")
+        account = Transaction.objects.filter(user__username="synth-21-1").first().account_destination
+        out = self._run(
+            "tag_pair_inflows", "--account-id", str(account.pk), "--entity-name", "Remittance", "--user-id", str(account.user_id)
+        )
+        self.assertIn("Scanned", out)
@@ -0,0 +1,114 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import perf
+from core.perf import aggregate, percentile, sql_shape
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="perf", password="p")
+        self.client.force_login(self.user)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(perf.reset_sink)
+
+    def test_sql_shape_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND name = \'x\' LIMIT 21'),
+            'SELECT * FROM "t" WHERE "id" IN (?, ...) AND name = ? LIMIT ?',
+        )
+        self.assertEqual(
+            sql_shape("SELECT 1 WHERE a = %s"), sql_shape("SELECT 2  WHERE a = %s")
+        )
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(
+            [percentile(values, p) for p in (50, 95, 99)], [50, 95, 99]
+        )
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    @override_settings(PERF_INSTRUMENTATION=True, PERF_SAMPLE_RATE=1, PERF_SINK="memory")
+    def test_middleware_records_sampled_requests(self):
+        resp = self.client.get(reverse("entities:list"))
+        self.assertEqual(resp.status_code, 200)
+        (record,) = perf.get_sink().records()
+        self.assertEqual(record["url_name"], "entities:list")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertEqual(record["response_bytes"], len(resp.content))
+        self.assertAlmostEqual(
+            record["duration_ms"], record["db_ms"] + record["python_ms"], places=1
+        )
+        for q in record["top_queries"]:
+            self.assertGreater(q["count"], 1)
+
+    @override_settings(PERF_INSTRUMENTATION=True, PERF_SAMPLE_RATE=0, PERF_SINK="memory")
+    def test_sampling_and_disabled(self):
+        self.client.get(reverse("entities:list"))
+        self.assertEqual(perf.get_sink().records(), [])
+        with self.settings(PERF_INSTRUMENTATION=False, PERF_SAMPLE_RATE=1):
+            self.client.get(reverse("entities:list"))
+            self.assertEqual(perf.get_sink().records(), [])
+
+    def test_file_sink_and_report(self):
+        path = Path(self.tmp.name) / "logs" / "perf.ndjson"
+        with self.settings(
+            PERF_INSTRUMENTATION=True, PERF_SAMPLE_RATE=1, PERF_SINK="file", PERF_LOG_PATH=path
+        ):
+            for _ in range(3):
+                self.client.get(reverse("entities:list"))
+            self.client.get(reverse("acquisitions:acquisition-list"))
+        lines = path.read_text().splitlines()
+        self.assertEqual(len(lines), 4)
+        # A corrupt line is skipped
+        with path.open("a") as fh:
+            fh.write("{not json\n")
+
+        out = StringIO()
+        call_command("perf_report", "--path", str(path), "--json", stdout=out)
+        rows = {r["url_name"]: r for r in json.loads(out.getvalue())}
+        self.assertEqual(rows["entities:list"]["requests"], 3)
+        self.assertEqual(rows["acquisitions:acquisition-list"]["requests"], 1)
+
+        out = StringIO()
+        call_command("perf_report", "--path", str(path), "--sort", "requests", stdout=out)
+        text = out.getvalue()
+        self.assertLess(text.index("entities:list"), text.index("acquisitions:acquisition-list"))
+        self.assertIn("2 endpoint(s) reported.", text)
+
+    def test_file_sink_reopens_externally_rotated_file(self):
+        path = Path(self.tmp.name) / "perf.ndjson"
+        sink = perf.NDJSONSink(path, max_bytes=0, backups=3)
+        self.addCleanup(sink.close)
+        sink.write({"n": 1})
+        path.rename(path.with_suffix(".1"))
+        sink.write({"n": 2})
+        self.assertEqual(sink.records(), [{"n": 2}])
+
+    def test_aggregate_groups_by_url_name(self):
+        records = [
+            {"url_name": "a", "duration_ms": d, "queries": q, "db_ms": 1,
+             "top_queries": [{"sql": "SELECT ?", "count": 2}]}
+            for d, q in ((10, 3), (20, 5), (30, 7))
+        ] + [{"path": "/x/", "duration_ms": 5, "queries": 1, "db_ms": 0}]
+        rows = {r["url_name"]: r for r in aggregate(records)}
+        self.assertEqual(
+            (rows["a"]["p50_ms"], rows["a"]["p99_ms"], rows["a"]["avg_queries"], rows["a"]["max_queries"]),
+            (20, 30, 5.0, 7),
+        )
+        self.assertEqual(rows["a"]["top_queries"], [{"sql": "SELECT ?", "count": 6}])
+        self.assertEqual(rows["/x/"]["requests"], 1)
@@ -0,0 +1,229 @@
+"""SQL query budgets for every page in cenfin_proj/urls.py.
+
+Each page is fetched against a small and a large synthetic ledger and must
+stay within the same budget at both sizes, so a query issued per row fails
+here before it reaches production. Set QUERY_BUDGET_SIZES (e.g. "100,10000")
+to check other sizes.
+"""
+
+import os
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import Client, TestCase, override_settings
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from accounts.models import Account
+from acquisitions.models import Acquisition
+from core.bench import seed
+from core.testing import QueryBudgetMixin, capture
+from entities.models import Entity
+from liabilities.models import CreditCard, Loan
+from transactions.models import Transaction, TransactionTemplate
+
+SIZES = [int(s) for s in os.environ.get("QUERY_BUDGET_SIZES", "100,1000").split(",")]
+
+# Maximum queries per GET, by URL name
+BUDGETS = {
+    "dashboard:dashboard": 28,
+    "dashboard:monthly-data": 9,
+    "dashboard:chart-monthly": 9,
+    "dashboard:dashboard-data": 10,
+    "dashboard:top10-data": 11,
+    "dashboard:category-summary": 7,
+    "dashboard:entity-summary": 8,
+    "dashboard:analytics-data": 7,
+    "dashboard:forecast-data": 17,
+    "dashboard:monthly-audit": 10,
+    "dashboard:bundle": 26,
+    "api_account_balance": 6,
+    "api_entity_balance": 6,
+    "api_lender_search": 5,
+    "api_currencies": 4,
+    "ajax_lender_search": 5,
+    "transactions:transaction_list": 18,
+    "transactions:transaction_create": 28,
+    "transactions:transaction_update": 33,
+    "transactions:transaction_edit": 33,
+    "transactions:transaction_correct": 31,
+    "transactions:template_list": 7,
+    "transactions:template_create": 14,
+    "transactions:template_update": 15,
+    "transactions:template_delete": 7,
+    "transactions:pair_balance": 7,
+    "transactions:category_manager": 7,
+    "transactions:tags": 4,
+    "transactions:entity_category_summary": 6,
+    "accounts:list": 10,
+    "accounts:create": 7,
+    "accounts:edit": 8,
+    "accounts:delete": 7,
+    "acquisitions:acquisition-list": 13,
+    "acquisitions:acquisition-create": 24,
+    "acquisitions:acquisition-detail": 11,
+    "acquisitions:acquisition-update": 26,
+    "acquisitions:acquisition-delete": 7,
+    "acquisitions:sell": 26,
+    "entities:list": 23,
+    "entities:create": 6,
+    "entities:edit": 8,
+    "entities:delete": 8,
+    "entities:accounts": 16,
+    "entities:analytics": 8,
+    "entities:analytics-kpis": 7,
+    "entities:analytics-category-summary": 7,
+    "entities:analytics-category-timeseries": 7,
+    "entities:detail": 13,
+    "liabilities:list": 10,
+    "liabilities:credit-create": 7,
+    "liabilities:credit-edit": 9,
+    "liabilities:credit-delete": 7,
+    "liabilities:loan-create": 11,
+    "liabilities:loan-edit": 14,
+    "liabilities:loan-update": 14,
+    "liabilities:loan-delete": 8,
+    "users:login": 4,
+    "users:register": 6,
+    "users:settings": 6,
+    "currencies:active-currencies": 5,
+    "currencies:currency-list": 4,
+}
+
+# Named routes without a budget, and why
+SKIPPED = {
+    "api_create_account": "POST only",
+    "api_create_entity": "POST only",
+    "api_create_template": "POST only",
+    "api_lender_create": "POST only",
+    "api_lender_search_create": "POST only",
+    "api_issuer_search_create": "POST only",
+    "ajax_lender_create": "POST only",
+    "set_display_currency": "POST only",
+    "transactions:transaction_delete": "deletes on GET",
+    "transactions:transaction_undo_delete": "writes on GET",
+    "transactions:tag_undo_delete": "writes on GET",
+    "transactions:bulk_action": "POST only",
+    "transactions:tag_detail": "PATCH and DELETE only",
+    "transactions:e2e_create_test_user": "development helper",
+    "accounts:detail": "no template",
+    "accounts:restore": "POST only",
+    "acquisitions:acquisition-restore": "POST only",
+    "entities:restore": "POST only",
+    "liabilities:credit-restore": "POST only",
+    "liabilities:loan-restore": "POST only",
+    "users:logout": "ends the session",
+}
+
+# Object passed as the path argument, by URL name prefix
+PATH_ARGS = {
+    "api_account_balance": "account",
+    "api_entity_balance": "entity",
+    "transactions:transaction_": "transaction",
+    "transactions:template_": "template",
+    "transactions:entity_category_summary": "entity",
+    "accounts:": "account",
+    "acquisitions:": "acquisition",
+    "entities:": "entity",
+    "liabilities:credit-": "card",
+    "liabilities:loan-": "loan",
+}
+
+
+def url_names(resolver=None, namespace=None):
+    """Yield the name of every named, non-admin route."""
+    for p in (resolver or get_resolver()).url_patterns:
+        if isinstance(p, URLResolver):
+            if p.namespace == "admin":
+                continue
+            ns = ":".join(filter(None, [namespace, p.namespace])) or None
+            yield from url_names(p, ns)
+        elif isinstance(p, URLPattern) and p.name:
+            yield f"{namespace}:{p.name}" if namespace else p.name
+
+
+def _objects(user):
+    """Return the objects whose pages are fetched, creating any the seed lacks."""
+    entity = (
+        Entity.objects.filter(user=user, is_visible=True, system_hidden=False)
+        .exclude(is_account_entity=True)
+        .first()
+    )
+    account = Account.objects.filter(user=user, is_visible=True, system_hidden=False).first()
+    template, _ = TransactionTemplate.objects.get_or_create(name=f"budget-{user.pk}", user=user)
+    acquisition = Acquisition.objects.filter(user=user).first()
+    if acquisition is None:
+        purchase = Transaction.objects.create(
+            user=user,
+            date=timezone.localdate(),
+            description="Buy Budget",
+            transaction_type="buy acquisition",
+            amount=Decimal("1.00"),
+            account_source=account,
+            account_destination=account,
+            entity_source=entity,
+            entity_destination=entity,
+        )
+        acquisition = Acquisition.objects.create(
+            name="Budget", category="product", status="active", purchase_tx=purchase, user=user
+        )
+    return {
+        "entity": entity,
+        "account": account,
+        "transaction": Transaction.objects.filter(
+            user=user, transaction_type="expense", is_reversal=False
+        ).first(),
+        "template": template,
+        "acquisition": acquisition,
+        "card": CreditCard.objects.filter(user=user).first(),
+        "loan": Loan.objects.filter(user=user).first(),
+    }
+
+
+def _request(name, objects):
+    try:
+        url = reverse(name)
+    except NoReverseMatch:
+        key = next(v for k, v in PATH_ARGS.items() if name.startswith(k))
+        url = reverse(name, args=[objects[key].pk])
+    today = timezone.localdate()
+    params = {
+        "dashboard:monthly-audit": {
+            "start": (today - timedelta(days=364)).isoformat(),
+            "end": today.isoformat(),
+        },
+        "transactions:pair_balance": {
+            "account": objects["account"].pk,
+            "entity": objects["entity"].pk,
+        },
+    }
+    return url, params.get(name, {})
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {size: seed(size, prefix=f"budget{size}") for size in SIZES}
+        cls.objects = {size: _objects(user) for size, user in cls.users.items()}
+
+    def test_every_route_has_a_budget_or_a_reason(self):
+        names = set(url_names())
+        self.assertEqual(names - set(BUDGETS) - set(SKIPPED), set())
+        self.assertEqual((set(BUDGETS) | set(SKIPPED)) - names, set())
+
+    def test_pages_stay_within_budget(self):
+        for name, budget in BUDGETS.items():
+            with self.subTest(name):
+                runs = {}
+                for size, user in self.users.items():
+                    # A fresh client per page, so no page sees another's session
+                    client = Client()
+                    client.force_login(user)
+                    url, params = _request(name, self.objects[size])
+                    # Warm-up, so process-level caches do not depend on page order
+                    client.get(url, params)
+                    runs[size] = capture(lambda: client.get(url, params))
+                self.assertQueryBudget(name, runs, budget)
@@ -0,0 +1,198 @@
+from decimal import Decimal
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+
+from accounts.models import Account
+from accounts.utils import ensure_outside_account
+from entities.utils import ensure_fixed_entities
+from liabilities.models import CreditCard, Lender
+from transactions.forecast import forecast_cash_flow
+from transactions.forms import TemplateForm
+from transactions.models import CategoryTag, Transaction, TransactionTemplate
+from transactions.recurring import next_date, run_scheduler
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class RecurringTemplateTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="rec", password="p")
+        self.outside = ensure_outside_account()
+        self.out_ent, self.acc_ent = ensure_fixed_entities(self.user)
+        self.cash = Account.objects.create(
+            account_name="Cash", account_type="Cash", user=self.user
+        )
+        Transaction.objects.create(
+            user=self.user,
+            date=date(2024, 12, 1),
+            transaction_type="income",
+            amount=Decimal("1000"),
+            account_source=self.outside,
+            account_destination=self.cash,
+            entity_source=self.out_ent,
+            entity_destination=self.acc_ent,
+        )
+
+    def _template(self, name, amount, recurrence="monthly", start=date(2025, 1, 31), **kw):
+        return TransactionTemplate.objects.create(
+            name=name,
+            user=self.user,
+            recurrence=recurrence,
+            recurrence_start=start,
+            autopop_map={
+                "transaction_type": "expense",
+                "amount": amount,
+                "account_source": kw.get("account", self.cash).pk,
+                "account_destination": self.outside.pk,
+                "entity_source": self.acc_ent.pk,
+                "entity_destination": self.out_ent.pk,
+            },
+        )
+
+    def test_monthly_steps_keep_anchor_day(self):
+        tpl = TransactionTemplate(recurrence="monthly", recurrence_start=date(2025, 1, 31))
+        self.assertEqual(next_date(tpl, date(2025, 1, 31)), date(2025, 2, 28))
+        self.assertEqual(next_date(tpl, date(2025, 2, 28)), date(2025, 3, 31))
+        tpl.recurrence, tpl.recurrence_interval = "weekly", 2
+        self.assertEqual(next_date(tpl, date(2025, 1, 1)), date(2025, 1, 15))
+
+    def test_catch_up_posts_all_due_occurrences_in_one_pass(self):
+        tpl = self._template("Rent", "100")
+        last_seq = Transaction.objects.get().seq_account
+        out = StringIO()
+        call_command("run_recurring", "--date", "2025-04-30", stdout=out)
+        self.assertIn("Posted 4", out.getvalue())
+
+        rows = list(Transaction.objects.filter(template=tpl).order_by("date"))
+        self.assertEqual(
+            [r.date for r in rows],
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)],
+        )
+        self.assertEqual([r.seq_account for r in rows], [last_seq + i for i in range(1, 5)])
+        self.assertEqual(rows[0].transaction_type_source, "expense")
+        self.assertEqual(rows[0].currency_id, self.cash.currency_id)
+        self.assertEqual(self.cash.get_current_balance(), Decimal("600"))
+        tpl.refresh_from_db()
+        self.assertEqual(tpl.next_occurrence, date(2025, 5, 31))
+
+        # Re-running the same day is a no-op
+        run_scheduler(date(2025, 4, 30))
+        self.assertEqual(Transaction.objects.filter(template=tpl).count(), 4)
+
+    def test_template_stops_at_first_unfunded_occurrence(self):
+        rent = self._template("Rent", "300")
+        gym = self._template("Gym", "50", start=date(2025, 1, 15))
+        result = run_scheduler(date(2025, 4, 30))
+        # Jan 15 gym, Jan 31 rent, Feb 15 gym, Feb 28 rent, Mar 15 gym, Mar 31 rent
+        # leaves 1000 - 900 - 150 = -50: the March rent cannot be covered.
+        self.assertEqual([(t.name, d) for t, d, _ in result.skipped], [("Rent", date(2025, 3, 31))])
+        self.assertIn("Insufficient funds", result.skipped[0][2])
+        self.assertEqual(Transaction.objects.filter(template=rent).count(), 2)
+        self.assertEqual(Transaction.objects.filter(template=gym).count(), 4)
+        rent.refresh_from_db()
+        self.assertEqual(rent.next_occurrence, date(2025, 3, 31))
+
+    def test_posting_invalidates_cached_ledger_views(self):
+        from transactions.versions import ledger_version
+
+        self._template("Rent", "100")
+        before = ledger_version(self.user.pk)
+        run_scheduler(date(2025, 2, 28))
+        self.assertNotEqual(ledger_version(self.user.pk), before)
+
+    def test_category_linked_when_bulk_create_returns_no_ids(self):
+        tag = CategoryTag.objects.create(name="Housing", user=self.user, transaction_type="expense")
+        tpl = self._template("Rent", "100")
+        tpl.autopop_map["category"] = tag.pk
+        tpl.save()
+        # As on MySQL, bulk_create does not report the inserted ids
+        with patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", False
+        ):
+            run_scheduler(date(2025, 2, 28))
+        rows = Transaction.objects.filter(template=tpl)
+        self.assertEqual(rows.count(), 2)
+        self.assertEqual(rows.filter(categories=tag).count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        self._template("Rent", "100")
+        out = StringIO()
+        call_command("run_recurring", "--date", "2025-02-28", "--dry-run", stdout=out)
+        self.assertIn("Would post 2", out.getvalue())
+        self.assertEqual(Transaction.objects.exclude(template=None).count(), 0)
+
+    def test_query_count_does_not_grow_with_occurrences(self):
+        def cost(name, until):
+            self._template(name, "1", recurrence="daily", start=date(2025, 1, 1))
+            with CaptureQueriesContext(connection) as ctx:
+                created = run_scheduler(until).created
+            return len(ctx), len(created)
+
+        small, n_small = cost("A", date(2025, 1, 5))
+        TransactionTemplate.objects.filter(name="A").update(recurrence="")
+        large, n_large = cost("B", date(2025, 3, 31))
+        self.assertEqual((n_small, n_large), (5, 90))
+        # Only extra bulk INSERT batches may appear
+        self.assertLessEqual(large - small, 3)
+
+    def test_card_statements_refreshed_once_per_batch(self):
+        card = CreditCard.objects.create(
+            user=self.user,
+            issuer=Lender.objects.create(name="CardBank"),
+            card_name="Visa",
+            credit_limit=Decimal("250"),
+            interest_rate=Decimal("2"),
+            statement_day=10,
+            payment_due_day=25,
+        )
+        self._template("Streaming", "100", start=date(2025, 1, 5), account=card.account)
+        result = run_scheduler(date(2025, 3, 31))
+        self.assertEqual(len(result.created), 2)
+        self.assertEqual(result.skipped[0][2], "Amount exceeds credit limit")
+        card.refresh_from_db()
+        self.assertEqual(card.outstanding_amount, Decimal("200"))
+        self.assertEqual(card.statements.count(), 2)
+
+    def test_forecast_includes_future_occurrences(self):
+        self._template("Rent", "100", start=date(2025, 2, 28))
+        fc = forecast_cash_flow(self.user, 3, start=date(2025, 2, 1))
+        recurring = [e for e in fc.events if e.kind == "recurring"]
+        self.assertEqual(
+            [e.date for e in recurring],
+            [date(2025, 2, 28), date(2025, 3, 28), date(2025, 4, 28)],
+        )
+        self.assertEqual(fc.accounts[self.cash.pk][-1], Decimal("700"))
+
+    def test_form_keeps_recurrence_out_of_autopop_map(self):
+        form = TemplateForm(
+            data={
+                "name": "Salary",
+                "transaction_type": "income",
+                "amount": "500",
+                "account_destination": self.cash.pk,
+                "entity_destination": self.acc_ent.pk,
+                "recurrence": "monthly",
+                "recurrence_start": "2025-01-15",
+            },
+            user=self.user,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        tpl = form.save()
+        self.assertEqual(tpl.next_occurrence, date(2025, 1, 15))
+        self.assertEqual(tpl.recurrence_interval, 1)
+        self.assertNotIn("recurrence", tpl.autopop_map)
+
+        form = TemplateForm(
+            data={"name": "Bad", "recurrence": "monthly"}, user=self.user
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("recurrence_start", form.errors)
@@ -0,0 +1,139 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from transactions.models import Transaction
+from transactions.services import reverse_and_hide, reverse_and_hide_many
+from transactions.synthetic import generate
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class ReverseAndHideManyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate(users=1, transactions=300, seed=31, start=date(2025, 1, 1), days=365)
+        cls.user = get_user_model().objects.get(username="synth-31-1")
+
+    def _roots(self, n, **filters):
+        return list(
+            Transaction.objects.filter(user=self.user, parent_transfer__isnull=True, **filters)
+            .exclude(transaction_type="loan_disbursement")
+            .order_by("pk")[:n]
+        )
+
+    def test_reverses_parents_and_child_legs(self):
+        parent = Transaction.all_objects.filter(
+            user=self.user, parent_transfer__isnull=False
+        ).first().parent_transfer
+        legs = list(Transaction.all_objects.filter(parent_transfer=parent))
+        others = self._roots(5, transaction_type="expense")
+
+        created = reverse_and_hide_many([parent, *others], actor=self.user)
+        self.assertEqual(len(created), 6 + len(legs))
+
+        for original in [parent, *legs, *others]:
+            original.refresh_from_db()
+            self.assertTrue(original.is_hidden)
+            self.assertTrue(original.is_reversed)
+            self.assertEqual(original.ledger_status, "reversed")
+            self.assertEqual(original.reversed_by, self.user)
+            rev = Transaction.all_objects.get(reversed_transaction=original)
+            self.assertTrue(rev.is_reversal and rev.is_hidden)
+            self.assertEqual(rev.account_source_id, original.account_destination_id)
+            self.assertEqual(rev.entity_destination_id, original.entity_source_id)
+            self.assertEqual(rev.transaction_type_source, original.transaction_type_source)
+        parent_rev = Transaction.all_objects.get(reversed_transaction=parent)
+        self.assertEqual(
+            set(Transaction.all_objects.filter(parent_transfer=parent_rev).values_list(
+                "reversed_transaction_id", flat=True
+            )),
+            {leg.pk for leg in legs},
+        )
+        # Caller's instances follow the rows
+        self.assertTrue(others[0].is_reversed and others[0].is_hidden)
+
+    def test_leg_passed_with_its_parent_is_reversed_once(self):
+        leg = Transaction.all_objects.filter(user=self.user, parent_transfer__isnull=False).first()
+        parent = leg.parent_transfer
+        legs = Transaction.all_objects.filter(parent_transfer=parent).count()
+
+        created = reverse_and_hide_many([leg, parent])
+        self.assertEqual(len(created), 1 + legs)
+        self.assertEqual(Transaction.all_objects.filter(reversed_transaction=leg).count(), 1)
+        rev = Transaction.all_objects.get(reversed_transaction=leg)
+        self.assertEqual(rev.parent_transfer.reversed_transaction_id, parent.pk)
+
+    def test_child_legs_point_at_the_parent_reversal_without_returned_ids(self):
+        parent = Transaction.all_objects.filter(
+            user=self.user, parent_transfer__isnull=False
+        ).first().parent_transfer
+        legs = Transaction.all_objects.filter(parent_transfer=parent).count()
+        # As on MySQL, bulk_create does not report the inserted ids
+        with patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", False
+        ):
+            reverse_and_hide_many([parent])
+        parent_rev = Transaction.all_objects.get(reversed_transaction=parent)
+        rev_legs = Transaction.all_objects.filter(
+            is_reversal=True, reversed_transaction__parent_transfer=parent
+        )
+        self.assertEqual(rev_legs.count(), legs)
+        self.assertEqual(
+            set(rev_legs.values_list("parent_transfer_id", flat=True)), {parent_rev.pk}
+        )
+
+    def test_sequence_numbers_continue_per_account(self):
+        txns = self._roots(4, transaction_type="expense")
+        account_id = txns[0].account_source_id
+        before = max(
+            Transaction.all_objects.filter(account_source_id=account_id).values_list("seq_account", flat=True)
+            or [0]
+        )
+        reverse_and_hide_many(txns)
+        seqs = sorted(
+            Transaction.all_objects.filter(
+                is_reversal=True, account_destination_id=account_id
+            ).values_list("seq_account", flat=True)
+        )
+        self.assertEqual(len(seqs), len(set(seqs)))
+        self.assertGreater(seqs[0], before)
+
+    def test_idempotent(self):
+        txn = self._roots(1, transaction_type="expense")[0]
+        reverse_and_hide(txn)
+        self.assertEqual(reverse_and_hide_many([txn]), [])
+        self.assertEqual(Transaction.all_objects.filter(reversed_transaction=txn).count(), 1)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        small = self._roots(3, transaction_type="expense")
+        large = self._roots(30, transaction_type="income")
+        with CaptureQueriesContext(connection) as few:
+            reverse_and_hide_many(small)
+        with CaptureQueriesContext(connection) as many:
+            reverse_and_hide_many(large)
+        self.assertEqual(
+            Transaction.all_objects.filter(is_reversal=True).count(), len(small) + len(large)
+        )
+        self.assertLessEqual(len(many), len(few) + 2)
+
+    def test_bulk_delete_view_reverses_the_selection(self):
+        self.client.force_login(self.user)
+        # Removing expenses never overdraws later balances
+        txns = self._roots(3, transaction_type="expense")
+        resp = self.client.post(
+            reverse("transactions:bulk_action"), {"selected_ids": [t.pk for t in txns]}
+        )
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(
+            Transaction.all_objects.filter(
+                pk__in=[t.pk for t in txns], is_reversed=True, is_hidden=True
+            ).count(),
+            3,
+        )
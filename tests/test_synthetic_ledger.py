@@ -0,0 +1,110 @@
+from collections import defaultdict
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from acquisitions.models import Acquisition
+from liabilities.models import CreditCardStatement, Loan
+from transactions.constants import transaction_type_TX_MAP
+from transactions.models import Transaction
+from transactions.synthetic import generate, load_export_rows
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class SyntheticLedgerTests(TestCase):
+    def _ledger(self, prefix):
+        return [
+            (
+                t.user.username.rsplit("-", 1)[1],
+                t.date,
+                t.transaction_type,
+                t.amount,
+                t.description,
+                t.account_source.account_name,
+                t.account_destination.account_name,
+                t.is_hidden,
+            )
+            for t in Transaction.all_objects.filter(user__username__startswith=prefix)
+            .select_related("user", "account_source", "account_destination")
+            .order_by("user__username", "pk")
+        ]
+
+    def test_same_seed_same_ledger(self):
+        kw = dict(users=2, transactions=300, seed=7, start=date(2024, 1, 1), days=365)
+        generate(prefix="a", **kw)
+        generate(prefix="b", **kw)
+        self.assertEqual(self._ledger("a-"), self._ledger("b-"))
+        self.assertGreater(len(self._ledger("a-")), 300)
+
+        generate(prefix="c", **{**kw, "seed": 8})
+        self.assertNotEqual(self._ledger("a-"), self._ledger("c-"))
+
+        with self.assertRaises(ValueError):
+            generate(prefix="a", **kw)
+
+    def test_rows_follow_the_ledger_rules(self):
+        stats = generate(users=1, transactions=500, seed=3, start=date(2024, 1, 1), days=365)
+        rows = list(Transaction.all_objects.order_by("pk"))
+        self.assertEqual(len(rows), Transaction.all_objects.count())
+        self.assertEqual(stats.transactions, len(rows) - stats.loans)
+
+        seen = defaultdict(int)
+        for t in rows:
+            key = t.transaction_type.replace(" ", "_")
+            self.assertEqual(
+                (
+                    t.transaction_type_source,
+                    t.transaction_type_destination,
+                    t.asset_type_source,
+                    t.asset_type_destination,
+                ),
+                transaction_type_TX_MAP[key],
+            )
+            # Numbered as Transaction.save would number them
+            accounts = {t.account_source_id, t.account_destination_id}
+            self.assertEqual(t.seq_account, max(seen[a] for a in accounts) + 1)
+            for a in accounts:
+                seen[a] = t.seq_account
+            if not t.is_hidden:
+                self.assertTrue(t.categories.exists())
+
+        parents = Transaction.all_objects.filter(child_transfers__isnull=False).distinct()
+        self.assertEqual(parents.count() * 2, stats.child_legs)
+        for parent in parents:
+            debit, credit = Transaction.all_objects.filter(parent_transfer=parent).order_by("pk")
+            self.assertEqual(debit.amount, parent.amount)
+            self.assertEqual(credit.amount, parent.destination_amount)
+            self.assertEqual(debit.account_destination, credit.account_source)
+            self.assertNotEqual(debit.currency_id, credit.currency_id)
+
+        self.assertEqual(Acquisition.objects.count(), stats.acquisitions)
+        self.assertTrue(CreditCardStatement.objects.exists())
+        for loan in Loan.objects.all():
+            self.assertLess(loan.outstanding_balance, loan.principal_amount)
+
+        # New rows still get fresh keys after the explicit ones
+        extra = Transaction.objects.create(
+            user=rows[0].user, date=date(2025, 1, 1), transaction_type="income", amount=1
+        )
+        self.assertGreater(extra.pk, rows[-1].pk)
+
+    def test_scales_the_export(self):
+        path = Path(settings.BASE_DIR) / "export.json"
+        template = load_export_rows(path)
+        self.assertTrue(template)
+        out = StringIO()
+        call_command(
+            "generate_ledger", "--from-export", str(path), "--scale", "2",
+            "--seed", "1", stdout=out,
+        )
+        self.assertIn("for 1 user(s)", out.getvalue())
+        replayed = Transaction.all_objects.filter(
+            description__in={row[2] for row in template}
+        ).exclude(description="Opening balance")
+        self.assertGreaterEqual(replayed.count(), 2 * len(template))
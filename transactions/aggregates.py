@@ -0,0 +1,346 @@
+"""Grouped SQL aggregations over the transaction ledger.
+
+Reporting endpoints used to walk every transaction in Python and convert each
+row to the display currency. The helpers here push the grouping into the
+database instead: rows are summed per bucket *and per native currency*, then
+each bucket is converted once with :func:`utils.currency.get_conversion_rates`.
+Because conversion is linear this yields the same totals as the row-by-row
+loops while issuing a fixed number of queries.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import (
+    Abs,
+    Coalesce,
+    Lower,
+    TruncMonth,
+    TruncQuarter,
+    TruncWeek,
+)
+
+from utils.currency import get_conversion_rates
+
+from .models import Transaction
+
+
+def inflow_amount_expr():
+    """Destination-side amount: ``destination_amount`` when it is denominated
+    in the destination account's currency, otherwise ``amount``."""
+    return Case(
+        When(
+            destination_amount__isnull=False,
+            account_destination__currency__isnull=False,
+            then=F("destination_amount"),
+        ),
+        default=F("amount"),
+        output_field=DecimalField(),
+    )
+
+
+def inflow_currency_expr():
+    """Currency id matching :func:`inflow_amount_expr`."""
+    return Case(
+        When(
+            destination_amount__isnull=False,
+            account_destination__currency__isnull=False,
+            then=F("account_destination__currency_id"),
+        ),
+        default=F("currency_id"),
+    )
+
+
+def exclude_internal(qs):
+    """Drop internal movements where the entity or account is identical."""
+    return qs.exclude(
+        entity_source_id__isnull=False,
+        entity_destination_id__isnull=False,
+        entity_source_id=F("entity_destination_id"),
+    ).exclude(
+        account_source_id__isnull=False,
+        account_destination_id__isnull=False,
+        account_source_id=F("account_destination_id"),
+    )
+
+
+def convert_buckets(buckets, target_currency) -> dict:
+    """Collapse ``{(key, currency_id): amount}`` into ``{key: converted}``."""
+    rates = get_conversion_rates({cid for _, cid in buckets}, target_currency)
+    out: dict = defaultdict(Decimal)
+    for (key, cid), amount in buckets.items():
+        out[key] += (amount or Decimal("0")) * rates[cid]
+    return out
+
+
+def entity_flow_totals(
+    user,
+    entity_ids=None,
+    start=None,
+    end=None,
+    currency=None,
+    *,
+    liquid_only=False,
+    skip_internal=True,
+):
+    """Return income, expenses and capital in/out per entity.
+
+    By default this mirrors the dashboard ``entity_summary`` rules: top-level
+    visible rows only, internal same-entity/same-account moves skipped,
+    income and capital in counted on the destination side, expenses and
+    capital out on the source side. With ``liquid_only`` a side only counts
+    when its asset type is liquid and with ``skip_internal=False`` internal
+    moves are kept, which matches the entity analytics KPIs. All four
+    measures come from one grouped query keyed by (destination entity,
+    source entity, currency) and are converted to ``currency`` once per
+    bucket, so any number of entities costs the same.
+
+    Returns ``{entity_id: {"income", "expenses", "capital_in", "capital_out"}}``.
+    """
+    qs = Transaction.objects.filter(user=user, parent_transfer__isnull=True)
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    if entity_ids is not None:
+        qs = qs.filter(
+            Q(entity_destination_id__in=entity_ids) | Q(entity_source_id__in=entity_ids)
+        )
+    if skip_internal:
+        qs = exclude_internal(qs)
+
+    dest = Q(asset_type_destination__iexact="liquid") if liquid_only else Q()
+    src = Q(asset_type_source__iexact="liquid") if liquid_only else Q()
+    is_transfer = Q(transaction_type__iexact="transfer")
+    rows = (
+        qs.annotate(in_amount=inflow_amount_expr(), in_currency=inflow_currency_expr())
+        .values("entity_destination_id", "entity_source_id", "in_currency", "currency_id")
+        .annotate(
+            income=Sum(
+                "in_amount",
+                filter=dest & Q(transaction_type_destination__iexact="income"),
+            ),
+            capital_in=Sum("in_amount", filter=dest & is_transfer),
+            expenses=Sum(
+                "amount", filter=src & Q(transaction_type_source__iexact="expense")
+            ),
+            capital_out=Sum("amount", filter=src & is_transfer),
+        )
+        .order_by()
+    )
+
+    buckets: dict = defaultdict(Decimal)
+    for row in rows:
+        dest, src = row["entity_destination_id"], row["entity_source_id"]
+        for measure, ent_id, cid in (
+            ("income", dest, row["in_currency"]),
+            ("capital_in", dest, row["in_currency"]),
+            ("expenses", src, row["currency_id"]),
+            ("capital_out", src, row["currency_id"]),
+        ):
+            if ent_id is None or row[measure] is None:
+                continue
+            buckets[((ent_id, measure), cid)] += row[measure]
+
+    out: dict = defaultdict(
+        lambda: {
+            "income": Decimal("0"),
+            "expenses": Decimal("0"),
+            "capital_in": Decimal("0"),
+            "capital_out": Decimal("0"),
+        }
+    )
+    for (ent_id, measure), total in convert_buckets(buckets, currency).items():
+        out[ent_id][measure] += total
+    return out
+
+
+def grouped_totals(qs, key, measures, currency=None):
+    """Return ``{group: {measure: total}}`` for transactions in ``qs``.
+
+    ``key`` is a field path or expression to group by (``None`` for a single
+    overall group, returned under the ``None`` key). ``measures`` maps an
+    output key to ``(side, condition)`` where ``side`` is ``"destination"``
+    (sum :func:`inflow_amount_expr`) or ``"source"`` (sum ``amount``) and
+    ``condition`` is an optional ``Q`` restricting the rows counted toward
+    that measure. Rows are grouped by (key, currency) in a single query and
+    each group is converted to ``currency`` once.
+    """
+    # Coalesce inside the Sum so a matching row with a NULL amount still
+    # reports its group (with a zero total), as the per-row loops did.
+    annotations = {
+        name: Sum(
+            Coalesce(
+                F("in_amount" if side == "destination" else "amount"),
+                Value(Decimal("0")),
+                output_field=DecimalField(),
+            ),
+            filter=cond,
+        )
+        for name, (side, cond) in measures.items()
+    }
+    qs = qs.annotate(in_amount=inflow_amount_expr(), in_currency=inflow_currency_expr())
+    fields = ["in_currency", "currency_id"]
+    if key is not None:
+        qs = qs.annotate(group_key=F(key) if isinstance(key, str) else key)
+        fields.insert(0, "group_key")
+    rows = qs.values(*fields).annotate(**annotations).order_by()
+
+    buckets: dict = defaultdict(Decimal)
+    for row in rows:
+        group = row.get("group_key")
+        for name, (side, _cond) in measures.items():
+            if row[name] is None:
+                continue
+            cid = row["in_currency"] if side == "destination" else row["currency_id"]
+            buckets[((group, name), cid)] += row[name]
+
+    out: dict = defaultdict(lambda: {name: Decimal("0") for name in measures})
+    for (group, name), total in convert_buckets(buckets, currency).items():
+        out[group][name] += total
+    return out
+
+
+def category_totals(qs, measures, currency=None, names=None):
+    """Return ``{tag_name: {measure: total}}`` for transactions in ``qs``.
+
+    Rows are joined through the ``Transaction.categories`` M2M table, so a
+    transaction carrying several tags contributes to each of them. See
+    :func:`grouped_totals` for the ``measures`` format. ``names`` optionally
+    restricts the tags reported.
+    """
+    totals = grouped_totals(qs, "categories__name", measures, currency)
+    wanted = set(names) if names else None
+    return {
+        name: values
+        for name, values in totals.items()
+        if name is not None and (wanted is None or name in wanted)
+    }
+
+
+PERIOD_TRUNC = {"week": TruncWeek, "month": TruncMonth, "quarter": TruncQuarter}
+
+
+def period_totals(qs, measures, interval="month", currency=None):
+    """Return ``{period_start: {measure: total}}`` bucketed in the database.
+
+    ``interval`` is ``"week"``, ``"month"`` or ``"quarter"``; unknown values
+    fall back to months.
+    """
+    trunc = PERIOD_TRUNC.get(interval, TruncMonth)
+    return grouped_totals(qs, trunc("date"), measures, currency)
+
+
+def exclude_internal_moves(qs, *, accounts=False, keep_asset_changes=True):
+    """Drop movements where the entity does not change.
+
+    With ``accounts`` same-account movements are dropped as well. With
+    ``keep_asset_changes`` such movements are kept when the asset class
+    changes (e.g. liquid to non-liquid within one entity).
+    """
+    internal = Q(
+        entity_source_id__isnull=False,
+        entity_destination_id__isnull=False,
+        entity_source_id=F("entity_destination_id"),
+    )
+    if accounts:
+        internal |= Q(
+            account_source_id__isnull=False,
+            account_destination_id__isnull=False,
+            account_source_id=F("account_destination_id"),
+        )
+    if keep_asset_changes:
+        qs = qs.annotate(
+            src_asset_key=Coalesce(Lower("asset_type_source"), Value("")),
+            dst_asset_key=Coalesce(Lower("asset_type_destination"), Value("")),
+        )
+        internal &= Q(src_asset_key=F("dst_asset_key"))
+    return qs.exclude(internal)
+
+
+def with_flow_flags(qs):
+    """Annotate 0/1 flags used by :func:`cash_flow_measures`.
+
+    Flags are plain integers so the measure conditions never negate a
+    nullable join (which SQL would treat as unknown).
+    """
+
+    def flag(cond):
+        return Case(
+            When(cond, then=Value(1)), default=Value(0), output_field=IntegerField()
+        )
+
+    return qs.annotate(
+        is_transfer=flag(Q(transaction_type__iexact="transfer")),
+        dest_outside=flag(
+            Q(account_destination__account_type="Outside")
+            | Q(account_destination__account_name="Outside")
+        ),
+        src_outside=flag(
+            Q(account_source__account_type="Outside")
+            | Q(account_source__account_name="Outside")
+        ),
+    )
+
+
+def cash_flow_measures(entity_id=None, outside_rules=True):
+    """Measures for income, expenses and liquid/non-liquid movements.
+
+    When ``entity_id`` is given only the matching side of each row counts.
+    With ``outside_rules`` a transfer to Outside moves value from liquid into
+    non-liquid (capital in) and a transfer from Outside does the reverse;
+    querysets must then be annotated with :func:`with_flow_flags`.
+    """
+    dest = Q() if entity_id is None else Q(entity_destination_id=entity_id)
+    src = Q() if entity_id is None else Q(entity_source_id=entity_id)
+    dest_liquid = Q(asset_type_destination__iexact="liquid")
+    src_liquid = Q(asset_type_source__iexact="liquid")
+    dest_non_liquid = Q(asset_type_destination__iexact="non_liquid")
+    src_non_liquid = Q(asset_type_source__iexact="non_liquid")
+    if outside_rules:
+        to_outside = Q(is_transfer=1, dest_outside=1)
+        from_outside = Q(is_transfer=1, src_outside=1)
+        dest_liquid &= Q(is_transfer=0) | Q(dest_outside=0)
+        src_liquid &= Q(is_transfer=0) | Q(src_outside=0)
+        dest_non_liquid = to_outside | dest_non_liquid
+        src_non_liquid = from_outside | src_non_liquid
+    return {
+        "income": ("destination", dest & Q(transaction_type_destination__iexact="income")),
+        "expenses": ("source", src & Q(transaction_type_source__iexact="expense")),
+        "liquid_in": ("destination", dest & dest_liquid),
+        "liquid_out": ("source", src & src_liquid),
+        "non_liquid_in": ("destination", dest & dest_non_liquid),
+        "non_liquid_out": ("source", src & src_non_liquid),
+    }
+
+
+def top_transactions(qs, n=10, currency=None):
+    """Return the ``n`` largest rows of ``qs`` by converted ``abs(amount)``.
+
+    Conversion preserves order within one currency, so each source currency
+    only needs its own ``n`` largest rows (``ORDER BY ... LIMIT n``). Those
+    candidates are converted with rates fetched in one query and merged into
+    the exact global top ``n``. Cost is O(n x currencies) rows rather than
+    every row in ``qs``.
+
+    Returns a list of ``(converted_amount, transaction)`` pairs, largest first.
+    """
+    qs = qs.order_by()
+    currency_ids = list(qs.values_list("currency_id", flat=True).distinct())
+    rates = get_conversion_rates(currency_ids, currency)
+    ranked = qs.annotate(abs_amount=Abs("amount")).order_by(
+        F("abs_amount").desc(nulls_last=True), "pk"
+    )
+    candidates = []
+    for cid in currency_ids:
+        if cid is None:
+            rows = ranked.filter(currency_id__isnull=True)
+        else:
+            rows = ranked.filter(currency_id=cid)
+        for tx in rows[:n]:
+            candidates.append((abs(tx.amount or Decimal("0")) * rates[cid], tx))
+    candidates.sort(key=lambda c: (-c[0], c[1].pk))
+    return candidates[:n]
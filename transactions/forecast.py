@@ -0,0 +1,285 @@
+"""Cash-flow forecasting over scheduled obligations.
+
+A forecast starts from the current materialized balances (account balances
+and entity/account pocket balances), then walks every future obligation in
+date order: unpaid loan installments, credit card statement dues and
+recurring transaction templates. Each source yields its events already sorted,
+so the streams are combined with a single ``heapq.merge`` pass and applied
+with :func:`transactions.services.walk_balances`, the same walk the overdraft
+checks use. The cost depends on the number of scheduled events, not on the
+length of the transaction history.
+
+All figures are converted to one target currency so account, entity and
+total series can be compared and summed.
+"""
+
+from __future__ import annotations
+
+import bisect
+import calendar
+import heapq
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from accounts.models import Account
+from currencies.models import Currency
+from utils.currency import get_conversion_rates
+
+from .services import walk_balances
+
+DAILY = "day"
+MONTHLY = "month"
+
+# Account types whose balances are not spendable cash
+NON_LIQUID_ACCOUNT_TYPES = ("Outside", "Entity", "Credit")
+
+TOTAL = ("total", None)
+
+
+@dataclass(frozen=True)
+class ForecastEvent:
+    date: date
+    amount: Decimal  # signed, in ``currency``
+    currency: Optional[str]
+    account_id: Optional[int] = None
+    entity_id: Optional[int] = None
+    kind: str = ""
+    label: str = ""
+
+
+@dataclass
+class Forecast:
+    currency: str
+    dates: list = field(default_factory=list)
+    accounts: dict = field(default_factory=dict)
+    entities: dict = field(default_factory=dict)
+    total: list = field(default_factory=list)
+    # {("account", id) | ("entity", id) | ("total", None): date}
+    first_negative: dict = field(default_factory=dict)
+    events: list = field(default_factory=list)
+
+
+def _add_months(d: date, months: int) -> date:
+    y, m = divmod(d.month - 1 + months, 12)
+    year, month = d.year + y, m + 1
+    return date(year, month, min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def _month_end(d: date) -> date:
+    return date(d.year, d.month, calendar.monthrange(d.year, d.month)[1])
+
+
+def bucket_dates(start: date, end: date, granularity: str = MONTHLY) -> list:
+    """Return the dates at which balances are sampled, ending with ``end``."""
+    if granularity == DAILY:
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    dates = []
+    cur = _month_end(start)
+    while cur < end:
+        dates.append(cur)
+        cur = _month_end(cur + timedelta(days=1))
+    dates.append(end)
+    return dates
+
+
+# ---------------- Event sources ----------------
+def loan_payment_events(user, start: date, end: date) -> Iterable[ForecastEvent]:
+    """Unpaid loan installments due up to ``end`` (overdue ones on ``start``).
+
+    Installments are charged to the account and entity that received the
+    loan's disbursement.
+    """
+    from liabilities.models import LoanPayment
+
+    rows = (
+        LoanPayment.objects.filter(
+            loan__user=user,
+            loan__is_deleted=False,
+            is_paid=False,
+            due_date__lte=end,
+        )
+        .order_by("due_date", "pk")
+        .values_list(
+            "due_date",
+            "amount",
+            "loan__currency",
+            "loan__disbursement_tx__account_destination_id",
+            "loan__disbursement_tx__entity_destination_id",
+            "loan__lender__name",
+        )
+    )
+    for due, amount, cur, acc_id, ent_id, lender in rows:
+        yield ForecastEvent(
+            max(due, start),
+            -(amount or Decimal("0")),
+            cur or None,
+            acc_id,
+            ent_id,
+            "loan",
+            f"{lender} loan payment",
+        )
+
+
+def card_due_events(user, start: date, end: date) -> Iterable[ForecastEvent]:
+    """Credit card dues from the materialized statement cycles.
+
+    The last closed statement is due on its due date less any payments made
+    since it closed; the rest of the outstanding amount falls due with the
+    open cycle. Which account pays a card is not recorded, so dues only
+    affect the total.
+    """
+    from liabilities.models import CreditCard, CreditCardStatement
+    from liabilities.statements import cycle_for, latest_statements
+
+    cards = list(CreditCard.objects.filter(user=user, is_deleted=False))
+    if not cards:
+        return []
+    closed = latest_statements(cards, as_of=start)
+    open_cycles = {}
+    for stmt in CreditCardStatement.objects.filter(
+        card__in=cards, statement_date__gte=start
+    ).order_by("card_id", "statement_date"):
+        open_cycles.setdefault(stmt.card_id, stmt)
+
+    events = []
+    for card in cards:
+        stmt, current = closed.get(card.pk), open_cycles.get(card.pk)
+        remaining = Decimal("0")
+        if stmt is not None and stmt.due_date >= start:
+            paid_since = current.payments if current is not None else Decimal("0")
+            remaining = max(stmt.closing_balance - paid_since, Decimal("0"))
+            if remaining > 0 and stmt.due_date <= end:
+                events.append(
+                    ForecastEvent(
+                        stmt.due_date, -remaining, card.currency or None,
+                        kind="credit", label=f"{card.card_name} statement",
+                    )
+                )
+        rest = (card.outstanding_amount or Decimal("0")) - remaining
+        due = current.due_date if current is not None else cycle_for(card, start)[2]
+        if rest > 0 and due <= end:
+            events.append(
+                ForecastEvent(
+                    due, -rest, card.currency or None,
+                    kind="credit", label=f"{card.card_name} statement",
+                )
+            )
+    events.sort(key=lambda e: e.date)
+    return events
+
+
+def recurring_template_events(user, start: date, end: date) -> Iterable[ForecastEvent]:
+    """Future occurrences of the user's recurring transaction templates."""
+    from .recurring import template_events
+
+    return template_events(user, start, end)
+
+
+# Callables ``(user, start, end) -> events sorted by date``
+EVENT_SOURCES: list[Callable] = [
+    loan_payment_events,
+    card_due_events,
+    recurring_template_events,
+]
+
+
+# ---------------- Engine ----------------
+def _rates_by_code(codes, target: Currency) -> dict:
+    ids = dict(Currency.objects.filter(code__in=set(codes)).values_list("code", "pk"))
+    by_id = get_conversion_rates(set(ids.values()), target)
+    return {code: by_id.get(ids.get(code), Decimal("1")) for code in codes}
+
+
+def _opening_balances(user, target: Currency):
+    """Return ``(accounts, entities)`` opening balances in ``target``."""
+    from cenfin_proj.utils import get_account_entity_balances
+
+    rows = list(
+        Account.objects.filter(user=user, is_active=True)
+        .exclude(account_type__in=NON_LIQUID_ACCOUNT_TYPES)
+        .with_current_balance()
+        .values_list("pk", "currency_id", "current_balance")
+    )
+    rates = get_conversion_rates({cid for _, cid, _ in rows}, target)
+    acc_rate = {pk: rates.get(cid, Decimal("1")) for pk, cid, _ in rows}
+    accounts = {pk: (bal or Decimal("0")) * acc_rate[pk] for pk, _, bal in rows}
+
+    entities: dict = {}
+    for (acc_id, ent_id), bal in get_account_entity_balances(user=user).items():
+        if acc_id in acc_rate and ent_id is not None:
+            entities[ent_id] = entities.get(ent_id, Decimal("0")) + bal * acc_rate[acc_id]
+    return accounts, entities
+
+
+def forecast_cash_flow(
+    user,
+    months: int = 12,
+    *,
+    granularity: str = MONTHLY,
+    currency=None,
+    start: Optional[date] = None,
+    sources: Optional[Iterable[Callable]] = None,
+) -> Forecast:
+    """Project liquid balances per account, per entity and in total.
+
+    Balances are sampled at the end of each day or month up to ``months``
+    ahead of ``start`` (today by default). ``first_negative`` records the
+    first date each series drops below zero.
+    """
+    start = start or timezone.localdate()
+    end = _add_months(start, months)
+    if isinstance(currency, str) or currency is None:
+        code = currency or getattr(
+            getattr(user, "base_currency", None), "code", None
+        ) or settings.BASE_CURRENCY
+        currency = Currency.objects.filter(code=code).first()
+    code = getattr(currency, "code", "") or settings.BASE_CURRENCY
+
+    accounts, entities = _opening_balances(user, currency)
+    events = list(
+        heapq.merge(
+            *(src(user, start, end) for src in (sources or EVENT_SOURCES)),
+            key=lambda e: e.date,
+        )
+    )
+    rates = _rates_by_code({e.currency for e in events if e.currency}, currency)
+
+    running = {("account", pk): bal for pk, bal in accounts.items()}
+    running.update({("entity", pk): bal for pk, bal in entities.items()})
+    running[TOTAL] = sum(accounts.values(), Decimal("0"))
+    fc = Forecast(currency=code, dates=bucket_dates(start, end, granularity), events=events)
+    for key, bal in running.items():
+        if bal < 0:
+            fc.first_negative[key] = start
+
+    def legs(event: ForecastEvent):
+        amt = event.amount * rates.get(event.currency, Decimal("1"))
+        out = [(TOTAL, amt)]
+        if event.account_id in accounts:
+            out.append((("account", event.account_id), amt))
+        if event.entity_id is not None:
+            out.append((("entity", event.entity_id), amt))
+        return out
+
+    series = {key: [] for key in running}
+    grouped = groupby(events, key=lambda e: bisect.bisect_left(fc.dates, e.date))
+    pending = next(grouped, None)
+    for idx in range(len(fc.dates)):
+        if pending is not None and pending[0] == idx:
+            for event, key, bal in walk_balances(running, pending[1], legs):
+                if bal < 0 and key not in fc.first_negative:
+                    fc.first_negative[key] = event.date
+            pending = next(grouped, None)
+        for key, bal in running.items():
+            series.setdefault(key, [Decimal("0")] * idx).append(bal)
+
+    fc.total = series.pop(TOTAL)
+    for (kind, pk), values in series.items():
+        (fc.accounts if kind == "account" else fc.entities)[pk] = values
+    return fc
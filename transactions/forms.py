@@ -1096,11 +1096,25 @@ class TemplateForm(forms.ModelForm):
             "entity_destination",
             "remarks",
             "category",
+            "recurrence",
+            "recurrence_interval",
+            "recurrence_start",
+            "recurrence_end",
         ]
         widgets = {
             "amount": forms.TextInput(attrs={"inputmode": "decimal"}),
+            "recurrence_start": forms.DateInput(attrs={"type": "date"}),
+            "recurrence_end": forms.DateInput(attrs={"type": "date"}),
         }
 
+    # Model fields stored on the template itself rather than in autopop_map
+    RECURRENCE_FIELDS = (
+        "recurrence",
+        "recurrence_interval",
+        "recurrence_start",
+        "recurrence_end",
+    )
+
     def __init__(self, *args, **kwargs):
         user = kwargs.pop("user", None)
         show_actions = kwargs.pop("show_actions", True)
@@ -1110,6 +1124,8 @@ class TemplateForm(forms.ModelForm):
         css = self.fields["amount"].widget.attrs.get("class", "")
         self.fields["amount"].widget.attrs["class"] = f"{css} amount-input".strip()
 
+        self.fields["recurrence_interval"].required = False
+
         outside_entity, _ = ensure_fixed_entities(self.user)
         outside_account = ensure_outside_account()
         tx_type = (
@@ -1214,6 +1230,13 @@ class TemplateForm(forms.ModelForm):
                 css_class="g-3",
             ),
             "remarks",
+            Row(
+                Column("recurrence", css_class="col-md-3"),
+                Column("recurrence_interval", css_class="col-md-3"),
+                Column("recurrence_start", css_class="col-md-3"),
+                Column("recurrence_end", css_class="col-md-3"),
+                css_class="g-3",
+            ),
         ]
 
         if show_actions:
@@ -1233,6 +1256,12 @@ class TemplateForm(forms.ModelForm):
 
     def clean(self):
         cleaned = super().clean()
+        cleaned["recurrence_interval"] = cleaned.get("recurrence_interval") or 1
+        if cleaned.get("recurrence"):
+            if not cleaned.get("recurrence_start"):
+                self.add_error("recurrence_start", "Pick the first occurrence date.")
+            if cleaned.get("amount") in (None, ""):
+                self.add_error("amount", "Recurring templates need an amount.")
         tx_type = cleaned.get("transaction_type")
         outside_entity, _ = ensure_fixed_entities(self.user)
         outside_account = ensure_outside_account()
@@ -1251,12 +1280,20 @@ class TemplateForm(forms.ModelForm):
         template = super().save(commit=False)
         defaults = {}
         for field_name in self.cleaned_data:
-            if field_name == "name":
+            if field_name == "name" or field_name in self.RECURRENCE_FIELDS:
                 continue
             value = self.cleaned_data.get(field_name)
             if value not in (None, "", []):
-                defaults[field_name] = value.pk if hasattr(value, "pk") else value
+                if hasattr(value, "pk"):
+                    value = value.pk
+                elif isinstance(value, Decimal):
+                    # JSONField cannot encode Decimal; keep the exact digits
+                    value = str(value)
+                defaults[field_name] = value
         template.autopop_map = defaults or None
+        if self.instance.pk and "recurrence_start" in self.changed_data:
+            # Restart the schedule from the new first occurrence
+            template.next_occurrence = None
 
         if commit:
             template.save()
@@ -0,0 +1,37 @@
+"""Chunked maintenance commands that rewrite ledger rows."""
+
+from core.maintenance import ChunkedCommand
+from liabilities.statements import sync_accounts
+
+from .models import Transaction
+from .versions import bump_ledger_version
+
+
+class LedgerMaintenanceCommand(ChunkedCommand):
+    """:class:`~core.maintenance.ChunkedCommand` over transactions.
+
+    ``bulk_update`` skips ``Transaction.save`` and its signals, and queryset
+    deletes of category links do not send ``m2m_changed``, so after each
+    chunk this invalidates the cached ledger views of the users whose rows
+    (or the rows linked to them) changed and rebuilds the statements of any
+    credit card account touched.
+    """
+
+    def get_queryset(self, options):
+        return Transaction.all_objects.all()
+
+    def after_chunk(self, objects):
+        rows = [o for o in objects if isinstance(o, Transaction)]
+        user_ids = {t.user_id for t in rows}
+        linked = {
+            getattr(o, "transaction_id", None) for o in objects if not isinstance(o, Transaction)
+        } - {None}
+        if linked:
+            user_ids |= set(
+                Transaction.all_objects.filter(pk__in=linked).values_list("user_id", flat=True)
+            )
+        for user_id in user_ids:
+            bump_ledger_version(user_id)
+        sync_accounts(
+            {t.account_source_id for t in rows} | {t.account_destination_id for t in rows}
+        )
@@ -0,0 +1,87 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.synthetic import generate, load_export_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate deterministic synthetic users and ledgers for load testing: "
+        "multi-currency accounts, entities, tags, loans, credit cards, "
+        "acquisitions and cross-currency transfers, bulk inserted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1, help="Users to create.")
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=1000,
+            help="Random transactions spread over all users.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=date(2023, 1, 1),
+            help="First ledger date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--days", type=int, default=1095, help="Days covered by the ledger."
+        )
+        parser.add_argument(
+            "--prefix", default="synth", help="Username prefix ({prefix}-{seed}-{n})."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Rows per INSERT."
+        )
+        parser.add_argument(
+            "--from-export",
+            help="Replay the rows of a dumpdata export instead of random draws.",
+        )
+        parser.add_argument(
+            "--scale",
+            type=int,
+            default=1,
+            help="Copies of the export replayed per user (with --from-export).",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["days"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--users, --days and --batch-size must be positive.")
+        template = None
+        if options.get("from_export"):
+            try:
+                template = load_export_rows(options["from_export"])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['from_export']}: {exc}")
+            if not template:
+                raise CommandError("The export has no income, expense or transfer rows.")
+
+        started = time.perf_counter()
+        try:
+            stats = generate(
+                users=options["users"],
+                transactions=options["transactions"],
+                seed=options["seed"],
+                start=options["start"],
+                days=options["days"],
+                prefix=options["prefix"],
+                batch_size=options["batch_size"],
+                template=template,
+                scale=options["scale"],
+                log=self.stdout.write if options["verbosity"] > 1 else None,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {stats.transactions} transaction(s) "
+                f"({stats.child_legs} remittance leg(s)) for {stats.users} user(s), "
+                f"{stats.loans} loan(s), {stats.cards} card(s), "
+                f"{stats.acquisitions} acquisition(s) in {elapsed:.1f}s."
+            )
+        )
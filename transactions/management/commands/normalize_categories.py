@@ -1,93 +1,52 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from collections import defaultdict
+
+from django.db.models import Count
+
+from transactions.maintenance import LedgerMaintenanceCommand
 from transactions.models import Transaction
 
 
-class Command(BaseCommand):
+class Command(LedgerMaintenanceCommand):
     help = (
         "Normalize transaction categories: for transactions with multiple categories, "
         "keep a single primary category and remove the rest."
     )
+    apply_flag = "--commit"
 
     def add_arguments(self, parser):
-        parser.add_argument(
-            "--commit",
-            action="store_true",
-            help="Apply changes. Omit to run in dry-run mode.",
-        )
+        super().add_arguments(parser)
         parser.add_argument(
             "--pick",
             choices=["oldest", "newest"],
             default="oldest",
             help="How to pick the primary category when multiple exist (default: oldest).",
         )
-        parser.add_argument(
-            "--limit",
-            type=int,
-            default=0,
-            help="Limit processing to N transactions (0 = all).",
-        )
-
-    def handle(self, *args, **options):
-        commit = options.get("commit")
-        pick = options.get("pick")
-        limit = options.get("limit")
 
-        qs = Transaction.all_objects.filter(categories__isnull=False).distinct()
-        # annotate count via Python to avoid DB-specific functions
-        candidates = []
-        for tx in qs.iterator():
-            cnt = tx.categories.count()
-            if cnt > 1:
-                candidates.append(tx.pk)
-                if limit and len(candidates) >= limit:
-                    break
-
-        if not candidates:
-            self.stdout.write(
-                self.style.SUCCESS("No transactions found with multiple categories.")
-            )
-            return
-
-        self.stdout.write(
-            self.style.WARNING(
-                f"Found {len(candidates)} transactions with multiple categories."
-            )
+    def get_queryset(self, options):
+        # Counted in SQL rather than one categories.count() per transaction
+        return Transaction.all_objects.annotate(n_categories=Count("categories")).filter(
+            n_categories__gt=1
         )
 
-        if not commit:
-            self.stdout.write(
-                self.style.NOTICE(
-                    "Dry-run mode (no changes will be applied). Use --commit to apply."
-                )
+    def process_chunk(self, rows, options):
+        through = Transaction.categories.through
+        links = defaultdict(list)
+        for link in (
+            through.objects.filter(transaction_id__in=[t.pk for t in rows])
+            .select_related("categorytag")
+            .order_by("categorytag__created_at", "categorytag_id")
+        ):
+            links[link.transaction_id].append(link)
+
+        for tx in rows:
+            cats = links[tx.pk]
+            if len(cats) <= 1:
+                continue
+            primary = cats[0] if options["pick"] == "oldest" else cats[-1]
+            others = [link for link in cats if link.pk != primary.pk]
+            self.delete(
+                others,
+                f"Transaction {tx.pk} (user={tx.user_id}) -> keep: "
+                f"{primary.categorytag.name} ({primary.categorytag_id}), "
+                f"remove: {[link.categorytag.name for link in others]}",
             )
-
-        processed = 0
-        changed = 0
-        with transaction.atomic():
-            for pk in candidates:
-                tx = (
-                    Transaction.all_objects.select_related("user")
-                    .prefetch_related("categories")
-                    .get(pk=pk)
-                )
-                cats = list(tx.categories.order_by("created_at").all())
-                if not cats or len(cats) <= 1:
-                    continue
-                processed += 1
-                if pick == "oldest":
-                    primary = cats[0]
-                else:
-                    primary = cats[-1]
-                others = [c for c in cats if c.pk != primary.pk]
-                self.stdout.write(
-                    f"Transaction {tx.pk} (user={tx.user_id}) -> keep: {primary.name} ({primary.pk}), remove: {[o.name for o in others]}"
-                )
-                if commit:
-                    tx.categories.set([primary])
-                    changed += 1
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Processed {processed} transactions; changed: {changed}"
-            )
-        )
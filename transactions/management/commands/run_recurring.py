@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.recurring import DEFAULT_BATCH_SIZE, run_scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Post every due occurrence of recurring transaction templates for all "
+        "users. Missed occurrences since the last run are caught up in one pass."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Post occurrences due on or before this ISO date (default: today).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Templates per insert batch (default: {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and report without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options.get("date"):
+            try:
+                as_of = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+
+        result = run_scheduler(
+            as_of,
+            batch_size=max(options["batch_size"], 1),
+            commit=not options["dry_run"],
+        )
+        for tpl, day, reason in result.skipped:
+            self.stdout.write(
+                self.style.WARNING(f"Skipped {tpl.name} on {day.isoformat()}: {reason}")
+            )
+        verb = "Would post" if options["dry_run"] else "Posted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {len(result.created)} recurring transaction(s).")
+        )
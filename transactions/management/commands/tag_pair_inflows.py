@@ -1,18 +1,20 @@
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandError
 from django.db.models import Q
 
+from transactions.maintenance import LedgerMaintenanceCommand
 from transactions.models import Transaction
 from accounts.models import Account
 from entities.models import Entity
 
 
-class Command(BaseCommand):
+class Command(LedgerMaintenanceCommand):
     help = (
         "Tag past liquid inflows to a specific account with a destination entity.\n"
         "Use this to align account/entity pair balances (e.g., BDO -> GDER Lending)."
     )
 
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument(
             "--account-id", type=int, help="Account ID to tag", default=None
         )
@@ -42,9 +44,6 @@ class Command(BaseCommand):
             action="store_true",
             help="Update even if entity_destination already set",
         )
-        parser.add_argument(
-            "--dry-run", action="store_true", help="Do not persist changes"
-        )
 
     def _pick_one(self, qs, kind, ident, name):
         if ident is not None:
@@ -75,15 +74,14 @@ class Command(BaseCommand):
             return qs.first()
         raise CommandError(f"Provide --{kind.lower()}-id or --{kind.lower()}-name")
 
-    def handle(self, *args, **opts):
-        user_id = opts.get("user_id")
-        acc = self._pick_one(
+    def prepare(self, opts):
+        self.account = acc = self._pick_one(
             Account.objects.all(),
             "Account",
             opts.get("account_id"),
             opts.get("account_name"),
         )
-        ent = self._pick_one(
+        self.entity = ent = self._pick_one(
             Entity.objects.all(),
             "Entity",
             opts.get("entity_id"),
@@ -95,12 +93,14 @@ class Command(BaseCommand):
         if ent.entity_name.lower() == "outside":
             raise CommandError("Entity must not be Outside")
 
+    def get_queryset(self, opts):
         q = Q(
-            account_destination_id=acc.id,
+            account_destination_id=self.account.id,
             parent_transfer__isnull=True,
             is_reversal=False,
         )
         q &= Q(asset_type_destination__iexact="liquid")
+        user_id = opts.get("user_id")
         if user_id:
             q &= Q(user_id=user_id)
         start = opts.get("start")
@@ -110,41 +110,16 @@ class Command(BaseCommand):
         if end:
             q &= Q(date__lte=end)
 
-        qs = (
-            Transaction.all_objects.filter(q)
-            .select_related("entity_destination")
-            .order_by("date", "id")
-        )
+        return Transaction.all_objects.filter(q).select_related("entity_destination")
 
+    def process_chunk(self, rows, opts):
+        ent = self.entity
         force = opts.get("force")
-        dry = opts.get("dry_run")
-        scanned = 0
-        updated = 0
-        for t in qs:
-            scanned += 1
+        for t in rows:
             # Only change when dest entity is empty/Account/Outside unless --force
-            dest = getattr(t, "entity_destination", None)
+            dest = t.entity_destination
             name = (getattr(dest, "entity_name", None) or "").lower()
-            if not force:
-                if (
-                    dest
-                    and name not in {"", "account", "outside"}
-                    and dest.id == ent.id
-                ):
-                    continue
-                if (
-                    dest
-                    and name not in {"", "account", "outside"}
-                    and dest.id != ent.id
-                ):
-                    # skip unrelated explicit tagging unless --force
-                    continue
-            self.stdout.write(
-                f"tx#{t.id} {t.date} '{t.description}' -> entity_destination: {name or '[None]'} => {ent.entity_name}"
-            )
-            if not dry:
-                t.entity_destination = ent
-                t.save(update_fields=["entity_destination"])
-            updated += 1
-
-        self.stdout.write(self.style.SUCCESS(f"Scanned: {scanned}; Updated: {updated}"))
+            if not force and dest and name not in {"", "account", "outside"}:
+                # already tagged, or explicit unrelated tagging
+                continue
+            self.update(t, entity_destination_id=ent.id)
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0012_normalize_tx_types_and_backfill_assets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transactiontemplate",
+            name="next_occurrence",
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="transactiontemplate",
+            name="recurrence",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "Does not repeat"),
+                    ("daily", "Daily"),
+                    ("weekly", "Weekly"),
+                    ("monthly", "Monthly"),
+                    ("yearly", "Yearly"),
+                ],
+                default="",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="transactiontemplate",
+            name="recurrence_end",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="transactiontemplate",
+            name="recurrence_interval",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="transactiontemplate",
+            name="recurrence_start",
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -17,6 +17,13 @@ from cenfin_proj.utils import (
 
 
 class TransactionTemplate(models.Model):
+    recurrence_choices = [
+        ("", "Does not repeat"),
+        ("daily", "Daily"),
+        ("weekly", "Weekly"),
+        ("monthly", "Monthly"),
+        ("yearly", "Yearly"),
+    ]
     name = models.CharField(max_length=60, unique=True)
     autopop_map = models.JSONField(default=dict, blank=True, null=True)
     user = models.ForeignKey(
@@ -25,10 +32,25 @@ class TransactionTemplate(models.Model):
         related_name="transaction_templates",
         null=True,
     )
+    # Recurrence rule; occurrences are posted by the run_recurring command
+    recurrence = models.CharField(
+        max_length=10, choices=recurrence_choices, blank=True, default=""
+    )
+    recurrence_interval = models.PositiveIntegerField(default=1)
+    recurrence_start = models.DateField(blank=True, null=True)
+    recurrence_end = models.DateField(blank=True, null=True)
+    next_occurrence = models.DateField(blank=True, null=True, db_index=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self.recurrence:
+            self.next_occurrence = None
+        elif self.next_occurrence is None and self.recurrence_start:
+            self.next_occurrence = self.recurrence_start
+        super().save(*args, **kwargs)
+
 
 class CategoryTag(models.Model):
     """User-defined tag for categorizing transactions."""
@@ -574,26 +596,16 @@ class Transaction(models.Model):
             else:
                 self.currency = Currency.objects.filter(code="PHP").first()
 
+        created = self._state.adding
         super().save(*args, **kwargs)
-        for acc_field in ["account_source", "account_destination"]:
-            acc = getattr(self, acc_field, None)
-            if acc and hasattr(acc, "credit_card"):
-                bal = abs(acc.get_current_balance())
-                card = acc.credit_card
-                card.outstanding_amount = bal
-                card.available_credit = (card.credit_limit or Decimal("0")) - bal
-                card.save(update_fields=["outstanding_amount", "available_credit"])
+        from liabilities.statements import sync_transaction
+
+        sync_transaction(self, created)
 
     def delete(self, *args, **kwargs):
         acc_ids = [self.account_source_id, self.account_destination_id]
         result = super().delete(*args, **kwargs)
-        for acc_id in acc_ids:
-            if acc_id:
-                acc = Account.objects.filter(pk=acc_id).first()
-                if acc and hasattr(acc, "credit_card"):
-                    bal = abs(acc.get_current_balance())
-                    card = acc.credit_card
-                    card.outstanding_amount = bal
-                    card.available_credit = (card.credit_limit or Decimal("0")) - bal
-                    card.save(update_fields=["outstanding_amount", "available_credit"])
+        from liabilities.statements import sync_accounts
+
+        sync_accounts(acc_ids)
         return result
@@ -0,0 +1,440 @@
+"""Recurring transactions generated from :class:`TransactionTemplate` rules.
+
+Templates with a ``recurrence`` carry a ``next_occurrence`` date. The
+scheduler collects every occurrence due up to a given day, validates them in
+date order against in-memory running balances (pocket cover, credit limits,
+currency consistency), allocates ``seq_account`` from one grouped query and
+writes the rows with ``bulk_create``. Derived balances (credit card
+statements) are refreshed once per batch rather than once per row, so
+catching up after downtime is a single pass.
+
+A template stops at its first occurrence that fails validation; its
+``next_occurrence`` stays on that date so the next run retries it.
+"""
+
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+from typing import Iterable, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_tx
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.models import Account
+from entities.models import Entity
+
+from .models import Transaction, TransactionTemplate
+from .versions import bump_ledger_version
+
+DEFAULT_BATCH_SIZE = 500
+CENT = Decimal("0.01")
+
+
+@dataclass
+class SchedulerResult:
+    created: list = field(default_factory=list)
+    # [(template, occurrence date, reason)]
+    skipped: list = field(default_factory=list)
+
+
+def next_date(template: TransactionTemplate, current: date) -> date:
+    """Return the occurrence following ``current`` under ``template``'s rule.
+
+    Monthly and yearly steps keep the day of ``recurrence_start`` (clamped to
+    the month's length) so a rule starting on the 31st does not drift.
+    """
+    step = max(template.recurrence_interval or 1, 1)
+    if template.recurrence == "daily":
+        return current + timedelta(days=step)
+    if template.recurrence == "weekly":
+        return current + timedelta(weeks=step)
+    months = step * (12 if template.recurrence == "yearly" else 1)
+    y, m = divmod(current.month - 1 + months, 12)
+    year, month = current.year + y, m + 1
+    anchor = (template.recurrence_start or current).day
+    return date(year, month, min(anchor, calendar.monthrange(year, month)[1]))
+
+
+def occurrences(template: TransactionTemplate, start: date, until: date) -> list:
+    """Return ``template``'s occurrence dates from ``start`` through ``until``."""
+    out = []
+    cur = start
+    end = min(until, template.recurrence_end) if template.recurrence_end else until
+    while cur and cur <= end:
+        out.append(cur)
+        cur = next_date(template, cur)
+    return out
+
+
+def due_templates(as_of: date):
+    """Templates with at least one occurrence due on or before ``as_of``."""
+    return (
+        TransactionTemplate.objects.exclude(recurrence="")
+        .filter(
+            user__isnull=False,
+            next_occurrence__isnull=False,
+            next_occurrence__lte=as_of,
+        )
+        .order_by("user_id", "pk")
+    )
+
+
+def build_occurrence(template: TransactionTemplate, day: date) -> Transaction:
+    """Return an unsaved transaction for ``template`` dated ``day``.
+
+    Raises ``ValidationError`` when the template lacks an amount or type.
+    """
+    data = template.autopop_map or {}
+    try:
+        amount = Decimal(str(data.get("amount")))
+    except (InvalidOperation, TypeError):
+        raise ValidationError({"amount": "Template has no amount."})
+    tx = Transaction(
+        user_id=template.user_id,
+        template=template,
+        date=day,
+        description=data.get("description") or template.name,
+        transaction_type=data.get("transaction_type"),
+        amount=amount,
+        remarks=data.get("remarks") or None,
+        account_source_id=data.get("account_source"),
+        account_destination_id=data.get("account_destination"),
+        entity_source_id=data.get("entity_source"),
+        entity_destination_id=data.get("entity_destination"),
+    )
+    tx._apply_defaults()
+    return tx
+
+
+def _is_outside_account(acc) -> bool:
+    return acc is not None and (
+        (acc.account_type or "").strip().lower() == "outside"
+        or (acc.account_name or "").strip().lower() == "outside"
+    )
+
+
+class _Ledger:
+    """In-memory running balances for one batch of planned rows."""
+
+    def __init__(self, accounts: dict, entities: dict, pockets: dict, seqs: dict):
+        self.accounts = accounts
+        self.entities = entities
+        self.pockets = pockets
+        self.seqs = seqs
+        self.cards = {
+            acc.pk: acc.credit_card
+            for acc in accounts.values()
+            if getattr(acc, "credit_card", None) is not None
+        }
+
+    def _pocket_leg(self, tx, side):
+        acc = self.accounts.get(getattr(tx, f"account_{side}_id"))
+        ent = self.entities.get(getattr(tx, f"entity_{side}_id"))
+        asset = (getattr(tx, f"asset_type_{side}") or "").lower()
+        if acc is None or ent is None or asset != "liquid":
+            return None
+        if tx.transaction_type == "transfer" and _is_outside_account(acc):
+            return None
+        return (acc.pk, ent.pk)
+
+    def check(self, tx) -> Optional[str]:
+        """Return why ``tx`` cannot post, or ``None`` when it fits."""
+        src = self.accounts.get(tx.account_source_id)
+        dst = self.accounts.get(tx.account_destination_id)
+        if (
+            tx.transaction_type != "transfer"
+            and src is not None
+            and dst is not None
+            and src.currency_id
+            and dst.currency_id
+            and src.currency_id != dst.currency_id
+        ):
+            return "Source and destination accounts must share the same currency."
+        dest_card = self.cards.get(tx.account_destination_id)
+        if (
+            tx.transaction_type == "cc_payment"
+            and dest_card is not None
+            and tx.amount > abs(dest_card.outstanding_amount)
+        ):
+            return "Payment amount cannot exceed current balance"
+        card = self.cards.get(tx.account_source_id)
+        if card is not None:
+            if card.outstanding_amount + tx.amount > (card.credit_limit or 0):
+                return "Amount exceeds credit limit"
+            return None
+        ent = self.entities.get(tx.entity_source_id)
+        pocket = self._pocket_leg(tx, "source")
+        if (
+            pocket is not None
+            and not _is_outside_account(src)
+            and (ent.entity_type or "").lower() != "outside"
+            and tx.transaction_type != "cc_payment"
+        ):
+            have = self.pockets.get(pocket, Decimal("0")).quantize(CENT)
+            if have < tx.amount.quantize(CENT):
+                return f"Insufficient funds in {ent} / {src} pocket."
+        return None
+
+    def apply(self, tx) -> None:
+        """Post ``tx`` to the running balances and assign its ``seq_account``."""
+        pocket = self._pocket_leg(tx, "source")
+        if pocket is not None:
+            self.pockets[pocket] = self.pockets.get(pocket, Decimal("0")) - tx.amount
+        pocket = self._pocket_leg(tx, "destination")
+        if pocket is not None:
+            self.pockets[pocket] = self.pockets.get(pocket, Decimal("0")) + tx.amount
+        if tx.account_source_id in self.cards:
+            self.cards[tx.account_source_id].outstanding_amount += tx.amount
+        if tx.account_destination_id in self.cards:
+            self.cards[tx.account_destination_id].outstanding_amount -= tx.amount
+
+        ids = {tx.account_source_id, tx.account_destination_id} - {None}
+        seq = max((self.seqs.get(a, 0) for a in ids), default=0) + 1
+        tx.seq_account = seq
+        for acc_id in ids:
+            self.seqs[acc_id] = seq
+
+
+def _max_seq_by_account(account_ids) -> dict:
+    """Return ``{account_id: max seq_account}`` across both ledger sides."""
+    seqs: dict = {}
+    live = Transaction.all_objects.filter(is_deleted=False)
+    for side in ("account_source_id", "account_destination_id"):
+        rows = (
+            live.filter(**{f"{side}__in": account_ids})
+            .values(side)
+            .annotate(top=Max("seq_account"))
+            .values_list(side, "top")
+            .order_by()
+        )
+        for acc_id, top in rows:
+            seqs[acc_id] = max(seqs.get(acc_id, 0), top or 0)
+    return seqs
+
+
+def _currency_for(tx, accounts, user_currency):
+    """Mirror ``Transaction.save``'s choice of ledger currency."""
+    if tx.transaction_type == "income" and tx.account_destination_id:
+        acc = accounts.get(tx.account_destination_id)
+    else:
+        acc = accounts.get(tx.account_source_id) or accounts.get(
+            tx.account_destination_id
+        )
+    return getattr(acc, "currency_id", None) or user_currency
+
+
+def post_user_batch(user, templates, as_of: date, *, commit=True) -> SchedulerResult:
+    """Generate, validate and insert the due occurrences of ``user``'s templates."""
+    from cenfin_proj.utils import get_account_entity_balances
+
+    result = SchedulerResult()
+    planned = []
+    for tpl in templates:
+        for day in occurrences(tpl, tpl.next_occurrence, as_of):
+            try:
+                planned.append((tpl, build_occurrence(tpl, day)))
+            except ValidationError as exc:
+                result.skipped.append((tpl, day, "; ".join(exc.messages)))
+                break
+    if not planned:
+        return result
+
+    acc_ids = {
+        a
+        for _, tx in planned
+        for a in (tx.account_source_id, tx.account_destination_id)
+        if a
+    }
+    ent_ids = {
+        e
+        for _, tx in planned
+        for e in (tx.entity_source_id, tx.entity_destination_id)
+        if e
+    }
+    accounts = Account.objects.select_related("credit_card").in_bulk(acc_ids)
+    entities = Entity.objects.in_bulk(ent_ids)
+    ledger = _Ledger(
+        accounts,
+        entities,
+        dict(get_account_entity_balances(user=user)),
+        _max_seq_by_account(acc_ids),
+    )
+    user_currency = getattr(user, "base_currency_id", None)
+
+    # Walk every template's occurrences in date order; a template stops at
+    # its first failure so later occurrences never skip ahead of it.
+    planned.sort(key=lambda p: (p[1].date, p[0].pk))
+    blocked = {tpl.pk for tpl, _, _ in result.skipped}
+    last_posted: dict = {}
+    now = timezone.now()
+    for tpl, tx in planned:
+        if tpl.pk in blocked:
+            continue
+        reason = ledger.check(tx)
+        if reason:
+            blocked.add(tpl.pk)
+            result.skipped.append((tpl, tx.date, reason))
+            continue
+        ledger.apply(tx)
+        tx.posted_at = now
+        tx.currency_id = _currency_for(tx, accounts, user_currency)
+        result.created.append(tx)
+        last_posted[tpl.pk] = tx.date
+
+    if not commit:
+        return result
+
+    with db_tx.atomic():
+        Transaction.objects.bulk_create(result.created)
+        _fill_ids(result.created)
+        _link_categories(result.created)
+        changed = []
+        for tpl in templates:
+            if tpl.pk in last_posted:
+                tpl.next_occurrence = next_date(tpl, last_posted[tpl.pk])
+                changed.append(tpl)
+        TransactionTemplate.objects.bulk_update(changed, ["next_occurrence"])
+        _refresh_cards(ledger, result.created)
+        # bulk_create skips the post_save handlers that invalidate caches
+        if result.created:
+            bump_ledger_version(user.pk)
+    return result
+
+
+def _fill_ids(rows) -> None:
+    """Set the ids ``bulk_create`` leaves unset on backends without RETURNING.
+
+    A template posts at most one occurrence per date, so the batch's rows
+    are found again by template, date and the posting time ``bulk_create``
+    stamped on them.
+    """
+    if all(tx.pk is not None for tx in rows):
+        return
+    ids = {
+        (tpl_id, day): pk
+        for pk, tpl_id, day in Transaction.all_objects.filter(
+            template_id__in={tx.template_id for tx in rows},
+            posted_at__in={tx.posted_at for tx in rows},
+        ).values_list("pk", "template_id", "date")
+    }
+    for tx in rows:
+        tx.pk = ids[(tx.template_id, tx.date)]
+
+
+def _link_categories(rows) -> None:
+    through = Transaction.categories.through
+    links = [
+        through(transaction_id=tx.pk, categorytag_id=tx.template.autopop_map["category"])
+        for tx in rows
+        if (tx.template.autopop_map or {}).get("category")
+    ]
+    if links:
+        through.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def _refresh_cards(ledger: _Ledger, rows) -> None:
+    """Rebuild statements once for every card the batch touched."""
+    from liabilities.statements import refresh_card
+
+    touched = {
+        a
+        for tx in rows
+        for a in (tx.account_source_id, tx.account_destination_id)
+        if a in ledger.cards
+    }
+    for acc_id in touched:
+        refresh_card(ledger.cards[acc_id])
+
+
+def run_scheduler(
+    as_of: Optional[date] = None,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    commit: bool = True,
+) -> SchedulerResult:
+    """Post every recurring occurrence due on or before ``as_of`` for all users.
+
+    Templates are processed per user in chunks of ``batch_size``.
+    """
+    as_of = as_of or timezone.localdate()
+    total = SchedulerResult()
+    templates = due_templates(as_of).select_related("user")
+    for _, user_templates in groupby(templates.iterator(), key=lambda t: t.user_id):
+        chunk: list = []
+        for tpl in user_templates:
+            chunk.append(tpl)
+            if len(chunk) >= batch_size:
+                _merge(total, post_user_batch(chunk[0].user, chunk, as_of, commit=commit))
+                chunk = []
+        if chunk:
+            _merge(total, post_user_batch(chunk[0].user, chunk, as_of, commit=commit))
+    return total
+
+
+def _merge(total: SchedulerResult, part: SchedulerResult) -> None:
+    total.created.extend(part.created)
+    total.skipped.extend(part.skipped)
+
+
+def template_events(user, start: date, end: date) -> Iterable:
+    """Forecast events for ``user``'s recurring templates between two dates.
+
+    Each liquid side of an occurrence becomes one event (outflow on the
+    source, inflow on the destination) so transfers between two liquid
+    accounts net to zero in the total.
+    """
+    from .forecast import NON_LIQUID_ACCOUNT_TYPES, ForecastEvent
+
+    templates = list(
+        TransactionTemplate.objects.filter(user=user, next_occurrence__isnull=False)
+        .exclude(recurrence="")
+        .exclude(recurrence_end__lt=start)
+    )
+    if not templates:
+        return []
+    acc_ids = {
+        (t.autopop_map or {}).get(k)
+        for t in templates
+        for k in ("account_source", "account_destination")
+    } - {None}
+    accounts = Account.objects.select_related("currency").in_bulk(acc_ids)
+
+    events = []
+    for tpl in templates:
+        try:
+            proto = build_occurrence(tpl, tpl.next_occurrence)
+        except ValidationError:
+            continue
+        legs = []
+        for side, sign in (("source", -1), ("destination", 1)):
+            acc = accounts.get(getattr(proto, f"account_{side}_id"))
+            if acc is None or acc.account_type in NON_LIQUID_ACCOUNT_TYPES:
+                continue
+            if (getattr(proto, f"asset_type_{side}") or "").lower() != "liquid":
+                continue
+            legs.append((acc, getattr(proto, f"entity_{side}_id"), sign * proto.amount))
+        if not legs:
+            continue
+        # Occurrences before ``start`` are overdue and counted on ``start``
+        for day in occurrences(tpl, tpl.next_occurrence, end):
+            day = max(day, start)
+            for acc, ent_id, amount in legs:
+                events.append(
+                    ForecastEvent(
+                        day,
+                        amount,
+                        getattr(acc.currency, "code", None),
+                        acc.pk,
+                        ent_id,
+                        "recurring",
+                        tpl.name,
+                    )
+                )
+    events.sort(key=lambda e: e.date)
+    return events
@@ -2,12 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Iterable, List, Optional, Sequence, Tuple
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction as db_tx
-from django.db.models import Case, DecimalField, F, Q, Sum, When
+from django.db.models import Case, DecimalField, F, Max, Q, Sum, When
 from django.utils import timezone
 
 from .models import Transaction
@@ -123,6 +123,50 @@ def _delta_for_account(tx: Transaction, account_id: int) -> Decimal:
     return delta
 
 
+def walk_balances(running: dict, rows: Iterable, legs) -> Iterator[Tuple[object, object, Decimal]]:
+    """Walk ``rows`` in order, applying each row's signed legs to ``running``.
+
+    ``running`` maps keys (account ids, entity ids, ...) to balances and is
+    updated in place; ``legs(row)`` returns ``(key, delta)`` pairs. Yields
+    ``(row, key, balance)`` after every leg so callers can stop at the first
+    overdraft or sample balances along the way.
+    """
+    for row in rows:
+        for key, delta in legs(row):
+            balance = running.get(key, Decimal("0")) + delta
+            running[key] = balance
+            yield row, key, balance
+
+
+def _account_legs(acc_id: int):
+    """Return a ``legs`` callable for :func:`walk_balances` over one account."""
+
+    def legs(tx: Transaction):
+        if tx.account_source_id != acc_id and tx.account_destination_id != acc_id:
+            return ()
+        return ((acc_id, _delta_for_account(tx, acc_id)),)
+
+    return legs
+
+
+def _first_account_overdraft(acc_id: int, opening: Decimal, rows) -> Optional[NegativeBalanceHit]:
+    """Return the first point where ``acc_id`` goes negative walking ``rows``."""
+    for tx, _, balance in walk_balances({acc_id: opening}, rows, _account_legs(acc_id)):
+        if balance < 0:
+            ent_id = (
+                getattr(tx, "entity_source_id", None)
+                if tx.account_source_id == acc_id
+                else getattr(tx, "entity_destination_id", None)
+            )
+            return NegativeBalanceHit(
+                account_id=acc_id,
+                date=getattr(tx, "date", None),
+                balance=balance,
+                entity_id=ent_id,
+            )
+    return None
+
+
 # ---------------- Entity-level optional cover helpers ----------------
 def _entity_balance_before(entity_id: int, user_id: int, start_date) -> Decimal:
     """Compute the entity's liquid balance strictly before start_date using
@@ -494,26 +538,9 @@ def validate_no_future_negative_balances(
         merged = stream + planned
         merged.sort(key=key_fn)
 
-        for tx in merged:
-            # Only consider transactions that touch this account
-            if tx.account_source_id != acc_id and tx.account_destination_id != acc_id:
-                continue
-            running += _delta_for_account(tx, acc_id)
-            if running < 0:
-                ent_id = (
-                    getattr(tx, "entity_source_id", None)
-                    if tx.account_source_id == acc_id
-                    else getattr(tx, "entity_destination_id", None)
-                )
-                hits.append(
-                    NegativeBalanceHit(
-                        account_id=acc_id,
-                        date=getattr(tx, "date", None),
-                        balance=running,
-                        entity_id=ent_id,
-                    )
-                )
-                break
+        hit = _first_account_overdraft(acc_id, running, merged)
+        if hit:
+            hits.append(hit)
 
     if hits:
         # Report the first hit (any); include account id and date in the message
@@ -703,25 +730,9 @@ def validate_delete_no_future_negative_balances(
         stream = _stream_after(
             acc_id, original.user_id, start_date, excluded_ids, for_update=for_update
         )
-        for tx in stream:
-            if tx.account_source_id != acc_id and tx.account_destination_id != acc_id:
-                continue
-            running += _delta_for_account(tx, acc_id)
-            if running < 0:
-                ent_id = (
-                    getattr(tx, "entity_source_id", None)
-                    if tx.account_source_id == acc_id
-                    else getattr(tx, "entity_destination_id", None)
-                )
-                hits.append(
-                    NegativeBalanceHit(
-                        account_id=acc_id,
-                        date=getattr(tx, "date", None),
-                        balance=running,
-                        entity_id=ent_id,
-                    )
-                )
-                break
+        hit = _first_account_overdraft(acc_id, running, stream)
+        if hit:
+            hits.append(hit)
 
     if hits:
         h = hits[0]
@@ -829,56 +840,173 @@ def validate_delete_no_future_negative_balances(
             raise err
 
 
-def reverse_and_hide(txn: Transaction, actor=None) -> None:
-    """Create reversal entries for a transaction then hide the original (and child legs).
+def _next_seqs(account_ids) -> dict:
+    """Return ``{account_id: last seq_account}`` over non-deleted rows, in two queries."""
+    last = {acc_id: 0 for acc_id in account_ids}
+    for side in ("account_source_id", "account_destination_id"):
+        rows = (
+            Transaction.all_objects.filter(is_deleted=False, **{f"{side}__in": list(last)})
+            .values(side)
+            .annotate(top=Max("seq_account"))
+        )
+        for row in rows:
+            last[row[side]] = max(last[row[side]], row["top"] or 0)
+    return last
+
+
+def _reversal_of(original: Transaction, now) -> Transaction:
+    """Build (unsaved) the hidden reversal row of ``original`` with sides swapped."""
+    has_both = bool(original.account_source_id and original.account_destination_id)
+    if has_both and original.destination_amount is not None:
+        amount = original.destination_amount
+        dest_amount = original.amount
+    else:
+        amount = original.amount
+        dest_amount = None
+    rev = Transaction(
+        user_id=original.user_id,
+        date=now.date(),
+        description=f"Reversal of {original.description}",
+        transaction_type=original.transaction_type,
+        amount=amount,
+        destination_amount=dest_amount,
+        account_source_id=original.account_destination_id,
+        account_destination_id=original.account_source_id,
+        entity_source_id=original.entity_destination_id,
+        entity_destination_id=original.entity_source_id,
+        currency_id=original.currency_id,
+        # Reversal rows are hidden by default. Use the manager helper
+        # `include_reversals()` or `all_objects` to discover them when
+        # needed (undo, audits, tests).
+        is_hidden=True,
+        is_reversal=True,
+        reversed_transaction_id=original.pk,
+        posted_at=now,
+    )
+    # bulk_create skips save(); fill what save() would
+    rev._apply_defaults()
+    return rev
 
-    Mirrors the behavior used by the UI delete flow so audit and reporting stay consistent.
+
+def reverse_and_hide_many(txns: Iterable[Transaction], actor=None) -> List[Transaction]:
+    """Reverse and hide many transactions (and their child legs) in one batch.
+
+    Set-based version of :func:`reverse_and_hide`: the originals and their
+    child transfer legs are read in two queries, the reversal rows are built
+    in memory and inserted with one ``bulk_create`` per level (parents, then
+    child legs pointing at their parent's reversal), and the originals are
+    marked reversed and hidden with single ``UPDATE`` statements. Sequence
+    numbers are assigned as consecutive saves would. Cached valuations and
+    card statements are refreshed once for the batch instead of once per row.
+
+    Reversals and already-reversed transactions are skipped. Returns the
+    created reversal rows.
     """
-    if getattr(txn, "is_reversal", False) or getattr(txn, "is_reversed", False):
-        return
+    from .versions import bump_ledger_version
+    from liabilities.statements import sync_accounts
+
+    given = {t.pk: t for t in txns if t is not None and t.pk is not None}
+    if not given:
+        return []
 
-    related = [txn] + list(Transaction.all_objects.filter(parent_transfer=txn))
-    rev_parent = None
-    for original in related:
-        if getattr(original, "is_reversal", False) or getattr(original, "is_reversed", False):
-            continue
-        has_both = bool(original.account_source_id and original.account_destination_id)
-        if has_both and original.destination_amount is not None:
-            amount = original.destination_amount
-            dest_amount = original.amount
-        else:
-            amount = original.amount
-            dest_amount = None
-
-        rev = Transaction.objects.create(
-            user=original.user,
-            date=timezone.now().date(),
-            description=f"Reversal of {original.description}",
-            transaction_type=original.transaction_type,
-            amount=amount,
-            destination_amount=dest_amount,
-            account_source=original.account_destination,
-            account_destination=original.account_source,
-            entity_source=original.entity_destination,
-            entity_destination=original.entity_source,
-            currency=original.currency,
-            parent_transfer=rev_parent if original is not txn else None,
-            is_hidden=True,
-            is_reversal=True,
-            reversed_transaction=original,
+    with db_tx.atomic():
+        roots = list(
+            Transaction.all_objects.filter(
+                pk__in=list(given), is_reversal=False, is_reversed=False
+            ).order_by("pk")
         )
-        if original is txn:
-            rev_parent = rev
-        original.is_reversed = True
-        original.reversed_at = timezone.now()
+        # A child leg passed in with its parent is reversed as the parent's leg
+        picked = {t.pk for t in roots}
+        roots = [t for t in roots if t.parent_transfer_id not in picked]
+        if not roots:
+            return []
+        root_ids = [t.pk for t in roots]
+        legs: dict = {}
+        for leg in Transaction.all_objects.filter(parent_transfer_id__in=root_ids).order_by("pk"):
+            legs.setdefault(leg.parent_transfer_id, []).append(leg)
+
+        now = timezone.now()
+        originals, parents, children = [], [], []
+        # Reversal rows in the order one-by-one creation would number them
+        ordered = []
+        reversals = {}
+        for root in roots:
+            originals.append(root)
+            reversals[root.pk] = rev = _reversal_of(root, now)
+            parents.append(rev)
+            ordered.append(rev)
+            for leg in legs.get(root.pk, []):
+                if leg.is_reversal or leg.is_reversed:
+                    continue
+                originals.append(leg)
+                rev = _reversal_of(leg, now)
+                children.append((root.pk, rev))
+                ordered.append(rev)
+
+        last = _next_seqs(
+            {a for r in ordered for a in (r.account_source_id, r.account_destination_id) if a}
+        )
+        for rev in ordered:
+            accounts = {rev.account_source_id, rev.account_destination_id} - {None}
+            seq = max((last[a] for a in accounts), default=0) + 1
+            rev.seq_account = seq
+            for acc_id in accounts:
+                last[acc_id] = seq
+
+        Transaction.all_objects.bulk_create(parents)
+        if any(rev.pk is None for rev in parents):
+            # Backends without RETURNING (MySQL) leave the new ids unset; the
+            # newest reversal of each root is the one just inserted
+            ids = dict(
+                Transaction.all_objects.filter(
+                    is_reversal=True, reversed_transaction_id__in=root_ids
+                )
+                .values("reversed_transaction_id")
+                .annotate(top=Max("pk"))
+                .values_list("reversed_transaction_id", "top")
+            )
+            for root_id, rev in reversals.items():
+                rev.pk = ids[root_id]
+        for parent_id, rev in children:
+            rev.parent_transfer_id = reversals[parent_id].pk
+        Transaction.all_objects.bulk_create([rev for _, rev in children])
+
+        marked = {
+            "is_reversed": True,
+            "reversed_at": now,
+            "ledger_status": "reversed",
+        }
         if actor is not None:
-            original.reversed_by = actor
-        original.ledger_status = "reversed"
-        original.save(
-            update_fields=["is_reversed", "reversed_at", "reversed_by", "ledger_status"]
+            marked["reversed_by"] = actor
+        Transaction.all_objects.filter(pk__in=[t.pk for t in originals]).update(**marked)
+        Transaction.all_objects.filter(
+            Q(pk__in=root_ids) | Q(parent_transfer_id__in=root_ids)
+        ).update(is_hidden=True)
+
+        # Keep the caller's instances in step with the rows
+        for obj in given.values():
+            if obj.pk in reversals:
+                for field, value in marked.items():
+                    setattr(obj, field, value)
+                obj.is_hidden = True
+
+        # Derived state, once for the whole batch
+        for user_id in {t.user_id for t in originals}:
+            bump_ledger_version(user_id)
+        sync_accounts(
+            {t.account_source_id for t in originals} | {t.account_destination_id for t in originals}
         )
+    return parents + [rev for _, rev in children]
+
+
+def reverse_and_hide(txn: Transaction, actor=None) -> None:
+    """Create reversal entries for a transaction then hide the original (and child legs).
 
-    Transaction.all_objects.filter(Q(pk=txn.pk) | Q(parent_transfer=txn)).update(is_hidden=True)
+    Mirrors the behavior used by the UI delete flow so audit and reporting stay consistent.
+    """
+    if getattr(txn, "is_reversal", False) or getattr(txn, "is_reversed", False):
+        return
+    reverse_and_hide_many([txn], actor=actor)
 
 
 def correct_transaction(original: Transaction, new_data: dict, actor=None) -> Transaction:
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Transaction
+from .models import CategoryTag, Transaction
+from .versions import bump_ledger_version
 
 
 @receiver(post_delete, sender=Transaction)
@@ -11,3 +12,17 @@ def remove_loan_when_disbursement_deleted(sender, instance, **kwargs):
         loan = getattr(instance, "loan_disbursement", None)
         if loan:
             loan.delete()
+
+
+@receiver(post_save, sender=CategoryTag)
+@receiver(post_delete, sender=CategoryTag)
+def invalidate_ledger_on_tag_change(sender, instance, **kwargs):
+    """Drop cached ledger views when a tag is renamed or deleted."""
+    bump_ledger_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Transaction.categories.through)
+def invalidate_ledger_on_tagging(sender, instance, action, **kwargs):
+    """Drop cached ledger views when transactions are tagged or untagged."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_ledger_version(instance.user_id)
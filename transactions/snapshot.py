@@ -0,0 +1,463 @@
+"""Columnar in-memory snapshot of a user's ledger.
+
+Report helpers either walk model instances with ``Decimal`` math or issue
+one grouped query per question. :func:`ledger_snapshot` instead reads a
+user's visible transactions once with ``values_list`` and keeps them as
+parallel columns: amounts as integer cents, currency, account and entity
+ids, dates as ordinals and month indexes, and small integer codes for the
+transaction and asset types; missing ids are stored as ``-1``. Rows are
+kept in ledger order (date, posting time, id), so a running balance is a
+cumulative sum over a mask.
+
+Columns are NumPy arrays (NumPy is listed in ``requirements.txt``) and
+fall back to plain lists where it is missing; the primitives below
+(:func:`group_sum`, :func:`cumsum` and the mask helpers) run vectorized on
+the former and as simple loops on the latter, so results are identical
+either way. Sums stay in integer cents per (group, currency) and each
+group is converted once with :func:`~transactions.aggregates.convert_buckets`,
+exactly as the SQL aggregates do.
+
+Snapshots are memoized per process under the user's ledger version (see
+:func:`transactions.versions.bump_ledger_version`), so any change made
+through ``save()``, the signal handlers (including tag renames, deletes
+and ``categories`` changes) or the bulk maintenance paths invalidates them.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+from .aggregates import convert_buckets
+from .models import Transaction
+
+try:
+    import numpy as np
+except ImportError:  # optional: fall back to list columns
+    np = None
+
+HAS_NUMPY = np is not None
+
+# Users whose snapshots are kept per process
+CACHE_SIZE = 16
+
+NONE = -1
+
+_FIELDS = (
+    "pk",
+    "date",
+    "amount",
+    "destination_amount",
+    "currency_id",
+    "account_destination__currency_id",
+    "account_source_id",
+    "account_destination_id",
+    "entity_source_id",
+    "entity_destination_id",
+    "transaction_type",
+    "transaction_type_source",
+    "transaction_type_destination",
+    "asset_type_source",
+    "asset_type_destination",
+    "parent_transfer_id",
+)
+
+
+COLUMNS = (
+    "pk",
+    "date",
+    "month",
+    "amount",
+    "received",
+    "in_amount",
+    "in_currency",
+    "currency",
+    "account_source",
+    "account_destination",
+    "entity_source",
+    "entity_destination",
+    "type",
+    "type_source",
+    "type_destination",
+    "asset_source",
+    "asset_destination",
+    "top_level",
+)
+
+
+# ---------------- primitives ----------------
+def _column(values, dtype="int64"):
+    if np is not None:
+        return np.asarray(values, dtype=dtype)
+    return list(values)
+
+
+def equals(column, value):
+    """Mask of rows where ``column == value``; ``value`` may be a column."""
+    if np is not None:
+        return column == value
+    if isinstance(value, list):
+        return [a == b for a, b in zip(column, value)]
+    return [v == value for v in column]
+
+
+def at_least(column, value):
+    """Mask of rows where ``column >= value``."""
+    if np is not None:
+        return column >= value
+    return [v >= value for v in column]
+
+
+def at_most(column, value):
+    """Mask of rows where ``column <= value``."""
+    if np is not None:
+        return column <= value
+    return [v <= value for v in column]
+
+
+def isin(column, values):
+    """Mask of rows whose ``column`` is in ``values``."""
+    if np is not None:
+        return np.isin(column, list(values))
+    values = set(values)
+    return [v in values for v in column]
+
+
+def all_of(*masks):
+    """Element-wise AND of ``masks``."""
+    if np is not None:
+        return np.logical_and.reduce(masks)
+    return [all(bits) for bits in zip(*masks)]
+
+
+def any_of(*masks):
+    """Element-wise OR of ``masks``."""
+    if np is not None:
+        return np.logical_or.reduce(masks)
+    return [any(bits) for bits in zip(*masks)]
+
+
+def negate(mask):
+    if np is not None:
+        return ~mask
+    return [not bit for bit in mask]
+
+
+def group_sum(keys, values, where=None) -> dict:
+    """Return ``{key tuple: sum of values}`` over the rows selected by ``where``.
+
+    ``keys`` is a sequence of equally long columns; the sums are exact
+    integers.
+    """
+    if np is not None:
+        rows = np.flatnonzero(where) if where is not None else slice(None)
+        vals = values[rows]
+        if not len(vals):
+            return {}
+        stacked = np.stack([k[rows] for k in keys], axis=1)
+        uniq, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        sums = np.zeros(len(uniq), dtype=np.int64)
+        np.add.at(sums, inverse.ravel(), vals)
+        return {tuple(int(k) for k in key): int(total) for key, total in zip(uniq, sums)}
+    out: dict = defaultdict(int)
+    for i, value in enumerate(values):
+        if where is None or where[i]:
+            out[tuple(k[i] for k in keys)] += value
+    return dict(out)
+
+
+def masked(column, mask):
+    """``column`` with the rows outside ``mask`` set to zero."""
+    if np is not None:
+        return np.where(mask, column, 0)
+    return [v if bit else 0 for v, bit in zip(column, mask)]
+
+
+def difference(left, right):
+    """Element-wise ``left - right``."""
+    if np is not None:
+        return left - right
+    return [a - b for a, b in zip(left, right)]
+
+
+def cumsum(values):
+    """Running total of ``values``."""
+    if np is not None:
+        return np.cumsum(values)
+    out, running = [], 0
+    for value in values:
+        running += value
+        out.append(running)
+    return out
+
+
+def where_true(mask):
+    """Indexes of the rows selected by ``mask``."""
+    if np is not None:
+        return np.flatnonzero(mask)
+    return [i for i, bit in enumerate(mask) if bit]
+
+
+def take(column, index):
+    if np is not None:
+        return column[index]
+    return [column[i] for i in index]
+
+
+def _cents(value) -> int:
+    if value is None:
+        return 0
+    return int((Decimal(value) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def _month_start(index: int) -> date:
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# ---------------- snapshot ----------------
+class LedgerSnapshot:
+    """Columns of one user's visible transactions, in ledger order.
+
+    ``rows`` are ``values_list`` tuples of the ledger fields, ``links``
+    ``(transaction id, tag id)`` pairs and ``tag_names`` maps tag ids to
+    names. Amount columns hold cents: ``amount`` on the source side,
+    ``in_amount`` and ``in_currency`` on the destination side as the SQL
+    aggregates read it, ``received`` as account balances read it. Type and
+    asset columns hold codes from :attr:`codes`; use :meth:`match`.
+    """
+
+    def __init__(self, rows, links=(), tag_names=None):
+        self.codes: dict = {"": 0}
+
+        def code(label):
+            return self.codes.setdefault((label or "").strip().lower(), len(self.codes))
+
+        cols = {name: [] for name in COLUMNS}
+        for (
+            pk, day, amount, dest_amount, currency_id, dest_currency_id,
+            acc_src, acc_dst, ent_src, ent_dst,
+            ttype, tt_src, tt_dst, asset_src, asset_dst, parent_id,
+        ) in rows:  # fmt: skip
+            cols["pk"].append(pk)
+            cols["date"].append(day.toordinal() if day else 0)
+            cols["month"].append(day.year * 12 + day.month - 1 if day else 0)
+            cols["amount"].append(_cents(amount))
+            # Account-side inflow, as services._delta_for_account reads it
+            cols["received"].append(_cents(dest_amount if dest_amount is not None else amount))
+            # Inflow side mirrors aggregates.inflow_amount_expr
+            if dest_amount is not None and dest_currency_id is not None:
+                cols["in_amount"].append(_cents(dest_amount))
+                cols["in_currency"].append(dest_currency_id)
+            else:
+                cols["in_amount"].append(_cents(amount))
+                cols["in_currency"].append(NONE if currency_id is None else currency_id)
+            cols["currency"].append(NONE if currency_id is None else currency_id)
+            for name, value in (
+                ("account_source", acc_src),
+                ("account_destination", acc_dst),
+                ("entity_source", ent_src),
+                ("entity_destination", ent_dst),
+            ):
+                cols[name].append(NONE if value is None else value)
+            cols["type"].append(code(ttype))
+            cols["type_source"].append(code(tt_src))
+            cols["type_destination"].append(code(tt_dst))
+            cols["asset_source"].append(code(asset_src))
+            cols["asset_destination"].append(code(asset_dst))
+            cols["top_level"].append(parent_id is None)
+
+        self.size = len(cols["pk"])
+        self.columns = {
+            name: _column(values, "bool" if name == "top_level" else "int64")
+            for name, values in cols.items()
+        }
+        row_of = {pk: i for i, pk in enumerate(cols["pk"])}
+        # Transaction/tag links as (row, tag id) columns; tags of rows not
+        # in the snapshot (hidden ones) are dropped
+        linked = [(row_of[tx_id], tag_id) for tx_id, tag_id in links if tx_id in row_of]
+        self.tag_rows = _column([row for row, _ in linked])
+        self.tag_ids = _column([tag for _, tag in linked])
+        self.tags = dict(tag_names or {})
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    # ---------------- masks ----------------
+    def match(self, column: str, *labels):
+        """Mask of rows whose coded ``column`` is one of ``labels`` (any case)."""
+        wanted = [self.codes[l.lower()] for l in labels if l.lower() in self.codes]
+        return isin(self.columns[column], wanted)
+
+    def between(self, start=None, end=None):
+        """Mask of rows dated within ``start``..``end`` (inclusive, either open)."""
+        days = self.columns["date"]
+        masks = [at_least(days, start.toordinal() if start else 0)]
+        if end is not None:
+            masks.append(at_most(days, end.toordinal()))
+        return all_of(*masks)
+
+    @property
+    def internal(self):
+        """Mask of moves where the entity or the account does not change."""
+        c = self.columns
+        return any_of(
+            all_of(
+                negate(equals(c["entity_source"], NONE)),
+                equals(c["entity_source"], c["entity_destination"]),
+            ),
+            all_of(
+                negate(equals(c["account_source"], NONE)),
+                equals(c["account_source"], c["account_destination"]),
+            ),
+        )
+
+    # ---------------- analytics ----------------
+    def _buckets(self, key, measures, where):
+        """``{((group, measure), currency): Decimal}`` for :func:`convert_buckets`."""
+        buckets: dict = {}
+        for name, (side, mask) in measures.items():
+            value, currency = (
+                ("in_amount", "in_currency") if side == "destination" else ("amount", "currency")
+            )
+            select = mask if where is None else all_of(mask, where)
+            keys = [self.columns[currency]] if key is None else [key, self.columns[currency]]
+            for group, cents in group_sum(keys, self.columns[value], select).items():
+                *head, cid = group
+                bucket = ((head[0] if head else None, name), None if cid == NONE else cid)
+                buckets[bucket] = Decimal(cents) / 100
+        return buckets
+
+    @staticmethod
+    def _collect(buckets, measures, currency) -> dict:
+        out: dict = defaultdict(lambda: {name: Decimal("0") for name in measures})
+        for (group, name), total in convert_buckets(buckets, currency).items():
+            out[group][name] += total
+        return out
+
+    def totals(self, key: Optional[str], measures: dict, currency=None, where=None) -> dict:
+        """Return ``{group: {measure: total}}``; see ``aggregates.grouped_totals``.
+
+        ``key`` is a column name (or ``None`` for one overall group) and
+        ``measures`` maps names to ``(side, mask)``.
+        """
+        column = None if key is None else self.columns[key]
+        return self._collect(self._buckets(column, measures, where), measures, currency)
+
+    def monthly_totals(self, measures: dict, currency=None, where=None) -> dict:
+        """Return ``{first day of month: {measure: total}}``."""
+        return {
+            _month_start(month): values
+            for month, values in self.totals("month", measures, currency, where).items()
+        }
+
+    def entity_totals(self, currency=None, start=None, end=None) -> dict:
+        """Income, expenses and capital in/out per entity.
+
+        Same rules and result as ``aggregates.entity_flow_totals`` with its
+        defaults: top-level rows only and internal moves skipped.
+        """
+        where = all_of(self.columns["top_level"], negate(self.internal), self.between(start, end))
+        transfer = self.match("type", "transfer")
+        dest = self._buckets(
+            self.columns["entity_destination"],
+            {
+                "income": ("destination", self.match("type_destination", "income")),
+                "capital_in": ("destination", transfer),
+            },
+            all_of(where, negate(equals(self.columns["entity_destination"], NONE))),
+        )
+        src = self._buckets(
+            self.columns["entity_source"],
+            {
+                "expenses": ("source", self.match("type_source", "expense")),
+                "capital_out": ("source", transfer),
+            },
+            all_of(where, negate(equals(self.columns["entity_source"], NONE))),
+        )
+        return self._collect(
+            {**dest, **src}, ("income", "expenses", "capital_in", "capital_out"), currency
+        )
+
+    def category_totals(self, measures: dict, currency=None, where=None) -> dict:
+        """Return ``{tag name: {measure: total}}``; a row counts once per tag."""
+        rows = self.tag_rows
+        expanded = {
+            name: (side, take(mask, rows)) for name, (side, mask) in measures.items()
+        }
+        buckets: dict = defaultdict(Decimal)
+        for name, (side, mask) in expanded.items():
+            value, currency_col = (
+                ("in_amount", "in_currency") if side == "destination" else ("amount", "currency")
+            )
+            select = mask if where is None else all_of(mask, take(where, rows))
+            sums = group_sum(
+                [self.tag_ids, take(self.columns[currency_col], rows)],
+                take(self.columns[value], rows),
+                select,
+            )
+            for (tag_id, cid), cents in sums.items():
+                key = ((self.tags[tag_id], name), None if cid == NONE else cid)
+                buckets[key] += Decimal(cents) / 100
+        return dict(self._collect(buckets, measures, currency))
+
+    def running_balance(self, account_id: int) -> list:
+        """Return ``[(date, balance)]`` after each row touching ``account_id``.
+
+        Balances are in the account's native amounts and follow
+        ``services._delta_for_account``: inflows use the destination amount
+        and income or loan disbursements never count as outflows.
+        """
+        c = self.columns
+        inflow = equals(c["account_destination"], account_id)
+        outflow = all_of(
+            equals(c["account_source"], account_id),
+            negate(self.match("type", "income", "loan_disbursement")),
+        )
+        rows = where_true(any_of(inflow, equals(c["account_source"], account_id)))
+        delta = difference(masked(c["received"], inflow), masked(c["amount"], outflow))
+        balances = cumsum(take(delta, rows))
+        return [
+            (date.fromordinal(int(c["date"][i])), Decimal(int(b)) / 100)
+            for i, b in zip(rows, balances)
+        ]
+
+
+_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def build_snapshot(user) -> LedgerSnapshot:
+    """Read ``user``'s visible transactions and tags into a new snapshot."""
+    qs = Transaction.objects.filter(user=user).order_by("date", "posted_at", "pk")
+    through = Transaction.categories.through
+    tagged = through.objects.filter(transaction__user=user)
+    return LedgerSnapshot(
+        qs.values_list(*_FIELDS),
+        tagged.values_list("transaction_id", "categorytag_id"),
+        tagged.values_list("categorytag_id", "categorytag__name").distinct(),
+    )
+
+
+def ledger_snapshot(user) -> LedgerSnapshot:
+    """Return the snapshot of ``user``'s ledger, rebuilt when its version changed."""
+    from .versions import ledger_version
+
+    version = ledger_version(user.pk)
+    with _lock:
+        hit = _cache.get(user.pk)
+        if hit and hit[0] == version:
+            _cache.move_to_end(user.pk)
+            return hit[1]
+    snapshot = build_snapshot(user)
+    with _lock:
+        _cache[user.pk] = (version, snapshot)
+        _cache.move_to_end(user.pk)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return snapshot
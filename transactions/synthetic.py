@@ -0,0 +1,706 @@
+"""Deterministic synthetic ledgers for load testing and benchmarks.
+
+:func:`generate` creates users with accounts in several currencies, fund
+entities, category tags, loans, credit cards and acquisitions, and fills
+their ledgers with transactions drawn from a seeded :class:`random.Random`.
+The same seed and options always produce the same ledger content.
+
+Rows with side effects (users, accounts, entities, tags, loans and their
+schedules, credit cards and their accounts) go through the models. The
+transactions themselves are written with ``bulk_create``:
+
+* primary keys are allocated up front so the remittance child legs of a
+  cross-currency transfer can point at their parent, and the sequence is
+  reset afterwards the way ``loaddata`` does;
+* the type, asset and ``seq_account`` fields are filled exactly as
+  :meth:`Transaction.save` would fill them;
+* statements, loan payments, acquisitions, depreciation and cached
+  valuations are brought up to date once per user at the end.
+
+Instead of random draws the ledger can replay an exported fixture
+(``manage.py dumpdata transactions.transaction``), see
+:func:`load_export_rows`. Its income, expense and transfer rows are mapped
+onto each synthetic user's accounts and repeated ``scale`` times.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from accounts.models import Account
+from accounts.utils import ensure_outside_account, ensure_remittance_account
+from currencies.models import Currency, ExchangeRate
+from entities.models import Entity
+from entities.utils import ensure_fixed_entities, ensure_remittance_entity
+
+from .models import CategoryTag, Transaction
+
+CENT = Decimal("0.01")
+
+# code -> (name, value of one unit in PHP)
+CURRENCIES = {
+    "PHP": ("Philippine Peso", Decimal("1")),
+    "USD": ("US Dollar", Decimal("56.50")),
+    "EUR": ("Euro", Decimal("61.20")),
+    "JPY": ("Japanese Yen", Decimal("0.38")),
+}
+
+# (name, account_type, currency)
+ACCOUNTS = [
+    ("Payroll", "Banks", "PHP"),
+    ("Savings", "Banks", "PHP"),
+    ("E-Wallet", "E-Wallet", "PHP"),
+    ("Cash", "Cash", "PHP"),
+    ("Dollar Savings", "Banks", "USD"),
+    ("Euro Account", "Banks", "EUR"),
+    ("Yen Wallet", "E-Wallet", "JPY"),
+]
+
+ENTITIES = [
+    ("Household", "personal fund"),
+    ("Emergency", "emergency fund"),
+    ("Side Business", "business fund"),
+    ("Brokerage", "investment fund"),
+]
+
+# CategoryTag.transaction_type -> tag names
+TAGS = {
+    "income": ["Salary", "Freelance", "Dividends", "Refunds"],
+    "expense": ["Groceries", "Utilities", "Rent", "Transport", "Dining", "Health"],
+    "transfer": ["Savings", "Allowance", "Investments"],
+    "loan_repayment": ["Loan Repayment"],
+    "cc_payment": ["Credit Payment"],
+}
+
+# Randomly drawn rows; loan repayments follow the loan schedules instead
+MIX = {
+    "expense": 50,
+    "income": 14,
+    "transfer": 12,
+    "remittance": 5,
+    "cc_purchase": 14,
+    "cc_payment": 5,
+}
+
+# (category, description, cost range in PHP)
+ACQUISITIONS = [
+    ("stock_bond", "Index fund units", (5_000, 80_000)),
+    ("equipment", "Laptop", (30_000, 120_000)),
+    ("vehicle", "Motorcycle", (80_000, 250_000)),
+    ("property", "Condo unit", (1_500_000, 4_000_000)),
+]
+
+TEMPLATE_TYPES = {"income", "expense", "transfer"}
+
+
+@dataclass
+class LedgerStats:
+    users: int = 0
+    transactions: int = 0
+    child_legs: int = 0
+    loans: int = 0
+    cards: int = 0
+    acquisitions: int = 0
+
+
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(CENT)
+
+
+def load_export_rows(path) -> list:
+    """Read income, expense and transfer rows from a ``dumpdata`` export.
+
+    Returns ``[(day offset, type, description, amount, account id, entity
+    id)]`` ordered by date, with offsets counted from the earliest row. The
+    account and entity are those of the row's liquid side. Hidden child
+    legs and rows of other types are skipped: their loans and acquisitions
+    are not part of the export.
+    """
+    records = json.loads(Path(path).read_text(encoding="utf-8"))
+    rows = []
+    for rec in records:
+        if rec.get("model") != "transactions.transaction":
+            continue
+        f = rec["fields"]
+        kind = (f.get("transaction_type") or "").replace(" ", "_")
+        if kind not in TEMPLATE_TYPES or f.get("parent_transfer") or f.get("is_deleted"):
+            continue
+        # The liquid side of the row decides which synthetic account it maps to
+        side = "source" if kind == "expense" else "destination"
+        rows.append(
+            (
+                date.fromisoformat(f["date"]),
+                kind,
+                f.get("description") or "",
+                Decimal(f["amount"]),
+                f.get(f"account_{side}"),
+                f.get(f"entity_{side}"),
+            )
+        )
+    if not rows:
+        return []
+    rows.sort(key=lambda r: r[0])
+    first = rows[0][0]
+    return [((r[0] - first).days,) + r[1:] for r in rows]
+
+
+def ensure_currencies() -> dict:
+    """Create the synthetic currencies and PHP rates; return ``{code: Currency}``."""
+    out = {}
+    for code, (name, _) in CURRENCIES.items():
+        out[code], _ = Currency.objects.get_or_create(code=code, defaults={"name": name})
+    for code, (_, rate) in CURRENCIES.items():
+        if code == "PHP":
+            continue
+        for cur_from, cur_to, value in (
+            (out[code], out["PHP"], rate),
+            (out["PHP"], out[code], Decimal("1") / rate),
+        ):
+            ExchangeRate.objects.get_or_create(
+                currency_from=cur_from,
+                currency_to=cur_to,
+                defaults={"rate": value.quantize(Decimal("0.000001"))},
+            )
+    return out
+
+
+class _Writer:
+    """Buffer transactions and category links and insert them in batches."""
+
+    def __init__(self, batch_size: int, seq: dict):
+        self.batch_size = batch_size
+        self.seq = seq
+        self.next_id = (Transaction.all_objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+        self.rows: list = []
+        self.links: list = []
+        self.written = 0
+
+    def add(self, category=None, **fields) -> int:
+        tx = Transaction(id=self.next_id, ledger_status="posted", **fields)
+        self.next_id += 1
+        tx._apply_defaults()
+        tx.posted_at = datetime.combine(tx.date, time(12), tzinfo=dt_timezone.utc)
+        # Same numbering as Transaction.save: one past the highest sequence
+        # seen on either account
+        accounts = {tx.account_source_id, tx.account_destination_id} - {None}
+        tx.seq_account = max((self.seq.get(a, 0) for a in accounts), default=0) + 1
+        for acc_id in accounts:
+            self.seq[acc_id] = tx.seq_account
+        self.rows.append(tx)
+        if category is not None:
+            self.links.append(
+                Transaction.categories.through(transaction_id=tx.id, categorytag_id=category)
+            )
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+        return tx.id
+
+    def flush(self) -> None:
+        if self.rows:
+            Transaction.all_objects.bulk_create(self.rows, batch_size=self.batch_size)
+            Transaction.categories.through.objects.bulk_create(
+                self.links, batch_size=self.batch_size
+            )
+            self.written += len(self.rows)
+        self.rows, self.links = [], []
+
+    def close(self) -> None:
+        self.flush()
+        # Explicit keys leave sequence-backed databases behind; same as loaddata
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Transaction]):
+                cursor.execute(sql)
+
+
+def _existing_seq(account_ids) -> dict:
+    seq: dict = {}
+    for field in ("account_source_id", "account_destination_id"):
+        rows = (
+            Transaction.all_objects.filter(is_deleted=False, **{f"{field}__in": account_ids})
+            .values(field)
+            .annotate(top=Max("seq_account"))
+            .values_list(field, "top")
+        )
+        for acc_id, top in rows:
+            seq[acc_id] = max(seq.get(acc_id, 0), top or 0)
+    return seq
+
+
+class _UserLedger:
+    """Build one user's reference data and ledger."""
+
+    def __init__(self, rng: random.Random, username: str, currencies: dict, start: date, days: int):
+        from liabilities.models import CreditCard, Lender, Loan
+
+        self.rng = rng
+        self.start = start
+        self.end = start + timedelta(days=days - 1)
+        self.currencies = currencies
+        self.user = get_user_model().objects.create_user(
+            username=username, email=f"{username}@example.com"
+        )
+        user = self.user
+        self.outside_acc = ensure_outside_account()
+        self.outside_ent, _ = ensure_fixed_entities(user)
+        self.rem_acc = ensure_remittance_account(user)
+        self.rem_ent = ensure_remittance_entity(user)
+
+        self.accounts = [
+            Account.objects.create(
+                account_name=name, account_type=kind, currency=currencies[code], user=user
+            )
+            for name, kind, code in ACCOUNTS
+        ]
+        self.local = [a for a in self.accounts if a.currency_id == currencies["PHP"].pk]
+        self.foreign = [a for a in self.accounts if a not in self.local]
+        self.entities = [
+            Entity.objects.create(entity_name=name, entity_type=kind, user=user)
+            for name, kind in ENTITIES
+        ]
+        self.tags = {
+            kind: [
+                CategoryTag.objects.create(name=name, transaction_type=kind, user=user).pk
+                for name in names
+            ]
+            for kind, names in TAGS.items()
+        }
+        # Running balance per liquid account, in the account's currency
+        self.balance = {a.pk: Decimal("0") for a in self.accounts}
+        self.rate = {
+            currencies[code].pk: value for code, (_, value) in CURRENCIES.items()
+        }
+
+        lender, _ = Lender.objects.get_or_create(name="Synthetic Lending")
+        self.loans = []
+        for i in range(rng.randint(0, 2)):
+            loan = Loan(
+                user=user,
+                lender=lender,
+                principal_amount=_money(rng.randrange(50_000, 500_000, 1_000)),
+                interest_rate=Decimal(rng.choice(["6.50", "9.00", "12.00"])),
+                received_date=start + timedelta(days=rng.randrange(max(days // 2, 1))),
+                term_months=rng.choice([12, 24, 36]),
+                currency="PHP",
+            )
+            loan._account_destination = self.local[0]
+            loan.save()
+            self.balance[self.local[0].pk] += loan.principal_amount
+            self.loans.append(loan)
+
+        issuer, _ = Lender.objects.get_or_create(name="Synthetic Card Issuer")
+        self.cards = []
+        for i in range(rng.randint(1, 2)):
+            card = CreditCard(
+                user=user,
+                issuer=issuer,
+                card_name=f"Card {i + 1}",
+                credit_limit=_money(rng.randrange(20_000, 150_000, 5_000)),
+                interest_rate=Decimal("3.00"),
+                currency="PHP",
+                statement_day=rng.randint(1, 28),
+                payment_due_day=rng.randint(1, 28),
+            )
+            card.save()
+            self.cards.append(card)
+        self.owed = {c.account_id: Decimal("0") for c in self.cards}
+
+        self.acquisitions = []
+        self.payments = []
+
+    # ---------------- helpers ----------------
+    def _tag(self, kind):
+        return self.rng.choice(self.tags[kind])
+
+    def _amount(self, low: int, high: int, account=None) -> Decimal:
+        value = Decimal(self.rng.randrange(low * 100, high * 100)) / 100
+        if account is not None:
+            value = value / self.rate[account.currency_id]
+        return _money(value)
+
+    def _source(self, out: _Writer, day, amount: Decimal, account=None):
+        """Pick a local account holding ``amount``, topping one up if none does."""
+        if account is not None and self.balance[account.pk] >= amount:
+            return account
+        funded = [a for a in self.local if self.balance[a.pk] >= amount]
+        if funded:
+            return self.rng.choice(funded)
+        account = account or self.local[0]
+        self.income(out, day, amount=amount, account=account, description="Top-up")
+        return account
+
+    def _convert(self, amount: Decimal, src, dst) -> Decimal:
+        return _money(amount * self.rate[src.currency_id] / self.rate[dst.currency_id])
+
+    # ---------------- rows ----------------
+    def income(self, out: _Writer, day, amount=None, account=None, entity=None, description=None):
+        account = account or self.rng.choice(self.accounts)
+        amount = amount or self._amount(5_000, 60_000, account)
+        self.balance[account.pk] += amount
+        out.add(
+            category=self._tag("income"),
+            user=self.user,
+            date=day,
+            description="Income" if description is None else description,
+            transaction_type="income",
+            amount=amount,
+            currency_id=account.currency_id,
+            account_source=self.outside_acc,
+            account_destination=account,
+            entity_source=self.outside_ent,
+            entity_destination=entity or self.rng.choice(self.entities),
+        )
+
+    def expense(self, out: _Writer, day, amount=None, account=None, entity=None, description=None):
+        amount = amount or self._amount(50, 5_000)
+        account = self._source(out, day, amount, account)
+        self.balance[account.pk] -= amount
+        out.add(
+            category=self._tag("expense"),
+            user=self.user,
+            date=day,
+            description="Expense" if description is None else description,
+            transaction_type="expense",
+            amount=amount,
+            currency_id=account.currency_id,
+            account_source=account,
+            account_destination=self.outside_acc,
+            entity_source=entity or self.rng.choice(self.entities),
+            entity_destination=self.outside_ent,
+        )
+
+    def transfer(self, out: _Writer, day, amount=None, description=None):
+        amount = amount or self._amount(500, 20_000)
+        src = self._source(out, day, amount)
+        dst = self.rng.choice([a for a in self.local if a is not src])
+        self.balance[src.pk] -= amount
+        self.balance[dst.pk] += amount
+        out.add(
+            category=self._tag("transfer"),
+            user=self.user,
+            date=day,
+            description=f"Transfer to {dst.account_name}" if description is None else description,
+            transaction_type="transfer",
+            amount=amount,
+            currency_id=src.currency_id,
+            account_source=src,
+            account_destination=dst,
+            entity_source=self.rng.choice(self.entities),
+            entity_destination=self.rng.choice(self.entities),
+        )
+
+    def remittance(self, out: _Writer, day) -> int:
+        """Cross-currency transfer with its two hidden legs via Remittance."""
+        src, dst = self.rng.choice(self.local), self.rng.choice(self.foreign)
+        if self.rng.random() < 0.5:
+            src, dst = dst, src
+        amount = min(self._amount(1_000, 30_000, src), self.balance[src.pk])
+        if amount <= 0:
+            self.income(out, day, account=src)
+            return 0
+        dest_amount = self._convert(amount, src, dst)
+        self.balance[src.pk] -= amount
+        self.balance[dst.pk] += dest_amount
+        ent_src, ent_dst = self.rng.choice(self.entities), self.rng.choice(self.entities)
+        common = dict(
+            user=self.user,
+            date=day,
+            description=f"Remittance to {dst.account_name}",
+            transaction_type="transfer",
+        )
+        parent = out.add(
+            category=self._tag("transfer"),
+            amount=amount,
+            destination_amount=dest_amount,
+            currency_id=src.currency_id,
+            account_source=src,
+            account_destination=dst,
+            entity_source=ent_src,
+            entity_destination=ent_dst,
+            **common,
+        )
+        out.add(
+            amount=amount,
+            currency_id=src.currency_id,
+            account_source=src,
+            account_destination=self.rem_acc,
+            entity_source=ent_src,
+            entity_destination=self.rem_ent,
+            parent_transfer_id=parent,
+            is_hidden=True,
+            **common,
+        )
+        out.add(
+            amount=dest_amount,
+            destination_amount=dest_amount,
+            currency_id=dst.currency_id,
+            account_source=self.rem_acc,
+            account_destination=dst,
+            entity_source=self.rem_ent,
+            entity_destination=ent_dst,
+            parent_transfer_id=parent,
+            is_hidden=True,
+            **common,
+        )
+        return 2
+
+    def cc_purchase(self, out: _Writer, day):
+        card = self.rng.choice(self.cards)
+        amount = self._amount(100, 8_000)
+        if self.owed[card.account_id] + amount > card.credit_limit:
+            return self.cc_payment(out, day, card)
+        self.owed[card.account_id] += amount
+        out.add(
+            category=self._tag("expense"),
+            user=self.user,
+            date=day,
+            description=f"{card.card_name} purchase",
+            transaction_type="cc_purchase",
+            amount=amount,
+            currency_id=card.account.currency_id,
+            account_source=card.account,
+            account_destination=self.outside_acc,
+            entity_source=self.rng.choice(self.entities),
+            entity_destination=self.outside_ent,
+        )
+
+    def cc_payment(self, out: _Writer, day, card=None):
+        card = card or self.rng.choice(self.cards)
+        amount = self.owed[card.account_id]
+        if amount <= 0:
+            # Nothing owed yet: charge the card instead
+            return self.cc_purchase(out, day)
+        src = self._source(out, day, amount)
+        self.owed[card.account_id] = Decimal("0")
+        self.balance[src.pk] -= amount
+        entity = self.rng.choice(self.entities)
+        out.add(
+            category=self._tag("cc_payment"),
+            user=self.user,
+            date=day,
+            description=f"{card.card_name} payment",
+            transaction_type="cc_payment",
+            amount=amount,
+            currency_id=src.currency_id,
+            account_source=src,
+            account_destination=card.account,
+            entity_source=entity,
+            entity_destination=entity,
+        )
+
+    def loan_repayment(self, out: _Writer, day, payment):
+        entity = self.rng.choice(self.entities)
+        src = self._source(out, day, payment.amount)
+        self.balance[src.pk] -= payment.amount
+        tx_id = out.add(
+            category=self._tag("loan_repayment"),
+            user=self.user,
+            date=day,
+            description=f"Loan repayment {payment.due_date:%Y-%m}",
+            transaction_type="loan_repayment",
+            amount=payment.amount,
+            currency_id=src.currency_id,
+            account_source=src,
+            account_destination=self.outside_acc,
+            entity_source=entity,
+            entity_destination=self.outside_ent,
+        )
+        payment.is_paid = True
+        payment.transaction_id = tx_id
+        self.payments.append(payment)
+
+    def buy_acquisition(self, out: _Writer, day, spec):
+        category, name, (low, high) = spec
+        amount = self._amount(low, high)
+        src = self._source(out, day, amount)
+        self.balance[src.pk] -= amount
+        entity = self.rng.choice(self.entities)
+        tx_id = out.add(
+            category=self._tag("transfer"),
+            user=self.user,
+            date=day,
+            description=f"Buy {name}",
+            transaction_type="buy acquisition",
+            amount=amount,
+            currency_id=src.currency_id,
+            account_source=src,
+            account_destination=self.outside_acc,
+            entity_source=entity,
+            entity_destination=entity,
+        )
+        quantity = Decimal(self.rng.randint(10, 500)) if category == "stock_bond" else Decimal("0")
+        self.acquisitions.append((name, category, tx_id, quantity, amount))
+
+    # ---------------- ledgers ----------------
+    def _scheduled(self) -> list:
+        from liabilities.models import LoanPayment
+
+        events = [
+            (p.due_date, "loan_repayment", p)
+            for p in LoanPayment.objects.filter(
+                loan__in=self.loans, due_date__lte=self.end
+            ).order_by("due_date", "pk")
+        ]
+        for spec in self.rng.sample(ACQUISITIONS, self.rng.randint(0, 3)):
+            events.append((self.start + timedelta(days=self.rng.randrange(self.days)), "buy", spec))
+        return events
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    def random_events(self, count: int) -> list:
+        kinds = self.rng.choices(list(MIX), weights=list(MIX.values()), k=count)
+        days = sorted(self.rng.randrange(self.days) for _ in range(count))
+        return [(self.start + timedelta(days=d), k, None) for d, k in zip(days, kinds)]
+
+    def template_events(self, rows: list, scale: int) -> list:
+        """Repeat exported rows ``scale`` times, one span after another."""
+        span = rows[-1][0] + 1
+        account_ids = sorted({r[4] for r in rows} - {None})
+        entity_ids = sorted({r[5] for r in rows} - {None})
+        accounts = {old: self.local[i % len(self.local)] for i, old in enumerate(account_ids)}
+        entities = {old: self.entities[i % len(self.entities)] for i, old in enumerate(entity_ids)}
+        events = []
+        for copy in range(scale):
+            for offset, kind, desc, amount, acc, ent in rows:
+                jitter = Decimal(self.rng.randint(90, 110)) / 100
+                payload = (kind, desc, _money(amount * jitter), accounts.get(acc), entities.get(ent))
+                events.append((self.start + timedelta(days=copy * span + offset), "template", payload))
+        if events:
+            self.end = max(self.end, events[-1][0])
+        return events
+
+    def write(self, out: _Writer, events: list) -> int:
+        """Write the opening balances and ``events`` in date order."""
+        children = 0
+        for account in self.accounts:
+            self.income(
+                out,
+                self.start,
+                amount=self._amount(20_000, 200_000, account),
+                account=account,
+                description="Opening balance",
+            )
+        events = sorted(events + self._scheduled(), key=lambda e: e[0])
+        for day, kind, payload in events:
+            if kind == "template":
+                tkind, desc, amount, account, entity = payload
+                if tkind == "income":
+                    self.income(out, day, amount, account, entity, desc)
+                elif tkind == "expense":
+                    self.expense(out, day, amount, account, entity, desc)
+                else:
+                    self.transfer(out, day, amount, desc)
+            elif kind == "loan_repayment":
+                self.loan_repayment(out, day, payload)
+            elif kind == "buy":
+                self.buy_acquisition(out, day, payload)
+            elif kind == "remittance":
+                children += self.remittance(out, day)
+            else:
+                getattr(self, kind)(out, day)
+        return children
+
+    def finish(self) -> None:
+        """Bring records derived from the ledger up to date."""
+        from acquisitions.lots import ensure_lots
+        from acquisitions.models import Acquisition
+        from .versions import bump_ledger_version
+        from liabilities.models import Loan, LoanPayment
+        from liabilities.statements import refresh_card
+
+        LoanPayment.objects.bulk_update(self.payments, ["is_paid", "transaction"])
+        for loan in self.loans:
+            paid = [p for p in self.payments if p.loan_id == loan.pk]
+            principal = sum((p.principal_component for p in paid), Decimal("0"))
+            interest = sum((p.interest_component for p in paid), Decimal("0"))
+            Loan.objects.filter(pk=loan.pk).update(
+                outstanding_balance=max(loan.principal_amount - principal, Decimal("0")),
+                interest_paid=interest,
+            )
+        for card in self.cards:
+            refresh_card(card)
+        # Saved one by one so depreciation follows through the signals, each
+        # with an opening lot linked to its purchase
+        for name, category, tx_id, quantity, amount in self.acquisitions:
+            acq = Acquisition.objects.create(
+                name=name,
+                category=category,
+                purchase_tx_id=tx_id,
+                quantity=quantity,
+                avg_unit_cost=_money(amount / quantity) if quantity else Decimal("0"),
+                status="active",
+                user=self.user,
+            )
+            ensure_lots(acq)
+        bump_ledger_version(self.user.pk)
+
+
+def generate(
+    *,
+    users: int = 1,
+    transactions: int = 1000,
+    seed: int = 0,
+    start: date = date(2023, 1, 1),
+    days: int = 1095,
+    prefix: str = "synth",
+    batch_size: int = 5000,
+    template: Optional[list] = None,
+    scale: int = 1,
+    log: Optional[Callable[[str], None]] = None,
+) -> LedgerStats:
+    """Create ``users`` synthetic users and their ledgers.
+
+    ``transactions`` visible rows are spread evenly over the users and over
+    ``days`` days from ``start`` (on top of opening balances, scheduled loan
+    repayments and acquisition purchases; remittance child legs are counted
+    separately). With ``template`` rows from :func:`load_export_rows` the
+    template is replayed ``scale`` times per user instead.
+
+    Usernames are ``{prefix}-{seed}-{n}``; existing ones raise ``ValueError``.
+    """
+    names = [f"{prefix}-{seed}-{n}" for n in range(1, users + 1)]
+    if get_user_model().objects.filter(username__in=names).exists():
+        raise ValueError(f"Users with prefix {prefix!r} and seed {seed} already exist.")
+
+    rng = random.Random(seed)
+    currencies = ensure_currencies()
+    stats = LedgerStats()
+    per_user, extra = divmod(transactions, users) if users else (0, 0)
+    for n, username in enumerate(names):
+        with transaction.atomic():
+            ledger = _UserLedger(rng, username, currencies, start, days)
+            if template:
+                events = ledger.template_events(template, scale)
+            else:
+                events = ledger.random_events(per_user + (1 if n < extra else 0))
+            accounts = [a.pk for a in ledger.accounts] + [
+                ledger.outside_acc.pk,
+                ledger.rem_acc.pk,
+            ]
+            out = _Writer(batch_size, _existing_seq(accounts))
+            children = ledger.write(out, events)
+            out.close()
+            ledger.finish()
+
+        stats.users += 1
+        stats.transactions += out.written
+        stats.child_legs += children
+        stats.loans += len(ledger.loans)
+        stats.cards += len(ledger.cards)
+        stats.acquisitions += len(ledger.acquisitions)
+        if log:
+            log(f"{username}: {out.written} transaction(s)")
+    return stats
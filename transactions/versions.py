@@ -0,0 +1,42 @@
+"""Per-user ledger versions for cached ledger views.
+
+Valuations (:mod:`acquisitions.valuation`) and ledger snapshots
+(:mod:`transactions.snapshot`) are cached under the owner's ledger version,
+which every write path bumps, so a cached result is never served after the
+ledger changed.
+
+The versions are stored in Django's default cache. That guarantee therefore
+holds across worker processes only when ``CACHES["default"]`` is a backend
+they all share (memcached, Redis or the database cache); with the default
+per-process local-memory cache another worker keeps serving its own copy
+until the entry's timeout expires.
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.core.cache import cache
+
+_LEDGER_KEY = "ledger-version:{}"
+
+
+def cache_version(key: str) -> int:
+    """Current value of the version stored under ``key``, created on first use."""
+    return cache.get_or_set(key, time.time_ns(), None)
+
+
+def bump_cache_version(key: str) -> None:
+    """Replace the version stored under ``key``."""
+    cache.set(key, time.time_ns(), None)
+
+
+def bump_ledger_version(user_id) -> None:
+    """Invalidate cached ledger views of ``user_id``."""
+    if user_id is not None:
+        bump_cache_version(_LEDGER_KEY.format(user_id))
+
+
+def ledger_version(user_id) -> int:
+    """Current ledger version of ``user_id``; changes on every bump."""
+    return cache_version(_LEDGER_KEY.format(user_id))
@@ -22,6 +22,8 @@ from cenfin_proj.utils import (
 from utils.currency import get_active_currency, convert_amount, convert_to_base
 
 from .models import Transaction, TransactionTemplate, CategoryTag
+from .aggregates import category_totals
+from .services import reverse_and_hide_many
 from .forms import TransactionForm, TemplateForm
 from accounts.forms import AccountForm
 from accounts.utils import ensure_remittance_account
@@ -50,58 +52,7 @@ def _reverse_and_hide(txn, actor=None):
     """
     if getattr(txn, "is_reversal", False) or getattr(txn, "is_reversed", False):
         return
-
-    related = [txn] + list(Transaction.all_objects.filter(parent_transfer=txn))
-    rev_parent = None
-    for original in related:
-        if getattr(original, "is_reversal", False) or getattr(
-            original, "is_reversed", False
-        ):
-            continue
-        has_both = bool(original.account_source_id and original.account_destination_id)
-        if has_both and original.destination_amount is not None:
-            amount = original.destination_amount
-            dest_amount = original.amount
-        else:
-            amount = original.amount
-            dest_amount = None
-
-        rev = Transaction.objects.create(
-            user=original.user,
-            date=timezone.now().date(),
-            description=f"Reversal of {original.description}",
-            transaction_type=original.transaction_type,
-            amount=amount,
-            destination_amount=dest_amount,
-            account_source=original.account_destination,
-            account_destination=original.account_source,
-            entity_source=original.entity_destination,
-            entity_destination=original.entity_source,
-            currency=original.currency,
-            parent_transfer=rev_parent if original is not txn else None,
-            # Reversal rows are hidden by default. Use the manager helper
-            # `include_reversals()` or `all_objects` to discover them when
-            # needed (undo, audits, tests).
-            is_hidden=True,
-            is_reversal=True,
-            reversed_transaction=original,
-        )
-        if original is txn:
-            rev_parent = rev
-        # mark original as reversed (use all_objects to bypass default manager filter)
-        updates = {
-            "is_reversed": True,
-            "reversed_at": timezone.now(),
-            "ledger_status": "reversed",
-        }
-        if actor is not None:
-            updates["reversed_by"] = actor
-        # Perform an update query to avoid base manager filtering out hidden rows
-        Transaction.all_objects.filter(pk=original.pk).update(**updates)
-
-    Transaction.all_objects.filter(Q(pk=txn.pk) | Q(parent_transfer=txn)).update(
-        is_hidden=True
-    )
+    reverse_and_hide_many([txn], actor=actor)
 
 
 @login_required
@@ -167,7 +118,15 @@ class TransactionListView(ListView):
             super()
             .get_queryset()
             .filter(user=self.request.user)
-            .select_related("currency", "account_destination__currency")
+            .select_related(
+                "currency",
+                "account_source",
+                "account_destination__currency",
+                "entity_source",
+                "entity_destination",
+                "acquisition_purchase",
+                "acquisition_sale",
+            )
         )
         # Do not display reversal entries in the list
         qs = qs.filter(is_reversal=False).exclude(
@@ -617,12 +576,12 @@ class TransactionListView(ListView):
                 user=request.user, id__in=selected_ids, is_reversal=False
             )
             warned = False
-            deleted = 0
             blocked = 0
             # Validate deletions won't cause overdrafts; delete safe ones only
             from .services import validate_delete_no_future_negative_balances
             # Build a set of IDs to exclude as we plan deletions within this batch
             excluded_batch = set()
+            safe = []
             for txn in qs.order_by("date", "id"):
                 try:
                     validate_delete_no_future_negative_balances(
@@ -631,10 +590,12 @@ class TransactionListView(ListView):
                 except Exception:
                     blocked += 1
                     continue
-                # Safe to delete: add to exclusion set and perform reversal+hide
+                # Safe to delete: add to exclusion set; reversed below as one batch
                 excluded_batch.add(txn.id)
-                _reverse_and_hide(txn, actor=request.user)
-                deleted += 1
+                safe.append(txn)
+            reverse_and_hide_many(safe, actor=request.user)
+            deleted = len(safe)
+            for txn in safe:
                 if txn.transaction_type == "loan_disbursement":
                     loan = getattr(txn, "loan_disbursement", None)
                     if loan:
@@ -675,10 +636,10 @@ def bulk_action(request):
                 user=request.user, pk__in=selected_ids, is_reversal=False
             )
             warned = False
-            deleted = 0
             blocked = 0
             from .services import validate_delete_no_future_negative_balances
             excluded_batch = set()
+            safe = []
             for txn in qs.order_by("date", "id"):
                 try:
                     validate_delete_no_future_negative_balances(
@@ -688,8 +649,10 @@ def bulk_action(request):
                     blocked += 1
                     continue
                 excluded_batch.add(txn.id)
-                _reverse_and_hide(txn, actor=request.user)
-                deleted += 1
+                safe.append(txn)
+            reverse_and_hide_many(safe, actor=request.user)
+            deleted = len(safe)
+            for txn in safe:
                 if txn.transaction_type == "loan_disbursement":
                     loan = getattr(txn, "loan_disbursement", None)
                     if loan:
@@ -847,29 +810,13 @@ class TransactionCreateView(CreateView):
             self.object = visible_tx
             messages.success(self.request, "Transaction saved successfully!")
             if loan:
-                paid = Decimal(str(visible_tx.amount or 0))
-                principal_applied = min(paid, loan.outstanding_balance)
-                excess = paid - principal_applied
-                loan.outstanding_balance -= principal_applied
-                if excess > 0:
-                    loan.interest_paid = (loan.interest_paid or Decimal("0")) + excess
-                    loan.save(update_fields=["outstanding_balance", "interest_paid"])
-                else:
-                    loan.save(update_fields=["outstanding_balance"])
+                loan.apply_payment(visible_tx.amount)
             return HttpResponseRedirect(self.get_success_url())
         else:
             self.object = form.save()
             messages.success(self.request, "Transaction saved successfully!")
             if loan:
-                paid = Decimal(str(visible_tx.amount or 0))
-                principal_applied = min(paid, loan.outstanding_balance)
-                excess = paid - principal_applied
-                loan.outstanding_balance -= principal_applied
-                if excess > 0:
-                    loan.interest_paid = (loan.interest_paid or Decimal("0")) + excess
-                    loan.save(update_fields=["outstanding_balance", "interest_paid"])
-                else:
-                    loan.save(update_fields=["outstanding_balance"])
+                loan.apply_payment(visible_tx.amount)
             return HttpResponseRedirect(self.get_success_url())
 
     def form_invalid(self, form):
@@ -2022,16 +1969,12 @@ def entity_category_summary(request, entity_id):
     qs = Transaction.objects.filter(
         user=request.user,
         parent_transfer__isnull=True,
-        categories__isnull=False,
     ).filter(Q(entity_source_id=entity_id) | Q(entity_destination_id=entity_id))
-    amount_expr = Case(
-        When(destination_amount__isnull=False, then=F("destination_amount")),
-        default=F("amount"),
-        output_field=DecimalField(),
-    )
-    data = (
-        qs.values("categories__name")
-        .annotate(total=Sum(amount_expr))
-        .order_by("categories__name")
+    grouped = category_totals(
+        qs, {"total": ("destination", None)}, currency=get_active_currency(request)
     )
-    return JsonResponse(list(data), safe=False)
+    data = [
+        {"categories__name": name, "total": grouped[name]["total"]}
+        for name in sorted(grouped)
+    ]
+    return JsonResponse(data, safe=False)
@@ -27,13 +27,28 @@ def get_currency_symbol(code: str) -> str:
     return CURRENCY_SYMBOLS.get(code.upper(), code)
 
 
+def _request_cache(request) -> dict:
+    """Return a per-request dict for memoising currency lookups."""
+
+    cache = getattr(request, "_currency_cache", None)
+    if cache is None:
+        cache = {}
+        try:
+            request._currency_cache = cache
+        except AttributeError:
+            pass
+    return cache
+
+
 def get_active_currency(request) -> Currency | None:
     """Return the display currency for the current request.
 
     The selected currency is stored in ``request.session['display_currency']``.
     If missing, the session is initialised to ``'PHP'`` as a sensible default.
     ``Currency`` objects are looked up lazily so any code can safely call this
-    helper even before the session value has been set explicitly.
+    helper even before the session value has been set explicitly. The lookup
+    is cached on the request, so repeated calls while rendering a page cost
+    a single query.
     """
 
     code = getattr(request, "display_currency", None)
@@ -43,33 +58,48 @@ def get_active_currency(request) -> Currency | None:
             code = "PHP"
             request.session["display_currency"] = code
         request.display_currency = code
-    return Currency.objects.filter(code=code).first()
+    cache = _request_cache(request)
+    key = ("active", code)
+    if key not in cache:
+        cache[key] = Currency.objects.filter(code=code).first()
+    return cache[key]
 
 
-def convert_amount(
-    amount: Decimal,
-    orig_currency: Union[str, Currency],
-    target_currency: Union[str, Currency],
-) -> Decimal:
-    """Convert ``amount`` from ``orig_currency`` to ``target_currency``.
-
-    If a conversion rate is missing, an attempt will be made to fetch it from
-    the Frankfurter API and store it in the ``ExchangeRate`` table.
-    """
+def _convert_for_request(request, amount, orig_currency, target: Currency):
+    """Convert ``amount`` like :func:`convert_amount`, caching the rate on
+    ``request`` so each currency pair is resolved once per request."""
 
     if amount is None:
         return amount
+    cache = _request_cache(request)
+    key = ("rate", getattr(orig_currency, "pk", orig_currency), target.pk)
+    if key not in cache:
+        cache[key] = _resolve_rate(orig_currency, target)
+    rate = cache[key]
+    return amount if rate is None else amount * rate
+
+
+def _resolve_rate(
+    orig_currency: Union[str, Currency], target_currency: Union[str, Currency]
+) -> Decimal | None:
+    """Return the rate from ``orig_currency`` to ``target_currency``.
+
+    ``None`` means amounts pass through unchanged: the currencies are the
+    same, one of them is unknown, or no rate could be stored or fetched.
+    A missing rate is fetched from the Frankfurter API and stored in the
+    ``ExchangeRate`` table.
+    """
 
     if isinstance(orig_currency, str):
         orig_currency = Currency.objects.filter(code=orig_currency).first()
         if orig_currency is None:
-            return amount
+            return None
     if isinstance(target_currency, str):
         target_currency = Currency.objects.filter(code=target_currency).first()
         if target_currency is None:
-            return amount
+            return None
     if orig_currency == target_currency:
-        return amount
+        return None
 
     rate = get_rate(orig_currency, target_currency)
     if rate is None:
@@ -88,9 +118,68 @@ def convert_amount(
             )
             rate = rate_val
         except Exception:
-            return amount
+            return None
+    return rate
+
+
+def convert_amount(
+    amount: Decimal,
+    orig_currency: Union[str, Currency],
+    target_currency: Union[str, Currency],
+) -> Decimal:
+    """Convert ``amount`` from ``orig_currency`` to ``target_currency``.
 
-    return amount * rate
+    If a conversion rate is missing, an attempt will be made to fetch it from
+    the Frankfurter API and store it in the ``ExchangeRate`` table.
+    """
+
+    if amount is None:
+        return amount
+    rate = _resolve_rate(orig_currency, target_currency)
+    return amount if rate is None else amount * rate
+
+
+def get_conversion_rates(currency_ids, target_currency, *, strict: bool = False) -> dict:
+    """Return ``{currency_id: rate}`` for converting into ``target_currency``.
+
+    All stored rates are read with a single query. Missing pairs fall back to
+    :func:`convert_amount` (which may fetch from Frankfurter) so a bucket
+    converted with the returned rate matches converting each row separately.
+    A rate of ``1`` is used for unknown currencies or when no target is given,
+    mirroring ``convert_amount`` returning the amount unchanged.
+
+    With ``strict`` only stored rates are used and every pair
+    :func:`utils.conversion.convert_amount` would reject with
+    ``MissingRateError`` maps to ``None`` instead.
+    """
+
+    ids = {cid for cid in currency_ids if cid is not None}
+    rates = {cid: None if strict else Decimal("1") for cid in currency_ids}
+    if isinstance(target_currency, str):
+        target_currency = Currency.objects.filter(code=target_currency).first()
+    if target_currency is None or not ids:
+        return rates
+
+    stored = dict(
+        ExchangeRate.objects.filter(
+            currency_from_id__in=ids, currency_to=target_currency
+        ).values_list("currency_from_id", "rate")
+    )
+    if strict:
+        for cid, rate in stored.items():
+            # Same-currency pairs convert to the amount itself once a rate exists
+            rates[cid] = Decimal("1") if cid == target_currency.pk else rate
+        return rates
+    missing = ids - set(stored) - {target_currency.pk}
+    currencies = Currency.objects.in_bulk(missing) if missing else {}
+    for cid in ids:
+        if cid == target_currency.pk:
+            continue
+        if cid in stored:
+            rates[cid] = stored[cid]
+        elif cid in currencies:
+            rates[cid] = convert_amount(Decimal("1"), currencies[cid], target_currency)
+    return rates
 
 
 def convert_to_base(
@@ -114,6 +203,10 @@ def convert_to_base(
             base_currency = get_active_currency(request)
             if user is None and hasattr(request, "user"):
                 user = request.user
+            if base_currency is not None:
+                return _convert_for_request(
+                    request, amount, orig_currency, base_currency
+                )
         elif user is not None and getattr(user, "base_currency_id", None):
             base_currency = user.base_currency
 
@@ -131,4 +224,4 @@ def amount_for_display(
     target = get_active_currency(request)
     if not target:
         return amount
-    return convert_amount(amount, orig_currency, target)
+    return _convert_for_request(request, amount, orig_currency, target)
@@ -1,5 +1,5 @@
 from django.conf import settings
-from utils.conversion import convert_amount, MissingRateError
+from utils.currency import get_conversion_rates
 
 
 class CurrencyConversionMixin:
@@ -14,18 +14,18 @@ class CurrencyConversionMixin:
         """Attach ``converted_balance`` to objects in ``qs``.
 
         Each object's ``amount_attr`` is converted from its ``currency_attr``'s
-        code to the request's display currency.
+        code to the request's display currency. Rates are fetched once per
+        distinct currency, so ``qs`` should select its currency relation.
         """
         disp = self.get_display_currency()
-        for obj in qs:
+        objs = list(qs)
+        ids = [getattr(getattr(obj, currency_attr, None), "pk", None) for obj in objs]
+        rates = get_conversion_rates(ids, disp, strict=True)
+        for obj, cid in zip(objs, ids):
             amount = getattr(obj, amount_attr, None)
-            currency = getattr(obj, currency_attr, None)
-            code = getattr(currency, "code", None)
-            if amount is None or not code:
+            rate = rates.get(cid)
+            if amount is None or rate is None:
                 obj.converted_balance = None
                 continue
-            try:
-                obj.converted_balance = convert_amount(amount, code, disp)
-            except MissingRateError:
-                obj.converted_balance = None
+            obj.converted_balance = amount * rate
         return qs